@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Офлайн-бенчмарк конвейера на записанных фикстурах (fixture_replay.py)
+
+Режимы:
+    selenium - WorkUaParser + Chrome: список -> карточки -> детальные страницы -> пагинация
+    http     - те же страницы по HTTP без браузера + разбор секций
+    llm      - parse_resume_with_llm по каждой странице резюме через mock OpenAI
+               (--batch: несколько резюме в одном запросе, llm_batching.py;
+                --backend: локальная модель вместо OpenAI, llm_backends.py)
+
+Использование:
+    python bench.py http --pages 5 --latency 50 --jitter 20
+    python bench.py http --json bench_http.json && python bench.py planner --concurrency 4 --compare bench_http.json
+    python bench.py llm --synthetic 3 --json bench_results.json
+    python bench.py selenium --compare bench_baseline.json
+    python bench.py llm --json bench_llm.json && python bench.py llm --batch --compare bench_llm.json
+    python bench.py llm --llm-latency 400 --json bench_llm.json
+    python bench.py llm --backend local_endpoint --local-url http://127.0.0.1:8080/v1 --batch --compare bench_llm.json
+"""
+
+import argparse
+import json
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from config import BASE_URL, FIXTURES_CONFIG, SELECTORS
+from fixture_replay import FixtureRecorder, ReplayServer, fixture_key, load_manifest
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def peak_rss_mb() -> Dict:
+    """Пиковый RSS процесса и завершенных дочерних процессов (Chrome/chromedriver)"""
+    # ru_maxrss в Linux - килобайты, в macOS - байты
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return {
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1),
+        'children_peak_rss_mb': round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale, 1),
+    }
+
+
+class BenchResult:
+    """Счетчики и задержки одного прогона"""
+
+    def __init__(self, mode: str):
+        self.mode = mode
+        self.pages = 0
+        self.resumes = 0
+        self.page_latencies: List[float] = []
+        self.resume_latencies: List[float] = []
+        self.started_at = time.perf_counter()
+
+    def page(self, seconds: float):
+        self.pages += 1
+        self.page_latencies.append(seconds)
+
+    def resume(self, seconds: float):
+        self.resumes += 1
+        self.resume_latencies.append(seconds)
+
+    def to_dict(self) -> Dict:
+        elapsed = time.perf_counter() - self.started_at
+        return {
+            'mode': self.mode,
+            'elapsed_s': round(elapsed, 3),
+            'pages': self.pages,
+            'resumes': self.resumes,
+            'pages_per_sec': round(self.pages / elapsed, 2) if elapsed else 0.0,
+            'resumes_per_sec': round(self.resumes / elapsed, 2) if elapsed else 0.0,
+            'page_p50_ms': round(percentile(self.page_latencies, 0.5) * 1000, 1),
+            'page_p95_ms': round(percentile(self.page_latencies, 0.95) * 1000, 1),
+            'resume_p50_ms': round(percentile(self.resume_latencies, 0.5) * 1000, 1),
+            'resume_p95_ms': round(percentile(self.resume_latencies, 0.95) * 1000, 1),
+            **peak_rss_mb(),
+        }
+
+
+# ========================================
+# РЕЖИМЫ
+# ========================================
+
+def bench_http(server: ReplayServer, pages: int, concurrency: int = 1) -> Dict:
+    """Список и детальные страницы по HTTP, текст резюме разбирается на секции"""
+    from bs4 import BeautifulSoup
+    from fixture_replay import http_get
+    from resume_sections import split_sections
+
+    result = BenchResult('http')
+
+    def fetch_resume(url: str):
+        started_at = time.perf_counter()
+        html = http_get(url)
+        text = BeautifulSoup(html, 'html.parser').get_text('\n', strip=True)
+        split_sections(text)
+        result.resume(time.perf_counter() - started_at)
+
+    list_url = server.url_for(BASE_URL)
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for page in range(1, pages + 1):
+            started_at = time.perf_counter()
+            try:
+                html = http_get(list_url)
+            except Exception:
+                break  # Страница не записана - конец фикстур
+            soup = BeautifulSoup(html, 'html.parser')
+            links = [card.select_one('h2 a') for card in soup.select(SELECTORS['resume_cards'])]
+            result.page(time.perf_counter() - started_at)
+
+            urls = [server.url_for(link['href']) for link in links if link and link.get('href')]
+            list(pool.map(fetch_resume, urls))
+            list_url = server.url_for(f"{BASE_URL}?page={page + 1}")
+
+    return result.to_dict()
+
+
+def bench_planner(server: ReplayServer, pages: int, concurrency: int = 1) -> Dict:
+    """Страницы списка по прямым URL параллельно (pagination_planner.py), резюме - как в http"""
+    from bs4 import BeautifulSoup
+    from fixture_replay import http_get
+    from pagination_planner import PaginationPlanner
+    from rate_controller import AdaptiveRateController
+    from resume_sections import split_sections
+
+    result = BenchResult('planner')
+
+    def fetch_resume(url: str):
+        started_at = time.perf_counter()
+        html = http_get(url)
+        text = BeautifulSoup(html, 'html.parser').get_text('\n', strip=True)
+        split_sections(text)
+        result.resume(time.perf_counter() - started_at)
+
+    # Без пауз между запросами, как в режиме http: меряется только загрузка
+    rate = AdaptiveRateController(config={'initial_delay': 0, 'min_delay': 0, 'jitter': 0,
+                                          'initial_concurrency': concurrency, 'max_concurrency': concurrency})
+    planner = PaginationPlanner(server.url_for(BASE_URL), rate=rate, max_pages=pages,
+                                card_selector=SELECTORS['resume_cards'])
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        urls = []
+        for page, _, cards in planner.iter_pages():
+            result.page(planner.latencies.get(page, 0.0))
+            urls += [card['url'] for card in cards]  # Ссылки уже на сервер фикстур
+        list(pool.map(fetch_resume, urls))
+
+    return result.to_dict()
+
+
+def bench_selenium(server: ReplayServer, pages: int) -> Dict:
+    """Полный путь WorkUaParser в Chrome против сервера фикстур"""
+    from work_ua_parser import WorkUaParser
+    from browser_profile import wait_until_ready
+
+    result = BenchResult('selenium')
+    parser = WorkUaParser()
+    parser.base_url = server.url_for(BASE_URL)
+
+    try:
+        if not parser.setup_driver():
+            raise RuntimeError("Не удалось запустить Chrome")
+
+        started_at = time.perf_counter()
+        parser.driver.get(parser.base_url)
+        wait_until_ready(parser.driver, 'list')
+
+        for page in range(1, pages + 1):
+            cards = parser.find_resume_cards()
+            card_infos = [parser.parse_card_info(card) for card in cards]
+            result.page(time.perf_counter() - started_at)
+            list_url = parser.driver.current_url
+
+            for card_info in card_infos:
+                if not card_info or not card_info.get('url'):
+                    continue
+                resume_started_at = time.perf_counter()
+                parser.driver.get(card_info['url'])
+                if parser.parse_resume_details():
+                    result.resume(time.perf_counter() - resume_started_at)
+
+            if page == pages:
+                break
+            started_at = time.perf_counter()
+            parser.driver.get(list_url)
+            wait_until_ready(parser.driver, 'list')
+            if not parser.has_next_page() or not parser.go_to_next_page():
+                break
+    finally:
+        parser.close_driver()
+
+    return result.to_dict()
+
+
+class FixtureDriver:
+    """Минимальный "драйвер" для parse_resume_with_llm: URL и HTML записанной страницы"""
+
+    def __init__(self, current_url: str, page_source: str):
+        self.current_url = current_url
+        self.page_source = page_source
+
+
+def bench_llm(server: ReplayServer, limit: int = 0, batch: bool = False, backend: str = 'openai',
+              local_url: str = None) -> Dict:
+    """
+    Извлечение LLM по записанным страницам резюме через mock OpenAI
+
+    batch=False - parse_resume_with_llm по одному резюме на запрос,
+    batch=True  - parse_resumes_with_llm_batch (llm_batching.py)
+    backend     - модель извлечения (llm_backends.py); local_endpoint без
+                  local_url отправляется в тот же mock сервер
+    """
+    from llm_backends import LocalEndpointBackend, make_extraction_backend
+    from work_ua_parser import WorkUaParser
+
+    os.environ['OPENAI_BASE_URL'] = f"{server.origin}/v1"
+    os.environ.setdefault('OPENAI_API_KEY', 'replay')
+
+    mode = 'llm' if backend == 'openai' else f'llm_{backend}'
+    result = BenchResult(f'{mode}_batch' if batch else mode)
+    parser = WorkUaParser()
+    if backend == 'local_endpoint':
+        parser.extraction_backend = LocalEndpointBackend(parser.metrics, parser.logger,
+                                                         base_url=local_url or f"{server.origin}/v1")
+    elif backend != 'openai':
+        parser.extraction_backend = make_extraction_backend(parser, backend)
+    resume_keys = [key for key, entry in server.manifest.items() if entry['kind'] == 'resume']
+    if limit:
+        resume_keys = resume_keys[:limit]
+
+    snapshots = []
+    for key in resume_keys:
+        with open(os.path.join(server.fixtures_dir, server.manifest[key]['file']), 'r', encoding='utf-8') as f:
+            html = f.read()
+        parser.driver = FixtureDriver(server.origin + key, html)
+        if batch:
+            snapshots.append(parser.snapshot_resume_for_llm())
+            continue
+        started_at = time.perf_counter()
+        if parser.parse_resume_with_llm():
+            result.resume(time.perf_counter() - started_at)
+
+    if batch:
+        started_at = time.perf_counter()
+        extracted = parser.parse_resumes_with_llm_batch(snapshots)
+        per_resume = (time.perf_counter() - started_at) / max(len(extracted), 1)
+        for _ in extracted:
+            result.resume(per_resume)
+
+    parser.driver = None
+    summary = result.to_dict()
+    tokens = sum(item['value'] for item in parser.metrics.snapshot()['counters'].get('llm_tokens_total', []))
+    summary['llm_requests'] = server.requests['llm']
+    summary['llm_tokens_per_resume'] = round(tokens / result.resumes, 1) if result.resumes else 0.0
+    summary['resumes_per_min'] = round(summary['resumes_per_sec'] * 60, 1)
+    summary['llm_recorded_hits'] = server.requests['llm_recorded']
+    return summary
+
+
+# ========================================
+# ЗАПУСК
+# ========================================
+
+def print_result(result: Dict, baseline: Dict = None):
+    print(f"\n📊 BENCH [{result['mode']}] за {result['elapsed_s']}с")
+    rows = [
+        ('Страниц', 'pages', ''), ('Резюме', 'resumes', ''),
+        ('Страниц/с', 'pages_per_sec', ''), ('Резюме/с', 'resumes_per_sec', ''),
+        ('Страница p50', 'page_p50_ms', 'мс'), ('Страница p95', 'page_p95_ms', 'мс'),
+        ('Резюме p50', 'resume_p50_ms', 'мс'), ('Резюме p95', 'resume_p95_ms', 'мс'),
+        ('Пиковый RSS', 'peak_rss_mb', 'МБ'), ('Пиковый RSS дочерних', 'children_peak_rss_mb', 'МБ'),
+        ('Запросов к LLM', 'llm_requests', ''), ('Токенов/резюме', 'llm_tokens_per_resume', ''),
+        ('Резюме/мин', 'resumes_per_min', ''),
+    ]
+    for title, key, unit in rows:
+        if key not in result:
+            continue
+        line = f"   {title:<22} {result[key]:>10} {unit}"
+        if baseline and baseline.get(key):
+            line += f"   ({(result[key] - baseline[key]) / baseline[key] * 100:+.1f}% к базовому)"
+        print(line)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Офлайн-бенчмарк парсера на фикстурах")
+    arg_parser.add_argument('mode', choices=['selenium', 'http', 'planner', 'llm'])
+    arg_parser.add_argument('--fixtures', default=FIXTURES_CONFIG['dir'])
+    arg_parser.add_argument('--pages', type=int, default=3)
+    arg_parser.add_argument('--latency', type=float, default=None, help="Задержка сервера, мс")
+    arg_parser.add_argument('--jitter', type=float, default=None, help="Джиттер задержки, мс")
+    arg_parser.add_argument('--llm-latency', type=float, default=None, help="Задержка mock OpenAI, мс")
+    arg_parser.add_argument('--concurrency', type=int, default=1, help="Параллельные запросы (http, planner)")
+    arg_parser.add_argument('--batch', action='store_true', help="Пакетный режим LLM (llm)")
+    arg_parser.add_argument('--backend', default='openai', choices=['openai', 'local_endpoint', 'token_classifier'],
+                            help="Модель извлечения (llm)")
+    arg_parser.add_argument('--local-url', default=None, help="URL локального OpenAI-совместимого сервера")
+    arg_parser.add_argument('--synthetic', type=int, default=0, help="Сгенерировать N синтетических страниц")
+    arg_parser.add_argument('--json', dest='json_file', help="Дописать результат в JSON файл")
+    arg_parser.add_argument('--compare', help="JSON с базовым результатом для сравнения")
+    args = arg_parser.parse_args()
+
+    if args.synthetic:
+        FixtureRecorder(args.fixtures).generate_synthetic(args.synthetic)
+    if not load_manifest(args.fixtures):
+        print(f"❌ Нет фикстур в {args.fixtures}: запишите (python fixture_replay.py record) или используйте --synthetic N")
+        return 1
+
+    with ReplayServer(args.fixtures, port=0, latency_ms=args.latency, jitter_ms=args.jitter,
+                      llm_latency_ms=args.llm_latency) as server:
+        print(f"🎞️ Сервер фикстур: {server.origin}{fixture_key(BASE_URL)}")
+        if args.mode == 'http':
+            result = bench_http(server, args.pages, args.concurrency)
+        elif args.mode == 'planner':
+            result = bench_planner(server, args.pages, args.concurrency)
+        elif args.mode == 'selenium':
+            result = bench_selenium(server, args.pages)
+        else:
+            result = bench_llm(server, batch=args.batch, backend=args.backend, local_url=args.local_url)
+
+    baseline = None
+    if args.compare and os.path.exists(args.compare):
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            history = json.load(f)
+        history = history if isinstance(history, list) else [history]
+        # Пакетный режим и локальные модели сравниваются с обычным путем LLM, прямые URL - с http
+        baseline_mode = 'llm' if result['mode'].startswith('llm') else result['mode']
+        baseline_mode = 'http' if baseline_mode == 'planner' else baseline_mode
+        baseline = next((item for item in reversed(history) if item.get('mode') == baseline_mode), None)
+
+    print_result(result, baseline)
+
+    if args.json_file:
+        history = []
+        if os.path.exists(args.json_file):
+            with open(args.json_file, 'r', encoding='utf-8') as f:
+                history = json.load(f)
+        history.append({**result, 'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')})
+        with open(args.json_file, 'w', encoding='utf-8') as f:
+            json.dump(history, f, ensure_ascii=False, indent=2)
+        print(f"💾 Результат добавлен в {args.json_file}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Профили браузера для Selenium режима и замер трафика/времени готовности страниц
+
+"lean" - новый headless, pageLoadStrategy eager, блокировка картинок, шрифтов,
+медиа и сторонних доменов через CDP Network.setBlockedURLs.
+"full" - обычный Chrome, как раньше.
+"""
+
+import json
+import sys
+from typing import Dict, List, Optional
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+from config import BASE_URL, BROWSER_CONFIG, LEAN_BROWSER_CONFIG
+
+
+def is_lean(profile: Optional[str] = None) -> bool:
+    return (profile or BROWSER_CONFIG.get('profile', 'full')) == 'lean'
+
+
+def build_chrome_options(profile: Optional[str] = None, collect_metrics: Optional[bool] = None) -> Options:
+    """
+    Настройки Chrome для выбранного профиля
+
+    Args:
+        profile: 'lean' или 'full' (по умолчанию BROWSER_CONFIG['profile'])
+        collect_metrics: Включить performance-лог для подсчета байт
+    """
+    chrome_options = Options()
+    chrome_options.add_argument(f"--window-size={BROWSER_CONFIG['window_size'][0]},{BROWSER_CONFIG['window_size'][1]}")
+
+    if is_lean(profile):
+        if LEAN_BROWSER_CONFIG['headless']:
+            chrome_options.add_argument("--headless=new")
+        chrome_options.page_load_strategy = LEAN_BROWSER_CONFIG['page_load_strategy']
+        # Картинки отключаем и на уровне настроек - действует на все вкладки сразу
+        chrome_options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2
+        })
+        chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+        chrome_options.add_argument("--mute-audio")
+    elif BROWSER_CONFIG['headless']:
+        chrome_options.add_argument("--headless")
+
+    # Дополнительные настройки для стабильности
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--disable-extensions")
+    chrome_options.add_argument("--disable-web-security")
+
+    if collect_metrics if collect_metrics is not None else BROWSER_CONFIG.get('collect_page_metrics'):
+        chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+
+    return chrome_options
+
+
+def apply_network_blocking(driver, profile: Optional[str] = None) -> bool:
+    """
+    Блокировка ресурсов через CDP для текущей вкладки
+
+    Network.setBlockedURLs действует только на вкладку, к которой подключен
+    CDP, поэтому вызывается после создания драйвера и для каждой новой вкладки.
+    """
+    if not is_lean(profile):
+        return False
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': LEAN_BROWSER_CONFIG['blocked_url_patterns']})
+    return True
+
+
+def ready_selector(page_type: str, profile: Optional[str] = None) -> str:
+    """Селектор готовности страницы ('list' или 'resume')"""
+    if not is_lean(profile):
+        return 'body'
+    return LEAN_BROWSER_CONFIG['list_ready_selector' if page_type == 'list' else 'resume_ready_selector']
+
+
+def wait_until_ready(driver, page_type: str, profile: Optional[str] = None, timeout: Optional[float] = None):
+    """Ожидание только контейнера с данными, а не полной загрузки страницы"""
+    wait = WebDriverWait(driver, timeout or LEAN_BROWSER_CONFIG['ready_timeout'])
+    return wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, ready_selector(page_type, profile))))
+
+
+def drain_network_log(driver) -> Dict:
+    """
+    Сумма переданных байт по performance-логу с прошлого вызова
+
+    Берется encodedDataLength из Network.loadingFinished - в отличие от
+    Performance API он учитывает и сторонние домены без Timing-Allow-Origin.
+    """
+    stats = {'transfer_bytes': 0, 'requests': 0, 'blocked_requests': 0}
+    try:
+        entries = driver.get_log('performance')
+    except Exception:
+        return stats
+
+    for entry in entries:
+        message = json.loads(entry['message'])['message']
+        method = message.get('method')
+        if method == 'Network.loadingFinished':
+            stats['transfer_bytes'] += int(message['params'].get('encodedDataLength', 0))
+            stats['requests'] += 1
+        elif method == 'Network.loadingFailed' and message['params'].get('blockedReason'):
+            stats['blocked_requests'] += 1
+    return stats
+
+
+PAGE_TIMING_JS = """
+const nav = performance.getEntriesByType('navigation')[0];
+if (!nav) { return {ready_ms: performance.now(), load_ms: 0}; }
+return {ready_ms: nav.domContentLoadedEventEnd || performance.now(), load_ms: nav.loadEventEnd};
+"""
+
+
+class PageMetricsLog:
+    """Журнал метрик страниц: байты и время до готовности контейнера"""
+
+    def __init__(self, profile: Optional[str] = None):
+        self.profile = profile or BROWSER_CONFIG.get('profile', 'full')
+        self.records: List[Dict] = []
+
+    def record(self, driver, page_type: str, url: str = '') -> Dict:
+        """
+        Запись метрик текущей страницы
+
+        Готовность - окончание DOMContentLoaded по Navigation Timing (контейнер
+        с данными приходит в HTML с сервера), поэтому время не зависит от того,
+        когда парсер переключился на вкладку.
+        """
+        timing = driver.execute_script(PAGE_TIMING_JS) or {}
+        record = {
+            'page_type': page_type,
+            'url': url,
+            'ready_ms': round(timing.get('ready_ms') or 0, 1),
+            'load_ms': round(timing.get('load_ms') or 0, 1),
+            **drain_network_log(driver)
+        }
+        self.records.append(record)
+        return record
+
+    def summary(self) -> Dict:
+        """Средние значения по типам страниц"""
+        summary = {}
+        for page_type in sorted({record['page_type'] for record in self.records}):
+            records = [record for record in self.records if record['page_type'] == page_type]
+            summary[page_type] = {
+                'pages': len(records),
+                'avg_kb': round(sum(r['transfer_bytes'] for r in records) / len(records) / 1024, 1),
+                'avg_ready_ms': round(sum(r['ready_ms'] for r in records) / len(records), 1),
+                'avg_blocked': round(sum(r['blocked_requests'] for r in records) / len(records), 1),
+            }
+        return summary
+
+    def log_summary(self, logger):
+        for page_type, stats in self.summary().items():
+            logger.info(f"🌐 [{self.profile}] {page_type}: {stats['pages']} стр., "
+                        f"~{stats['avg_kb']} КБ, готовность ~{stats['avg_ready_ms']} мс, "
+                        f"заблокировано ~{stats['avg_blocked']} запросов")
+
+
+def measure_profile(profile: str, pages: int = 3) -> Dict:
+    """Открывает первые страницы списка и первое резюме в заданном профиле"""
+    driver = webdriver.Chrome(options=build_chrome_options(profile, collect_metrics=True))
+    metrics = PageMetricsLog(profile)
+    try:
+        driver.set_page_load_timeout(BROWSER_CONFIG['page_load_timeout'])
+        apply_network_blocking(driver, profile)
+
+        for page in range(1, pages + 1):
+            url = BASE_URL if page == 1 else f"{BASE_URL}?page={page}"
+            driver.get(url)
+            wait_until_ready(driver, 'list', profile)
+            metrics.record(driver, 'list', url)
+
+        links = driver.find_elements(By.CSS_SELECTOR, f"{LEAN_BROWSER_CONFIG['list_ready_selector']} h2 a")
+        for link in [element.get_attribute('href') for element in links[:pages]]:
+            driver.get(link)
+            wait_until_ready(driver, 'resume', profile)
+            metrics.record(driver, 'resume', link)
+    finally:
+        driver.quit()
+    return metrics.summary()
+
+
+def compare_profiles(pages: int = 3):
+    """Сравнение профилей full и lean: трафик и время готовности на страницу"""
+    print("🌐 СРАВНЕНИЕ ПРОФИЛЕЙ БРАУЗЕРА")
+    print("=" * 60)
+    results = {profile: measure_profile(profile, pages) for profile in ('full', 'lean')}
+
+    for page_type in ('list', 'resume'):
+        full = results['full'].get(page_type)
+        lean = results['lean'].get(page_type)
+        if not full or not lean:
+            continue
+        print(f"\n📄 {page_type}:")
+        print(f"   full: {full['avg_kb']:>8} КБ  {full['avg_ready_ms']:>8} мс")
+        print(f"   lean: {lean['avg_kb']:>8} КБ  {lean['avg_ready_ms']:>8} мс  (заблокировано ~{lean['avg_blocked']})")
+        if full['avg_kb'] and full['avg_ready_ms']:
+            print(f"   ⚡ Трафик -{(1 - lean['avg_kb'] / full['avg_kb']) * 100:.0f}%, "
+                  f"время -{(1 - lean['avg_ready_ms'] / full['avg_ready_ms']) * 100:.0f}%")
+    return results
+
+
+if __name__ == "__main__":
+    compare_profiles(int(sys.argv[1]) if len(sys.argv) > 1 else 3)
@@ -1,86 +1,121 @@
 """
-Калькулятор стоимости LLM парсинга резюме
+Отчет о стоимости LLM парсинга резюме по записанному расходу
+
+Источник - журнал llm_usage.jsonl (llm_usage.UsageMeter): каждый запрос к LLM
+с токенами из response.usage и стоимостью по ценам LLM_USAGE_CONFIG.
+
+Использование:
+    python calculate_cost.py                 # последний запуск
+    python calculate_cost.py --all           # все запуски
+    python calculate_cost.py --run 20250101_120000
 """
 
-import tiktoken
-
-def calculate_cost():
-    """Расчет стоимости парсинга одного резюме"""
-    
-    # Инициализируем токенизатор для GPT-3.5
-    encoding = tiktoken.encoding_for_model("gpt-3.5-turbo")
-    
-    # Примерные данные из наших тестов
-    sample_input = """
-    Проанализируй страницу резюме с сайта work.ua и извлеки информацию в формате JSON.
-
-    Текст страницы:
-    Андрейченко Олена Павлiвна Головний бухгалтер Київ, 58 років Досвід роботи: з 09.1984 по 01.2025 (40 років 4 місяці) Головний бухгалтер в ТОВ Інвест-груп (з 09.2019 по 01.2025 (5 років 4 місяці)) Головний бухгалтер в ТОВ Перспектива (з 02.2016 по 09.2019 (3 роки 7 місяців)) Головний бухгалтер в ТОВ Сучасні технології (з 01.2012 по 02.2016 (4 роки 1 місяць)) Освіта: 1983 - Вища (Київський інститут народного господарства ім. Д.Коротченка Бухгалтерський облік і аналіз господарської діяльності) Навички та вміння: Українська — Рідна, Російська — Вільно 1С Підприємство Зарплата і Управління Персоналом Консультант Плюс Парус MS Office Майстерність у веденні бухгалтерського та податкового обліку Знання чинного законодавства України Уміння працювати з комп'ютером та різними програмами Система автоматизації документообігу Парус 8.5 Система зарплати Парус 8.5 Система кадри Парус 8.5 Поточний банк
-    
-    Верни JSON с такими полями:
-    {
-        "full_name": "полное имя кандидата",
-        "position": "желаемая должность", 
-        "salary": "зарплатные ожидания",
-        "age": "возраст",
-        "location": "город/локация",
-        "education": ["образование", "учебные заведения"],
-        "experience": ["опыт работы", "предыдущие места работы"],
-        "skills": ["навыки", "ключевые компетенции"],
-        "additional_info": "дополнительная информация"
-    }
-    
-    Если какая-то информация не найдена, укажи "Не указано".
-    Ответь ТОЛЬКО JSON, без дополнительного текста.
-    """
-    
-    sample_output = """{
-        "full_name": "Андрейченко Олена Павлiвна",
-        "position": "Головний бухгалтер",
-        "salary": "Не указано",
-        "age": "58 років",
-        "location": "Київ",
-        "education": ["Київський інститут народного господарства ім. Д.Коротченка", "Бухгалтерський облік і аналіз господарської діяльності"],
-        "experience": ["Головний бухгалтер в ТОВ Інвест-груп (5 років 4 місяці)", "Головний бухгалтер в ТОВ Перспектива (3 роки 7 місяців)", "Головний бухгалтер в ТОВ Сучасні технології (4 роки 1 місяць)"],
-        "skills": ["1С Підприємство", "Консультант Плюс", "MS Office", "Ведення бухгалтерського обліку", "Знання законодавства України", "Парус 8.5"],
-        "additional_info": "40 років досвіду роботи"
-    }"""
-    
-    # Подсчитываем токены
-    input_tokens = len(encoding.encode(sample_input))
-    output_tokens = len(encoding.encode(sample_output))
-    total_tokens = input_tokens + output_tokens
-    
-    # Цены GPT-3.5-turbo (по состоянию на январь 2025)
-    input_price_per_1k = 0.0005  # $0.0005 за 1K input токенов
-    output_price_per_1k = 0.0015 # $0.0015 за 1K output токенов
-    
-    # Расчет стоимости
-    input_cost = (input_tokens / 1000) * input_price_per_1k
-    output_cost = (output_tokens / 1000) * output_price_per_1k
-    total_cost_usd = input_cost + output_cost
-    
-    # Конвертация в гривны (примерно 41 грн за $1)
-    usd_to_uah = 41
-    total_cost_uah = total_cost_usd * usd_to_uah
-    
-    print("💰 СТОИМОСТЬ LLM ПАРСИНГА ОДНОГО РЕЗЮМЕ")
+import argparse
+import json
+import os
+import sys
+from typing import Dict, List, Optional
+
+from config import LLM_USAGE_CONFIG
+
+
+def load_usage(log_file: str) -> List[Dict]:
+    if not os.path.exists(log_file):
+        return []
+    entries = []
+    with open(log_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                entries.append(json.loads(line))
+    return entries
+
+
+def _add(totals: Dict, entry: Dict):
+    totals['requests'] = totals.get('requests', 0) + 1
+    totals['prompt_tokens'] = totals.get('prompt_tokens', 0) + entry['prompt_tokens']
+    totals['completion_tokens'] = totals.get('completion_tokens', 0) + entry['completion_tokens']
+    totals['cost_usd'] = totals.get('cost_usd', 0.0) + entry['cost_usd']
+    totals['estimated'] = totals.get('estimated', 0) + (1 if entry.get('estimated') else 0)
+
+
+def build_report(entries: List[Dict]) -> Dict:
+    """Итоги по запускам, моделям, назначениям и резюме"""
+    report = {'total': {}, 'runs': {}, 'models': {}, 'purposes': {}}
+    per_resume = {}
+    for entry in entries:
+        _add(report['total'], entry)
+        _add(report['runs'].setdefault(entry['run_id'], {}), entry)
+        _add(report['models'].setdefault(entry['model'], {}), entry)
+        _add(report['purposes'].setdefault(entry['purpose'], {}), entry)
+        resumes = entry.get('resumes') or []
+        for resume in resumes:
+            per_resume[resume] = per_resume.get(resume, 0.0) + entry['cost_usd'] / len(resumes)
+
+    report['resumes'] = len(per_resume)
+    report['cost_per_resume_usd'] = sum(per_resume.values()) / len(per_resume) if per_resume else 0.0
+    report['max_resume_cost_usd'] = max(per_resume.values()) if per_resume else 0.0
+    return report
+
+
+def print_report(report: Dict, title: str):
+    usd_to_uah = LLM_USAGE_CONFIG['usd_to_uah']
+    total = report['total']
+
+    print(f"💰 СТОИМОСТЬ LLM ПАРСИНГА: {title}")
     print("=" * 60)
-    print(f"📊 Input токенов: {input_tokens:,}")
-    print(f"📊 Output токенов: {output_tokens:,}")
-    print(f"📊 Всего токенов: {total_tokens:,}")
-    print()
-    print(f"💵 Input стоимость: ${input_cost:.6f}")
-    print(f"💵 Output стоимость: ${output_cost:.6f}")
-    print(f"💵 Общая стоимость: ${total_cost_usd:.6f}")
-    print()
-    print(f"💴 В гривнах: ₴{total_cost_uah:.4f}")
-    print(f"💴 В копейках: {total_cost_uah*100:.2f} коп")
-    print()
-    print("🔍 АНАЛИЗ:")
-    print(f"   • За 100 резюме: ${total_cost_usd*100:.3f} (₴{total_cost_uah*100:.2f})")
-    print(f"   • За 1000 резюме: ${total_cost_usd*1000:.2f} (₴{total_cost_uah*1000:.0f})")
-    print(f"   • За 10000 резюме: ${total_cost_usd*10000:.0f} (₴{total_cost_uah*10000:.0f})")
+    print(f"📊 Запросов: {total['requests']:,} (оценка tiktoken без usage: {total['estimated']})")
+    print(f"📊 Input токенов: {total['prompt_tokens']:,}")
+    print(f"📊 Output токенов: {total['completion_tokens']:,}")
+    print(f"💵 Общая стоимость: ${total['cost_usd']:.6f} (₴{total['cost_usd'] * usd_to_uah:.4f})")
+
+    for section, name in (('runs', 'ЗАПУСКИ'), ('models', 'МОДЕЛИ'), ('purposes', 'НАЗНАЧЕНИЕ')):
+        if section == 'runs' and len(report['runs']) < 2:
+            continue
+        print(f"\n📋 {name}:")
+        for key, totals in sorted(report[section].items(), key=lambda item: -item[1]['cost_usd']):
+            print(f"   {key:<24} запросов {totals['requests']:>5}, токенов "
+                  f"{totals['prompt_tokens']:>9,}+{totals['completion_tokens']:<8,} ${totals['cost_usd']:.6f}")
+
+    per_resume = report['cost_per_resume_usd']
+    if report['resumes']:
+        print(f"\n🧾 РЕЗЮМЕ: {report['resumes']}, в среднем ${per_resume:.6f} "
+              f"(₴{per_resume * usd_to_uah:.4f}), максимум ${report['max_resume_cost_usd']:.6f}")
+        print("🔍 ПРОГНОЗ ПО ФАКТИЧЕСКОЙ СРЕДНЕЙ:")
+        for count in (100, 1000, 10000):
+            print(f"   • За {count} резюме: ${per_resume * count:.3f} (₴{per_resume * count * usd_to_uah:.2f})")
+
+
+def calculate_cost(log_file: Optional[str] = None, run_id: Optional[str] = None, all_runs: bool = False) -> Dict:
+    """Отчет по журналу расхода: последний запуск, запуск run_id или все"""
+    log_file = log_file or LLM_USAGE_CONFIG['log_file']
+    entries = load_usage(log_file)
+    if not entries:
+        print(f"❌ Нет записанного расхода в {log_file}: он пишется при каждом запросе к LLM во время парсинга")
+        return {}
+
+    if all_runs:
+        title = f"все запуски ({len({entry['run_id'] for entry in entries})})"
+    else:
+        run_id = run_id or entries[-1]['run_id']
+        entries = [entry for entry in entries if entry['run_id'] == run_id]
+        title = f"запуск {run_id}"
+        if not entries:
+            print(f"❌ Запуск {run_id} не найден в {log_file}")
+            return {}
+
+    report = build_report(entries)
+    print_report(report, title)
+    return report
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Отчет о стоимости LLM по записанному расходу")
+    arg_parser.add_argument('--file', default=None, help="Журнал расхода (по умолчанию LLM_USAGE_CONFIG['log_file'])")
+    arg_parser.add_argument('--run', default=None, help="ID запуска (по умолчанию последний)")
+    arg_parser.add_argument('--all', action='store_true', help="Все запуски")
+    args = arg_parser.parse_args()
+    return 0 if calculate_cost(args.file, args.run, args.all) else 1
+
 
 if __name__ == "__main__":
-    calculate_cost() 
\ No newline at end of file
+    sys.exit(main())
@@ -4,65 +4,205 @@
 """
 
 import json
-import pandas as pd
 import re
 from datetime import datetime
 
+from config import EXPORT_CONFIG
+
+# Паттерны служебной информации сайта. Порядок важен: каждый паттерн применяется
+# к результату предыдущих, поэтому движок ниже сохраняет последовательную семантику.
+# Одна альтернация меняет результат: 'Кандидати\s*' срезает 'кандидати' из строки
+# 'Схожі кандидати' раньше ее собственного паттерна, а альтернация на этой позиции
+# выбирает 'Схожі кандидати.*$' и удаляет строку целиком.
+NAVIGATION_PATTERNS = [
+    # Навигация сайта
+    r'Шукачу\s*',
+    r'Українська\s*',
+    r'Знайти кандидатів\s*',
+    r'Створити вакансію\s*',
+    r'Увійти\s*',
+    r'Кандидати\s*',
+    r'у [А-ЯІЇЄа-яіїє\s]+\s*',
+    r'Запропонувати вакансію\s*',
+    r'Зберегти\s*',
+    r'Ще\s*',
+    r'Файл\s*',
+]
+
+# Служебные блоки страницы резюме: безопасны и для текста внутри контейнера резюме
+# (в отличие от навигации, где фрагменты вроде 'у ...' задевают обычный текст)
+BOILERPLATE_PATTERNS = [
+    # Контактная информация (служебная)
+    r'Контактна інформація\s*',
+    r'Шукач вказав телефон\s*',
+    r'та ел\. пошту\.?\s*',
+    r'Прізвище, контакти та світлина доступні тільки для зареєстрованих роботодавців\..*?(?=\n|$)',
+    r'Щоб отримати доступ до особистих даних кандидатів.*?(?=\n|$)',
+    r'Шукач приховав свої особисті дані.*?(?=\n|$)',
+    r'але ви зможете надіслати йому повідомлення.*?(?=\n|$)',
+    r'але йому можна надіслати повідомлення.*?(?=\n|$)',
+    
+    # Другие служебные элементы
+    r'Резюме від \d+ [а-яіїє]+ \d+\s*',
+    r'PRO\s*',
+    r'VIP\s*',
+    r'TOP\s*',
+    
+    # Схожі кандидати и футер
+    r'Схожі кандидати.*$',
+    r'Кандидати у категорії.*$',
+    r'Кандидати за містами.*$',
+    r'Порівняйте свої вимоги.*$',
+    r'Вакансії.*$',
+    r'Послуги сайту.*$',
+    r'Про нас.*$',
+    r'Контакти.*$',
+    r'© \d+-\d+ Work\.ua.*$',
+    r'Зроблено в компанії.*$',
+    r'Освіта в Україні.*$',
+    r'Typing tutor.*$',
+]
+
+CLEANUP_PATTERNS = NAVIGATION_PATTERNS + BOILERPLATE_PATTERNS
+
+def fold_case(text):
+    """
+    Свертка регистра для проверки литералов через `in` (str.casefold)
+
+    re.IGNORECASE дополнительно считает 'ı' и 'İ' равными 'i' - они сводятся к
+    'i' заранее; для остальных символов литералов этапов свертки совпадают.
+    """
+    if 'ı' in text or 'İ' in text:
+        text = text.replace('ı', 'i').replace('İ', 'i')
+    return text.casefold()
+
+
+def _pattern_anchor(pattern):
+    """
+    Самый длинный обязательный литеральный фрагмент паттерна (после fold_case)
+    
+    Если фрагмента нет в тексте, паттерн гарантированно ничего не найдет,
+    и проход регулярным выражением можно пропустить.
+    """
+    pieces = []
+    current = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '\\' and i + 1 < len(pattern) and pattern[i + 1] in '.-':
+            current.append(pattern[i + 1])
+            i += 2
+        elif char in '?*{':
+            # Предыдущий символ необязателен
+            if current:
+                current.pop()
+            pieces.append(''.join(current))
+            current = []
+            i += 1
+        elif char == '+':
+            pieces.append(''.join(current))
+            current = []
+            i += 1
+        elif char == '\\' or char in '.[()$^|':
+            pieces.append(''.join(current))
+            current = []
+            if char == '[':
+                i = pattern.index(']', i) + 1
+            elif char == '(':
+                i = pattern.index(')', i) + 1
+            elif char == '\\':
+                i += 2
+            else:
+                i += 1
+        else:
+            current.append(char)
+            i += 1
+    pieces.append(''.join(current))
+    return fold_case(max(pieces, key=len))
+
+
+# Паттерны компилируются один раз при импорте модуля
+CLEANUP_STAGES = [
+    (re.compile(pattern, re.MULTILINE | re.IGNORECASE), _pattern_anchor(pattern))
+    for pattern in CLEANUP_PATTERNS
+]
+BOILERPLATE_STAGES = CLEANUP_STAGES[len(NAVIGATION_PATTERNS):]
+
+
 def clean_full_text(text):
     """Очищает полный текст от служебной информации сайта"""
+    return _apply_stages(text, CLEANUP_STAGES)
+
+
+def clean_boilerplate(text):
+    """Только служебные блоки (контакты, футер, похожие кандидаты) - без навигации"""
+    return _apply_stages(text, BOILERPLATE_STAGES)
+
+
+def _apply_stages(text, stages):
     if not text:
         return text
     
-    # Список служебных фраз для удаления
-    cleanup_patterns = [
-        # Навигация сайта
-        r'Шукачу\s*',
-        r'Українська\s*',
-        r'Знайти кандидатів\s*',
-        r'Створити вакансію\s*',
-        r'Увійти\s*',
-        r'Кандидати\s*',
-        r'у [А-ЯІЇЄа-яіїє\s]+\s*',
-        r'Запропонувати вакансію\s*',
-        r'Зберегти\s*',
-        r'Ще\s*',
-        r'Файл\s*',
-        
-        # Контактная информация (служебная)
-        r'Контактна інформація\s*',
-        r'Шукач вказав телефон\s*',
-        r'та ел\. пошту\.?\s*',
-        r'Прізвище, контакти та світлина доступні тільки для зареєстрованих роботодавців\..*?(?=\n|$)',
-        r'Щоб отримати доступ до особистих даних кандидатів.*?(?=\n|$)',
-        r'Шукач приховав свої особисті дані.*?(?=\n|$)',
-        r'але ви зможете надіслати йому повідомлення.*?(?=\n|$)',
-        r'але йому можна надіслати повідомлення.*?(?=\n|$)',
-        
-        # Другие служебные элементы
-        r'Резюме від \d+ [а-яіїє]+ \d+\s*',
-        r'PRO\s*',
-        r'VIP\s*',
-        r'TOP\s*',
+    cleaned_text = text
+    folded = fold_case(cleaned_text)
+    folded_is_stale = False
+    
+    # Этап пропускается, только если его литерала гарантированно нет в тексте.
+    # Свертка регистра пересчитывается лениво: устаревшая свертка годится для
+    # решения "запускать", но не для решения "пропустить".
+    for regex, anchor in stages:
+        if anchor not in folded:
+            if not folded_is_stale:
+                continue
+            folded = fold_case(cleaned_text)
+            folded_is_stale = False
+            if anchor not in folded:
+                continue
+        cleaned_text, replaced = regex.subn('', cleaned_text)
+        if replaced:
+            folded_is_stale = True
+    
+    # Пробелы в начале/конце строк и пустые строки - один проход по строкам
+    lines = (line.strip() for line in cleaned_text.split('\n'))
+    return '\n'.join(line for line in lines if line)
+
+
+def benchmark_cleaner(texts, repeat=3):
+    """
+    Сверка с эталонной очисткой и замер скорости (МБ/с)
+    
+    Args:
+        texts: Список исходных текстов (золотой корпус)
+        repeat: Количество прогонов для замера
         
-        # Схожі кандидати и футер
-        r'Схожі кандидати.*$',
-        r'Кандидати у категорії.*$',
-        r'Кандидати за містами.*$',
-        r'Порівняйте свої вимоги.*$',
-        r'Вакансії.*$',
-        r'Послуги сайту.*$',
-        r'Про нас.*$',
-        r'Контакти.*$',
-        r'© \d+-\d+ Work\.ua.*$',
-        r'Зроблено в компанії.*$',
-        r'Освіта в Україні.*$',
-        r'Typing tutor.*$',
-    ]
+    Returns:
+        dict: Скорость обоих движков и список индексов расхождений
+    """
+    import time
+    
+    mismatches = [i for i, text in enumerate(texts) if clean_full_text(text) != clean_full_text_legacy(text)]
+    total_mb = sum(len(text.encode('utf-8')) for text in texts if text) / 1024 / 1024
+    
+    results = {'mismatches': mismatches, 'corpus_mb': round(total_mb, 3)}
+    for name, cleaner in (('legacy', clean_full_text_legacy), ('compiled', clean_full_text)):
+        start_time = time.perf_counter()
+        for _ in range(repeat):
+            for text in texts:
+                cleaner(text)
+        elapsed = time.perf_counter() - start_time
+        results[f'{name}_mb_per_sec'] = round(total_mb * repeat / elapsed, 2) if elapsed else 0.0
+    
+    return results
+
+def clean_full_text_legacy(text):
+    """Эталонная (старая) очистка: ~40 последовательных re.sub, используется для сверки"""
+    if not text:
+        return text
     
     cleaned_text = text
     
     # Применяем паттерны очистки
-    for pattern in cleanup_patterns:
+    for pattern in CLEANUP_PATTERNS:
         cleaned_text = re.sub(pattern, '', cleaned_text, flags=re.MULTILINE | re.IGNORECASE)
     
     # Убираем лишние пробелы и переносы строк
@@ -72,133 +212,24 @@ def clean_full_text(text):
     
     return cleaned_text
 
-def create_cleaned_csv():
+def create_cleaned_csv(source=None, workers=None):
     """Создает CSV с очищенным полным текстом"""
+    from export_pipeline import run_export, print_export_stats
+    
     print("🧹 ОЧИСТКА ПОЛНОГО ТЕКСТА ОТ СЛУЖЕБНОЙ ИНФОРМАЦИИ")
     print("=" * 60)
     
-    # Загружаем исходные данные
-    with open('resume_data_20250801_024557.json', 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    print(f"📂 Загружено резюме: {len(data):,}")
-    
-    # Обрабатываем данные
-    export_data = []
-    cleaned_count = 0
-    
-    for index, item in enumerate(data):
-        # Извлекаем возраст и город из age_location
-        age = 'Не указан'
-        location = 'Не указан'
-        
-        if item.get('age_location'):
-            parts = item['age_location'].split(', ')
-            if len(parts) >= 2:
-                age = parts[0]
-                location = ', '.join(parts[1:])
-            else:
-                location = item['age_location']
-        
-        # Извлекаем навыки из full_text
-        skills = []
-        if item.get('full_text'):
-            skills_match = re.search(r'Знання і навички\s*([\s\S]*?)(?:\n\n|\nДодаткова інформація|\nЗапропонувати вакансію|$)', 
-                                   item['full_text'], re.IGNORECASE)
-            if skills_match and skills_match.group(1):
-                skills_text = skills_match.group(1)
-                skills = [s.strip() for s in skills_text.split('\n') if s.strip() and len(s.strip()) > 1]
-        
-        # ОЧИЩАЕМ полный текст
-        original_full_text = item.get('full_text', '')
-        cleaned_full_text = clean_full_text(original_full_text)
-        
-        if len(cleaned_full_text) < len(original_full_text):
-            cleaned_count += 1
-        
-        # Создаем подробную информацию с ОЧИЩЕННЫМ текстом
-        detailed_info = []
-        
-        # Основная информация
-        detailed_info.append(f"👤 Имя: {item.get('name', 'Не указано')}")
-        detailed_info.append(f"💼 Должность: {item.get('title', 'Не указано')}")
-        detailed_info.append(f"💰 Зарплата: {item.get('salary', 'Не указана')}")
-        detailed_info.append(f"📍 Возраст и локация: {item.get('age_location', 'Не указано')}")
-        detailed_info.append(f"🔗 URL: {item.get('url', item.get('link', '#'))}")
-        
-        # Опыт работы
-        if item.get('experience'):
-            detailed_info.append("\n📋 Опыт работы:")
-            if isinstance(item['experience'], list):
-                for exp in item['experience']:
-                    detailed_info.append(f"  • {exp}")
-            else:
-                detailed_info.append(f"  • {item['experience']}")
-        
-        # Образование
-        if item.get('education_employment'):
-            detailed_info.append(f"\n🎓 Образование: {item['education_employment']}")
-        
-        # Навыки
-        if skills:
-            detailed_info.append(f"\n🔧 Навыки ({len(skills)}):")
-            for skill in skills[:15]:
-                detailed_info.append(f"  • {skill}")
-            if len(skills) > 15:
-                detailed_info.append(f"  ... и еще {len(skills) - 15} навыков")
-        
-        # ОЧИЩЕННЫЙ полный текст (ограниченный)
-        if cleaned_full_text:
-            preview_text = cleaned_full_text[:800] if len(cleaned_full_text) > 800 else cleaned_full_text
-            detailed_info.append(f"\n📄 Полная информация (очищено): {preview_text}")
-            if len(cleaned_full_text) > 800:
-                detailed_info.append("...")
-        
-        # Создаем строку
-        row = {
-            'ID': index + 1,
-            'Имя': item.get('name', 'Не указано'),
-            'Должность': item.get('title', 'Не указано'),
-            'Зарплата': item.get('salary', 'Не указана'),
-            'Город': location,
-            'Возраст': age,
-            'Навыки': ', '.join(skills[:10]) if skills else 'Не указаны',
-            'Количество_навыков': len(skills),
-            'Опыт': ', '.join(item.get('experience', [])) if isinstance(item.get('experience'), list) else str(item.get('experience', 'Не указан')),
-            'Образование': item.get('education_employment', 'Не указано'),
-            'URL': item.get('url', item.get('link', '#')),
-            'Подробно': '\n'.join(detailed_info),
-        }
-        
-        export_data.append(row)
-        
-        # Прогресс
-        if (index + 1) % 1000 == 0:
-            print(f"⏳ Обработано: {index + 1:,}/{len(data):,}")
-    
-    # Создаем DataFrame и экспортируем
-    df = pd.DataFrame(export_data)
+    source = source or EXPORT_CONFIG['default_source']
+    print(f"📂 Источник: {source}")
     
     # Имя файла с временной меткой
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     csv_filename = f'resume_data_CLEANED_{timestamp}.csv'
     
-    # Сохраняем CSV
-    df.to_csv(csv_filename, index=False, encoding='utf-8-sig')
+    # Потоковая обработка: чтение, очистка в пуле процессов и запись CSV порциями
+    stats = run_export(source, csv_filename, mode='cleaned', workers=workers)
     
-    # Статистика
-    total = len(df)
-    with_names = len(df[df['Имя'] != 'Не указано'])
-    with_skills = len(df[df['Навыки'] != 'Не указаны'])
-    with_salary = len(df[df['Зарплата'] != 'Не указана'])
-    
-    print()
-    print("📊 СТАТИСТИКА ОЧИСТКИ:")
-    print(f"   📚 Всего записей: {total:,}")
-    print(f"   🧹 Очищено текстов: {cleaned_count:,} ({cleaned_count/total*100:.1f}%)")
-    print(f"   👤 С именами: {with_names:,} ({with_names/total*100:.1f}%)")
-    print(f"   🔧 С навыками: {with_skills:,} ({with_skills/total*100:.1f}%)")
-    print(f"   💰 С зарплатой: {with_salary:,} ({with_salary/total*100:.1f}%)")
+    print_export_stats(stats, "📊 СТАТИСТИКА ОЧИСТКИ:")
     print()
     print(f"✅ Очищенный CSV создан: {csv_filename}")
     
@@ -213,5 +244,28 @@ def main():
     print("🧹 Служебная информация сайта удалена")
     print("📋 Полная информация очищена и готова к использованию")
 
+def run_benchmark(json_file='resume_data_20250801_024557.json'):
+    """Сверка движка очистки с эталоном на выгрузке резюме и замер МБ/с"""
+    with open(json_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    
+    texts = [item.get('full_text', '') for item in data if item.get('full_text')]
+    print(f"📂 Золотой корпус: {len(texts):,} текстов из {json_file}")
+    
+    results = benchmark_cleaner(texts)
+    print(f"   📦 Объем: {results['corpus_mb']} МБ")
+    print(f"   🐢 Старая очистка: {results['legacy_mb_per_sec']} МБ/с")
+    print(f"   ⚡ Новая очистка: {results['compiled_mb_per_sec']} МБ/с")
+    if results['mismatches']:
+        print(f"   ❌ Расхождений с эталоном: {len(results['mismatches'])} (первые: {results['mismatches'][:10]})")
+    else:
+        print("   ✅ Результат идентичен эталону")
+    return results
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    import sys
+    
+    if len(sys.argv) > 1 and sys.argv[1] == '--benchmark':
+        run_benchmark(*sys.argv[2:3])
+    else:
+        main()
\ No newline at end of file
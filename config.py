@@ -34,10 +34,34 @@ SELECTORS = {
 
 # Настройки браузера
 BROWSER_CONFIG = {
-    "headless": False,  # Показывать браузер или нет
+    "headless": False,  # Показывать браузер или нет (для профиля "full")
     "window_size": (1920, 1080),
     "page_load_timeout": 30,
-    "implicit_wait": 10
+    "implicit_wait": 10,
+    "profile": "full",  # "full" - обычный Chrome, "lean" - облегченный headless профиль (browser_profile.py)
+    "collect_page_metrics": False  # Замер байт и времени готовности каждой страницы (performance log)
+}
+
+# Облегченный профиль браузера: без картинок, шрифтов, медиа и сторонних скриптов
+LEAN_BROWSER_CONFIG = {
+    "headless": True,  # Новый headless режим (--headless=new)
+    "page_load_strategy": "eager",  # Не ждем загрузки картинок и сторонних ресурсов ("none" - не ждем вообще)
+    "list_ready_selector": "#pjax-resume-list",  # Готовность страницы списка
+    "resume_ready_selector": "[id^='resume_'], h1",  # Готовность страницы резюме
+    "ready_timeout": 15,
+    "blocked_url_patterns": [
+        # Картинки
+        "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico", "*.avif",
+        # Шрифты
+        "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+        # Медиа
+        "*.mp4", "*.webm", "*.mp3", "*.ogg",
+        # Аналитика, реклама и сторонние домены
+        "*googletagmanager.com*", "*google-analytics.com*", "*doubleclick.net*",
+        "*googlesyndication.com*", "*facebook.net*", "*facebook.com/tr*", "*connect.facebook.net*",
+        "*hotjar.com*", "*clarity.ms*", "*criteo.*", "*tiktok.com*",
+        "*googleadservices.com*", "*adservice.google.*", "*bat.bing.com*"
+    ]
 }
 
 # Настройки парсинга
@@ -52,11 +76,239 @@ PARSING_CONFIG = {
     "pagination_wait_timeout": 15,  # Время ожидания загрузки страницы
     "pagination_retry_attempts": 3,  # Попытки при ошибках пагинации
     "enable_pagination": True,  # Включить обработку пагинации
-    "pagination_auto_adapt": True  # Автоматическая адаптация селекторов пагинации
+    "pagination_auto_adapt": True,  # Автоматическая адаптация селекторов пагинации
+    "pagination_mode": "planned"  # "planned" - прямые URL ?page=N (pagination_planner.py), "click" - запасной вариант: кнопка "Наступна"
 }
 
 # Настройки сохранения данных
 OUTPUT_CONFIG = {
     "csv_filename": "work_ua_resumes.csv",
-    "json_filename": "work_ua_resumes.json"
-} 
\ No newline at end of file
+    "json_filename": "work_ua_resumes.json",
+    "database_file": "work_ua_resumes.db",  # SQLite база (ResumeDatabase), используется view_console.py
+    "analytics_snapshot": "resume_columns.npz"  # Колоночный снимок для resume_analytics.py
+}
+
+# Настройки экспорта (export_pipeline.py)
+EXPORT_CONFIG = {
+    "default_source": "resume_data_20250801_024557.json",  # JSON массив, JSONL или база .db
+    "workers": None,  # Количество процессов (None - по числу ядер)
+    "chunk_size": 500  # Записей в одной порции для процесса
+}
+
+# Метрики запуска (run_metrics.py)
+METRICS_CONFIG = {
+    "enabled": True,
+    "prefix": "workua_",
+    "prometheus_port": None,  # Например 9108 - эндпоинт http://localhost:9108/metrics
+    "prometheus_host": "127.0.0.1",  # "0.0.0.0" - открыть эндпоинт для Prometheus с другой машины
+    "json_file": "run_metrics_{run_id}.json",  # Файл метрик по завершении запуска
+    "max_events": 1000  # Последних событий каждого вида в JSON (record_event)
+}
+
+# Фикстуры и офлайн-бенчмарк (fixture_replay.py, bench.py)
+FIXTURES_CONFIG = {
+    "dir": "fixtures",
+    "record": False,  # Сохранять страницы и ответы LLM во время обычного парсинга
+    "port": 8765,
+    "latency_ms": 0,  # Задержка ответа сервера фикстур
+    "jitter_ms": 0,  # Случайное отклонение задержки (+/-)
+    "llm_latency_ms": 0  # Задержка mock OpenAI
+}
+
+# Профилирование долгих запусков (sampling_profiler.py), включается флагом --profile
+PROFILING_CONFIG = {
+    "enabled": False,
+    "output_dir": "profiles",
+    "sample_interval": 0.01,  # секунды между снимками стеков
+    "window_seconds": 300,  # отдельный .folded файл на каждое окно
+    "tracemalloc_every": 50,  # снимок памяти каждые N резюме
+    "tracemalloc_frames": 10,
+    "tracemalloc_top": 15
+}
+
+# Логирование (log_pipeline.py): "classic" - как раньше, "queue_json" - очередь + JSON lines
+LOGGING_CONFIG = {
+    "mode": "classic",
+    "json_file": "work_ua_parser_{run_id}.jsonl",
+    "console": True,
+    "console_level": "INFO",
+    "summary_level": "INFO",  # Итоговые сообщения (страницы, статистика)
+    "card_level": "INFO",  # Сообщения по каждой карточке; WARNING - тише, DEBUG - подробно
+    # Логгеры проекта: уровни задаются только им, корневой логгер и сторонние библиотеки не трогаются
+    "project_loggers": ["work_ua_parser", "database_manager", "resume_analytics", "prompt_builder"]
+}
+
+# Адаптивная скорость (rate_controller.py): стартует с задержек PARSING_CONFIG и подстраивается
+RATE_CONFIG = {
+    "initial_delay": PARSING_CONFIG["delay_between_cards"],  # секунды между карточками
+    "page_delay_factor": PARSING_CONFIG["delay_between_pages"] / PARSING_CONFIG["delay_between_cards"],
+    "min_delay": 0.2,
+    "max_delay": 60,
+    "delay_step": 0.1,  # Аддитивное уменьшение паузы при здоровых ответах
+    "backoff_factor": 2.0,  # Мультипликативное увеличение при троттлинге
+    "min_backoff_delay": 2.0,  # Пауза после троттлинга не меньше этого значения
+    "initial_concurrency": 1,
+    "max_concurrency": 4,
+    "increase_every": 5,  # Разгоняемся после N здоровых ответов подряд
+    "target_latency": 1.5,  # Ответ сервера быстрее - считаем здоровым (секунды)
+    "slow_factor": 3,  # Ответ медленнее target_latency * slow_factor - притормаживаем
+    "error_window": 20,
+    "max_error_rate": 0.2,
+    "jitter": 0.25,
+    "history_size": 1000,  # Последних изменений скорости в истории (диапазон паузы считается за весь запуск)
+    "captcha_markers": {
+        "selectors": ["iframe[src*='captcha']", ".g-recaptcha", "#challenge-form", "[data-sitekey]"],
+        "titles": ["captcha", "attention required", "just a moment", "too many requests"]
+    }
+}
+
+# Распределенный парсинг (crawl_coordinator.py): общая база задач для нескольких машин
+COORDINATOR_CONFIG = {
+    "db_file": "crawl_jobs.db",  # Путь на общем (сетевом) диске
+    "shard_size": 5,  # Страниц списка в одной задаче list_range
+    "lease_seconds": 300,  # Аренда задачи без heartbeat истекает через это время
+    "heartbeat_interval": 30,
+    "max_attempts": 3,
+    "poll_interval": 5,  # Ожидание новых задач в режиме --wait
+    "busy_timeout": 30  # Ожидание блокировки SQLite, секунды
+}
+
+# Планировщик по категориям/городам/запросам (crawl_scheduler.py)
+SCHEDULER_CONFIG = {
+    "cities": ["kyiv"],  # slug города в URL work.ua; пустой список - вся Украина
+    "categories": [],  # slug категорий (в URL на месте запроса)
+    "queries": ["бухгалтер"],
+    "workers": 2,  # Параллельных браузеров (активных - не больше rate_concurrency)
+    "max_pages_per_target": 50,
+    "stop_after_empty_pages": 2,  # Страниц подряд без новых резюме - цель закончена
+    "initial_yield": 14,  # Ожидаемый выход новой цели (карточек на странице)
+    "yield_smoothing": 0.5,
+    "yield_weight": 1.0,
+    "freshness_weight": 10.0,  # Ближние страницы свежее (work.ua сортирует по дате)
+    "staleness_weight": 5.0,  # Давно не обходившиеся цели получают бонус
+    "staleness_cap": 600,
+    "idle_poll": 1.0
+}
+
+# Инкрементальный обход (incremental_crawl.py), включается флагом --incremental
+INCREMENTAL_CONFIG = {
+    "enabled": False,
+    "known_streak": 5,  # Известных неизмененных карточек подряд - конец новых резюме
+    "database_file": OUTPUT_CONFIG["database_file"]
+}
+
+# Промпт резюме для LLM (prompt_builder.py)
+PROMPT_CONFIG = {
+    "model": "gpt-3.5-turbo",  # Для подсчета токенов через tiktoken
+    "token_budget": 3000,  # Токенов текста резюме в одном промпте
+    "container_selectors": ["[id^='resume_']", "#center", "main"],
+    # Порядок сокращения секций при превышении бюджета (шапка с именем и должностью - последней)
+    "trim_order": ["additional_info", "languages", "skills", "education", "experience", "header"]
+}
+
+# Извлечение резюме через LLM (llm_extraction.py)
+LLM_EXTRACTION_CONFIG = {
+    "model": "gpt-3.5-turbo",
+    "max_tokens": 4000,
+    "json_mode": True,  # response_format=json_object
+    "max_continuations": 2  # Запросы недостающих полей после обрыва ответа
+}
+
+# Несколько резюме в одном запросе к LLM (llm_batching.py)
+LLM_BATCH_CONFIG = {
+    "enabled": False,  # full_page_parser.py --batch
+    "max_batch_size": 8,
+    "input_token_budget": 11000,  # Промпт пакета; вместе с max_tokens ответа - в пределах контекста модели
+    "output_tokens_per_resume": 700,  # Начальная оценка ответа на одно резюме, дальше - по факту
+    "output_safety": 0.85,  # Доля max_tokens, которую планируется занять ответом
+    "smoothing": 0.3  # Вес последнего пакета в оценке ответа на резюме
+}
+
+# Отложенное пакетное извлечение через Batch API (llm_batch_jobs.py)
+LLM_BATCH_JOBS_CONFIG = {
+    "backend": "openai",  # openai - Batch API, local - файловый исполнитель без сети (для проверки)
+    "database_file": "work_ua_resumes.db",  # Очередь промптов и результаты - в базе резюме
+    "work_dir": "llm_batches",  # JSONL файлы пакетов (вход и результаты)
+    "max_requests_per_file": 5000,  # Лимит Batch API - 50 000 запросов на файл
+    "completion_window": "24h",
+    "poll_interval": 60,  # Секунды между опросами статуса в режиме --wait
+    "max_attempts": 3  # Попыток на резюме, дальше статус failed
+}
+
+# Учет токенов и стоимости LLM (llm_usage.py, отчет - calculate_cost.py)
+LLM_USAGE_CONFIG = {
+    "log_file": "llm_usage.jsonl",  # Каждый запрос: run_id, модель, назначение, резюме, токены, стоимость
+    "budget_usd": None,  # Лимит на запуск; после превышения - извлечение по правилам без LLM
+    "usd_to_uah": 41,
+    # Цены за 1M токенов, USD
+    "pricing": {
+        "gpt-3.5-turbo": {"input": 0.50, "output": 1.50},
+        "gpt-4o-mini": {"input": 0.15, "output": 0.60},
+        "gpt-4o": {"input": 2.50, "output": 10.00},
+    },
+    "default_model": "gpt-3.5-turbo"  # Цены для моделей, которых нет в pricing
+}
+
+# Модель извлечения резюме (llm_backends.py)
+EXTRACTION_BACKEND_CONFIG = {
+    "backend": "openai",  # openai | local_endpoint | token_classifier
+    # OpenAI-совместимый локальный сервер (llama.cpp server, vLLM, Ollama /v1)
+    "local_endpoint": {
+        "base_url": "http://127.0.0.1:8080/v1",
+        "model": "local",
+        "max_tokens": 2000,
+        "json_mode": True,  # llama.cpp поддерживает response_format=json_object
+        "parallel": 4  # Одновременных запросов (слоты сервера, llama.cpp -np)
+    },
+    # Дообученная модель разметки токенов (transformers, CPU)
+    "token_classifier": {
+        "model": "models/workua-resume-ner",  # Каталог или имя модели на Hugging Face
+        "batch_size": 16,
+        "max_chars": 1500,  # Фрагменты длиннее окна модели режутся по строкам
+        "threads": None,  # torch.set_num_threads; None - по умолчанию
+        # Метка сущности -> поле резюме (списочные поля накапливают значения)
+        "label_map": {
+            "NAME": "full_name", "POSITION": "position", "SALARY": "salary", "AGE": "age",
+            "LOC": "location", "BIRTH": "birth_date", "ADDRESS": "address", "PHONE": "phone",
+            "SKILL": "professional_skills", "TRAIT": "personal_skills", "LANG": "languages"
+        }
+    }
+}
+
+# Локальный вывод селекторов по повторяющейся структуре страницы (selector_inference.py)
+SELECTOR_INFERENCE_CONFIG = {
+    "enabled": True,  # Перед LLM автоадаптацией; LLM - только если вывод не удался
+    "resume_link_pattern": r"/resumes/\d+",  # Ссылки карточек резюме
+    "min_cards": 3,  # Минимум одинаковых соседних блоков со ссылками на резюме
+    "max_classes": 3,  # Классов в селекторе карточки не больше
+    # Классы состояния и сгенерированные классы не попадают в селектор
+    "unstable_class_patterns": [
+        r"\d", r"^(is|has|js)-", r"(^|-)(active|hover|visited|selected|focus|open|hidden|disabled|"
+                                  r"highlight\w*|new|seen|checked|loading)$"
+    ],
+    # Приоритет классов при равной длине селектора (раньше в списке - выше)
+    "class_hints": ["resume", "card", "item"],
+    "next_page_texts": ["наступна", "следующая", "next", "далі", "далее", "›", "»", ">", "→"]
+}
+
+# Выученные селекторы (selector_registry.py) вместо перезаписи config.py во время парсинга
+SELECTOR_REGISTRY_CONFIG = {
+    "file": "learned_selectors.json",  # Версионированный JSON, общий для воркеров на одной машине/диске
+    "roles": ["resume_cards", "pagination_next"],  # Исходные селекторы - из SELECTORS (и pagination_next_alt)
+    "recent_window": 20,  # Последних исходов на селектор
+    "recent_decay": 0.7,  # Вес исхода падает с давностью: последние ошибки быстро опускают селектор
+    "flush_every": 25,  # Сохранять счетчики каждые N исходов (выученный селектор - сразу)
+    "reload_interval": 5  # Секунд между проверками файла на новую версию от других воркеров
+}
+
+# Поиск почти одинаковых резюме под разными URL (near_duplicates.py): MinHash + LSH по полосам
+NEAR_DUPLICATE_CONFIG = {
+    "enabled": False,  # True - дубликат не отправляется в LLM и не сохраняется, только попадает в кластер
+    "database_file": OUTPUT_CONFIG["database_file"],  # Подписи и кластеры - в ResumeDatabase
+    "num_perm": 128,  # Хеш-функций в подписи MinHash
+    "bands": 16,  # Полос LSH (по num_perm / bands строк): порог попадания в кандидаты ~ (1/bands) ** (1/rows)
+    "shingle_size": 3,  # Слов в шингле
+    "threshold": 0.8,  # Оценка сходства Жаккара, с которой резюме считается дубликатом
+    "min_tokens": 20,  # Короче - текст не показателен (ошибка загрузки, заглушка), подпись не строится
+    "seed": 1  # Фиксирован: подписи из базы должны совпадать с новыми
+}
@@ -0,0 +1,445 @@
+#!/usr/bin/env python3
+"""
+Координация парсинга между несколькими машинами через общую таблицу задач
+
+Фронтир (диапазоны страниц списка и URL резюме) лежит в общем SQLite файле
+(например, на сетевом диске). Воркеры берут задачи в аренду (lease) с
+heartbeat и сроком истечения: если воркер упал или завис (heartbeat продлевает
+аренду, только пока воркер продвигается - берет задачи и проходит страницы),
+его аренда истекает и задача возвращается в очередь; при штатной остановке
+задачи освобождаются сразу.
+
+Задачи:
+    list_range - диапазон страниц списка {start, end}; прогресс по странице
+                 хранится в задаче (аналог session_state['current_page']),
+                 поэтому после падения другой воркер продолжит с той же страницы
+    detail     - URL резюме с данными карточки; результат пишется в задачу
+
+Использование:
+    python crawl_coordinator.py seed --pages 1-40 --shard 5
+    python crawl_coordinator.py seed --pages auto        # число страниц - по пагинации
+    python crawl_coordinator.py work [--worker-id node1]
+    python crawl_coordinator.py status
+    python crawl_coordinator.py export resumes.json
+"""
+
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from typing import Dict, Iterable, List, Optional
+
+from config import COORDINATOR_CONFIG
+
+# Порядок выдачи: сначала резюме (результаты), потом новые страницы списка
+KIND_PRIORITY = {'detail': 0, 'list_range': 1}
+
+
+class JobStore:
+    """Общая таблица задач с арендой"""
+
+    def __init__(self, db_path: Optional[str] = None, lease_seconds: Optional[float] = None,
+                 max_attempts: Optional[int] = None):
+        self.db_path = db_path or COORDINATOR_CONFIG['db_file']
+        self.lease_seconds = lease_seconds or COORDINATOR_CONFIG['lease_seconds']
+        self.max_attempts = max_attempts or COORDINATOR_CONFIG['max_attempts']
+        self.init_store()
+
+    def connect(self) -> sqlite3.Connection:
+        # WAL не работает на сетевых файловых системах - обычный журнал + busy_timeout
+        conn = sqlite3.connect(self.db_path, timeout=COORDINATOR_CONFIG['busy_timeout'],
+                               isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def init_store(self):
+        with self.connect() as conn:
+            conn.executescript('''
+                CREATE TABLE IF NOT EXISTS crawl_jobs (
+                    job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    kind TEXT NOT NULL,
+                    job_key TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    worker_id TEXT,
+                    lease_expires REAL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    progress INTEGER,
+                    result TEXT,
+                    error TEXT,
+                    updated_at REAL,
+                    UNIQUE (kind, job_key)
+                );
+                CREATE INDEX IF NOT EXISTS idx_crawl_jobs_status ON crawl_jobs (status, kind);
+                CREATE TABLE IF NOT EXISTS crawl_workers (
+                    worker_id TEXT PRIMARY KEY,
+                    host TEXT,
+                    pid INTEGER,
+                    started_at REAL,
+                    heartbeat_at REAL,
+                    jobs_done INTEGER NOT NULL DEFAULT 0
+                );
+            ''')
+
+    # ---------- наполнение фронтира ----------
+
+    def seed_page_ranges(self, first_page: int, last_page: int, shard_size: Optional[int] = None) -> int:
+        """Шардирование страниц списка на диапазоны по shard_size страниц"""
+        shard_size = shard_size or COORDINATOR_CONFIG['shard_size']
+        jobs = []
+        for start in range(first_page, last_page + 1, shard_size):
+            end = min(start + shard_size - 1, last_page)
+            jobs.append(('list_range', f'{start}-{end}', json.dumps({'start': start, 'end': end})))
+        return self._insert(jobs)
+
+    def add_detail_jobs(self, cards: Iterable[Dict]) -> int:
+        """URL резюме со страницы списка (дубликаты по URL игнорируются)"""
+        jobs = [('detail', card['url'], json.dumps(card, ensure_ascii=False))
+                for card in cards if card.get('url')]
+        return self._insert(jobs)
+
+    def _insert(self, jobs: List) -> int:
+        now = time.time()
+        with self.connect() as conn:
+            before = conn.total_changes
+            conn.executemany('''
+                INSERT OR IGNORE INTO crawl_jobs (kind, job_key, payload, updated_at)
+                VALUES (?, ?, ?, ?)
+            ''', [job + (now,) for job in jobs])
+            return conn.total_changes - before
+
+    # ---------- аренда ----------
+
+    def register_worker(self, worker_id: str):
+        now = time.time()
+        with self.connect() as conn:
+            conn.execute('''
+                INSERT OR REPLACE INTO crawl_workers (worker_id, host, pid, started_at, heartbeat_at)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (worker_id, socket.gethostname(), os.getpid(), now, now))
+
+    def requeue_expired(self, conn: Optional[sqlite3.Connection] = None) -> int:
+        """Возврат в очередь задач с истекшей арендой (воркер упал или завис), после max_attempts - failed"""
+        def _requeue(conn):
+            now = time.time()
+            cursor = conn.execute('''
+                UPDATE crawl_jobs
+                SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                    worker_id = NULL, lease_expires = NULL, error = 'Аренда истекла', updated_at = ?
+                WHERE status = 'leased' AND lease_expires < ?
+            ''', (self.max_attempts, now, now))
+            return cursor.rowcount
+
+        if conn is not None:
+            return _requeue(conn)
+        with self.connect() as conn:
+            return _requeue(conn)
+
+    def lease(self, worker_id: str, kinds: Iterable[str] = ('detail', 'list_range')) -> Optional[Dict]:
+        """Взять следующую задачу в аренду (атомарно для всех воркеров)"""
+        kinds = list(kinds)
+        conn = self.connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            self.requeue_expired(conn)
+            order = ' '.join(f"WHEN '{kind}' THEN {priority}" for kind, priority in KIND_PRIORITY.items())
+            row = conn.execute(f'''
+                SELECT * FROM crawl_jobs
+                WHERE status = 'pending' AND kind IN ({','.join('?' * len(kinds))})
+                ORDER BY CASE kind {order} END, job_id
+                LIMIT 1
+            ''', kinds).fetchone()
+            if row is None:
+                conn.execute('COMMIT')
+                return None
+
+            now = time.time()
+            conn.execute('''
+                UPDATE crawl_jobs SET status = 'leased', worker_id = ?, lease_expires = ?,
+                       attempts = attempts + 1, updated_at = ?
+                WHERE job_id = ?
+            ''', (worker_id, now + self.lease_seconds, now, row['job_id']))
+            conn.execute('UPDATE crawl_workers SET heartbeat_at = ? WHERE worker_id = ?', (now, worker_id))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+        job = dict(row)
+        job['payload'] = json.loads(job['payload'])
+        job['attempts'] += 1
+        return job
+
+    def heartbeat(self, worker_id: str) -> int:
+        """Продление аренды всех задач воркера"""
+        now = time.time()
+        with self.connect() as conn:
+            conn.execute('UPDATE crawl_workers SET heartbeat_at = ? WHERE worker_id = ?', (now, worker_id))
+            cursor = conn.execute('''
+                UPDATE crawl_jobs SET lease_expires = ?
+                WHERE status = 'leased' AND worker_id = ?
+            ''', (now + self.lease_seconds, worker_id))
+            return cursor.rowcount
+
+    def set_progress(self, job_id: int, worker_id: str, page: int):
+        """Последняя полностью обработанная страница диапазона"""
+        with self.connect() as conn:
+            conn.execute('''
+                UPDATE crawl_jobs SET progress = ?, updated_at = ?
+                WHERE job_id = ? AND worker_id = ? AND status = 'leased'
+            ''', (page, time.time(), job_id, worker_id))
+
+    def complete(self, job_id: int, worker_id: str, result: Optional[Dict] = None) -> bool:
+        """Задача выполнена (False - аренда уже потеряна и задача отдана другому)"""
+        with self.connect() as conn:
+            cursor = conn.execute('''
+                UPDATE crawl_jobs SET status = 'done', lease_expires = NULL, result = ?, updated_at = ?
+                WHERE job_id = ? AND worker_id = ? AND status = 'leased'
+            ''', (json.dumps(result, ensure_ascii=False) if result is not None else None,
+                  time.time(), job_id, worker_id))
+            if cursor.rowcount:
+                conn.execute('UPDATE crawl_workers SET jobs_done = jobs_done + 1 WHERE worker_id = ?',
+                             (worker_id,))
+            return bool(cursor.rowcount)
+
+    def fail(self, job_id: int, worker_id: str, error: str):
+        """Ошибка: задача возвращается в очередь, после max_attempts - failed"""
+        with self.connect() as conn:
+            conn.execute('''
+                UPDATE crawl_jobs
+                SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                    worker_id = NULL, lease_expires = NULL, error = ?, updated_at = ?
+                WHERE job_id = ? AND worker_id = ? AND status = 'leased'
+            ''', (self.max_attempts, str(error)[:500], time.time(), job_id, worker_id))
+
+    def release_worker(self, worker_id: str) -> int:
+        """Освобождение всех задач воркера (штатная остановка или Ctrl+C)"""
+        with self.connect() as conn:
+            cursor = conn.execute('''
+                UPDATE crawl_jobs SET status = 'pending', worker_id = NULL, lease_expires = NULL,
+                       attempts = MAX(attempts - 1, 0), updated_at = ?
+                WHERE status = 'leased' AND worker_id = ?
+            ''', (time.time(), worker_id))
+            conn.execute('DELETE FROM crawl_workers WHERE worker_id = ?', (worker_id,))
+            return cursor.rowcount
+
+    # ---------- отчеты ----------
+
+    def progress(self) -> Dict:
+        with self.connect() as conn:
+            rows = conn.execute('SELECT kind, status, COUNT(*) FROM crawl_jobs GROUP BY kind, status').fetchall()
+            workers = conn.execute('SELECT * FROM crawl_workers ORDER BY worker_id').fetchall()
+        stats = {}
+        for kind, status, count in rows:
+            stats.setdefault(kind, {})[status] = count
+        return {'jobs': stats, 'workers': [dict(worker) for worker in workers]}
+
+    def iter_results(self) -> Iterable[Dict]:
+        with self.connect() as conn:
+            for (result,) in conn.execute('''
+                SELECT result FROM crawl_jobs
+                WHERE kind = 'detail' AND status = 'done' AND result IS NOT NULL
+                ORDER BY job_id
+            '''):
+                yield json.loads(result)
+
+
+class CrawlWorker:
+    """Воркер: берет задачи из JobStore и выполняет их ULTIMATE парсером"""
+
+    def __init__(self, store: JobStore, worker_id: Optional[str] = None, parser=None):
+        self.store = store
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.parser = parser
+        self._stop = threading.Event()
+        self._heartbeat_thread = None
+        self._progress_at = time.time()
+
+    def _touch(self):
+        """Отметка продвижения: новая задача или пройденная страница"""
+        self._progress_at = time.time()
+
+    def _heartbeat_loop(self):
+        """
+        Продление аренды, только если с прошлого heartbeat было продвижение
+
+        Зависший вызов Selenium не держит задачу вечно: аренда истекает через
+        lease_seconds после последнего продвижения, и задачу берет другой воркер.
+        """
+        interval = COORDINATOR_CONFIG['heartbeat_interval']
+        beat_progress = self._progress_at
+        stalled = False
+        while not self._stop.wait(interval):
+            if self._progress_at == beat_progress:
+                if not stalled:
+                    self.parser.logger.warning("💓 Нет продвижения %.0fс - аренда не продлевается",
+                                               time.time() - self._progress_at)
+                stalled = True
+                continue
+            beat_progress = self._progress_at
+            stalled = False
+            try:
+                self.store.heartbeat(self.worker_id)
+            except sqlite3.Error as e:
+                self.parser.logger.warning("💓 Heartbeat не записан: %s", e)
+
+    def run(self, idle_exit: bool = True) -> int:
+        """
+        Цикл воркера до опустошения очереди
+
+        Args:
+            idle_exit: Выйти, когда задач нет (иначе ждать новые)
+
+        Returns:
+            Количество выполненных задач
+        """
+        if self.parser is None:
+            from ultimate_parser import UltimateWorkUaParser
+            self.parser = UltimateWorkUaParser()
+        logger = self.parser.logger
+
+        self.store.register_worker(self.worker_id)
+        self._heartbeat_thread = threading.Thread(target=self._heartbeat_loop, name='crawl-heartbeat', daemon=True)
+        self._heartbeat_thread.start()
+        logger.info("🛰️ Воркер %s подключен к %s", self.worker_id, self.store.db_path)
+
+        done = 0
+        try:
+            while not self._stop.is_set():
+                job = self.store.lease(self.worker_id)
+                self._touch()
+                if job is None:
+                    if idle_exit:
+                        break
+                    time.sleep(COORDINATOR_CONFIG['poll_interval'])
+                    continue
+
+                try:
+                    if not self.parser.driver:
+                        self.parser.start_browser()
+                    if job['kind'] == 'list_range':
+                        self.run_list_range(job)
+                        self.store.complete(job['job_id'], self.worker_id)
+                    else:
+                        result = self.run_detail(job)
+                        if result is None:
+                            self.store.fail(job['job_id'], self.worker_id, 'Детали резюме не получены')
+                            continue
+                        self.store.complete(job['job_id'], self.worker_id, result)
+                    done += 1
+                except Exception as e:
+                    logger.error("❌ Задача %s %s провалена: %s", job['kind'], job['job_key'], e)
+                    self.store.fail(job['job_id'], self.worker_id, e)
+                    self.parser.restart_driver_bulletproof()
+        finally:
+            self._stop.set()
+            released = self.store.release_worker(self.worker_id)
+            if released:
+                logger.info("🔓 Освобождено задач: %d", released)
+        logger.info("🛰️ Воркер %s: выполнено задач %d", self.worker_id, done)
+        return done
+
+    def stop(self):
+        self._stop.set()
+
+    def run_list_range(self, job: Dict):
+        """Страницы диапазона: карточки -> задачи detail"""
+        parser = self.parser
+        start = (job['progress'] or job['payload']['start'] - 1) + 1
+        for page_num in range(start, job['payload']['end'] + 1):
+            parser.session_state['current_page'] = page_num
+            parser.set_log_context(page=page_num)
+            parser.driver.get(parser.page_url(page_num))
+            parser.waits.stable_cards(parser.selectors.get('resume_cards'))
+
+            cards = parser.get_cards_with_llm_fallback()
+            if not cards:
+                parser.logger.info("📄 Страница %d пустая - конец списка", page_num)
+                break
+            added = self.store.add_detail_jobs(
+                {key: value for key, value in card.items() if key != 'card_element'} for card in cards
+            )
+            self.store.set_progress(job['job_id'], self.worker_id, page_num)
+            self._touch()
+            parser.logger.info("📄 Страница %d: карточек %d, новых задач %d", page_num, len(cards), added)
+            parser.rate.wait('page')
+
+    def run_detail(self, job: Dict) -> Optional[Dict]:
+        """Одно резюме; результат - полная запись резюме или {'duplicate_of', 'cluster_id', ...} для почти дубликата"""
+        card = job['payload']
+        saved_before = len(self.parser.resume_data)
+        if not self.parser.process_card(card):
+            return None
+        self.parser.rate.wait('card')
+        if self.parser.last_duplicate:
+            return self.parser.last_duplicate
+        return self.parser.resume_data[-1] if len(self.parser.resume_data) > saved_before else None
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Распределенный парсинг через общую таблицу задач")
+    arg_parser.add_argument('--db', default=COORDINATOR_CONFIG['db_file'], help="Файл общей базы задач")
+    commands = arg_parser.add_subparsers(dest='command', required=True)
+
+    seed = commands.add_parser('seed', help="Добавить диапазоны страниц")
+    seed.add_argument('--pages', default='1-10',
+                      help="Диапазон страниц, например 1-40; auto - все страницы по пагинации первой")
+    seed.add_argument('--shard', type=int, default=COORDINATOR_CONFIG['shard_size'])
+
+    work = commands.add_parser('work', help="Запустить воркер")
+    work.add_argument('--worker-id')
+    work.add_argument('--wait', action='store_true', help="Ждать новые задачи вместо выхода")
+
+    commands.add_parser('status', help="Прогресс по задачам и воркерам")
+
+    export = commands.add_parser('export', help="Собрать результаты в JSON")
+    export.add_argument('output')
+
+    args = arg_parser.parse_args()
+    store = JobStore(args.db)
+
+    if args.command == 'seed':
+        if args.pages == 'auto':
+            from pagination_planner import fetch_total_pages
+            first, last = 1, fetch_total_pages()
+            print(f"🧭 Страниц в списке: {last}")
+        else:
+            first, _, last = args.pages.partition('-')
+        added = store.seed_page_ranges(int(first), int(last or first), args.shard)
+        print(f"🌱 Добавлено диапазонов: {added}")
+    elif args.command == 'work':
+        worker = CrawlWorker(store, args.worker_id)
+        try:
+            worker.run(idle_exit=not args.wait)
+        except KeyboardInterrupt:
+            print("\n⏹️ Воркер остановлен, задачи освобождены")
+        finally:
+            if worker.parser:
+                worker.parser.cleanup_ultimate()
+    elif args.command == 'status':
+        progress = store.progress()
+        for kind, statuses in sorted(progress['jobs'].items()):
+            print(f"📋 {kind}: " + ', '.join(f"{status}={count}" for status, count in sorted(statuses.items())))
+        for worker in progress['workers']:
+            age = time.time() - (worker['heartbeat_at'] or 0)
+            print(f"🛰️ {worker['worker_id']} @ {worker['host']}: задач {worker['jobs_done']}, heartbeat {age:.0f}с назад")
+    elif args.command == 'export':
+        results = list(store.iter_results())
+        # Почти дубликаты - только ссылка на кластер, в экспорт резюме не попадают
+        resumes = [result for result in results if 'duplicate_of' not in result]
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(resumes, f, ensure_ascii=False, indent=2)
+        print(f"💾 Сохранено резюме: {len(resumes)} -> {args.output}"
+              + (f" (почти дубликатов: {len(results) - len(resumes)})" if len(results) > len(resumes) else ''))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
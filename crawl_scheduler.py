@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Планировщик парсинга по нескольким категориям, городам и запросам
+
+Цели (город x категория/запрос) разворачиваются в задачи страниц списка.
+Очередь - по приоритету: свежесть (ближние страницы и давно не обходившиеся
+цели) и выход (новых резюме на страницу, скользящее среднее). Цель перестает
+выдавать страницы после нескольких страниц подряд без новых резюме.
+
+Все цели обходятся параллельно (по браузеру на поток) через один общий
+AdaptiveRateController и одно общее множество URL, поэтому резюме,
+попавшее в пересекающиеся категории, скачивается один раз.
+
+Использование:
+    python crawl_scheduler.py                      # цели из SCHEDULER_CONFIG
+    python crawl_scheduler.py --city kyiv --city lviv --query бухгалтер --query економіст
+"""
+
+import argparse
+import heapq
+import itertools
+import sys
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import quote
+
+from config import SCHEDULER_CONFIG
+from rate_controller import AdaptiveRateController
+from run_metrics import RunMetrics
+
+RESUMES_ROOT = "https://www.work.ua/resumes"
+
+
+def build_list_url(city: Optional[str] = None, query: Optional[str] = None, page: int = 1) -> str:
+    """
+    URL страницы списка резюме work.ua
+
+    /resumes-<город>-<запрос>/, /resumes-<запрос>/, /resumes-<город>/ или /resumes/
+    """
+    parts = [RESUMES_ROOT]
+    if city:
+        parts.append(city)
+    if query:
+        parts.append(quote(query.strip().lower().replace(' ', '+'), safe='+'))
+    url = '-'.join(parts) + '/'
+    return f"{url}?page={page}" if page > 1 else url
+
+
+class CrawlTarget:
+    """Одна цель обхода и ее статистика"""
+
+    def __init__(self, city: Optional[str] = None, query: Optional[str] = None):
+        self.city = city
+        self.query = query
+        self.name = '/'.join(part for part in (city, query) if part) or 'all'
+        self.pages_done = 0
+        self.new_resumes = 0
+        self.yield_avg = None  # Скользящее среднее новых резюме на страницу
+        self.empty_streak = 0
+        self.last_crawled_at = 0.0
+        self.finished = False
+
+    def url(self, page: int = 1) -> str:
+        return build_list_url(self.city, self.query, page)
+
+    def record_page(self, new_count: int):
+        alpha = SCHEDULER_CONFIG['yield_smoothing']
+        self.pages_done += 1
+        self.new_resumes += new_count
+        self.yield_avg = new_count if self.yield_avg is None else alpha * new_count + (1 - alpha) * self.yield_avg
+        self.empty_streak = 0 if new_count else self.empty_streak + 1
+        self.last_crawled_at = time.time()
+
+
+def expand_targets(cities: Iterable[str] = (), categories: Iterable[str] = (),
+                   queries: Iterable[str] = ()) -> List[CrawlTarget]:
+    """Декартово произведение городов и категорий/запросов"""
+    cities = list(cities) or [None]
+    topics = list(categories) + list(queries) or [None]
+    return [CrawlTarget(city, topic) for city, topic in itertools.product(cities, topics)]
+
+
+class DedupSet:
+    """Общее множество URL резюме для всех потоков"""
+
+    def __init__(self, known: Iterable[str] = ()):
+        self._urls = set(known)
+        self._lock = threading.Lock()
+
+    def add_if_new(self, url: str) -> bool:
+        with self._lock:
+            if url in self._urls:
+                return False
+            self._urls.add(url)
+            return True
+
+    def release(self, url: str):
+        """Резюме не обработано - его снова может взять любая цель"""
+        with self._lock:
+            self._urls.discard(url)
+
+    def __contains__(self, url: str) -> bool:
+        with self._lock:
+            return url in self._urls
+
+    def __len__(self):
+        return len(self._urls)
+
+
+class CrawlScheduler:
+    """Приоритетная очередь страниц списка по всем целям"""
+
+    def __init__(self, targets: List[CrawlTarget], metrics: Optional[RunMetrics] = None):
+        self.targets = targets
+        self.metrics = metrics or RunMetrics()
+        self.rate = AdaptiveRateController(metrics=self.metrics)
+        self.dedup = DedupSet()
+        self._queue = []
+        self._counter = itertools.count()
+        self._in_flight = 0
+        self._lock = threading.Condition()
+        for target in targets:
+            self._push(target, 1)
+
+    def priority(self, target: CrawlTarget, page: int) -> float:
+        """Больше - раньше: выход цели + свежесть страницы и цели"""
+        expected_yield = target.yield_avg if target.yield_avg is not None else SCHEDULER_CONFIG['initial_yield']
+        staleness = min(time.time() - target.last_crawled_at, SCHEDULER_CONFIG['staleness_cap'])
+        return (SCHEDULER_CONFIG['yield_weight'] * expected_yield
+                + SCHEDULER_CONFIG['freshness_weight'] / page
+                + SCHEDULER_CONFIG['staleness_weight'] * staleness / SCHEDULER_CONFIG['staleness_cap'])
+
+    def _push(self, target: CrawlTarget, page: int):
+        heapq.heappush(self._queue, (-self.priority(target, page), next(self._counter), target, page))
+
+    def _reprioritize(self):
+        """Пересчет приоритетов перед выдачей: свежесть растет, пока страница ждет в очереди"""
+        self._queue = [(-self.priority(target, page), order, target, page) for _, order, target, page in self._queue]
+        heapq.heapify(self._queue)
+
+    def next_job(self, timeout: float = 1.0):
+        """Следующая (target, page) или None, когда обход закончен"""
+        with self._lock:
+            while True:
+                if self._queue:
+                    self._reprioritize()
+                    _, _, target, page = heapq.heappop(self._queue)
+                    self._in_flight += 1
+                    return target, page
+                if not self._in_flight:
+                    return None
+                # Очередь пуста, но страницы в работе могут добавить следующие
+                self._lock.wait(timeout)
+
+    def is_done(self) -> bool:
+        with self._lock:
+            return not self._queue and not self._in_flight
+
+    def complete(self, target: CrawlTarget, page: int, cards_found: int, new_count: int):
+        """Итог страницы: обновление выхода и постановка следующей страницы цели"""
+        with self._lock:
+            self._in_flight -= 1
+            target.record_page(new_count)
+            self.metrics.inc('scheduler_pages_total', target=target.name)
+            self.metrics.inc('scheduler_new_resumes_total', new_count, target=target.name)
+
+            if (not cards_found or page >= SCHEDULER_CONFIG['max_pages_per_target']
+                    or target.empty_streak >= SCHEDULER_CONFIG['stop_after_empty_pages']):
+                target.finished = True
+            else:
+                self._push(target, page + 1)
+            self._lock.notify_all()
+
+    def summary(self) -> List[Dict]:
+        return [{
+            'target': target.name,
+            'pages': target.pages_done,
+            'new_resumes': target.new_resumes,
+            'yield_avg': round(target.yield_avg or 0, 2),
+            'finished': target.finished,
+        } for target in self.targets]
+
+
+class SchedulerWorker(threading.Thread):
+    """Поток с собственным браузером, берет страницы из общего планировщика"""
+
+    def __init__(self, scheduler: CrawlScheduler, index: int, max_cards_per_page: Optional[int] = None):
+        super().__init__(name=f'crawl-worker-{index}', daemon=True)
+        self.scheduler = scheduler
+        self.index = index
+        self.max_cards_per_page = max_cards_per_page
+        self.parser = None
+        self.resumes = 0
+
+    def run(self):
+        from ultimate_parser import UltimateWorkUaParser
+
+        scheduler = self.scheduler
+        self.parser = parser = UltimateWorkUaParser()
+        # Общий регулятор скорости; собственные файлы данных на поток
+        parser.rate = scheduler.rate
+        parser.data_file = parser.data_file.replace('.json', f'_w{self.index}.json')
+        parser.checkpoint_file = parser.checkpoint_file.replace('.json', f'_w{self.index}.json')
+
+        try:
+            while True:
+                # Потоки сверх текущей параллельности регулятора ждут
+                if self.index >= scheduler.rate.concurrency:
+                    if scheduler.is_done():
+                        break
+                    time.sleep(SCHEDULER_CONFIG['idle_poll'])
+                    continue
+
+                job = scheduler.next_job()
+                if job is None:
+                    break
+                target, page = job
+                cards_found, new_count = 0, 0
+                try:
+                    cards_found, new_count = self.crawl_page(target, page)
+                except Exception as e:
+                    parser.logger.error("❌ %s, страница %d: %s", target.name, page, e)
+                    parser.restart_driver_bulletproof()
+                    cards_found = 1  # Ошибка - не признак конца списка
+                finally:
+                    scheduler.complete(target, page, cards_found, new_count)
+        finally:
+            parser.cleanup_ultimate()
+
+    def crawl_page(self, target: CrawlTarget, page: int):
+        parser = self.parser
+        parser.base_url = target.url()
+        parser.session_state['current_page'] = page
+        parser.set_log_context(page=page)
+
+        self.scheduler.rate.acquire('page')
+        if not parser.driver:
+            parser.start_browser(page)
+        else:
+            parser.driver.get(target.url(page))
+            parser.rate.observe_page(parser.driver)
+            parser.waits.stable_cards(parser.selectors.get('resume_cards'))
+
+        cards = parser.get_cards_with_llm_fallback()
+        dedup = self.scheduler.dedup
+        new_cards = [card for card in cards if card['url'] not in dedup]
+        parser.logger.info("🗂️ %s, страница %d: карточек %d, новых %d", target.name, page, len(cards), len(new_cards))
+
+        # Занимаются только карточки, которые обрабатываются сейчас; неудачные - освобождаются
+        for card in new_cards[:self.max_cards_per_page]:
+            if not dedup.add_if_new(card['url']):
+                continue  # Другой поток взял ее раньше
+            self.scheduler.rate.acquire('card')
+            processed = False
+            try:
+                processed = parser.process_card(card)
+            finally:
+                if processed:
+                    self.resumes += 1
+                else:
+                    dedup.release(card['url'])
+        return len(cards), len(new_cards)
+
+
+def run_schedule(targets: List[CrawlTarget], workers: Optional[int] = None,
+                 max_cards_per_page: Optional[int] = None) -> CrawlScheduler:
+    """Параллельный обход всех целей"""
+    scheduler = CrawlScheduler(targets)
+    workers = workers or SCHEDULER_CONFIG['workers']
+    threads = [SchedulerWorker(scheduler, index, max_cards_per_page) for index in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return scheduler
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Обход нескольких категорий/городов/запросов")
+    arg_parser.add_argument('--city', action='append', help="Город (slug work.ua), можно несколько")
+    arg_parser.add_argument('--category', action='append', help="Категория (slug), можно несколько")
+    arg_parser.add_argument('--query', action='append', help="Поисковый запрос, можно несколько")
+    arg_parser.add_argument('--workers', type=int, default=None, help="Параллельных браузеров")
+    arg_parser.add_argument('--max-cards', type=int, default=None, help="Карточек на страницу")
+    args = arg_parser.parse_args()
+
+    targets = expand_targets(
+        args.city or SCHEDULER_CONFIG['cities'],
+        args.category or SCHEDULER_CONFIG['categories'],
+        args.query or SCHEDULER_CONFIG['queries'],
+    )
+    print(f"🗂️ Целей: {len(targets)} - " + ', '.join(target.name for target in targets))
+
+    scheduler = run_schedule(targets, args.workers, args.max_cards)
+
+    print(f"\n📊 ИТОГИ ПЛАНИРОВЩИКА (уникальных резюме: {len(scheduler.dedup)})")
+    for item in sorted(scheduler.summary(), key=lambda item: -item['new_resumes']):
+        print(f"   {item['target']:<30} страниц {item['pages']:>3}, новых {item['new_resumes']:>4}, "
+              f"выход {item['yield_avg']:.1f}/стр")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,7 +6,94 @@ import sqlite3
 import json
 import logging
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from resume_fields import extract_index_fields
+from resume_sections import TEXT_SECTIONS, sections_for_record
+
+# Фильтры консольного просмотра -> условия по индексу
+INDEX_FILTERS = {
+    'quality': 'has_details = 1',
+    'kiev': 'is_kiev = 1',
+    'salary': 'has_salary = 1',
+    '1c': 'has_1c = 1',
+}
+
+# Версия данных БД (PRAGMA user_version): 1 - секции записей LLM разобраны по llm_details
+SECTIONS_LLM_VERSION = 1
+
+INDEX_COLUMNS = (
+    'resume_url', 'full_name', 'position', 'salary', 'salary_num', 'location',
+    'age', 'skills_json', 'experience_count', 'updated_at'
+)
+
+
+class ResumeCursor:
+    """Постраничный курсор по индексу резюме (keyset-пагинация)"""
+
+    def __init__(self, db_path: str, where: str, params: Tuple, page_size: int = 10):
+        self.db_path = db_path
+        self.where = where
+        self.params = params
+        self.page_size = page_size
+        self._last_key = None
+        self._total = None
+        self.exhausted = False
+
+    @property
+    def total(self) -> int:
+        """Количество записей, подходящих под фильтр (считается один раз)"""
+        if self._total is None:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute(f'SELECT COUNT(*) FROM resume_index WHERE {self.where}', self.params)
+                self._total = cursor.fetchone()[0]
+        return self._total
+
+    def fetch_page(self) -> List[Dict]:
+        """Следующая страница результатов (пустой список - конец выборки)"""
+        if self.exhausted:
+            return []
+
+        where = self.where
+        params = self.params
+        if self._last_key is not None:
+            where = f'({where}) AND (updated_at, rowid) < (?, ?)'
+            params = params + self._last_key
+
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT rowid, {', '.join(INDEX_COLUMNS)}
+                FROM resume_index
+                WHERE {where}
+                ORDER BY updated_at DESC, rowid DESC
+                LIMIT ?
+            ''', params + (self.page_size,))
+            rows = cursor.fetchall()
+
+        if len(rows) < self.page_size:
+            self.exhausted = True
+        if not rows:
+            return []
+
+        last = rows[-1]
+        self._last_key = (last[INDEX_COLUMNS.index('updated_at') + 1], last[0])
+
+        results = []
+        for row in rows:
+            item = dict(zip(INDEX_COLUMNS, row[1:]))
+            item['skills'] = json.loads(item.pop('skills_json') or '[]')
+            results.append(item)
+        return results
+
+    def __iter__(self) -> Iterator[Dict]:
+        while True:
+            page = self.fetch_page()
+            if not page:
+                return
+            yield from page
+
 
 class ResumeDatabase:
     """Менеджер базы данных для хранения данных резюме"""
@@ -20,6 +107,7 @@ class ResumeDatabase:
         """
         self.db_path = db_path
         self.logger = logging.getLogger(__name__)
+        self.has_search = False
         self.init_database()
     
     def init_database(self):
@@ -45,6 +133,114 @@ class ResumeDatabase:
                     ON resumes(resume_url)
                 ''')
                 
+                # Индекс полей резюме для фильтров и поиска без разбора JSON
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS resume_index (
+                        resume_url TEXT PRIMARY KEY,
+                        full_name TEXT,
+                        position TEXT,
+                        salary TEXT,
+                        salary_num INTEGER,
+                        location TEXT,
+                        age TEXT,
+                        skills_json TEXT,
+                        experience_count INTEGER DEFAULT 0,
+                        has_details INTEGER DEFAULT 0,
+                        is_kiev INTEGER DEFAULT 0,
+                        has_salary INTEGER DEFAULT 0,
+                        has_1c INTEGER DEFAULT 0,
+                        search_text TEXT,
+                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
+                for column in ('has_details', 'is_kiev', 'has_salary', 'has_1c'):
+                    cursor.execute(f'''
+                        CREATE INDEX IF NOT EXISTS idx_resume_index_{column}
+                        ON resume_index({column}, updated_at)
+                    ''')
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_resume_index_updated
+                    ON resume_index(updated_at)
+                ''')
+                
+                # Полнотекстовый индекс search_text (rowid = rowid в resume_index): триграммы
+                # дают поиск подстроки от 3 символов без полного просмотра resume_index
+                try:
+                    cursor.execute('''
+                        CREATE VIRTUAL TABLE IF NOT EXISTS resume_search
+                        USING fts5(search_text, tokenize = 'trigram')
+                    ''')
+                    self.has_search = True
+                except sqlite3.OperationalError as e:
+                    self.logger.warning(f"⚠️ FTS5 с trigram недоступен ({e}), поиск просматривает весь индекс")
+                
+                # Навыки отдельной таблицей для агрегаций (ТОП навыков)
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS resume_skills (
+                        resume_url TEXT NOT NULL,
+                        skill TEXT NOT NULL
+                    )
+                ''')
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_resume_skills_url
+                    ON resume_skills(resume_url)
+                ''')
+                
+                # Секции полного текста, разобранные один раз при сохранении
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS resume_sections (
+                        resume_url TEXT PRIMARY KEY,
+                        skills_json TEXT,
+                        experience TEXT,
+                        education TEXT,
+                        languages TEXT,
+                        additional_info TEXT
+                    )
+                ''')
+                
+                # Карточки, уже обработанные прошлыми запусками (инкрементальный режим)
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS resume_seen (
+                        resume_id TEXT PRIMARY KEY,
+                        resume_url TEXT,
+                        fingerprint TEXT NOT NULL,
+                        posted TEXT,
+                        first_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
+                
+                # Подписи MinHash и кластеры почти одинаковых резюме (near_duplicates.py)
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS resume_minhash (
+                        resume_url TEXT PRIMARY KEY,
+                        signature BLOB NOT NULL,
+                        cluster_id TEXT NOT NULL,
+                        duplicate_of TEXT,
+                        similarity REAL,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_resume_minhash_cluster
+                    ON resume_minhash(cluster_id)
+                ''')
+                # Корзины LSH: резюме с совпавшей полосой подписи - кандидаты в дубликаты
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS resume_lsh (
+                        band INTEGER NOT NULL,
+                        bucket BLOB NOT NULL,
+                        resume_url TEXT NOT NULL
+                    )
+                ''')
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_resume_lsh_bucket
+                    ON resume_lsh(band, bucket)
+                ''')
+                
+                # Дозаполняем индекс для записей, сохраненных до его появления
+                self._backfill_index(cursor)
+                
                 conn.commit()
                 self.logger.info("✅ База данных инициализирована")
                 
@@ -76,11 +272,13 @@ class ResumeDatabase:
                     (resume_url, resume_data, updated_at) 
                     VALUES (?, ?, CURRENT_TIMESTAMP)
                 ''', (resume_url, resume_json))
+                saved = cursor.rowcount
                 
+                self._write_index(cursor, resume_url, resume_data)
                 conn.commit()
                 
                 # Проверяем было ли это обновление или новая запись
-                if cursor.rowcount > 0:
+                if saved > 0:
                     action = "обновлено" if self.resume_exists(resume_url) else "добавлено"
                     self.logger.info(f"✅ Резюме {action}: {resume_url}")
                     return True
@@ -92,6 +290,245 @@ class ResumeDatabase:
             self.logger.error(f"❌ Ошибка сохранения резюме {resume_url}: {e}")
             return False
     
+    def _write_index(self, cursor, resume_url: str, resume_data: Dict, updated_at: Optional[str] = None):
+        """
+        Обновление индексных таблиц для одного резюме (в текущей транзакции)
+        
+        updated_at - время сохранения записи в resumes (при дозаполнении индекса),
+        по умолчанию текущее: по нему идет keyset-пагинация курсора.
+        """
+        fields = extract_index_fields(resume_data)
+        
+        if self.has_search:
+            cursor.execute('SELECT rowid FROM resume_index WHERE resume_url = ?', (resume_url,))
+            previous = cursor.fetchone()
+            if previous:
+                cursor.execute('DELETE FROM resume_search WHERE rowid = ?', previous)
+        
+        cursor.execute('''
+            INSERT OR REPLACE INTO resume_index
+            (resume_url, full_name, position, salary, salary_num, location, age,
+             skills_json, experience_count, has_details, is_kiev, has_salary, has_1c,
+             search_text, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))
+        ''', (
+            resume_url, fields['full_name'], fields['position'], fields['salary'],
+            fields['salary_num'], fields['location'], fields['age'], fields['skills_json'],
+            fields['experience_count'], fields['has_details'], fields['is_kiev'],
+            fields['has_salary'], fields['has_1c'], fields['search_text'], updated_at
+        ))
+        
+        if self.has_search:
+            cursor.execute('INSERT INTO resume_search (rowid, search_text) VALUES (?, ?)',
+                           (cursor.lastrowid, fields['search_text']))
+        
+        cursor.execute('DELETE FROM resume_skills WHERE resume_url = ?', (resume_url,))
+        if fields['has_details'] and fields['skills']:
+            cursor.executemany(
+                'INSERT INTO resume_skills (resume_url, skill) VALUES (?, ?)',
+                [(resume_url, skill) for skill in fields['skills']]
+            )
+        
+        self._write_sections(cursor, resume_url, resume_data)
+    
+    def _write_sections(self, cursor, resume_url: str, resume_data: Dict):
+        """Сохранение секций полного текста резюме (в текущей транзакции)"""
+        sections = sections_for_record(resume_data)
+        cursor.execute('''
+            INSERT OR REPLACE INTO resume_sections
+            (resume_url, skills_json, experience, education, languages, additional_info)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (
+            resume_url, json.dumps(sections['skills'], ensure_ascii=False),
+            *(sections[key] for key in TEXT_SECTIONS)
+        ))
+    
+    def _backfill_index(self, cursor):
+        """Индексация записей, которых еще нет в resume_index"""
+        cursor.execute('''
+            SELECT r.resume_url, r.resume_data, COALESCE(r.updated_at, r.created_at)
+            FROM resumes r
+            LEFT JOIN resume_index i ON i.resume_url = r.resume_url
+            WHERE i.resume_url IS NULL
+        ''')
+        missing = cursor.fetchall()
+        
+        # Время записи берется из resumes: иначе старые резюме встали бы в начало выдачи
+        for resume_url, resume_json, updated_at in missing:
+            self._write_index(cursor, resume_url, json.loads(resume_json), updated_at)
+        
+        if missing:
+            self.logger.info(f"🗂️ Проиндексировано резюме: {len(missing)}")
+        
+        # Полнотекстовый индекс для записей, проиндексированных до его появления
+        if self.has_search:
+            cursor.execute('''
+                INSERT INTO resume_search (rowid, search_text)
+                SELECT rowid, search_text FROM resume_index
+                WHERE rowid NOT IN (SELECT rowid FROM resume_search)
+            ''')
+            if cursor.rowcount > 0:
+                self.logger.info(f"🔎 Добавлено в полнотекстовый индекс: {cursor.rowcount}")
+        
+        # Секции для записей, проиндексированных до появления resume_sections
+        cursor.execute('''
+            SELECT r.resume_url, r.resume_data
+            FROM resumes r
+            LEFT JOIN resume_sections s ON s.resume_url = r.resume_url
+            WHERE s.resume_url IS NULL
+        ''')
+        missing = cursor.fetchall()
+        
+        # Записи LLM раньше разбирались только по full_text и получили пустые секции -
+        # разбираются заново один раз (версия схемы в PRAGMA user_version): у многих
+        # записей LLM секции пусты законно, и при каждом запуске их трогать нельзя
+        version = cursor.execute('PRAGMA user_version').fetchone()[0]
+        if version < SECTIONS_LLM_VERSION:
+            cursor.execute('''
+                SELECT r.resume_url, r.resume_data
+                FROM resumes r
+                JOIN resume_sections s ON s.resume_url = r.resume_url
+                WHERE s.skills_json = '[]' AND s.experience = '' AND s.education = ''
+                  AND r.resume_data LIKE '%"llm_details"%'
+            ''')
+            missing += cursor.fetchall()
+            cursor.execute(f'PRAGMA user_version = {SECTIONS_LLM_VERSION}')
+        
+        for resume_url, resume_json in missing:
+            self._write_sections(cursor, resume_url, json.loads(resume_json))
+        
+        if missing:
+            self.logger.info(f"🧩 Разобрано на секции резюме: {len(missing)}")
+    
+    def save_resumes_bulk(self, items: List[Tuple[str, Dict]]) -> int:
+        """
+        Сохранение пачки резюме одной транзакцией
+        
+        Args:
+            items: Список пар (resume_url, resume_data)
+            
+        Returns:
+            int: Количество сохраненных записей
+        """
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                for resume_url, resume_data in items:
+                    cursor.execute('''
+                        INSERT OR REPLACE INTO resumes 
+                        (resume_url, resume_data, updated_at) 
+                        VALUES (?, ?, CURRENT_TIMESTAMP)
+                    ''', (resume_url, json.dumps(resume_data, ensure_ascii=False, indent=2)))
+                    self._write_index(cursor, resume_url, resume_data)
+                conn.commit()
+            
+            self.logger.info(f"✅ Сохранено пачкой: {len(items)} резюме")
+            return len(items)
+            
+        except Exception as e:
+            self.logger.error(f"❌ Ошибка пакетного сохранения: {e}")
+            return 0
+    
+    def import_json_export(self, json_file: str) -> int:
+        """Импорт JSON экспорта (формат export_to_json) в базу"""
+        try:
+            with open(json_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            self.logger.error(f"❌ Ошибка чтения {json_file}: {e}")
+            return 0
+        
+        items = [
+            (item['resume_url'], item.get('resume_data', {}))
+            for item in data
+            if isinstance(item, dict) and item.get('resume_url')
+        ]
+        return self.save_resumes_bulk(items)
+    
+    def query_resumes(self, filter_type: str = None, search_term: str = None,
+                      page_size: int = 10) -> ResumeCursor:
+        """
+        Индексированный запрос резюме с постраничной выдачей
+        
+        Args:
+            filter_type: Один из INDEX_FILTERS (quality, kiev, salary, 1c) или None
+            search_term: Подстрока для поиска по имени, должности и навыкам
+                (от 3 символов - по полнотекстовому индексу resume_search,
+                короче - просмотром search_text)
+            page_size: Размер страницы курсора
+            
+        Returns:
+            ResumeCursor: Курсор с полями индекса (без разбора resume_data)
+        """
+        conditions = []
+        params = ()
+        
+        if filter_type in INDEX_FILTERS:
+            conditions.append(INDEX_FILTERS[filter_type])
+        
+        if search_term and self.has_search and len(search_term) >= 3:
+            conditions.append('rowid IN (SELECT rowid FROM resume_search WHERE resume_search MATCH ?)')
+            params += ('"' + search_term.lower().replace('"', '""') + '"',)
+        elif search_term:
+            conditions.append('instr(search_text, ?) > 0')
+            params += (search_term.lower(),)
+        
+        where = ' AND '.join(conditions) if conditions else '1 = 1'
+        return ResumeCursor(self.db_path, where, params, page_size)
+    
+    def get_index_stats(self, top_n: int = 5) -> Dict:
+        """Агрегированная статистика по индексу (для консольного просмотра)"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute('''
+                    SELECT COUNT(*), COALESCE(SUM(has_details), 0) FROM resume_index
+                ''')
+                total, quality = cursor.fetchone()
+                
+                cursor.execute('''
+                    SELECT MIN(salary_num), MAX(salary_num), SUM(salary_num), COUNT(salary_num)
+                    FROM resume_index
+                    WHERE has_details = 1 AND salary_num IS NOT NULL
+                ''')
+                min_salary, max_salary, sum_salary, salary_count = cursor.fetchone()
+                
+                cursor.execute('''
+                    SELECT skill, COUNT(*) AS cnt FROM resume_skills
+                    GROUP BY skill ORDER BY cnt DESC LIMIT ?
+                ''', (top_n,))
+                top_skills = cursor.fetchall()
+                
+                cursor.execute('''
+                    SELECT location, COUNT(*) AS cnt FROM resume_index
+                    WHERE has_details = 1 AND location != '' AND location != 'Не указан'
+                    GROUP BY location ORDER BY cnt DESC LIMIT ?
+                ''', (top_n,))
+                top_cities = cursor.fetchall()
+                
+                cursor.execute('''
+                    SELECT position, COUNT(*) AS cnt FROM resume_index
+                    WHERE has_details = 1 AND position != '' AND position != 'Не указано'
+                    GROUP BY position ORDER BY cnt DESC LIMIT ?
+                ''', (top_n,))
+                top_positions = cursor.fetchall()
+                
+                return {
+                    'total_resumes': total,
+                    'quality_resumes': quality,
+                    'salary_min': min_salary,
+                    'salary_max': max_salary,
+                    'salary_avg': sum_salary // salary_count if salary_count else None,
+                    'top_skills': top_skills,
+                    'top_cities': top_cities,
+                    'top_positions': top_positions
+                }
+                
+        except Exception as e:
+            self.logger.error(f"❌ Ошибка получения статистики индекса: {e}")
+            return {}
+    
     def resume_exists(self, resume_url: str) -> bool:
         """Проверка существования резюме в базе"""
         try:
@@ -103,6 +540,116 @@ class ResumeDatabase:
             self.logger.error(f"❌ Ошибка проверки существования: {e}")
             return False
     
+    def get_seen_fingerprints(self, resume_ids: List[str]) -> Dict[str, str]:
+        """Отпечатки карточек, обработанных прошлыми запусками: {resume_id: fingerprint}"""
+        if not resume_ids:
+            return {}
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute(f'''
+                    SELECT resume_id, fingerprint FROM resume_seen
+                    WHERE resume_id IN ({','.join('?' * len(resume_ids))})
+                ''', resume_ids)
+                return dict(cursor.fetchall())
+        except Exception as e:
+            self.logger.error(f"❌ Ошибка чтения resume_seen: {e}")
+            return {}
+    
+    def mark_seen(self, rows: List[Tuple[str, str, str, str]]):
+        """Запись обработанных карточек: (resume_id, resume_url, fingerprint, posted)"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.executemany('''
+                    INSERT INTO resume_seen (resume_id, resume_url, fingerprint, posted)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(resume_id) DO UPDATE SET
+                        resume_url = excluded.resume_url,
+                        fingerprint = excluded.fingerprint,
+                        posted = excluded.posted,
+                        last_seen = CURRENT_TIMESTAMP
+                ''', rows)
+                conn.commit()
+        except Exception as e:
+            self.logger.error(f"❌ Ошибка записи resume_seen: {e}")
+    
+    def save_minhash(self, resume_url: str, signature: bytes, cluster_id: str, buckets: List[Tuple[int, bytes]],
+                     duplicate_of: str = None, similarity: float = None):
+        """Подпись MinHash резюме, его кластер и корзины LSH по полосам"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    INSERT OR REPLACE INTO resume_minhash
+                    (resume_url, signature, cluster_id, duplicate_of, similarity)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (resume_url, signature, cluster_id, duplicate_of, similarity))
+                cursor.execute('DELETE FROM resume_lsh WHERE resume_url = ?', (resume_url,))
+                cursor.executemany('INSERT INTO resume_lsh (band, bucket, resume_url) VALUES (?, ?, ?)',
+                                   [(band, bucket, resume_url) for band, bucket in buckets])
+                conn.commit()
+        except Exception as e:
+            self.logger.error(f"❌ Ошибка записи подписи MinHash {resume_url}: {e}")
+    
+    def load_minhash(self) -> Tuple[List[Tuple[str, bytes, str]], List[Tuple[int, bytes, str]]]:
+        """Все подписи [(url, подпись, кластер)] и корзины LSH [(полоса, корзина, url)]"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute('SELECT resume_url, signature, cluster_id FROM resume_minhash')
+                signatures = cursor.fetchall()
+                cursor.execute('SELECT band, bucket, resume_url FROM resume_lsh')
+                return signatures, cursor.fetchall()
+        except Exception as e:
+            self.logger.error(f"❌ Ошибка чтения подписей MinHash: {e}")
+            return [], []
+    
+    def get_cluster_id(self, resume_url: str) -> Optional[str]:
+        """Кластер почти одинаковых резюме, в который попал URL"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute('SELECT cluster_id FROM resume_minhash WHERE resume_url = ?', (resume_url,))
+                row = cursor.fetchone()
+                return row[0] if row else None
+        except Exception as e:
+            self.logger.error(f"❌ Ошибка получения кластера: {e}")
+            return None
+    
+    def get_cluster(self, cluster_id: str) -> List[Dict]:
+        """Резюме кластера: первое - сохраненное, остальные - его дубликаты"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT resume_url, duplicate_of, similarity, created_at FROM resume_minhash
+                    WHERE cluster_id = ?
+                    ORDER BY duplicate_of IS NOT NULL, created_at
+                ''', (cluster_id,))
+                return [{'resume_url': row[0], 'duplicate_of': row[1], 'similarity': row[2], 'created_at': row[3]}
+                        for row in cursor.fetchall()]
+        except Exception as e:
+            self.logger.error(f"❌ Ошибка получения кластера {cluster_id}: {e}")
+            return []
+    
+    def get_duplicate_clusters(self, min_size: int = 2) -> List[Dict]:
+        """Кластеры из нескольких URL, крупные первыми: [{'cluster_id', 'size', 'resume_urls'}]"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT cluster_id, COUNT(*), GROUP_CONCAT(resume_url, ' ') FROM resume_minhash
+                    GROUP BY cluster_id
+                    HAVING COUNT(*) >= ?
+                    ORDER BY COUNT(*) DESC, cluster_id
+                ''', (min_size,))
+                return [{'cluster_id': row[0], 'size': row[1], 'resume_urls': row[2].split(' ')}
+                        for row in cursor.fetchall()]
+        except Exception as e:
+            self.logger.error(f"❌ Ошибка получения кластеров: {e}")
+            return []
+    
     def get_resume(self, resume_url: str) -> Optional[Dict]:
         """Получение данных резюме по URL"""
         try:
@@ -148,6 +695,34 @@ class ResumeDatabase:
             self.logger.error(f"❌ Ошибка получения всех резюме: {e}")
             return []
     
+    def iter_resumes(self, batch_size: int = 1000) -> Iterator[Dict]:
+        """Потоковое чтение всех резюме порциями (без загрузки базы в память)"""
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT r.resume_url, r.resume_data, r.created_at, r.updated_at,
+                       s.skills_json, s.experience, s.education, s.languages, s.additional_info
+                FROM resumes r
+                LEFT JOIN resume_sections s ON s.resume_url = r.resume_url
+                ORDER BY r.id
+            ''')
+            
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield {
+                        'resume_url': row[0],
+                        'resume_data': json.loads(row[1]),
+                        'created_at': row[2],
+                        'updated_at': row[3],
+                        'sections': {
+                            'skills': json.loads(row[4]) if row[4] else [],
+                            **dict(zip(TEXT_SECTIONS, (value or '' for value in row[5:])))
+                        }
+                    }
+    
     def get_stats(self) -> Dict:
         """Получение статистики базы данных"""
         try:
@@ -202,6 +777,14 @@ class ResumeDatabase:
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute('DELETE FROM resumes')
+                cursor.execute('DELETE FROM resume_index')
+                if self.has_search:
+                    cursor.execute('DELETE FROM resume_search')
+                cursor.execute('DELETE FROM resume_skills')
+                cursor.execute('DELETE FROM resume_sections')
+                cursor.execute('DELETE FROM resume_seen')
+                cursor.execute('DELETE FROM resume_minhash')
+                cursor.execute('DELETE FROM resume_lsh')
                 conn.commit()
                 self.logger.info("⚠️ База данных очищена")
         except Exception as e:
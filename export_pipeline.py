@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Общий потоковый конвейер экспорта резюме в CSV/XLSX
+Используется create_web_csv.py и clean_full_text.py
+"""
+
+import csv
+import json
+import os
+import re
+import time
+from collections import deque
+from multiprocessing import Pool
+from typing import Dict, Iterator, List, Optional
+
+from config import EXPORT_CONFIG
+from resume_sections import extract_skills as extract_section_skills
+
+EXPORT_COLUMNS = [
+    'ID', 'Имя', 'Должность', 'Зарплата', 'Город', 'Возраст', 'Навыки',
+    'Количество_навыков', 'Опыт', 'Образование', 'URL', 'Подробно'
+]
+
+
+# ========================================
+# ИСТОЧНИКИ ДАННЫХ
+# ========================================
+
+def _iter_json_array(json_file: str, read_size: int = 1 << 20) -> Iterator[Dict]:
+    """Потоковое чтение JSON массива объектов без загрузки файла целиком"""
+    decoder = json.JSONDecoder()
+    skip = re.compile(r'[\s,]*')
+    with open(json_file, 'r', encoding='utf-8') as f:
+        buffer = f.read(read_size).lstrip()
+        if not buffer.startswith('['):
+            raise ValueError(f"{json_file}: ожидался JSON массив")
+        pos = 1
+        eof = False
+
+        while True:
+            pos = skip.match(buffer, pos).end()
+            if buffer.startswith(']', pos):
+                return
+            try:
+                item, pos_end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                # Объект обрезан границей блока - дочитываем и отбрасываем обработанное
+                chunk = f.read(read_size)
+                eof = not chunk
+                buffer = buffer[pos:] + chunk
+                pos = 0
+                continue
+            yield item
+            pos = pos_end
+
+
+def _flatten_db_record(record: Dict) -> Dict:
+    """Запись ResumeDatabase -> плоский формат ultimate_parser (name, title, full_text, ...)"""
+    resume_data = record.get('resume_data', {})
+    card = resume_data.get('card_info')
+    if not isinstance(card, dict):
+        # Запись уже в плоском формате
+        item = dict(resume_data)
+    else:
+        item = dict(card)
+        item.update({key: value for key, value in resume_data.items()
+                     if key not in ('card_info', 'detailed_info', 'llm_details', 'processing_info')})
+    item.setdefault('url', record.get('resume_url'))
+    
+    sections = record.get('sections')
+    if sections:
+        item['skills'] = sections['skills']
+        item['sections'] = {key: value for key, value in sections.items() if key != 'skills'}
+    return item
+
+
+def iter_source_records(source: str) -> Iterator[Dict]:
+    """
+    Потоковое чтение записей из БД (.db), JSONL или JSON массива
+
+    Args:
+        source: Путь к источнику
+
+    Yields:
+        Dict: Запись в плоском формате ultimate_parser
+    """
+    if source.endswith('.db'):
+        from database_manager import ResumeDatabase
+        for record in ResumeDatabase(source).iter_resumes():
+            yield _flatten_db_record(record)
+    elif source.endswith('.jsonl'):
+        with open(source, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        yield from _iter_json_array(source)
+
+
+# ========================================
+# ПРЕОБРАЗОВАНИЕ ЗАПИСИ
+# ========================================
+
+def split_age_location(age_location: str):
+    """'41 рік, Тернівка' -> ('41 рік', 'Тернівка')"""
+    age = 'Не указан'
+    location = 'Не указан'
+    if age_location:
+        parts = age_location.split(', ')
+        if len(parts) >= 2:
+            age = parts[0]
+            location = ', '.join(parts[1:])
+        else:
+            location = age_location
+    return age, location
+
+
+def extract_skills(item: Dict) -> List[str]:
+    """Навыки записи: сохраненные при парсинге или из секции 'Знання і навички' (старые выгрузки)"""
+    if isinstance(item.get('skills'), list):
+        return item['skills']
+    return extract_section_skills(item.get('full_text'))
+
+
+def build_export_row(item: Dict, index: int, mode: str = 'web'):
+    """
+    Строка экспорта (те же поля, что в веб-интерфейсе)
+
+    Args:
+        item: Запись в плоском формате
+        index: Порядковый номер записи (с нуля)
+        mode: 'web' - превью исходного текста, 'cleaned' - превью очищенного текста
+
+    Returns:
+        tuple: (row, был ли текст очищен)
+    """
+    age, location = split_age_location(item.get('age_location'))
+    skills = extract_skills(item)
+
+    detailed_info = []
+
+    # Основная информация
+    detailed_info.append(f"👤 Имя: {item.get('name', 'Не указано')}")
+    detailed_info.append(f"💼 Должность: {item.get('title', 'Не указано')}")
+    detailed_info.append(f"💰 Зарплата: {item.get('salary', 'Не указана')}")
+    detailed_info.append(f"📍 Возраст и локация: {item.get('age_location', 'Не указано')}")
+    detailed_info.append(f"🔗 URL: {item.get('url', item.get('link', '#'))}")
+
+    # Опыт работы
+    if item.get('experience'):
+        detailed_info.append("\n📋 Опыт работы:")
+        if isinstance(item['experience'], list):
+            for exp in item['experience']:
+                detailed_info.append(f"  • {exp}")
+        else:
+            detailed_info.append(f"  • {item['experience']}")
+
+    # Образование
+    if item.get('education_employment'):
+        detailed_info.append(f"\n🎓 Образование: {item['education_employment']}")
+
+    # Навыки
+    if skills:
+        detailed_info.append(f"\n🔧 Навыки ({len(skills)}):")
+        for skill in skills[:15]:
+            detailed_info.append(f"  • {skill}")
+        if len(skills) > 15:
+            detailed_info.append(f"  ... и еще {len(skills) - 15} навыков")
+
+    cleaned = False
+    if mode == 'cleaned':
+        from clean_full_text import clean_full_text
+
+        original_full_text = item.get('full_text', '')
+        cleaned_full_text = clean_full_text(original_full_text)
+        cleaned = len(cleaned_full_text or '') < len(original_full_text or '')
+
+        if cleaned_full_text:
+            preview_text = cleaned_full_text[:800] if len(cleaned_full_text) > 800 else cleaned_full_text
+            detailed_info.append(f"\n📄 Полная информация (очищено): {preview_text}")
+            if len(cleaned_full_text) > 800:
+                detailed_info.append("...")
+    elif item.get('full_text'):
+        full_text_preview = item['full_text'][:500]
+        detailed_info.append(f"\n📄 Полная информация: {full_text_preview}...")
+
+    row = {
+        'ID': index + 1,
+        'Имя': item.get('name', 'Не указано'),
+        'Должность': item.get('title', 'Не указано'),
+        'Зарплата': item.get('salary', 'Не указана'),
+        'Город': location,
+        'Возраст': age,
+        'Навыки': ', '.join(skills[:10]) if skills else 'Не указаны',
+        'Количество_навыков': len(skills),
+        'Опыт': ', '.join(item.get('experience', [])) if isinstance(item.get('experience'), list) else str(item.get('experience', 'Не указан')),
+        'Образование': item.get('education_employment', 'Не указано'),
+        'URL': item.get('url', item.get('link', '#')),
+        'Подробно': '\n'.join(detailed_info),
+    }
+    return row, cleaned
+
+
+def _transform_chunk(task):
+    """Обработка порции записей в процессе пула"""
+    start_index, items, mode = task
+    rows = []
+    cleaned_count = 0
+    for offset, item in enumerate(items):
+        row, cleaned = build_export_row(item, start_index + offset, mode)
+        rows.append(row)
+        cleaned_count += cleaned
+    return rows, cleaned_count
+
+
+def _iter_chunks(records: Iterator[Dict], chunk_size: int):
+    """Разбиение потока записей на порции (start_index, items)"""
+    chunk = []
+    start_index = 0
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            yield start_index, chunk
+            start_index += len(chunk)
+            chunk = []
+    if chunk:
+        yield start_index, chunk
+
+
+# ========================================
+# ЗАПИСЬ РЕЗУЛЬТАТА
+# ========================================
+
+class CsvRowWriter:
+    """Построчная запись CSV (с BOM для корректного отображения в Excel)"""
+
+    def __init__(self, filename: str):
+        self.file = open(filename, 'w', newline='', encoding='utf-8-sig')
+        # '\n' как у прежнего pandas to_csv (по умолчанию csv пишет '\r\n')
+        self.writer = csv.DictWriter(self.file, fieldnames=EXPORT_COLUMNS, lineterminator='\n')
+        self.writer.writeheader()
+
+    def write_rows(self, rows: List[Dict]):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+
+class XlsxRowWriter:
+    """Построчная запись XLSX в write-only режиме openpyxl"""
+
+    def __init__(self, filename: str):
+        try:
+            from openpyxl import Workbook
+        except ImportError:
+            raise RuntimeError("❌ Для экспорта в XLSX установите openpyxl: pip install openpyxl")
+
+        self.filename = filename
+        self.workbook = Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet('Резюме')
+        self.sheet.append(EXPORT_COLUMNS)
+
+    def write_rows(self, rows: List[Dict]):
+        for row in rows:
+            self.sheet.append([row[column] for column in EXPORT_COLUMNS])
+
+    def close(self):
+        self.workbook.save(self.filename)
+
+
+def _open_writer(output: str):
+    if output.endswith('.xlsx'):
+        return XlsxRowWriter(output)
+    return CsvRowWriter(output)
+
+
+# ========================================
+# КОНВЕЙЕР
+# ========================================
+
+def run_export(source: str, output: str, mode: str = 'web', workers: Optional[int] = None,
+               chunk_size: Optional[int] = None, preview_rows: int = 0) -> Dict:
+    """
+    Потоковый экспорт: чтение -> пул процессов по порциям -> инкрементальная запись
+
+    В работе одновременно не больше 2 * workers порций, поэтому память
+    не зависит от размера источника.
+
+    Args:
+        source: БД (.db), JSONL или JSON массив
+        output: Файл результата (.csv или .xlsx)
+        mode: 'web' или 'cleaned' (см. build_export_row)
+        workers: Количество процессов (по умолчанию из EXPORT_CONFIG / число ядер)
+        chunk_size: Размер порции записей
+        preview_rows: Сколько первых строк вернуть для предпросмотра
+
+    Returns:
+        Dict: Статистика экспорта
+    """
+    workers = workers or EXPORT_CONFIG.get('workers') or os.cpu_count() or 1
+    chunk_size = chunk_size or EXPORT_CONFIG.get('chunk_size', 500)
+    max_in_flight = workers * 2
+
+    stats = {
+        'total': 0,
+        'cleaned': 0,
+        'with_names': 0,
+        'with_skills': 0,
+        'with_salary': 0,
+        'preview': [],
+        'mode': mode,
+        'workers': workers
+    }
+
+    def consume(rows, cleaned_count):
+        writer.write_rows(rows)
+        stats['total'] += len(rows)
+        stats['cleaned'] += cleaned_count
+        for row in rows:
+            stats['with_names'] += row['Имя'] != 'Не указано'
+            stats['with_skills'] += row['Навыки'] != 'Не указаны'
+            stats['with_salary'] += row['Зарплата'] != 'Не указана'
+        if len(stats['preview']) < preview_rows:
+            stats['preview'].extend(rows[:preview_rows - len(stats['preview'])])
+        if stats['total'] // 1000 != (stats['total'] - len(rows)) // 1000:
+            print(f"⏳ Обработано: {stats['total']:,}")
+
+    start_time = time.time()
+    writer = _open_writer(output)
+    try:
+        tasks = ((start, items, mode) for start, items in _iter_chunks(iter_source_records(source), chunk_size))
+
+        if workers == 1:
+            for task in tasks:
+                consume(*_transform_chunk(task))
+        else:
+            with Pool(workers) as pool:
+                in_flight = deque()
+                for task in tasks:
+                    in_flight.append(pool.apply_async(_transform_chunk, (task,)))
+                    if len(in_flight) >= max_in_flight:
+                        consume(*in_flight.popleft().get())
+                while in_flight:
+                    consume(*in_flight.popleft().get())
+    finally:
+        writer.close()
+
+    stats['elapsed'] = round(time.time() - start_time, 2)
+    stats['records_per_sec'] = round(stats['total'] / stats['elapsed'], 1) if stats['elapsed'] else 0.0
+    return stats
+
+
+def print_export_stats(stats: Dict, title: str = "📈 СТАТИСТИКА CSV:"):
+    """Печать статистики экспорта в общем формате"""
+    total = stats['total'] or 1
+    print()
+    print(title)
+    print(f"   📚 Всего записей: {stats['total']:,}")
+    if stats['mode'] == 'cleaned':
+        print(f"   🧹 Очищено текстов: {stats['cleaned']:,} ({stats['cleaned']/total*100:.1f}%)")
+    print(f"   👤 С именами: {stats['with_names']:,} ({stats['with_names']/total*100:.1f}%)")
+    print(f"   🔧 С навыками: {stats['with_skills']:,} ({stats['with_skills']/total*100:.1f}%)")
+    print(f"   💰 С зарплатой: {stats['with_salary']:,} ({stats['with_salary']/total*100:.1f}%)")
+    print(f"   ⚡ Скорость: {stats['records_per_sec']:,} записей/с ({stats['workers']} процессов, {stats['elapsed']}с)")
@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""
+Фикстуры страниц Work.ua для офлайн-бенчмарков
+
+- FixtureRecorder: сохраняет HTML страниц списка/резюме и ответы LLM
+- ReplayServer: локальный HTTP сервер, отдающий фикстуры с задержкой/джиттером,
+  плюс mock OpenAI эндпоинт /v1/chat/completions
+
+Структура каталога фикстур:
+    manifest.json          путь+query -> {file, kind}
+    pages/<sha1>.html      HTML страниц
+    llm/<sha1>.json        ответы LLM по хешу сообщений запроса
+"""
+
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import urljoin, urlsplit
+
+from config import BASE_URL, FIXTURES_CONFIG
+
+SITE_ORIGIN = 'https://www.work.ua'
+
+
+def _sha1(text: str) -> str:
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def fixture_key(url: str) -> str:
+    """Ключ фикстуры - путь и query без домена"""
+    parts = urlsplit(url)
+    return parts.path + (f'?{parts.query}' if parts.query else '')
+
+
+def messages_key(messages: List[Dict]) -> str:
+    """Хеш сообщений запроса к LLM (ключ записанного ответа)"""
+    return _sha1(json.dumps(messages, ensure_ascii=False, sort_keys=True))
+
+
+class FixtureRecorder:
+    """Запись страниц и ответов LLM в каталог фикстур"""
+
+    def __init__(self, fixtures_dir: Optional[str] = None):
+        self.fixtures_dir = fixtures_dir or FIXTURES_CONFIG['dir']
+        os.makedirs(os.path.join(self.fixtures_dir, 'pages'), exist_ok=True)
+        os.makedirs(os.path.join(self.fixtures_dir, 'llm'), exist_ok=True)
+        self.manifest_file = os.path.join(self.fixtures_dir, 'manifest.json')
+        self.manifest = load_manifest(self.fixtures_dir)
+        self._lock = threading.Lock()
+
+    def record_page(self, url: str, html: str, kind: str) -> str:
+        """Сохранение HTML страницы ('list' или 'resume')"""
+        key = fixture_key(url)
+        filename = f"pages/{_sha1(key)}.html"
+        with open(os.path.join(self.fixtures_dir, filename), 'w', encoding='utf-8') as f:
+            f.write(html)
+        with self._lock:
+            self.manifest[key] = {'file': filename, 'kind': kind}
+            self._save_manifest()
+        return key
+
+    def record_llm(self, messages: List[Dict], content: str, usage: Optional[Dict] = None):
+        """Сохранение ответа LLM на конкретный набор сообщений"""
+        filename = os.path.join(self.fixtures_dir, 'llm', f"{messages_key(messages)}.json")
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump({'content': content, 'usage': usage or {}}, f, ensure_ascii=False, indent=2)
+
+    def _save_manifest(self):
+        tmp_file = self.manifest_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, self.manifest_file)
+
+    def record_live(self, pages: int = 2, resumes_per_page: int = 5, delay: float = 1.0) -> Dict:
+        """
+        Запись страниц с work.ua по HTTP (без браузера)
+
+        Args:
+            pages: Количество страниц списка
+            resumes_per_page: Сколько резюме с каждой страницы сохранить
+            delay: Пауза между запросами к сайту
+        """
+        from bs4 import BeautifulSoup
+        from selector_registry import SelectorRegistry
+
+        card_selector = SelectorRegistry().get('resume_cards')
+        recorded = {'list': 0, 'resume': 0}
+        for page in range(1, pages + 1):
+            list_url = BASE_URL if page == 1 else f"{BASE_URL}?page={page}"
+            html = http_get(list_url)
+            self.record_page(list_url, html, 'list')
+            recorded['list'] += 1
+            print(f"📥 Страница списка {page}: {list_url}")
+
+            soup = BeautifulSoup(html, 'html.parser')
+            links = [card.select_one('h2 a') for card in soup.select(card_selector)]
+            for link in [link for link in links if link and link.get('href')][:resumes_per_page]:
+                time.sleep(delay)
+                resume_url = urljoin(SITE_ORIGIN, link['href'])
+                self.record_page(resume_url, http_get(resume_url), 'resume')
+                recorded['resume'] += 1
+            time.sleep(delay)
+        return recorded
+
+    def generate_synthetic(self, pages: int = 5, resumes_per_page: int = 14) -> Dict:
+        """Синтетические страницы в разметке work.ua (для прогонов без записи с сайта)"""
+        base_path = fixture_key(BASE_URL)
+        resume_id = 1000
+        for page in range(1, pages + 1):
+            cards = []
+            for _ in range(resumes_per_page):
+                resume_id += 1
+                cards.append(SYNTHETIC_CARD.format(resume_id=resume_id, salary=10000 + resume_id * 10))
+                self.record_page(f"{SITE_ORIGIN}/resumes/{resume_id}/", SYNTHETIC_RESUME.format(resume_id=resume_id), 'resume')
+            # Номера страниц как на work.ua: по ним pagination_planner читает число страниц
+            page_links = '\n'.join(
+                '<li class="active"><span>{0}</span></li>'.format(number) if number == page else
+                '<li><a href="{0}{1}">{2}</a></li>'.format(base_path, f'?page={number}' if number > 1 else '', number)
+                for number in range(1, pages + 1)
+            )
+            next_link = (f'<li><a href="{base_path}?page={page + 1}">Наступна</a></li>'
+                         if page < pages else '<li class="disabled"><span>Наступна</span></li>')
+            list_url = SITE_ORIGIN + base_path + (f'?page={page}' if page > 1 else '')
+            self.record_page(list_url, SYNTHETIC_LIST.format(cards='\n'.join(cards), page_links=page_links,
+                                                             next_link=next_link), 'list')
+        return {'list': pages, 'resume': pages * resumes_per_page}
+
+
+def load_manifest(fixtures_dir: str) -> Dict:
+    manifest_file = os.path.join(fixtures_dir, 'manifest.json')
+    if not os.path.exists(manifest_file):
+        return {}
+    with open(manifest_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def http_get(url: str, timeout: float = 30) -> str:
+    request = urllib.request.Request(url, headers={
+        'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36',
+        'Accept-Language': 'uk-UA,uk;q=0.9',
+    })
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return response.read().decode('utf-8', errors='replace')
+
+
+# ========================================
+# СЕРВЕР ВОСПРОИЗВЕДЕНИЯ
+# ========================================
+
+class ReplayServer:
+    """
+    Локальный сервер фикстур с задержкой и mock OpenAI
+
+    Абсолютные ссылки на work.ua в HTML заменяются на адрес сервера,
+    поэтому переходы по карточкам и пагинации остаются внутри фикстур.
+    """
+
+    def __init__(self, fixtures_dir: Optional[str] = None, port: Optional[int] = None,
+                 latency_ms: Optional[float] = None, jitter_ms: Optional[float] = None,
+                 llm_latency_ms: Optional[float] = None):
+        self.fixtures_dir = fixtures_dir or FIXTURES_CONFIG['dir']
+        self.port = port if port is not None else FIXTURES_CONFIG['port']
+        self.latency_ms = latency_ms if latency_ms is not None else FIXTURES_CONFIG['latency_ms']
+        self.jitter_ms = jitter_ms if jitter_ms is not None else FIXTURES_CONFIG['jitter_ms']
+        self.llm_latency_ms = llm_latency_ms if llm_latency_ms is not None else FIXTURES_CONFIG['llm_latency_ms']
+        self.manifest = load_manifest(self.fixtures_dir)
+        self.requests = {'pages': 0, 'llm': 0, 'llm_recorded': 0, 'not_found': 0}
+        self._server = None
+        self._cache: Dict[str, bytes] = {}
+
+    @property
+    def origin(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def url_for(self, url: str) -> str:
+        """Адрес страницы на сервере фикстур"""
+        return self.origin + fixture_key(url)
+
+    def _delay(self, base_ms: float):
+        delay_ms = base_ms + (random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0)
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000)
+
+    def _page_body(self, key: str) -> Optional[bytes]:
+        if key not in self._cache:
+            entry = self.manifest.get(key)
+            if not entry:
+                return None
+            with open(os.path.join(self.fixtures_dir, entry['file']), 'r', encoding='utf-8') as f:
+                html = f.read()
+            self._cache[key] = html.replace(SITE_ORIGIN, self.origin).encode('utf-8')
+        return self._cache[key]
+
+    def _chat_completion(self, payload: Dict) -> Dict:
+        """Ответ mock OpenAI: записанный по хешу сообщений или синтетический JSON резюме"""
+        messages = payload.get('messages', [])
+        recorded_file = os.path.join(self.fixtures_dir, 'llm', f"{messages_key(messages)}.json")
+        if os.path.exists(recorded_file):
+            with open(recorded_file, 'r', encoding='utf-8') as f:
+                recorded = json.load(f)
+            content, usage = recorded['content'], recorded.get('usage') or {}
+            self.requests['llm_recorded'] += 1
+        else:
+            # Пакетный запрос (llm_batching.py): по синтетическому резюме на каждый ID
+            batch_ids = BATCH_MARKER_RE.findall(str(messages[-1].get('content', ''))) if messages else []
+            if batch_ids:
+                content = json.dumps({batch_id: SYNTHETIC_LLM_RESUME for batch_id in batch_ids}, ensure_ascii=False)
+            else:
+                content = json.dumps(SYNTHETIC_LLM_RESUME, ensure_ascii=False)
+            usage = {}
+
+        # Обрыв по max_tokens (~4 символа на токен), как у настоящего API
+        finish_reason = 'stop'
+        max_tokens = payload.get('max_tokens')
+        if max_tokens and len(content) > max_tokens * 4:
+            content = content[:max_tokens * 4]
+            finish_reason = 'length'
+
+        prompt_chars = sum(len(str(message.get('content', ''))) for message in messages)
+        usage = {
+            'prompt_tokens': usage.get('prompt_tokens', prompt_chars // 4),
+            'completion_tokens': usage.get('completion_tokens', len(content) // 4),
+        }
+        usage['total_tokens'] = usage['prompt_tokens'] + usage['completion_tokens']
+        return {
+            'id': f"chatcmpl-replay-{self.requests['llm']}",
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': payload.get('model', 'replay'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': finish_reason
+            }],
+            'usage': usage
+        }
+
+    @staticmethod
+    def _stream_body(completion: Dict, payload: Dict, chunk_chars: int = 64) -> bytes:
+        """Тот же ответ в формате stream=True (server-sent events по фрагментам)"""
+        choice = completion['choices'][0]
+        content = choice['message']['content']
+        base = {key: completion[key] for key in ('id', 'created', 'model')}
+        base['object'] = 'chat.completion.chunk'
+
+        events = []
+        for start in range(0, len(content), chunk_chars) or [0]:
+            events.append({**base, 'choices': [{'index': 0, 'delta': {'content': content[start:start + chunk_chars]},
+                                                'finish_reason': None}]})
+        events.append({**base, 'choices': [{'index': 0, 'delta': {}, 'finish_reason': choice['finish_reason']}]})
+        if (payload.get('stream_options') or {}).get('include_usage'):
+            events.append({**base, 'choices': [], 'usage': completion['usage']})
+
+        lines = [f"data: {json.dumps(event, ensure_ascii=False)}\n\n" for event in events]
+        lines.append("data: [DONE]\n\n")
+        return ''.join(lines).encode('utf-8')
+
+    def start(self):
+        replay = self
+
+        class ReplayHandler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def _send(self, status: int, body: bytes, content_type: str):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                replay._delay(replay.latency_ms)
+                body = replay._page_body(self.path)
+                if body is None:
+                    replay.requests['not_found'] += 1
+                    self._send(404, b'not found', 'text/plain')
+                    return
+                replay.requests['pages'] += 1
+                self._send(200, body, 'text/html; charset=utf-8')
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                payload = json.loads(self.rfile.read(length) or b'{}')
+                if not self.path.rstrip('/').endswith('/chat/completions'):
+                    self._send(404, b'{}', 'application/json')
+                    return
+                replay._delay(replay.llm_latency_ms)
+                replay.requests['llm'] += 1
+                completion = replay._chat_completion(payload)
+                if payload.get('stream'):
+                    self._send(200, replay._stream_body(completion, payload), 'text/event-stream')
+                    return
+                body = json.dumps(completion, ensure_ascii=False).encode('utf-8')
+                self._send(200, body, 'application/json')
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', self.port), ReplayHandler)
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+# ========================================
+# СИНТЕТИЧЕСКИЕ СТРАНИЦЫ
+# ========================================
+
+SYNTHETIC_CARD = """
+<div class="card card-hover card-search resume-link card-visited wordwrap">
+  <h2 class="mt-0 mb-0"><a href="https://www.work.ua/resumes/{resume_id}/">Бухгалтер {resume_id}</a></h2>
+  <p class="h5 strong-600 mt-xs mb-0 nowrap">{salary} грн</p>
+  <p class="mt-xs mb-0"><span class="strong-600">Кандидат {resume_id}</span>, 35 років, Київ</p>
+  <ul class="mt-lg mb-0"><li>Бухгалтер, 3 роки</li></ul>
+  <p class="mb-0 mt-xs text-default-7">Вища освіта · Повна зайнятість</p>
+</div>"""
+
+SYNTHETIC_LIST = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Резюме бухгалтер — Work.ua</title></head>
+<body>
+<div id="pjax-resume-list">
+{cards}
+<nav><ul class="pagination">
+{page_links}
+{next_link}
+</ul></nav>
+</div>
+</body></html>"""
+
+SYNTHETIC_RESUME = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Резюме {resume_id} — Work.ua</title></head>
+<body>
+<div class="card wordwrap" id="resume_{resume_id}">
+<h1>Бухгалтер {resume_id}</h1>
+<p>Кандидат {resume_id}, 35 років, Київ</p>
+<h2>Досвід роботи</h2>
+<p>Бухгалтер, ТОВ Приклад<br>(3 роки 2 місяці)</p>
+<h2>Освіта</h2>
+<p>КНЕУ, облік і аудит</p>
+<h2>Знання і навички</h2>
+<ul><li>1С: Бухгалтерія</li><li>Excel</li><li>M.E.Doc</li></ul>
+
+<h2>Додаткова інформація</h2>
+<p>Відповідальність, уважність</p>
+</div>
+</body></html>"""
+
+# Строка-разделитель резюме в пакетном промпте (llm_batching.RESUME_MARKER)
+BATCH_MARKER_RE = re.compile(r'^### РЕЗЮМЕ (\S+)$', re.MULTILINE)
+
+SYNTHETIC_LLM_RESUME = {
+    "full_name": "Кандидат",
+    "position": "Бухгалтер",
+    "salary": "15000 грн",
+    "age": "35 років",
+    "location": "Київ",
+    "education": ["КНЕУ, облік і аудит"],
+    "experience": ["Бухгалтер, ТОВ Приклад (3 роки 2 місяці)"],
+    "professional_skills": ["1С: Бухгалтерія", "Excel", "M.E.Doc"],
+    "personal_skills": ["Відповідальність"],
+    "languages": ["Українська"],
+    "additional_info": "",
+    "detailed_description": ""
+}
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else 'serve'
+    if command == 'record':
+        pages = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+        print(f"✅ Записано: {FixtureRecorder().record_live(pages)}")
+    elif command == 'synthetic':
+        pages = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+        print(f"✅ Сгенерировано: {FixtureRecorder().generate_synthetic(pages)}")
+    else:
+        server = ReplayServer().start()
+        print(f"🎞️ Фикстуры: {server.origin}{fixture_key(BASE_URL)}")
+        print(f"🤖 Mock OpenAI: {server.origin}/v1 (OPENAI_BASE_URL)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            server.stop()
@@ -2,17 +2,60 @@
 Полный парсер одной страницы Work.ua с сохранением в базу данных
 """
 
+import argparse
 import os
 import time
+from config import LLM_BATCH_CONFIG, NEAR_DUPLICATE_CONFIG
+from llm_batch_jobs import BatchJobStore
+from near_duplicates import NearDuplicateIndex
 from work_ua_parser import WorkUaParser
 from database_manager import ResumeDatabase
 
-def process_full_page():
-    """Полная обработка одной страницы с LLM парсингом и сохранением в БД"""
+def save_llm_resume(parser, db, resume_url, card_info, llm_details, llm_time, method='LLM_OpenAI_GPT35'):
+    """Карточка + данные LLM -> запись в базу; True при успехе"""
+    # Объединяем карточку и LLM данные
+    full_resume_data = {
+        'card_info': card_info,
+        'llm_details': llm_details,
+        'processing_info': {
+            'processed_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'llm_processing_time': round(llm_time, 2),
+            'method': method
+        }
+    }
+    
+    # Сохраняем в базу данных
+    print("💾 Сохранение в базу данных...")
+    with parser.metrics.timer('db_write_seconds', target='sqlite'):
+        saved = db.save_resume(resume_url, full_resume_data)
+    if not saved:
+        print("❌ Ошибка сохранения в базу")
+        return False
+    
+    print("✅ Сохранено в базу")
+    # Краткая информация
+    name = llm_details.get('full_name', 'Не указано')
+    position = llm_details.get('position', 'Не указано')
+    print(f"👤 {name} - {position}")
+    return True
+
+def process_full_page(batch=None, defer_llm=False, llm_budget=None):
+    """
+    Полная обработка одной страницы с LLM парсингом и сохранением в БД
+    
+    Args:
+        batch: Пакетный режим LLM (llm_batching.py) - тексты резюме собираются
+            при обходе, извлечение идет несколькими резюме на запрос
+        defer_llm: Только поставить промпты в очередь пакетных заданий
+            (llm_batch_jobs.py), без запросов к LLM во время обхода
+        llm_budget: Лимит стоимости LLM на запуск, USD (по умолчанию из LLM_USAGE_CONFIG)
+    """
+    if batch is None:
+        batch = LLM_BATCH_CONFIG['enabled']
     
     # Проверяем API ключ
     api_key = os.getenv('OPENAI_API_KEY')
-    if not api_key:
+    if not api_key and not defer_llm:
         print("❌ Установите переменную окружения OPENAI_API_KEY")
         print("   export OPENAI_API_KEY='your-api-key-here'")
         return False
@@ -22,11 +65,21 @@ def process_full_page():
     
     # Инициализация
     parser = WorkUaParser()
+    if llm_budget is not None:
+        parser.llm_usage.budget_usd = llm_budget
     db = ResumeDatabase("work_ua_resumes.db")
+    job_store = BatchJobStore(db.db_path) if defer_llm else None
+    near_duplicates = (NearDuplicateIndex(db, logger=parser.logger, metrics=parser.metrics)
+                       if NEAR_DUPLICATE_CONFIG['enabled'] else None)
     
     processed_count = 0
     failed_count = 0
     skipped_count = 0
+    queued_count = 0
+    duplicate_count = 0
+    pending_batch = []  # (URL, карточка, результат проверки на дубликат) для пакетного режима
+    held_duplicates = []  # Копии резюме из пакета: в кластер - когда образец сохранен
+    snapshots = []
     
     try:
         # Инициализируем драйвер
@@ -94,52 +147,68 @@ def process_full_page():
                 
                 print("✅ Перешли в резюме")
                 
-                # Извлекаем детальную информацию с помощью LLM
-                print("🤖 Извлечение данных через LLM...")
-                start_time = time.time()
-                
-                llm_details = parser.parse_resume_with_llm()
+                # Текст страницы снимается один раз: для проверки на дубликат и для LLM
+                snapshot = parser.snapshot_resume_for_llm()
+                duplicate = None
+                if snapshot and near_duplicates:
+                    duplicate = near_duplicates.check(resume_url, snapshot['text'])
                 
-                llm_time = time.time() - start_time
-                
-                if llm_details:
-                    print(f"🎉 LLM успешно извлек данные за {llm_time:.1f}с")
+                if duplicate and duplicate['duplicate_of']:
+                    # То же резюме под другим URL: только в кластер, без LLM и записи
+                    if duplicate['pending']:
+                        held_duplicates.append(duplicate)  # Образец еще ждет извлечения в пакете
+                    else:
+                        near_duplicates.add(duplicate)
+                    print(f"🧬 Почти дубликат {duplicate['duplicate_of']} ({duplicate['similarity']:.0%}), "
+                          f"кластер {duplicate['cluster_id']}, пропускаем...")
+                    duplicate_count += 1
+                elif defer_llm:
+                    # Промпт в очередь ночного пакета, ответ придет через Batch API
+                    if snapshot and job_store.queue([(resume_url, card_info, snapshot['text'])]):
+                        print("📝 Резюме поставлено в очередь пакетного извлечения")
+                        queued_count += 1
+                        # В базу подпись запишет llm_batch_jobs.py после сохранения резюме
+                        if duplicate:
+                            near_duplicates.hold(duplicate)
+                    else:
+                        print("❌ Не удалось получить текст резюме")
+                        failed_count += 1
+                elif batch:
+                    # Текст резюме в пакет, извлечение после обхода страницы
+                    if snapshot:
+                        snapshots.append(snapshot)
+                        pending_batch.append((snapshot['url'], resume_url, card_info, duplicate))
+                        # Только в памяти: копия в этом же пакете не уйдет в LLM второй раз
+                        if duplicate:
+                            near_duplicates.hold(duplicate)
+                    else:
+                        print("❌ Не удалось получить текст резюме")
+                        failed_count += 1
+                else:
+                    # Извлекаем детальную информацию с помощью LLM
+                    print("🤖 Извлечение данных через LLM...")
+                    start_time = time.time()
+                    
+                    llm_details = parser.parse_resume_with_llm(snapshot) if snapshot else None
                     
-                    # Объединяем карточку и LLM данные
-                    full_resume_data = {
-                        'card_info': card_info,
-                        'llm_details': llm_details,
-                        'processing_info': {
-                            'processed_at': time.strftime('%Y-%m-%d %H:%M:%S'),
-                            'llm_processing_time': round(llm_time, 2),
-                            'method': 'LLM_OpenAI_GPT35'
-                        }
-                    }
+                    llm_time = time.time() - start_time
                     
-                    # Сохраняем в базу данных
-                    print("💾 Сохранение в базу данных...")
-                    if db.save_resume(resume_url, full_resume_data):
-                        print("✅ Сохранено в базу")
-                        processed_count += 1
-                        
-                        # Краткая информация
-                        name = llm_details.get('full_name', 'Не указано')
-                        position = llm_details.get('position', 'Не указано')
-                        print(f"👤 {name} - {position}")
-                        
+                    if llm_details:
+                        print(f"🎉 LLM успешно извлек данные за {llm_time:.1f}с")
+                        if save_llm_resume(parser, db, resume_url, card_info, llm_details, llm_time):
+                            processed_count += 1
+                            if duplicate:
+                                near_duplicates.add(duplicate)
+                        else:
+                            failed_count += 1
                     else:
-                        print("❌ Ошибка сохранения в базу")
+                        print("❌ LLM не смог извлечь данные")
                         failed_count += 1
-                else:
-                    print("❌ LLM не смог извлечь данные")
-                    failed_count += 1
                 
                 # Возвращаемся к списку
                 print("🔙 Возврат к списку...")
                 if parser.go_back():
                     print("✅ Вернулись к списку")
-                    # Небольшая пауза для стабильности
-                    time.sleep(1)
                 else:
                     print("⚠️ Проблема с возвратом к списку")
                     # Переоткрываем страницу
@@ -158,6 +227,33 @@ def process_full_page():
                 except:
                     parser.open_page()
         
+        if pending_batch:
+            print(f"\n📦 Пакетное извлечение {len(pending_batch)} резюме через LLM...")
+            start_time = time.time()
+            batch_results = parser.parse_resumes_with_llm_batch(snapshots)
+            llm_time = (time.time() - start_time) / len(pending_batch)
+            
+            for page_url, resume_url, card_info, duplicate in pending_batch:
+                llm_details = batch_results.get(page_url)
+                if llm_details and save_llm_resume(parser, db, resume_url, card_info, llm_details, llm_time,
+                                                   method='LLM_OpenAI_GPT35_batch'):
+                    processed_count += 1
+                    if duplicate:
+                        near_duplicates.add(duplicate)
+                else:
+                    failed_count += 1
+                    if duplicate:
+                        near_duplicates.release(resume_url)
+            
+            # Копии - в кластер сохраненного образца; образец не сохранен - копия будет проверена в следующий запуск
+            for duplicate in held_duplicates:
+                if duplicate['duplicate_of'] in near_duplicates.signatures:
+                    near_duplicates.add(duplicate)
+            parser.extraction_backend.log_summary(parser.logger)
+        parser.llm_usage.log_summary(parser.logger)
+        if near_duplicates:
+            near_duplicates.log_summary(parser.logger)
+        
         # Финальная статистика
         print(f"\n{'='*70}")
         print(f"🎯 ИТОГИ ПОЛНОЙ ОБРАБОТКИ СТРАНИЦЫ")
@@ -165,8 +261,16 @@ def process_full_page():
         print(f"✅ Успешно обработано: {processed_count} резюме")
         print(f"❌ Ошибки обработки: {failed_count} резюме")
         print(f"⏭️ Пропущено: {skipped_count} резюме")
+        if duplicate_count:
+            print(f"🧬 Почти дубликаты (без LLM): {duplicate_count} резюме (python near_duplicates.py clusters)")
+        if queued_count:
+            print(f"📝 В очереди пакетного извлечения: {queued_count} резюме (python llm_batch_jobs.py run)")
         print(f"📊 Всего найдено: {total_cards} резюме")
         
+        # Метрики по этапам (драйвер, страницы, LLM, запись в БД)
+        parser.metrics.log_summary(parser.logger)
+        print(f"📈 Метрики сохранены: {parser.metrics.export_json()}")
+        
         # Статистика базы данных
         db_stats = db.get_stats()
         print(f"\n💾 СТАТИСТИКА БАЗЫ ДАННЫХ:")
@@ -181,7 +285,7 @@ def process_full_page():
             if export_file:
                 print(f"✅ Данные экспортированы в: {export_file}")
         
-        return processed_count > 0
+        return processed_count > 0 or queued_count > 0
         
     except Exception as e:
         print(f"❌ Критическая ошибка: {e}")
@@ -193,10 +297,19 @@ def process_full_page():
 
 def main():
     """Главная функция"""
+    arg_parser = argparse.ArgumentParser(description="Полный парсер одной страницы Work.ua")
+    arg_parser.add_argument('--batch', action='store_true', default=None,
+                            help="Несколько резюме в одном запросе к LLM")
+    arg_parser.add_argument('--defer-llm', action='store_true',
+                            help="Только очередь промптов для llm_batch_jobs.py, без запросов к LLM")
+    arg_parser.add_argument('--llm-budget', type=float, default=None,
+                            help="Лимит стоимости LLM на запуск, USD (дальше - извлечение по правилам)")
+    args = arg_parser.parse_args()
+    
     print("🚀 ЗАПУСК ПОЛНОГО ПАРСЕРА WORK.UA")
     print("=" * 70)
     
-    success = process_full_page()
+    success = process_full_page(batch=args.batch, defer_llm=args.defer_llm, llm_budget=args.llm_budget)
     
     if success:
         print(f"\n🎉 ПАРСИНГ ЗАВЕРШЕН УСПЕШНО!")
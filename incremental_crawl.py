@@ -0,0 +1,87 @@
+"""
+Инкрементальный обход: только новые резюме с прошлого запуска
+
+work.ua сортирует список по дате обновления, поэтому уже обработанные
+резюме идут сплошным хвостом. Карточка считается известной, если ее ID есть в
+resume_seen и отпечаток (заголовок, зарплата, данные кандидата, дата) не
+изменился. После K известных карточек подряд пагинация останавливается.
+"""
+
+import hashlib
+import re
+from typing import Dict, List, Optional, Tuple
+
+from config import INCREMENTAL_CONFIG
+from database_manager import ResumeDatabase
+
+RESUME_ID_RE = re.compile(r'/resumes/(\d+)')
+
+FINGERPRINT_FIELDS = ('title', 'salary', 'personal_info', 'posted', 'education_employment')
+
+
+def resume_id_from_url(url: str) -> str:
+    """ID резюме из URL (/resumes/1234567/), иначе сам URL"""
+    match = RESUME_ID_RE.search(url or '')
+    return match.group(1) if match else (url or '')
+
+
+def card_fingerprint(card_info: Dict) -> str:
+    """Отпечаток видимых в карточке полей: изменился - резюме обновлено"""
+    parts = [str(card_info.get(field) or '') for field in FINGERPRINT_FIELDS]
+    parts.extend(card_info.get('experience') or [])
+    return hashlib.sha1('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+
+class IncrementalCrawl:
+    """Решение по странице списка: какие карточки обрабатывать и пора ли остановиться"""
+
+    def __init__(self, db: Optional[ResumeDatabase] = None, known_streak: Optional[int] = None, logger=None):
+        self.db = db or ResumeDatabase(INCREMENTAL_CONFIG['database_file'])
+        self.known_streak = known_streak or INCREMENTAL_CONFIG['known_streak']
+        self.logger = logger
+        self.stats = {'new': 0, 'changed': 0, 'known': 0}
+
+    @staticmethod
+    def _card_info(card: Dict) -> Dict:
+        # Карточки ULTIMATE парсера - обертка с full_info, остальные - сам card_info
+        return card.get('full_info') or card
+
+    def classify_page(self, cards: List[Dict]) -> Tuple[List[Dict], bool]:
+        """
+        Карточки страницы в порядке списка
+
+        Returns:
+            (новые или измененные карточки, нужно ли остановить пагинацию)
+        """
+        infos = [self._card_info(card) for card in cards]
+        ids = [info.get('resume_id') or resume_id_from_url(info.get('url', '')) for info in infos]
+        seen = self.db.get_seen_fingerprints([resume_id for resume_id in ids if resume_id])
+
+        to_process = []
+        streak = 0
+        stop = False
+        for card, info, resume_id in zip(cards, infos, ids):
+            previous = seen.get(resume_id)
+            if previous is not None and previous == card_fingerprint(info):
+                self.stats['known'] += 1
+                streak += 1
+                if streak >= self.known_streak:
+                    stop = True
+                continue
+            self.stats['changed' if previous is not None else 'new'] += 1
+            streak = 0
+            to_process.append(card)
+        return to_process, stop
+
+    def mark_processed(self, card: Dict):
+        """Карточка обработана - в следующий раз она известна"""
+        info = self._card_info(card)
+        url = info.get('url', '')
+        self.db.mark_seen([(info.get('resume_id') or resume_id_from_url(url), url,
+                            card_fingerprint(info), info.get('posted', ''))])
+
+    def log_summary(self, logger=None):
+        logger = logger or self.logger
+        if logger:
+            logger.info(f"🆕 ИНКРЕМЕНТАЛЬНО: новых {self.stats['new']}, измененных {self.stats['changed']}, "
+                        f"известных {self.stats['known']} (стоп после {self.known_streak} подряд)")
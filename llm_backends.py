@@ -0,0 +1,242 @@
+"""
+Модели извлечения резюме за общим интерфейсом
+
+    openai           - OpenAI API (StructuredExtractor, пакеты - BatchExtractor)
+    local_endpoint   - OpenAI-совместимый локальный сервер на CPU (llama.cpp
+                       server, vLLM, Ollama): тот же промпт и разбор JSON, без
+                       оплаты токенов; пакет - параллельные запросы в слоты сервера
+    token_classifier - дообученная модель разметки токенов (transformers):
+                       загружается один раз на процесс и держится в памяти,
+                       фрагменты всех резюме пакета размечаются одним вызовом
+
+Все бэкенды возвращают (поля, сведения) как StructuredExtractor.extract,
+parse_resume_with_llm() и parse_resumes_with_llm_batch() работают через
+WorkUaParser.extraction_backend.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from config import EXTRACTION_BACKEND_CONFIG
+from llm_extraction import RESUME_FIELDS, StructuredExtractor, rule_based_fields
+
+
+class ExtractionBackend:
+    """Интерфейс модели извлечения"""
+
+    name = 'base'
+    label = ''  # Значение parsed_with в записи резюме
+
+    def extract(self, resume_text: str, resume_url: Optional[str] = None) -> Tuple[Dict, Dict]:
+        raise NotImplementedError
+
+    def extract_many(self, items: List[Tuple[str, str]]) -> Dict[str, Tuple[Dict, Dict]]:
+        """{ключ: (поля, сведения)} для [(ключ, текст)]; по умолчанию - по одному"""
+        results = {}
+        for key, text in items:
+            data, info = self.extract(text, key)
+            if data:
+                results[key] = (data, info)
+        return results
+
+    def log_summary(self, logger):
+        pass
+
+
+class OpenAIBackend(ExtractionBackend):
+    """Удаленный путь: OpenAI API"""
+
+    name = 'openai'
+    label = 'OpenAI GPT-3.5'
+
+    def __init__(self, extractor: StructuredExtractor, batch_extractor=None):
+        self.extractor = extractor
+        self.batch_extractor = batch_extractor
+
+    def extract(self, resume_text: str, resume_url: Optional[str] = None) -> Tuple[Dict, Dict]:
+        return self.extractor.extract(resume_text, resume_url)
+
+    def extract_many(self, items: List[Tuple[str, str]]) -> Dict[str, Tuple[Dict, Dict]]:
+        if self.batch_extractor is None:
+            return super().extract_many(items)
+        return self.batch_extractor.extract_many(items)
+
+    def log_summary(self, logger):
+        if self.batch_extractor is not None:
+            self.batch_extractor.log_summary(logger)
+
+
+class LocalEndpointBackend(ExtractionBackend):
+    """OpenAI-совместимый сервер локальной модели (llama.cpp / vLLM / Ollama)"""
+
+    name = 'local_endpoint'
+
+    def __init__(self, metrics=None, logger=None, base_url: Optional[str] = None, model: Optional[str] = None,
+                 parallel: Optional[int] = None):
+        settings = EXTRACTION_BACKEND_CONFIG['local_endpoint']
+        self.base_url = base_url or settings['base_url']
+        self.model = model or settings['model']
+        self.parallel = parallel or settings['parallel']
+        self.label = f'local {self.model}'
+        self.logger = logger
+        self._local = threading.local()
+        # Клиент на поток: запросы пакета идут параллельно в слоты сервера
+        self._extractor_args = dict(metrics=metrics, logger=logger, model=self.model,
+                                    max_tokens=settings['max_tokens'], json_mode=settings['json_mode'])
+
+    @property
+    def extractor(self) -> StructuredExtractor:
+        if not hasattr(self._local, 'extractor'):
+            import openai
+            client = openai.OpenAI(base_url=self.base_url, api_key='local')
+            # Учет стоимости не ведется: токены локальной модели бесплатны
+            self._local.extractor = StructuredExtractor(client=client, **self._extractor_args)
+        return self._local.extractor
+
+    def extract(self, resume_text: str, resume_url: Optional[str] = None) -> Tuple[Dict, Dict]:
+        return self.extractor.extract(resume_text, resume_url)
+
+    def extract_many(self, items: List[Tuple[str, str]]) -> Dict[str, Tuple[Dict, Dict]]:
+        def run(item):
+            key, text = item
+            try:
+                return key, self.extract(text, key)
+            except Exception as e:
+                if self.logger:
+                    self.logger.error("❌ Ошибка локальной модели (%s): %s", key, e)
+                return key, ({}, {})
+
+        with ThreadPoolExecutor(max_workers=self.parallel) as pool:
+            return {key: result for key, result in pool.map(run, items) if result[0]}
+
+
+# Модели разметки токенов, загруженные в процессе: {(модель, batch_size): pipeline}
+_PIPELINES = {}
+_PIPELINES_LOCK = threading.Lock()
+
+
+def load_token_classifier(model: str, batch_size: int, threads: Optional[int] = None):
+    """Pipeline token-classification на CPU, один раз на процесс"""
+    key = (model, batch_size)
+    with _PIPELINES_LOCK:
+        if key not in _PIPELINES:
+            try:
+                from transformers import pipeline
+            except ImportError:
+                raise RuntimeError("Для token_classifier установите transformers и torch: "
+                                   "pip install transformers torch")
+            if threads:
+                import torch
+                torch.set_num_threads(threads)
+            _PIPELINES[key] = pipeline('token-classification', model=model, aggregation_strategy='simple',
+                                       device=-1, batch_size=batch_size)
+        return _PIPELINES[key]
+
+
+def split_chunks(text: str, max_chars: int) -> List[str]:
+    """Фрагменты по целым строкам, не длиннее max_chars (окно модели)"""
+    chunks, current = [], ''
+    for line in text.split('\n'):
+        if current and len(current) + len(line) + 1 > max_chars:
+            chunks.append(current)
+            current = ''
+        current = f'{current}\n{line}' if current else line[:max_chars]
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class TokenClassifierBackend(ExtractionBackend):
+    """
+    Дообученная модель разметки токенов на CPU
+
+    Короткие поля (имя, должность, зарплата, навыки...) - сущности модели по
+    EXTRACTION_BACKEND_CONFIG['token_classifier']['label_map']; секции опыта и
+    образования - по заголовкам страницы (rule_based_fields).
+    """
+
+    name = 'token_classifier'
+
+    def __init__(self, metrics=None, logger=None, model: Optional[str] = None):
+        settings = EXTRACTION_BACKEND_CONFIG['token_classifier']
+        self.model = model or settings['model']
+        self.batch_size = settings['batch_size']
+        self.max_chars = settings['max_chars']
+        self.label_map = settings['label_map']
+        self.label = f'token classifier {self.model}'
+        self.metrics = metrics
+        self.logger = logger
+        self.stats = {'resumes': 0, 'chunks': 0, 'seconds': 0.0}
+        # Загрузка при создании: первый запрос не платит за старт модели
+        started_at = time.perf_counter()
+        self.pipeline = load_token_classifier(self.model, self.batch_size, settings['threads'])
+        if logger:
+            logger.info("🧠 Модель %s готова за %.1fс", self.model, time.perf_counter() - started_at)
+
+    def _fields(self, resume_text: str, entities: List[Dict]) -> Dict:
+        fields = rule_based_fields(resume_text)
+        found = {}
+        for entity in entities:
+            field = self.label_map.get(entity.get('entity_group'))
+            value = (entity.get('word') or '').strip()
+            if not field or not value:
+                continue
+            if RESUME_FIELDS[field][0] == 'array':
+                values = found.setdefault(field, [])
+                if value not in values:
+                    values.append(value)
+            elif field not in found:
+                found[field] = value
+        fields.update(found)
+        return fields
+
+    def extract_many(self, items: List[Tuple[str, str]]) -> Dict[str, Tuple[Dict, Dict]]:
+        started_at = time.perf_counter()
+        chunks, owners = [], []
+        for index, (_, text) in enumerate(items):
+            for chunk in split_chunks(text, self.max_chars):
+                chunks.append(chunk)
+                owners.append(index)
+
+        entities = [[] for _ in items]
+        if chunks:
+            for owner, chunk_entities in zip(owners, self.pipeline(chunks)):
+                entities[owner].extend(chunk_entities)
+
+        results = {}
+        for (key, text), resume_entities in zip(items, entities):
+            data = self._fields(text, resume_entities)
+            results[key] = (data, {'requests': 0, 'truncated': False, 'continued_fields': [],
+                                   'prompt_tokens': 0, 'completion_tokens': 0,
+                                   'missing': [field for field in RESUME_FIELDS if not data.get(field)]})
+
+        elapsed = time.perf_counter() - started_at
+        self.stats['resumes'] += len(items)
+        self.stats['chunks'] += len(chunks)
+        self.stats['seconds'] += elapsed
+        if self.metrics:
+            self.metrics.observe('llm_latency_seconds', elapsed, purpose='token_classifier')
+        return results
+
+    def extract(self, resume_text: str, resume_url: Optional[str] = None) -> Tuple[Dict, Dict]:
+        return self.extract_many([(resume_url or '', resume_text)])[resume_url or '']
+
+    def log_summary(self, logger):
+        if self.stats['resumes']:
+            logger.info(f"🧠 {self.label}: {self.stats['resumes']} резюме, {self.stats['chunks']} фрагментов "
+                        f"за {self.stats['seconds']:.1f}с "
+                        f"({self.stats['resumes'] / self.stats['seconds'] if self.stats['seconds'] else 0:.1f} резюме/с)")
+
+
+def make_extraction_backend(parser, name: Optional[str] = None) -> ExtractionBackend:
+    """Бэкенд для WorkUaParser (OpenAI - через его llm_extractor и batch_extractor)"""
+    name = name or EXTRACTION_BACKEND_CONFIG['backend']
+    if name == 'openai':
+        return OpenAIBackend(parser.llm_extractor, parser.batch_extractor)
+    if name == 'local_endpoint':
+        return LocalEndpointBackend(metrics=parser.metrics, logger=parser.logger)
+    if name == 'token_classifier':
+        return TokenClassifierBackend(metrics=parser.metrics, logger=parser.logger)
+    raise ValueError(f"Неизвестный бэкенд извлечения: {name} (openai, local_endpoint, token_classifier)")
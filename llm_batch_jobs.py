@@ -0,0 +1,581 @@
+#!/usr/bin/env python3
+"""
+Отложенное извлечение резюме через пакетные задания (в стиле OpenAI Batch API)
+
+Для ночного полного обхода ответы в реальном времени не нужны: промпты
+резюме копятся в очереди (таблица llm_queue в базе резюме), пишутся в JSONL
+файл пакета и отправляются через подключаемый бэкенд. Результаты забираются
+опросом и сохраняются в ResumeDatabase.
+
+Состояние пакетов хранится в таблице llm_batches, поэтому прерванный запуск
+продолжается: неотправленные пакеты отправляются повторно, по завершенным
+дочитываются результаты (уже сохраненные резюме пропускаются), резюме без
+ответа возвращаются в очередь.
+
+Бэкенды:
+    openai - OpenAI Batch API (files + batches, /v1/chat/completions)
+    local  - файловый исполнитель без сети: тот же формат JSONL, ответы по
+             правилам (llm_extraction.rule_based_fields); для проверки потока
+
+Использование:
+    python llm_batch_jobs.py queue --fixtures fixtures    # промпты из записанных страниц
+    python full_page_parser.py --defer-llm                # или при обходе сайта
+    python llm_batch_jobs.py submit
+    python llm_batch_jobs.py poll --wait
+    python llm_batch_jobs.py run --backend local          # submit + poll --wait
+    python llm_batch_jobs.py status
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import time
+import uuid
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from config import LLM_BATCH_JOBS_CONFIG, LLM_EXTRACTION_CONFIG, NEAR_DUPLICATE_CONFIG
+from database_manager import ResumeDatabase
+from llm_extraction import RESUME_FIELDS, IncrementalJsonParser, build_messages, rule_based_fields
+
+CHAT_ENDPOINT = '/v1/chat/completions'
+
+# Статусы Batch API, после которых пакет больше не изменится
+TERMINAL_STATUSES = ('completed', 'failed', 'expired', 'cancelled')
+
+
+class BatchJobStore:
+    """Очередь промптов и пакеты в файле базы резюме"""
+
+    def __init__(self, db_path: Optional[str] = None, max_attempts: Optional[int] = None):
+        self.db_path = db_path or LLM_BATCH_JOBS_CONFIG['database_file']
+        self.max_attempts = max_attempts or LLM_BATCH_JOBS_CONFIG['max_attempts']
+        self.init_store()
+
+    def connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def init_store(self):
+        with self.connect() as conn:
+            conn.executescript('''
+                CREATE TABLE IF NOT EXISTS llm_queue (
+                    queue_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    resume_url TEXT UNIQUE NOT NULL,
+                    card_info TEXT,
+                    prompt_text TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    batch_id TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    error TEXT,
+                    updated_at REAL
+                );
+                CREATE INDEX IF NOT EXISTS idx_llm_queue_status ON llm_queue (status, batch_id);
+                CREATE TABLE IF NOT EXISTS llm_batches (
+                    batch_id TEXT PRIMARY KEY,
+                    backend TEXT NOT NULL,
+                    remote_id TEXT,
+                    input_file TEXT NOT NULL,
+                    requests INTEGER NOT NULL,
+                    status TEXT NOT NULL,
+                    created_at REAL,
+                    updated_at REAL
+                );
+            ''')
+
+    def queue(self, items: Iterable[Tuple[str, Dict, str]]) -> int:
+        """
+        Промпты резюме в очередь: (resume_url, card_info, текст промпта)
+
+        Уже отправленные в пакет резюме не трогаются; остальные (в т.ч.
+        обработанные ранее) снова становятся pending с новым текстом.
+        """
+        now = time.time()
+        with self.connect() as conn:
+            before = conn.total_changes
+            conn.executemany('''
+                INSERT INTO llm_queue (resume_url, card_info, prompt_text, updated_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(resume_url) DO UPDATE SET
+                    card_info = excluded.card_info, prompt_text = excluded.prompt_text,
+                    status = 'pending', batch_id = NULL, attempts = 0, error = NULL,
+                    updated_at = excluded.updated_at
+                WHERE llm_queue.status != 'submitted'
+            ''', [(url, json.dumps(card_info or {}, ensure_ascii=False), text, now)
+                  for url, card_info, text in items])
+            return conn.total_changes - before
+
+    def create_batch(self, batch_id: str, backend: str, input_file: str, limit: int) -> List[sqlite3.Row]:
+        """Pending резюме (до limit) -> новый пакет; одна транзакция"""
+        now = time.time()
+        with self.connect() as conn:
+            rows = conn.execute('''
+                SELECT queue_id, resume_url, prompt_text FROM llm_queue
+                WHERE status = 'pending' ORDER BY queue_id LIMIT ?
+            ''', (limit,)).fetchall()
+            if not rows:
+                return []
+            conn.executemany('''
+                UPDATE llm_queue SET status = 'submitted', batch_id = ?, updated_at = ? WHERE queue_id = ?
+            ''', [(batch_id, now, row['queue_id']) for row in rows])
+            conn.execute('''
+                INSERT INTO llm_batches (batch_id, backend, input_file, requests, status, created_at, updated_at)
+                VALUES (?, ?, ?, ?, 'created', ?, ?)
+            ''', (batch_id, backend, input_file, len(rows), now, now))
+            return rows
+
+    def update_batch(self, batch_id: str, **fields):
+        fields['updated_at'] = time.time()
+        assignments = ', '.join(f'{name} = ?' for name in fields)
+        with self.connect() as conn:
+            conn.execute(f'UPDATE llm_batches SET {assignments} WHERE batch_id = ?',
+                         list(fields.values()) + [batch_id])
+
+    def open_batches(self) -> List[sqlite3.Row]:
+        """Пакеты, результаты которых еще не сохранены"""
+        with self.connect() as conn:
+            return conn.execute('''
+                SELECT * FROM llm_batches WHERE status != 'ingested' ORDER BY created_at
+            ''').fetchall()
+
+    def batch_items(self, batch_id: str) -> Dict[str, sqlite3.Row]:
+        """Резюме пакета, еще ожидающие результата: {custom_id: строка очереди}"""
+        with self.connect() as conn:
+            rows = conn.execute('''
+                SELECT * FROM llm_queue WHERE batch_id = ? AND status = 'submitted'
+            ''', (batch_id,)).fetchall()
+        return {custom_id(row['queue_id']): row for row in rows}
+
+    def finish_item(self, queue_id: int, error: Optional[str] = None):
+        """Результат сохранен (error=None) или попытка неудачна - в очередь до max_attempts"""
+        with self.connect() as conn:
+            if error is None:
+                conn.execute('''
+                    UPDATE llm_queue SET status = 'done', error = NULL, updated_at = ? WHERE queue_id = ?
+                ''', (time.time(), queue_id))
+            else:
+                conn.execute('''
+                    UPDATE llm_queue SET attempts = attempts + 1, error = ?, batch_id = NULL,
+                           status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END,
+                           updated_at = ?
+                    WHERE queue_id = ?
+                ''', (error, self.max_attempts, time.time(), queue_id))
+
+    def counts(self) -> Dict:
+        with self.connect() as conn:
+            queue = dict(conn.execute('SELECT status, COUNT(*) FROM llm_queue GROUP BY status').fetchall())
+            batches = dict(conn.execute('SELECT status, COUNT(*) FROM llm_batches GROUP BY status').fetchall())
+        return {'queue': queue, 'batches': batches}
+
+
+def custom_id(queue_id: int) -> str:
+    return f'resume-{queue_id}'
+
+
+def request_line(queue_id: int, prompt_text: str) -> Dict:
+    """Строка входного JSONL: тот же запрос, что у StructuredExtractor, без потока"""
+    body = {
+        'model': LLM_EXTRACTION_CONFIG['model'],
+        'messages': build_messages(prompt_text),
+        'max_tokens': LLM_EXTRACTION_CONFIG['max_tokens'],
+        'temperature': 0.1,
+    }
+    if LLM_EXTRACTION_CONFIG.get('json_mode', True):
+        body['response_format'] = {'type': 'json_object'}
+    return {'custom_id': custom_id(queue_id), 'method': 'POST', 'url': CHAT_ENDPOINT, 'body': body}
+
+
+def read_jsonl(path: str) -> List[Dict]:
+    if not path or not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+# ========================================
+# БЭКЕНДЫ
+# ========================================
+
+class BatchBackend:
+    """Интерфейс бэкенда пакетов"""
+
+    name = 'base'
+
+    def submit(self, input_file: str) -> str:
+        """Отправка входного JSONL, возвращает ID пакета на стороне бэкенда"""
+        raise NotImplementedError
+
+    def status(self, remote_id: str) -> Dict:
+        """{'status': статус Batch API, 'counts': {...}}"""
+        raise NotImplementedError
+
+    def download(self, remote_id: str, dest_dir: str) -> List[str]:
+        """Файлы результатов и ошибок завершенного пакета (JSONL формата Batch API)"""
+        raise NotImplementedError
+
+
+class OpenAIBatchBackend(BatchBackend):
+    """OpenAI Batch API"""
+
+    name = 'openai'
+
+    def __init__(self, client=None):
+        self._client = client
+        self._batches = {}
+
+    @property
+    def client(self):
+        if self._client is None:
+            import openai
+            self._client = openai.OpenAI()
+        return self._client
+
+    def submit(self, input_file: str) -> str:
+        with open(input_file, 'rb') as f:
+            uploaded = self.client.files.create(file=f, purpose='batch')
+        batch = self.client.batches.create(input_file_id=uploaded.id, endpoint=CHAT_ENDPOINT,
+                                           completion_window=LLM_BATCH_JOBS_CONFIG['completion_window'])
+        return batch.id
+
+    def status(self, remote_id: str) -> Dict:
+        batch = self.client.batches.retrieve(remote_id)
+        self._batches[remote_id] = batch
+        counts = batch.request_counts.model_dump() if batch.request_counts else {}
+        return {'status': batch.status, 'counts': counts}
+
+    def download(self, remote_id: str, dest_dir: str) -> List[str]:
+        batch = self._batches.get(remote_id) or self.client.batches.retrieve(remote_id)
+        paths = []
+        # У истекшего или отмененного пакета есть результаты выполненной части
+        for kind, file_id in (('output', batch.output_file_id), ('errors', batch.error_file_id)):
+            if not file_id:
+                continue
+            path = os.path.join(dest_dir, f'{remote_id}_{kind}.jsonl')
+            if not os.path.exists(path):
+                content = self.client.files.content(file_id)
+                with open(path + '.tmp', 'w', encoding='utf-8') as f:
+                    f.write(content.text)
+                os.replace(path + '.tmp', path)
+            paths.append(path)
+        return paths
+
+
+def _prompt_resume_text(body: Dict) -> str:
+    """Текст резюме из запроса build_messages: между строкой задания и форматом ответа"""
+    content = body['messages'][-1]['content']
+    text = content.split('\n\n', 1)[1] if '\n\n' in content else content
+    return text.rsplit('\n\nФормат ответа:', 1)[0]
+
+
+def rule_based_completion(body: Dict) -> Dict:
+    """Ответ в формате chat.completion по правилам, без модели"""
+    content = json.dumps(rule_based_fields(_prompt_resume_text(body)), ensure_ascii=False)
+    return {
+        'id': f'chatcmpl-local-{uuid.uuid4().hex[:12]}',
+        'object': 'chat.completion',
+        'created': int(time.time()),
+        'model': 'local-rules',
+        'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}],
+        'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0},
+    }
+
+
+class LocalBatchBackend(BatchBackend):
+    """
+    Файловый исполнитель пакетов без сети
+
+    Каталог пакета: input.jsonl, output.jsonl (дописывается построчно) и
+    state.json. Опрос статуса выполняет до requests_per_poll запросов, поэтому
+    пакет проходит те же состояния, что и в Batch API, а прерванное выполнение
+    продолжается с первой строки без результата.
+    """
+
+    name = 'local'
+
+    def __init__(self, work_dir: Optional[str] = None, responder=None, requests_per_poll: int = 0):
+        self.root = os.path.join(work_dir or LLM_BATCH_JOBS_CONFIG['work_dir'], 'local')
+        self.responder = responder or rule_based_completion
+        self.requests_per_poll = requests_per_poll
+        os.makedirs(self.root, exist_ok=True)
+
+    def _dir(self, remote_id: str) -> str:
+        return os.path.join(self.root, remote_id)
+
+    def _state(self, remote_id: str) -> Dict:
+        with open(os.path.join(self._dir(remote_id), 'state.json'), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_state(self, remote_id: str, state: Dict):
+        path = os.path.join(self._dir(remote_id), 'state.json')
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(path + '.tmp', path)
+
+    def submit(self, input_file: str) -> str:
+        remote_id = f'local_batch_{uuid.uuid4().hex[:12]}'
+        os.makedirs(self._dir(remote_id))
+        shutil.copyfile(input_file, os.path.join(self._dir(remote_id), 'input.jsonl'))
+        self._save_state(remote_id, {'status': 'validating'})
+        return remote_id
+
+    def status(self, remote_id: str) -> Dict:
+        state = self._state(remote_id)
+        if state['status'] not in TERMINAL_STATUSES:
+            state['status'] = self._run(remote_id)
+            self._save_state(remote_id, state)
+        requests = read_jsonl(os.path.join(self._dir(remote_id), 'input.jsonl'))
+        done = read_jsonl(os.path.join(self._dir(remote_id), 'output.jsonl'))
+        failed = sum(1 for line in done if line.get('error'))
+        return {'status': state['status'],
+                'counts': {'total': len(requests), 'completed': len(done) - failed, 'failed': failed}}
+
+    def _run(self, remote_id: str) -> str:
+        output_file = os.path.join(self._dir(remote_id), 'output.jsonl')
+        answered = {line['custom_id'] for line in read_jsonl(output_file)}
+        budget = self.requests_per_poll or float('inf')
+        with open(output_file, 'a', encoding='utf-8') as out:
+            for request in read_jsonl(os.path.join(self._dir(remote_id), 'input.jsonl')):
+                if request['custom_id'] in answered:
+                    continue
+                if budget <= 0:
+                    return 'in_progress'
+                try:
+                    result = {'status_code': 200, 'body': self.responder(request['body'])}
+                    line = {'id': f'req_{uuid.uuid4().hex[:12]}', 'custom_id': request['custom_id'],
+                            'response': result, 'error': None}
+                except Exception as e:
+                    line = {'id': f'req_{uuid.uuid4().hex[:12]}', 'custom_id': request['custom_id'],
+                            'response': None, 'error': {'code': 'local_error', 'message': str(e)}}
+                out.write(json.dumps(line, ensure_ascii=False) + '\n')
+                out.flush()
+                budget -= 1
+        return 'completed'
+
+    def download(self, remote_id: str, dest_dir: str) -> List[str]:
+        return [os.path.join(self._dir(remote_id), 'output.jsonl')]
+
+
+BACKENDS = {'openai': OpenAIBatchBackend, 'local': LocalBatchBackend}
+
+
+def make_backend(name: Optional[str] = None, work_dir: Optional[str] = None) -> BatchBackend:
+    name = name or LLM_BATCH_JOBS_CONFIG['backend']
+    if name == 'local':
+        return LocalBatchBackend(work_dir)
+    if name not in BACKENDS:
+        raise ValueError(f"Неизвестный бэкенд пакетов: {name} (есть: {', '.join(BACKENDS)})")
+    return BACKENDS[name]()
+
+
+# ========================================
+# ОТПРАВКА И ПРИЕМ
+# ========================================
+
+class BatchJobRunner:
+    """Очередь -> JSONL пакеты -> бэкенд -> результаты в ResumeDatabase"""
+
+    def __init__(self, store: Optional[BatchJobStore] = None, backend: Optional[BatchBackend] = None,
+                 db: Optional[ResumeDatabase] = None, work_dir: Optional[str] = None, logger=None):
+        self.store = store or BatchJobStore()
+        self.work_dir = work_dir or LLM_BATCH_JOBS_CONFIG['work_dir']
+        self.backend = backend or make_backend(work_dir=self.work_dir)
+        self.db = db or ResumeDatabase(self.store.db_path)
+        self.logger = logger
+        self.stats = {'submitted': 0, 'saved': 0, 'retried': 0}
+        self._near_duplicates = None
+        os.makedirs(self.work_dir, exist_ok=True)
+
+    @property
+    def near_duplicates(self):
+        """Индекс почти дубликатов той же базы: подпись сохраненного резюме - после записи"""
+        if self._near_duplicates is None and NEAR_DUPLICATE_CONFIG['enabled']:
+            from near_duplicates import NearDuplicateIndex
+            self._near_duplicates = NearDuplicateIndex(self.db, logger=self.logger)
+        return self._near_duplicates
+
+    def _log(self, message: str):
+        if self.logger:
+            self.logger.info(message)
+        else:
+            print(message)
+
+    def submit_pending(self, max_requests: Optional[int] = None) -> List[str]:
+        """Все pending промпты -> пакеты по max_requests_per_file"""
+        max_requests = max_requests or LLM_BATCH_JOBS_CONFIG['max_requests_per_file']
+        batch_ids = []
+        while True:
+            batch_id = f"{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+            input_file = os.path.join(self.work_dir, f'{batch_id}_input.jsonl')
+            rows = self.store.create_batch(batch_id, self.backend.name, input_file, max_requests)
+            if not rows:
+                return batch_ids
+            with open(input_file, 'w', encoding='utf-8') as f:
+                for row in rows:
+                    f.write(json.dumps(request_line(row['queue_id'], row['prompt_text']), ensure_ascii=False) + '\n')
+            self._send(batch_id, input_file)
+            self.stats['submitted'] += len(rows)
+            self._log(f"📤 Пакет {batch_id}: {len(rows)} резюме -> {self.backend.name}")
+            batch_ids.append(batch_id)
+
+    def _send(self, batch_id: str, input_file: str):
+        remote_id = self.backend.submit(input_file)
+        self.store.update_batch(batch_id, remote_id=remote_id, status='submitted')
+
+    def poll(self) -> int:
+        """Один опрос всех незавершенных пакетов; возвращает число оставшихся"""
+        remaining = 0
+        for batch in self.store.open_batches():
+            if batch['backend'] != self.backend.name:
+                remaining += 1
+                continue
+            if not batch['remote_id']:
+                # Запуск прервался между записью файла и отправкой
+                self._send(batch['batch_id'], batch['input_file'])
+                remaining += 1
+                continue
+
+            status = self.backend.status(batch['remote_id'])
+            if status['status'] != batch['status']:
+                self.store.update_batch(batch['batch_id'], status=status['status'])
+            counts = status.get('counts') or {}
+            self._log(f"⏳ Пакет {batch['batch_id']}: {status['status']} "
+                      f"({counts.get('completed', 0)}/{counts.get('total', batch['requests'])})")
+            if status['status'] in TERMINAL_STATUSES:
+                self.ingest(batch)
+            else:
+                remaining += 1
+        return remaining
+
+    def ingest(self, batch: sqlite3.Row) -> int:
+        """Результаты завершенного пакета в базу; резюме без результата - снова в очередь"""
+        items = self.store.batch_items(batch['batch_id'])
+        saved, retried = 0, 0
+        for path in self.backend.download(batch['remote_id'], self.work_dir):
+            for line in read_jsonl(path):
+                row = items.pop(line.get('custom_id'), None)
+                if row is None:
+                    continue  # Уже сохранено прошлым запуском
+                error = self._save_line(batch, row, line)
+                self.store.finish_item(row['queue_id'], error)
+                if error is None:
+                    saved += 1
+                else:
+                    retried += 1
+
+        for row in items.values():
+            self.store.finish_item(row['queue_id'], f"нет результата в пакете ({batch['status']})")
+            retried += 1
+        self.store.update_batch(batch['batch_id'], status='ingested')
+        self.stats['saved'] += saved
+        self.stats['retried'] += retried
+        self._log(f"📥 Пакет {batch['batch_id']}: сохранено {saved}, неудачных {retried}")
+        return saved
+
+    def _save_line(self, batch: sqlite3.Row, row: sqlite3.Row, line: Dict) -> Optional[str]:
+        """Строка результата -> запись резюме; возвращает ошибку или None"""
+        response = line.get('response') or {}
+        if line.get('error') or response.get('status_code') != 200:
+            return json.dumps(line.get('error') or response.get('body'), ensure_ascii=False)[:500]
+
+        choice = response['body']['choices'][0]
+        parser = IncrementalJsonParser()
+        parser.feed(choice['message'].get('content') or '')
+        llm_details = parser.result
+        if not llm_details:
+            return f"ответ без полей ({choice.get('finish_reason')})"
+
+        missing = [field for field in RESUME_FIELDS if field not in llm_details]
+        llm_details['resume_url'] = row['resume_url']
+        llm_details['parsed_with'] = f"{self.backend.name} batch"
+        if missing:
+            llm_details['missing_fields'] = missing
+        resume_data = {
+            'card_info': json.loads(row['card_info'] or '{}'),
+            'llm_details': llm_details,
+            'processing_info': {
+                'processed_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'method': f"LLM_batch_{self.backend.name}",
+                'batch_id': batch['batch_id'],
+            }
+        }
+        if not self.db.save_resume(row['resume_url'], resume_data):
+            return "ошибка сохранения в базу"
+        if self.near_duplicates:
+            self.near_duplicates.add(self.near_duplicates.check(row['resume_url'], row['prompt_text']))
+        return None
+
+    def run(self, wait: bool = True, poll_interval: Optional[float] = None) -> Dict:
+        """Отправка очереди и опрос до сохранения всех пакетов (wait=False - один опрос)"""
+        poll_interval = poll_interval if poll_interval is not None else LLM_BATCH_JOBS_CONFIG['poll_interval']
+        self.submit_pending()
+        while True:
+            remaining = self.poll()
+            # Неудачные строки вернулись в очередь - следующая попытка новым пакетом
+            if self.submit_pending():
+                remaining += 1
+            if not remaining or not wait:
+                return self.stats
+            time.sleep(poll_interval)
+
+
+def queue_from_fixtures(store: BatchJobStore, fixtures_dir: str) -> int:
+    """Промпты из записанных страниц резюме (fixture_replay.py)"""
+    from urllib.parse import urljoin
+
+    from config import BASE_URL
+    from fixture_replay import load_manifest
+    from prompt_builder import ResumePromptBuilder
+
+    builder = ResumePromptBuilder()
+    items = []
+    for key, entry in load_manifest(fixtures_dir).items():
+        if entry['kind'] != 'resume':
+            continue
+        with open(os.path.join(fixtures_dir, entry['file']), 'r', encoding='utf-8') as f:
+            items.append((urljoin(BASE_URL, key), {'url': urljoin(BASE_URL, key)}, builder.build(f.read())['text']))
+    return store.queue(items)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Пакетное извлечение резюме через LLM")
+    arg_parser.add_argument('command', choices=['queue', 'submit', 'poll', 'run', 'status'])
+    arg_parser.add_argument('--db', default=None, help="База резюме (очередь и результаты)")
+    arg_parser.add_argument('--backend', choices=list(BACKENDS), default=None)
+    arg_parser.add_argument('--work-dir', default=None, help="Каталог JSONL файлов пакетов")
+    arg_parser.add_argument('--fixtures', default=None, help="queue: каталог записанных страниц")
+    arg_parser.add_argument('--wait', action='store_true', help="poll: опрашивать до завершения")
+    args = arg_parser.parse_args()
+
+    store = BatchJobStore(args.db)
+
+    if args.command == 'queue':
+        if not args.fixtures:
+            print("❌ Укажите --fixtures (или собирайте промпты обходом: full_page_parser.py --defer-llm)")
+            return 1
+        print(f"📝 В очереди: {queue_from_fixtures(store, args.fixtures)} резюме")
+        return 0
+
+    if args.command == 'status':
+        counts = store.counts()
+        print(f"📝 Очередь: {counts['queue'] or 'пусто'}")
+        print(f"📦 Пакеты: {counts['batches'] or 'нет'}")
+        return 0
+
+    runner = BatchJobRunner(store, make_backend(args.backend, args.work_dir), work_dir=args.work_dir)
+    if args.command == 'submit':
+        runner.submit_pending()
+    elif args.command == 'poll':
+        while runner.poll() and args.wait:
+            time.sleep(LLM_BATCH_JOBS_CONFIG['poll_interval'])
+    else:
+        runner.run(wait=True)
+    print(f"📊 Отправлено: {runner.stats['submitted']}, сохранено: {runner.stats['saved']}, "
+          f"повторно в очередь: {runner.stats['retried']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,209 @@
+"""
+Несколько резюме в одном запросе к LLM
+
+Системный промпт, правила и формат ответа занимают больше токенов, чем
+короткое резюме. В пакетном режиме они отправляются один раз на пакет:
+резюме помечаются короткими ID, ответ - JSON объект {ID: поля резюме}.
+
+- размер пакета подбирается по бюджету токенов промпта и по оценке ответа
+  на одно резюме (скользящее среднее фактического расхода)
+- ответ разбирается потоково (IncrementalJsonParser): резюме, чей объект
+  успел закрыться до обрыва, сохраняются
+- резюме без ответа (обрыв, ошибка разбора, ошибка запроса) обрабатываются
+  по одному обычным StructuredExtractor.extract
+"""
+
+import time
+from typing import Dict, List, Optional, Tuple
+
+from config import LLM_BATCH_CONFIG
+from llm_extraction import RESUME_FIELDS, RULES, SYSTEM_PROMPT, StructuredExtractor, response_format
+from prompt_builder import count_tokens
+
+RESUME_MARKER = "### РЕЗЮМЕ {id}"
+
+
+def build_batch_messages(items: List[Tuple[str, str]]) -> List[Dict]:
+    """Сообщения запроса для пакета [(ID, текст резюме)]"""
+    example_id = items[0][0]
+    instruction = (
+        f"Ниже {len(items)} резюме, каждое начинается строкой \"{RESUME_MARKER.format(id='<ID>')}\". "
+        f"Извлеки ПОЛНУЮ детальную информацию из КАЖДОГО резюме. Ответ - JSON объект, "
+        f"где ключ - ID резюме, значение - поля резюме:\n"
+        f"{{\n\"{example_id}\": {response_format(list(RESUME_FIELDS))}\n}}\n\n{RULES}"
+    )
+    resumes = '\n\n'.join(f"{RESUME_MARKER.format(id=item_id)}\n{text}" for item_id, text in items)
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": f"{instruction}\n\n{resumes}\n"},
+    ]
+
+
+class BatchExtractor:
+    """Пакетное извлечение резюме с откатом на одиночные запросы"""
+
+    def __init__(self, extractor: StructuredExtractor, metrics=None, logger=None,
+                 max_batch_size: Optional[int] = None, input_token_budget: Optional[int] = None):
+        self.extractor = extractor
+        self.metrics = metrics
+        self.logger = logger
+        self.max_batch_size = max_batch_size or LLM_BATCH_CONFIG['max_batch_size']
+        self.input_token_budget = input_token_budget or LLM_BATCH_CONFIG['input_token_budget']
+        self.output_per_resume = float(LLM_BATCH_CONFIG['output_tokens_per_resume'])
+        self._overhead_tokens = None
+        self.stats = {'resumes': 0, 'batches': 0, 'requests': 0, 'fallbacks': 0,
+                      'prompt_tokens': 0, 'completion_tokens': 0, 'seconds': 0.0}
+
+    @property
+    def overhead_tokens(self) -> int:
+        """Токены инструкций пакета без текста резюме"""
+        if self._overhead_tokens is None:
+            messages = build_batch_messages([('r1', '')])
+            self._overhead_tokens = sum(count_tokens(message['content']) for message in messages)
+        return self._overhead_tokens
+
+    def batch_capacity(self) -> int:
+        """Сколько резюме помещается в ответ при текущей оценке токенов на резюме"""
+        output_budget = self.extractor.max_tokens * LLM_BATCH_CONFIG['output_safety']
+        return max(1, min(self.max_batch_size, int(output_budget // self.output_per_resume)))
+
+    def _resume_tokens(self, item_id: str, text: str) -> int:
+        return count_tokens(text) + count_tokens(RESUME_MARKER.format(id=item_id)) + 2
+
+    def _take_batch(self, pending: List[Tuple[str, str]], tokens: Dict[str, int]) -> int:
+        """Сколько резюме из начала очереди идет в следующий пакет"""
+        capacity = self.batch_capacity()
+        used = self.overhead_tokens
+        size = 0
+        for key, _ in pending:
+            if size and (size >= capacity or used + tokens[key] > self.input_token_budget):
+                break
+            used += tokens[key]
+            size += 1
+        return size
+
+    def extract_many(self, items: List[Tuple[str, str]]) -> Dict[str, Tuple[Dict, Dict]]:
+        """
+        Поля резюме для [(ключ, текст)]
+
+        Returns:
+            {ключ: (поля, сведения как у StructuredExtractor.extract)}; резюме,
+            которые не удалось извлечь и по одному, отсутствуют
+        """
+        results = {}
+        started_at = time.perf_counter()
+        tokens = {key: self._resume_tokens(key, text) for key, text in items}
+        pending = list(items)
+        while pending:
+            # Размер пакета пересчитывается после каждого ответа
+            size = self._take_batch(pending, tokens)
+            results.update(self._extract_batch(pending[:size]))
+            pending = pending[size:]
+        self.stats['resumes'] += len(results)
+        self.stats['seconds'] += time.perf_counter() - started_at
+        return results
+
+    def _extract_batch(self, batch: List[Tuple[str, str]]) -> Dict[str, Tuple[Dict, Dict]]:
+        meter = self.extractor.usage_meter
+        if len(batch) == 1 or (meter and meter.exceeded):
+            # Одно резюме или бюджет исчерпан (extract перейдет на правила)
+            return self._extract_singles(batch, fallback=False)
+
+        # Короткие ID в промпте экономят токены; ключи вызывающего кода - в словаре
+        keys = {f"r{index}": key for index, (key, _) in enumerate(batch, 1)}
+        texts = {f"r{index}": text for index, (_, text) in enumerate(batch, 1)}
+        try:
+            data, _, finish_reason, usage = self.extractor.request(
+                build_batch_messages(list(texts.items())), 'resume_batch', tuple(keys.values()))
+        except Exception as e:
+            if self.logger:
+                self.logger.error("❌ Ошибка пакетного запроса (%d резюме): %s", len(batch), e)
+            return self._extract_singles(batch)
+
+        self.stats['batches'] += 1
+        self.stats['requests'] += 1
+        if usage:
+            self.stats['prompt_tokens'] += usage.get('prompt_tokens', 0) or 0
+            self.stats['completion_tokens'] += usage.get('completion_tokens', 0) or 0
+
+        results, missing = {}, []
+        for short_id, key in keys.items():
+            fields = data.get(short_id)
+            if isinstance(fields, dict) and fields:
+                info = {'requests': 1, 'truncated': False, 'continued_fields': [], 'batch_size': len(batch),
+                        'missing': [field for field in RESUME_FIELDS if field not in fields]}
+                results[key] = (fields, info)
+            else:
+                missing.append((key, texts[short_id]))
+
+        self._adapt(usage, len(results), finish_reason)
+        if missing:
+            if self.logger:
+                self.logger.warning("✂️ Пакет из %d резюме: без ответа %d (%s), обрабатываем по одному",
+                                    len(batch), len(missing), finish_reason)
+            results.update(self._extract_singles(missing))
+        return results
+
+    def _extract_singles(self, items: List[Tuple[str, str]], fallback: bool = True) -> Dict[str, Tuple[Dict, Dict]]:
+        results = {}
+        for key, text in items:
+            try:
+                data, info = self.extractor.extract(text, key)
+            except Exception as e:
+                if self.logger:
+                    self.logger.error("❌ Ошибка запроса к OpenAI: %s", e)
+                continue
+            self.stats['requests'] += info['requests']
+            self.stats['prompt_tokens'] += info['prompt_tokens']
+            self.stats['completion_tokens'] += info['completion_tokens']
+            if data:
+                results[key] = (data, info)
+                # Ответ на одно резюме без обрыва - точная оценка: пакетирование восстанавливается
+                if info['requests'] == 1 and not info['truncated'] and info['completion_tokens']:
+                    self._adapt({'completion_tokens': info['completion_tokens']}, 1, None)
+        if fallback:
+            self.stats['fallbacks'] += len(items)
+            if self.metrics:
+                self.metrics.inc('llm_batch_fallbacks_total', len(items))
+        return results
+
+    def _adapt(self, usage: Optional[Dict], answered: int, finish_reason: Optional[str]):
+        """
+        Оценка ответа на резюме: по факту пакета, при обрыве - с запасом
+
+        После обрыва оценка не больше половины бюджета ответа: следующий пакет
+        все равно из 2+ резюме и успевает ее уточнить (пакет из одного резюме
+        идет через _extract_singles и пакетирование бы больше не включилось).
+        """
+        alpha = LLM_BATCH_CONFIG['smoothing']
+        if finish_reason == 'length':
+            # Ответ не поместился: фактический расход на резюме больше учтенного
+            observed = self.extractor.max_tokens / max(answered, 1)
+            ceiling = self.extractor.max_tokens * LLM_BATCH_CONFIG['output_safety'] / 2
+            self.output_per_resume = min(max(self.output_per_resume * 1.5, observed), ceiling)
+        elif usage and answered:
+            observed = (usage.get('completion_tokens', 0) or 0) / answered
+            self.output_per_resume = alpha * observed + (1 - alpha) * self.output_per_resume
+        if self.metrics:
+            self.metrics.set_gauge('llm_batch_capacity', self.batch_capacity())
+
+    def summary(self) -> Dict:
+        resumes = self.stats['resumes']
+        minutes = self.stats['seconds'] / 60
+        return {
+            **self.stats,
+            'seconds': round(self.stats['seconds'], 2),
+            'tokens_per_resume': round((self.stats['prompt_tokens'] + self.stats['completion_tokens']) / resumes, 1)
+            if resumes else 0.0,
+            'resumes_per_min': round(resumes / minutes, 1) if minutes else 0.0,
+            'batch_capacity': self.batch_capacity(),
+        }
+
+    def log_summary(self, logger=None):
+        logger = logger or self.logger
+        if not logger or not self.stats['resumes']:
+            return
+        summary = self.summary()
+        logger.info(f"📦 ПАКЕТЫ LLM: {summary['resumes']} резюме, пакетов {summary['batches']}, "
+                    f"запросов {summary['requests']} (по одному: {summary['fallbacks']}), "
+                    f"{summary['tokens_per_resume']} токенов/резюме, {summary['resumes_per_min']} резюме/мин")
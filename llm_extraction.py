@@ -0,0 +1,329 @@
+"""
+Структурированное извлечение резюме через LLM
+
+- JSON mode (response_format=json_object) и поток (stream=True)
+- инкрементальный парсер: поля верхнего уровня фиксируются по мере того,
+  как их значения закрываются в потоке
+- при обрыве ответа (finish_reason=length) все завершенные поля остаются,
+  а отдельный запрос продолжения просит только недостающие поля
+
+Заменяет угадывание скобок в _fix_incomplete_json, при котором неудачное
+восстановление выбрасывало весь оплаченный ответ.
+"""
+
+import json
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+
+from config import LLM_EXTRACTION_CONFIG
+from resume_sections import SECTION_HEADINGS, split_sections
+
+# Поля резюме: тип и описание для промпта (порядок - порядок в ответе)
+RESUME_FIELDS = {
+    'full_name': ('string', "полное имя"),
+    'position': ('string', "должность"),
+    'salary': ('string', "зарплата"),
+    'age': ('string', "возраст"),
+    'location': ('string', "город"),
+    'birth_date': ('string', "дата рождения"),
+    'address': ('string', "полный адрес"),
+    'phone': ('string', "телефон (если есть)"),
+    'education': ('array', "ПОЛНАЯ информация об образовании с годами, учебными заведениями, квалификациями"),
+    'experience': ('array', "ДЕТАЛЬНАЯ информация о каждом месте работы с должностными обязанностями, компанией, периодом"),
+    'professional_skills': ('array', "ПОДРОБНЫЕ профессиональные навыки, знание программ, технологий"),
+    'personal_skills': ('array', "Личные качества, характеристики"),
+    'languages': ('array', "Знание языков с уровнем"),
+    'additional_info': ('string', "ВСЯ дополнительная информация"),
+    'detailed_description': ('string', "Полное описание кандидата"),
+}
+
+SYSTEM_PROMPT = ("Ты эксперт по анализу резюме. Извлекаешь ПОЛНУЮ структурированную информацию "
+                 "из текста резюме БЕЗ сокращений. Отвечаешь только JSON объектом.")
+
+RULES = """КРИТИЧЕСКИ ВАЖНО:
+- Извлекай ВСЮ доступную информацию БЕЗ сокращений
+- В education - ПОЛНЫЕ названия учебных заведений с годами и специальностями
+- В experience - ДЕТАЛЬНЫЕ должностные обязанности для каждого места работы
+- В professional_skills - ВСЕ упомянутые программы, технологии, навыки
+- Сохраняй ВЕСЬ оригинальный текст важных разделов
+- Если информация большая - включай её полностью
+- Ответь ТОЛЬКО JSON"""
+
+
+def response_format(fields: List[str]) -> str:
+    lines = []
+    for field in fields:
+        kind, description = RESUME_FIELDS[field]
+        value = f'["{description}"]' if kind == 'array' else f'"{description}"'
+        lines.append(f'    "{field}": {value}')
+    return '{\n' + ',\n'.join(lines) + '\n}'
+
+
+def build_messages(resume_text: str, fields: Optional[List[str]] = None) -> List[Dict]:
+    """Сообщения запроса: все поля или только перечисленные (продолжение)"""
+    fields = fields or list(RESUME_FIELDS)
+    if len(fields) == len(RESUME_FIELDS):
+        task = "Извлеки ПОЛНУЮ детальную информацию из резюме в JSON формате:"
+    else:
+        task = ("Извлеки из резюме ТОЛЬКО эти поля (остальные уже получены): "
+                + ', '.join(fields) + ". Ответ в JSON формате:")
+    prompt = f"{task}\n\n{resume_text}\n\nФормат ответа:\n{response_format(fields)}\n\n{RULES}\n"
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt},
+    ]
+
+
+class IncrementalJsonParser:
+    """
+    Потоковый разбор JSON объекта по полям верхнего уровня
+
+    Сканер отслеживает строки и вложенность; когда на глубине 1 встречается
+    ',' или '}', пара "ключ: значение" закончена и разбирается один раз -
+    общая работа линейна по длине ответа.
+    """
+
+    def __init__(self):
+        self.buffer = ''
+        self.result: Dict = {}
+        self.complete = False
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member_start = None
+
+    def feed(self, chunk: str) -> List[str]:
+        """Добавить фрагмент ответа; возвращает ключи, завершенные этим фрагментом"""
+        self.buffer += chunk
+        completed = []
+        buffer = self.buffer
+        for pos in range(self._pos, len(buffer)):
+            char = buffer[pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+            if char == '"':
+                self._in_string = True
+            elif char in '{[':
+                self._depth += 1
+                if self._depth == 1:
+                    self._member_start = pos + 1
+            elif char in '}]':
+                if self._depth == 1 and char == '}':
+                    completed.extend(self._close_member(pos))
+                    self.complete = True
+                self._depth -= 1
+            elif char == ',' and self._depth == 1:
+                completed.extend(self._close_member(pos))
+                self._member_start = pos + 1
+        self._pos = len(buffer)
+        return completed
+
+    def _close_member(self, end: int) -> List[str]:
+        member = self.buffer[self._member_start:end].strip()
+        if not member:
+            return []
+        try:
+            parsed = json.loads('{' + member + '}')
+        except json.JSONDecodeError:
+            return []
+        self.result.update(parsed)
+        return list(parsed)
+
+
+_SALARY_RE = re.compile(r'\d[\d \u00a0\u202f]*\s*грн')
+_AGE_RE = re.compile(r'(\d{2})\s*(?:рок\w*|рік)')
+_CITY_RE = re.compile(r'Місто(?: проживання)?:\s*(.+)')
+
+
+def rule_based_fields(resume_text: str) -> Dict:
+    """
+    Поля резюме без LLM: шапка по шаблонам, секции по заголовкам страницы
+
+    Грубее ответа модели (нет разбиения опыта на места работы и личных
+    качеств), но бесплатно и без сети.
+    """
+    sections = split_sections(resume_text)
+    header_lines = []
+    for line in resume_text.split('\n'):
+        if line.strip() in SECTION_HEADINGS:
+            break
+        header_lines.append(line.strip())
+    header_text = '\n'.join(header_lines)
+
+    fields = {field: ([] if kind == 'array' else '') for field, (kind, _) in RESUME_FIELDS.items()}
+    if header_lines:
+        fields['position'] = header_lines[0]
+    for line in header_lines[1:]:
+        # "Ім'я Прізвище, 35 років, Київ" или отдельная строка с именем
+        first = line.split(',')[0].strip()
+        if first and (',' in line and _AGE_RE.search(line) or not any(char.isdigit() for char in first)) \
+                and ':' not in first and not _AGE_RE.search(first):
+            fields['full_name'] = first
+            break
+    salary = _SALARY_RE.search(header_text)
+    age = _AGE_RE.search(header_text)
+    city = _CITY_RE.search(header_text)
+    fields['salary'] = salary.group(0).strip() if salary else ''
+    fields['age'] = age.group(1) if age else ''
+    if city:
+        fields['location'] = city.group(1).strip()
+    elif age:
+        after_age = header_text[age.end():].split('\n')[0]
+        fields['location'] = after_age.strip(' ,')
+
+    def lines(text):
+        return [line.strip() for line in text.split('\n') if line.strip()]
+
+    fields['experience'] = lines(sections['experience'])
+    fields['education'] = lines(sections['education'])
+    fields['languages'] = lines(sections['languages'])
+    fields['professional_skills'] = sections['skills']
+    fields['additional_info'] = sections['additional_info']
+    fields['detailed_description'] = header_text
+    return fields
+
+
+def _strip_fence(text: str) -> str:
+    text = text.strip()
+    if text.startswith('```'):
+        text = text.split('\n', 1)[1] if '\n' in text else ''
+    return text
+
+
+class StructuredExtractor:
+    """Извлечение полей резюме с продолжением при обрыве ответа"""
+
+    def __init__(self, client=None, metrics=None, logger=None, fixture_recorder=None,
+                 model: Optional[str] = None, max_tokens: Optional[int] = None, usage_meter=None,
+                 json_mode: Optional[bool] = None):
+        self._client = client
+        self.metrics = metrics
+        self.logger = logger
+        self.fixture_recorder = fixture_recorder
+        self.usage_meter = usage_meter
+        self.model = model or LLM_EXTRACTION_CONFIG['model']
+        self.max_tokens = max_tokens or LLM_EXTRACTION_CONFIG['max_tokens']
+        self.json_mode = json_mode if json_mode is not None else LLM_EXTRACTION_CONFIG.get('json_mode', True)
+
+    @property
+    def client(self):
+        if self._client is None:
+            import openai
+            self._client = openai.OpenAI()
+        return self._client
+
+    def request(self, messages: List[Dict], purpose: str,
+                resumes: Tuple[str, ...] = ()) -> Tuple[Dict, bool, Optional[str], Optional[Dict]]:
+        """
+        Один потоковый запрос (resumes - URL резюме для учета стоимости)
+
+        Returns:
+            (разобранные поля, закрыт ли JSON объект, finish_reason, usage)
+        """
+        parser = IncrementalJsonParser()
+        content_parts = []
+        finish_reason = None
+        usage = None
+        kwargs = {}
+        if self.json_mode:
+            kwargs['response_format'] = {"type": "json_object"}
+
+        started_at = time.perf_counter()
+        stream = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            max_tokens=self.max_tokens,
+            temperature=0.1,
+            stream=True,
+            stream_options={"include_usage": True},
+            **kwargs
+        )
+        fence_checked = False
+        for chunk in stream:
+            if getattr(chunk, 'usage', None):
+                usage = chunk
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            delta = choice.delta.content or ''
+            if delta:
+                content_parts.append(delta)
+                if not fence_checked:
+                    # Без JSON mode модель может обернуть ответ в ```json
+                    head = ''.join(content_parts)
+                    if len(head) < 8 and '{' not in head:
+                        continue
+                    fence_checked = True
+                    delta = _strip_fence(head)
+                parser.feed(delta)
+            if choice.finish_reason:
+                finish_reason = choice.finish_reason
+
+        if self.metrics:
+            self.metrics.observe('llm_latency_seconds', time.perf_counter() - started_at, purpose=purpose)
+            if usage is not None:
+                self.metrics.record_llm_usage(usage, purpose=purpose)
+        usage_dict = usage.usage.model_dump() if usage is not None else None
+        if self.usage_meter:
+            self.usage_meter.record(self.model, purpose, usage_dict, messages, ''.join(content_parts), resumes)
+        if self.fixture_recorder:
+            self.fixture_recorder.record_llm(messages, ''.join(content_parts), usage_dict)
+        return parser.result, parser.complete, finish_reason, usage_dict
+
+    @staticmethod
+    def _add_usage(info: Dict, usage: Optional[Dict]):
+        if usage:
+            info['prompt_tokens'] += usage.get('prompt_tokens', 0) or 0
+            info['completion_tokens'] += usage.get('completion_tokens', 0) or 0
+
+    def extract(self, resume_text: str, resume_url: Optional[str] = None) -> Tuple[Dict, Dict]:
+        """
+        Поля резюме (по правилам, если бюджет LLM запуска исчерпан)
+
+        Returns:
+            (поля, сведения: requests, truncated, continued_fields, missing,
+             prompt_tokens, completion_tokens, rule_based)
+        """
+        if self.usage_meter and not self.usage_meter.allow('resume'):
+            self.usage_meter.record_rule_based()
+            data = rule_based_fields(resume_text)
+            return data, {'requests': 0, 'truncated': False, 'continued_fields': [], 'prompt_tokens': 0,
+                          'completion_tokens': 0, 'rule_based': True,
+                          'missing': [field for field in RESUME_FIELDS if not data.get(field)]}
+
+        resumes = (resume_url,) if resume_url else ()
+        data, complete, finish_reason, usage = self.request(build_messages(resume_text), 'resume', resumes)
+        info = {'requests': 1, 'truncated': finish_reason == 'length', 'continued_fields': [],
+                'prompt_tokens': 0, 'completion_tokens': 0}
+        self._add_usage(info, usage)
+
+        for _ in range(LLM_EXTRACTION_CONFIG['max_continuations']):
+            missing = [field for field in RESUME_FIELDS if field not in data]
+            # Ответ закончен штатно - отсутствующих полей в резюме просто нет
+            if not missing or (complete and finish_reason != 'length'):
+                break
+            if self.logger:
+                self.logger.warning("✂️ Ответ LLM неполный (%s), дозапрашиваем поля: %s",
+                                    finish_reason, ', '.join(missing))
+            extra, complete, finish_reason, usage = self.request(build_messages(resume_text, missing),
+                                                                 'resume_continuation', resumes)
+            info['requests'] += 1
+            self._add_usage(info, usage)
+            new_fields = [field for field in missing if field in extra]
+            if not new_fields:
+                break
+            data.update({field: extra[field] for field in new_fields})
+            info['continued_fields'].extend(new_fields)
+
+        info['missing'] = [field for field in RESUME_FIELDS if field not in data]
+        if self.metrics and info['continued_fields']:
+            self.metrics.inc('llm_continuations_total', info['requests'] - 1)
+        return data, info
@@ -0,0 +1,179 @@
+"""
+Учет токенов и стоимости запросов к LLM
+
+Каждый запрос (извлечение резюме, анализ селекторов, анализ пагинации)
+записывается с токенами из response.usage, а если их нет - с оценкой по
+tiktoken. Итоги - по запуску, модели, назначению и резюме; текущая стоимость
+идет в метрики (llm_cost_usd_total, llm_run_cost_usd) и в журнал
+LLM_USAGE_CONFIG['log_file'], по которому строит отчет calculate_cost.py.
+
+При заданном бюджете запуска (budget_usd) после его превышения извлечение
+резюме переходит на правила (llm_extraction.rule_based_fields), а
+вспомогательные запросы не выполняются.
+"""
+
+import json
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from config import LLM_USAGE_CONFIG
+
+
+def model_pricing(model: Optional[str]) -> Dict:
+    """Цены модели за 1M токенов; версии (gpt-3.5-turbo-0125) - по префиксу"""
+    pricing = LLM_USAGE_CONFIG['pricing']
+    model = model or LLM_USAGE_CONFIG['default_model']
+    if model in pricing:
+        return pricing[model]
+    matches = [name for name in pricing if model.startswith(name)]
+    if matches:
+        return pricing[max(matches, key=len)]
+    return pricing[LLM_USAGE_CONFIG['default_model']]
+
+
+def request_cost(model: Optional[str], prompt_tokens: int, completion_tokens: int) -> float:
+    prices = model_pricing(model)
+    return (prompt_tokens * prices['input'] + completion_tokens * prices['output']) / 1_000_000
+
+
+def usage_tokens(usage) -> Optional[Dict]:
+    """prompt/completion токены из response.usage (объект SDK или словарь)"""
+    if usage is None:
+        return None
+    if not isinstance(usage, dict):
+        usage = {'prompt_tokens': getattr(usage, 'prompt_tokens', None),
+                 'completion_tokens': getattr(usage, 'completion_tokens', None)}
+    if usage.get('prompt_tokens') is None:
+        return None
+    return {'prompt_tokens': usage.get('prompt_tokens') or 0,
+            'completion_tokens': usage.get('completion_tokens') or 0}
+
+
+class UsageMeter:
+    """Токены и стоимость LLM за запуск с контролем бюджета (потокобезопасно)"""
+
+    def __init__(self, metrics=None, logger=None, budget_usd: Optional[float] = None,
+                 log_file: Optional[str] = None):
+        self.metrics = metrics
+        self.logger = logger
+        self.budget_usd = budget_usd if budget_usd is not None else LLM_USAGE_CONFIG['budget_usd']
+        self.log_file = log_file if log_file is not None else LLM_USAGE_CONFIG['log_file']
+        self.run_id = getattr(metrics, 'run_id', None) or time.strftime('%Y%m%d_%H%M%S')
+        self.cost_usd = 0.0
+        self.by_model: Dict[str, Dict] = {}
+        self.by_purpose: Dict[str, Dict] = {}
+        self.by_resume: Dict[str, float] = {}
+        self.rule_based = 0
+        self._budget_logged = False
+        self._lock = threading.Lock()
+
+    @property
+    def exceeded(self) -> bool:
+        return self.budget_usd is not None and self.cost_usd >= self.budget_usd
+
+    def allow(self, purpose: str) -> bool:
+        """Можно ли выполнять запрос (False - бюджет запуска исчерпан)"""
+        if not self.exceeded:
+            return True
+        with self._lock:
+            if not self._budget_logged and self.logger:
+                self.logger.warning("💸 Бюджет LLM исчерпан: $%.4f из $%.4f, дальше без LLM",
+                                    self.cost_usd, self.budget_usd)
+            self._budget_logged = True
+        if self.metrics:
+            self.metrics.inc('llm_budget_skips_total', purpose=purpose)
+        return False
+
+    def record(self, model: Optional[str], purpose: str, usage=None, messages: Optional[List[Dict]] = None,
+               completion: str = '', resumes: Iterable[str] = ()) -> float:
+        """
+        Учет одного запроса
+
+        Args:
+            usage: response.usage; без него токены считаются tiktoken по messages и completion
+            resumes: URL резюме запроса (стоимость пакета делится поровну)
+
+        Returns:
+            float: стоимость запроса, USD
+        """
+        tokens = usage_tokens(usage)
+        estimated = tokens is None
+        if estimated:
+            from prompt_builder import count_tokens
+            tokens = {
+                'prompt_tokens': sum(count_tokens(str(message.get('content', '')), model) for message in messages or []),
+                'completion_tokens': count_tokens(completion or '', model),
+            }
+        cost = request_cost(model, tokens['prompt_tokens'], tokens['completion_tokens'])
+        resumes = [resume for resume in resumes if resume]
+        model = model or LLM_USAGE_CONFIG['default_model']
+
+        with self._lock:
+            self.cost_usd += cost
+            for totals in (self.by_model.setdefault(model, {}), self.by_purpose.setdefault(purpose, {})):
+                totals['requests'] = totals.get('requests', 0) + 1
+                totals['prompt_tokens'] = totals.get('prompt_tokens', 0) + tokens['prompt_tokens']
+                totals['completion_tokens'] = totals.get('completion_tokens', 0) + tokens['completion_tokens']
+                totals['cost_usd'] = totals.get('cost_usd', 0.0) + cost
+            for resume in resumes:
+                self.by_resume[resume] = self.by_resume.get(resume, 0.0) + cost / len(resumes)
+            run_cost = self.cost_usd
+
+        if self.metrics:
+            self.metrics.inc('llm_cost_usd_total', cost, model=model, purpose=purpose)
+            self.metrics.set_gauge('llm_run_cost_usd', run_cost)
+            if estimated:
+                self.metrics.inc('llm_tokens_estimated_total', tokens['prompt_tokens'] + tokens['completion_tokens'])
+        self._append_log({
+            'run_id': self.run_id,
+            'time': round(time.time(), 3),
+            'model': model,
+            'purpose': purpose,
+            'resumes': resumes,
+            **tokens,
+            'cost_usd': round(cost, 8),
+            'estimated': estimated,
+        })
+        return cost
+
+    def record_rule_based(self):
+        """Резюме извлечено правилами из-за бюджета"""
+        with self._lock:
+            self.rule_based += 1
+        if self.metrics:
+            self.metrics.inc('llm_rule_based_total')
+
+    def _append_log(self, entry: Dict):
+        if not self.log_file:
+            return
+        line = json.dumps(entry, ensure_ascii=False) + '\n'
+        with self._lock:
+            with open(self.log_file, 'a', encoding='utf-8') as f:
+                f.write(line)
+
+    def summary(self) -> Dict:
+        with self._lock:
+            resumes = len(self.by_resume)
+            return {
+                'run_id': self.run_id,
+                'cost_usd': round(self.cost_usd, 6),
+                'budget_usd': self.budget_usd,
+                'by_model': {name: dict(totals) for name, totals in self.by_model.items()},
+                'by_purpose': {name: dict(totals) for name, totals in self.by_purpose.items()},
+                'resumes': resumes,
+                'cost_per_resume_usd': round(sum(self.by_resume.values()) / resumes, 6) if resumes else 0.0,
+                'rule_based': self.rule_based,
+            }
+
+    def log_summary(self, logger=None):
+        logger = logger or self.logger
+        summary = self.summary()
+        if not logger or not (summary['by_model'] or summary['rule_based']):
+            return
+        budget = f" из ${summary['budget_usd']:.4f}" if summary['budget_usd'] is not None else ''
+        logger.info(f"💰 LLM: ${summary['cost_usd']:.4f}{budget}, резюме {summary['resumes']} "
+                    f"(${summary['cost_per_resume_usd']:.5f}/резюме), по правилам {summary['rule_based']}")
+        for name, totals in summary['by_purpose'].items():
+            logger.info(f"   {name:<20} запросов {totals['requests']:>4}, токенов {totals['prompt_tokens']:,}"
+                        f"+{totals['completion_tokens']:,}, ${totals['cost_usd']:.4f}")
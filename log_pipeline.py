@@ -0,0 +1,169 @@
+"""
+Структурированное логирование с выводом вне горячего пути
+
+Логгеры пишут в QueueHandler (в потоке парсера только постановка записи в
+очередь), а QueueListener в отдельном потоке форматирует и пишет:
+- JSON lines файл с полями run_id, page, card
+- консоль в привычном текстовом виде
+
+Сообщения форматируются лениво (%-стиль), поэтому отфильтрованные по уровню
+записи не стоят ничего. Уровень детализации по карточкам (логгер *.card)
+настраивается отдельно от уровня итоговых сообщений.
+
+Уровень корневого логгера не меняется: уровни задаются только логгерам
+проекта (LOGGING_CONFIG['project_loggers']), а DEBUG сторонних библиотек
+(Selenium с телами ответов, httpx, openai) в очередь не попадает.
+
+Контекст (run_id, страница, карточка) привязан к потоку: у каждого парсера
+в crawl_scheduler свой поток и свои поля в записях.
+"""
+
+import atexit
+import json
+import logging
+import queue
+import threading
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from config import LOGGING_CONFIG
+
+_STANDARD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_listener: Optional[QueueListener] = None
+_log_file: Optional[str] = None
+_setup_lock = threading.Lock()
+_thread_context = threading.local()
+
+
+class LogContext:
+    """Текущие run_id / страница / карточка - подставляются в каждую запись"""
+
+    def __init__(self, run_id: str):
+        self.run_id = run_id
+        self.page = None
+        self.card = None
+        self.log_file = None
+
+
+def bind_context(context: Optional[LogContext]):
+    """Контекст записей текущего потока"""
+    _thread_context.context = context
+
+
+class ContextFilter(logging.Filter):
+    """Поля контекста потока; DEBUG - только от логгеров проекта"""
+
+    def __init__(self, project_loggers):
+        super().__init__()
+        self.project_loggers = set(project_loggers)
+
+    def filter(self, record):
+        if record.levelno < logging.INFO and record.name.split('.')[0] not in self.project_loggers:
+            return False
+        context = getattr(_thread_context, 'context', None)
+        record.run_id = context.run_id if context else None
+        record.page = getattr(record, 'page', context.page if context else None)
+        record.card = getattr(record, 'card', context.card if context else None)
+        return True
+
+
+class LazyQueueHandler(QueueHandler):
+    """
+    QueueHandler без форматирования в вызывающем потоке
+
+    Стандартный prepare() склеивает msg и args еще до постановки в очередь;
+    здесь запись уходит как есть и форматируется уже в потоке QueueListener.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class JsonLineFormatter(logging.Formatter):
+    """Одна запись - одна JSON строка"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'func': record.funcName,
+            'run_id': getattr(record, 'run_id', None),
+            'page': getattr(record, 'page', None),
+            'card': getattr(record, 'card', None),
+            'msg': record.getMessage(),
+        }
+        # Дополнительные поля из extra={...}
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS and key not in entry:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def setup_queue_logging(run_id: str, context: Optional[LogContext] = None) -> LogContext:
+    """
+    Перевод обработчиков корневого логгера на очередь с JSON lines файлом и консолью
+
+    Повторный вызов (несколько парсеров в одном процессе, в т.ч. из разных
+    потоков) переиспользует уже запущенный QueueListener; контекст
+    привязывается к вызывающему потоку.
+    """
+    global _listener, _log_file
+    context = context or LogContext(run_id)
+
+    with _setup_lock:
+        if _listener is None:
+            _start_listener(run_id)
+        context.log_file = _log_file
+    bind_context(context)
+    return context
+
+
+def _start_listener(run_id: str):
+    """Поток записи и обработчик-очередь на корневом логгере (один раз на процесс)"""
+    global _listener, _log_file
+    root = logging.getLogger()
+    _log_file = LOGGING_CONFIG['json_file'].format(run_id=run_id)
+    json_handler = logging.FileHandler(_log_file, encoding='utf-8')
+    json_handler.setLevel(logging.DEBUG)
+    json_handler.setFormatter(JsonLineFormatter())
+
+    handlers = [json_handler]
+    if LOGGING_CONFIG.get('console', True):
+        console_handler = logging.StreamHandler()
+        console_handler.setLevel(LOGGING_CONFIG['console_level'])
+        console_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+        handlers.append(console_handler)
+
+    log_queue = queue.SimpleQueue()
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_queue_logging)
+
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    queue_handler = LazyQueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter(LOGGING_CONFIG['project_loggers']))
+    root.addHandler(queue_handler)
+
+    # Уровни - только логгерам проекта (work_ua_parser и *.card - в configure_levels)
+    for name in LOGGING_CONFIG['project_loggers']:
+        logging.getLogger(name).setLevel(LOGGING_CONFIG['summary_level'])
+
+
+def stop_queue_logging():
+    """Дописать очередь и остановить поток записи"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def configure_levels(logger: logging.Logger, card_logger: logging.Logger):
+    """Раздельные уровни: итоговые сообщения и детализация по карточкам"""
+    logger.setLevel(LOGGING_CONFIG['summary_level'])
+    card_logger.setLevel(LOGGING_CONFIG['card_level'])
@@ -0,0 +1,247 @@
+"""
+Почти одинаковые резюме под разными URL: MinHash + LSH по полосам
+
+Один кандидат часто встречается под несколькими URL и в нескольких
+категориях. Проверка processed_urls и UNIQUE(resume_url) такие копии не
+видит, и за каждую платим запросом к LLM и местом в базе.
+
+При приеме резюме по очищенному тексту строится подпись MinHash: шинглы из
+shingle_size слов, num_perm хеш-функций (a * h + b) mod p с фиксированным
+seed - подписи из базы сравнимы с новыми. Подпись режется на bands полос;
+резюме с хотя бы одной совпавшей полосой - кандидаты, дубликат - кандидат с
+оценкой сходства Жаккара (доля совпавших позиций подписи) >= threshold.
+
+Корзины держатся в памяти (поиск - bands обращений к словарю, доли
+миллисекунды), подписи, корзины и кластеры - в ResumeDatabase (resume_minhash,
+resume_lsh). Кластер уникального резюме - его ID, дубликат попадает в кластер
+найденного резюме.
+
+В базу (add) резюме записывается только после сохранения в resumes. Резюме,
+ожидающие извлечения в пакете, держатся в памяти (hold) - копия в том же
+пакете не уйдет в LLM второй раз, а неудачный пакет не оставит в индексе
+резюме, которого нет в базе (release).
+
+Использование:
+    python near_duplicates.py clusters [--db work_ua_resumes.db] [--min-size 2]
+    python near_duplicates.py cluster <url или ID кластера> [--db work_ua_resumes.db]
+"""
+
+import argparse
+import re
+import sys
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from clean_full_text import clean_boilerplate
+from config import NEAR_DUPLICATE_CONFIG
+from database_manager import ResumeDatabase
+from incremental_crawl import resume_id_from_url
+
+# Простое число Мерсенна 2^31 - 1: a, b < p и 32-битный хеш шингла дают a * h + b < 2^63
+MERSENNE_PRIME = (1 << 31) - 1
+
+WORD_RE = re.compile(r'\w+')
+
+
+def resume_tokens(text: str) -> List[str]:
+    """Слова очищенного текста в нижнем регистре, без чисел (ID, даты и счетчики просмотров у копий разные)"""
+    return [word for word in WORD_RE.findall(clean_boilerplate(text or '').lower()) if not word.isdigit()]
+
+
+def shingle_hashes(tokens: List[str], size: int) -> np.ndarray:
+    """32-битные хеши уникальных шинглов из size слов подряд"""
+    size = min(size, len(tokens)) or 1
+    shingles = {' '.join(tokens[index:index + size]) for index in range(len(tokens) - size + 1)}
+    return np.fromiter((zlib.crc32(shingle.encode('utf-8')) for shingle in shingles),
+                       dtype=np.uint64, count=len(shingles))
+
+
+class NearDuplicateIndex:
+    """Индекс подписей MinHash с корзинами LSH (потокобезопасно)"""
+
+    def __init__(self, db: Optional[ResumeDatabase] = None, logger=None, metrics=None,
+                 config: Optional[Dict] = None):
+        settings = {**NEAR_DUPLICATE_CONFIG, **(config or {})}
+        if settings['num_perm'] % settings['bands']:
+            raise ValueError(f"num_perm ({settings['num_perm']}) должно делиться на bands ({settings['bands']})")
+        self.db = db or ResumeDatabase(settings['database_file'])
+        self.logger = logger
+        self.metrics = metrics
+        self.num_perm = settings['num_perm']
+        self.bands = settings['bands']
+        self.rows = self.num_perm // self.bands
+        self.shingle_size = settings['shingle_size']
+        self.threshold = settings['threshold']
+        self.min_tokens = settings['min_tokens']
+
+        generator = np.random.default_rng(settings['seed'])
+        self._a = generator.integers(1, MERSENNE_PRIME, size=(self.num_perm, 1), dtype=np.uint64)
+        self._b = generator.integers(0, MERSENNE_PRIME, size=(self.num_perm, 1), dtype=np.uint64)
+
+        self.signatures: Dict[str, np.ndarray] = {}
+        self.clusters: Dict[str, str] = {}
+        self.buckets: List[Dict[bytes, List[str]]] = [{} for _ in range(self.bands)]
+        self.pending: Dict[str, Dict] = {}  # Ожидают сохранения: {url: результат check()}
+        self.stats = {'checked': 0, 'duplicates': 0, 'short': 0, 'seconds': 0.0}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        """Подписи и корзины из базы (подписи с другим num_perm пропускаются)"""
+        signatures, buckets = self.db.load_minhash()
+        for resume_url, signature, cluster_id in signatures:
+            signature = np.frombuffer(signature, dtype=np.uint32)
+            if len(signature) == self.num_perm:
+                self.signatures[resume_url] = signature
+                self.clusters[resume_url] = cluster_id
+        for band, bucket, resume_url in buckets:
+            if band < self.bands and resume_url in self.signatures:
+                self.buckets[band].setdefault(bytes(bucket), []).append(resume_url)
+        if self.logger and self.signatures:
+            self.logger.info("🧬 Подписи MinHash: %d резюме из %s", len(self.signatures), self.db.db_path)
+
+    # ---------- Подпись ----------
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """Подпись MinHash текста резюме; None - текст короче min_tokens слов"""
+        tokens = resume_tokens(text)
+        if len(tokens) < self.min_tokens:
+            return None
+        hashes = shingle_hashes(tokens, self.shingle_size)
+        return ((self._a * hashes + self._b) % MERSENNE_PRIME).min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        return [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes()) for band in range(self.bands)]
+
+    def similarity(self, first: np.ndarray, second: np.ndarray) -> float:
+        """Оценка сходства Жаккара по подписям"""
+        return float(np.count_nonzero(first == second)) / self.num_perm
+
+    # ---------- Поиск и запись ----------
+
+    def check(self, resume_url: str, text: str) -> Dict:
+        """
+        Поиск почти одинакового резюме, уже принятого раньше
+
+        Returns:
+            Dict: resume_url, signature, cluster_id, duplicate_of (None - не дубликат),
+                similarity, pending (дубликат еще не сохраненного резюме), seconds;
+                для add() после сохранения резюме
+        """
+        started_at = time.perf_counter()
+        signature = self.signature(text)
+        match = {'resume_url': resume_url, 'signature': signature, 'cluster_id': resume_id_from_url(resume_url),
+                 'duplicate_of': None, 'similarity': None, 'pending': False}
+
+        if signature is not None:
+            with self._lock:
+                candidates = {url for band, key in self._band_keys(signature)
+                              for url in self.buckets[band].get(key, ()) if url != resume_url}
+                scored = [(self.similarity(signature, self.signatures[url]), url) for url in candidates]
+                # Ожидающих сохранения немного (один пакет) - сравниваются все
+                scored += [(self.similarity(signature, held['signature']), url)
+                           for url, held in self.pending.items() if url != resume_url]
+                if resume_url in self.clusters:
+                    match['cluster_id'] = self.clusters[resume_url]  # Повторная проверка того же URL
+                best = max(scored, default=None)
+                if best and best[0] >= self.threshold:
+                    held = self.pending.get(best[1])
+                    match.update(duplicate_of=best[1], similarity=round(best[0], 3), pending=held is not None,
+                                 cluster_id=held['cluster_id'] if held else self.clusters[best[1]])
+
+        match['seconds'] = time.perf_counter() - started_at
+        self.stats['checked'] += 1
+        self.stats['seconds'] += match['seconds']
+        result = 'short' if signature is None else 'duplicate' if match['duplicate_of'] else 'unique'
+        if result == 'short':
+            self.stats['short'] += 1
+        elif result == 'duplicate':
+            self.stats['duplicates'] += 1
+            if self.logger:
+                self.logger.info("🧬 Почти дубликат (%.0f%%): %s = %s, кластер %s", match['similarity'] * 100,
+                                 resume_url, match['duplicate_of'], match['cluster_id'])
+        if self.metrics:
+            self.metrics.observe('near_duplicate_seconds', match['seconds'])
+            self.metrics.inc('near_duplicates_total', result=result)
+        return match
+
+    def hold(self, match: Dict):
+        """Резюме ждет извлечения и сохранения: только в памяти, для дубликатов в том же пакете"""
+        if match['signature'] is not None:
+            with self._lock:
+                self.pending[match['resume_url']] = match
+
+    def release(self, resume_url: str):
+        """Резюме не сохранено - больше не образец для дубликатов"""
+        with self._lock:
+            self.pending.pop(resume_url, None)
+
+    def add(self, match: Dict) -> Optional[str]:
+        """Запись результата check() в индекс и базу после сохранения резюме; кластер (None - подписи нет)"""
+        signature = match['signature']
+        if signature is None:
+            return None
+        resume_url = match['resume_url']
+        band_keys = self._band_keys(signature)
+        with self._lock:
+            self.pending.pop(resume_url, None)
+            known = resume_url in self.signatures
+            self.signatures[resume_url] = signature
+            self.clusters[resume_url] = match['cluster_id']
+            if not known:
+                for band, key in band_keys:
+                    self.buckets[band].setdefault(key, []).append(resume_url)
+        self.db.save_minhash(resume_url, signature.tobytes(), match['cluster_id'], band_keys,
+                             duplicate_of=match['duplicate_of'], similarity=match['similarity'])
+        return match['cluster_id']
+
+    def summary(self) -> Dict:
+        return {**self.stats, 'indexed': len(self.signatures),
+                'avg_ms': round(self.stats['seconds'] / self.stats['checked'] * 1000, 3) if self.stats['checked'] else 0}
+
+    def log_summary(self, logger=None):
+        logger = logger or self.logger
+        if not logger or not self.stats['checked']:
+            return
+        summary = self.summary()
+        logger.info(f"🧬 ДУБЛИКАТЫ: проверено {summary['checked']}, почти одинаковых {summary['duplicates']} "
+                    f"(без LLM и записи), коротких {summary['short']}, в индексе {summary['indexed']}, "
+                    f"{summary['avg_ms']:.2f} мс на резюме")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Кластеры почти одинаковых резюме")
+    arg_parser.add_argument('command', choices=['clusters', 'cluster'])
+    arg_parser.add_argument('target', nargs='?', help="URL резюме или ID кластера (для cluster)")
+    arg_parser.add_argument('--db', default=NEAR_DUPLICATE_CONFIG['database_file'])
+    arg_parser.add_argument('--min-size', type=int, default=2)
+    args = arg_parser.parse_args()
+
+    db = ResumeDatabase(args.db)
+    if args.command == 'clusters':
+        clusters = db.get_duplicate_clusters(args.min_size)
+        for cluster in clusters:
+            print(f"🧬 {cluster['cluster_id']:<12} {cluster['size']:>3} URL: {', '.join(cluster['resume_urls'])}")
+        print(f"📊 Кластеров из {args.min_size}+ URL: {len(clusters)}")
+        return 0
+
+    if not args.target:
+        arg_parser.error("cluster: укажите URL резюме или ID кластера")
+    cluster_id = db.get_cluster_id(args.target) or args.target
+    members = db.get_cluster(cluster_id)
+    if not members:
+        print(f"❌ Кластер не найден: {args.target}")
+        return 1
+    print(f"🧬 Кластер {cluster_id}: {len(members)} URL")
+    for member in members:
+        note = f"дубликат {member['duplicate_of']} ({member['similarity']:.0%})" if member['duplicate_of'] else 'сохранено'
+        print(f"   {member['resume_url']}  {note}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+"""
+Ожидания по событиям страницы вместо фиксированных пауз
+
+Сигналы готовности: document.readyState, мутации DOM в #pjax-resume-list,
+события pjax:end и стабильное количество карточек. Время каждого ожидания
+записывается, чтобы видеть, сколько реально тратится на навигацию.
+"""
+
+import time
+from typing import Dict, Optional
+
+LIST_CONTAINER_ID = 'pjax-resume-list'
+
+# Счетчики мутаций и PJAX событий живут в window страницы. После полной
+# навигации объект пропадает - это тоже признак смены страницы.
+INSTALL_OBSERVERS_JS = """
+if (window.__pageWaits) { return true; }
+const containerId = arguments[0];
+const state = {mutations: 0, lastMutation: performance.now(), pjaxEnd: 0};
+window.__pageWaits = state;
+const onPjaxEnd = () => { state.pjaxEnd += 1; state.lastMutation = performance.now(); };
+document.addEventListener('pjax:end', onPjaxEnd);
+if (window.jQuery) { window.jQuery(document).on('pjax:end', onPjaxEnd); }
+const observe = () => {
+    const container = document.getElementById(containerId);
+    if (!container) { return false; }
+    new MutationObserver((records) => {
+        state.mutations += records.length;
+        state.lastMutation = performance.now();
+    }).observe(container, {childList: true, subtree: true});
+    return true;
+};
+if (!observe()) {
+    // Контейнер еще не в DOM - подключаемся, когда он появится
+    new MutationObserver((records, observer) => {
+        if (observe()) { observer.disconnect(); }
+    }).observe(document.documentElement, {childList: true, subtree: true});
+}
+return true;
+"""
+
+STATE_JS = """
+const state = window.__pageWaits;
+return {
+    installed: !!state,
+    ready_state: document.readyState,
+    mutations: state ? state.mutations : 0,
+    pjax_end: state ? state.pjaxEnd : 0,
+    quiet_ms: state ? performance.now() - state.lastMutation : 0,
+    cards: arguments[0] ? document.querySelectorAll(arguments[0]).length : 0,
+    url: location.href
+};
+"""
+
+
+class PageWaiter:
+    """Ожидания по сигналам страницы с журналом фактического времени"""
+
+    def __init__(self, driver=None, logger=None, poll_interval: float = 0.1, metrics=None):
+        self.driver = driver
+        self.logger = logger
+        self.metrics = metrics
+        self.poll_interval = poll_interval
+        self.stats: Dict[str, Dict] = {}  # Агрегаты по видам ожиданий (журнал не растет за длинный запуск)
+        self.card_count = 0  # Карточек при последнем stable_cards
+
+    def attach(self, driver):
+        """Новый драйвер (после перезапуска) - журнал ожиданий сохраняется"""
+        self.driver = driver
+
+    def _state(self, card_selector: Optional[str] = None) -> Dict:
+        return self.driver.execute_script(STATE_JS, card_selector) or {}
+
+    def _wait(self, name: str, condition, timeout: float) -> bool:
+        """Опрос условия до timeout, запись фактического времени ожидания"""
+        started_at = time.time()
+        ok = False
+        while True:
+            try:
+                ok = bool(condition())
+            except Exception:
+                ok = False
+            if ok or time.time() - started_at >= timeout:
+                break
+            time.sleep(self.poll_interval)
+
+        elapsed = time.time() - started_at
+        stats = self.stats.setdefault(name, {'count': 0, 'total_s': 0.0, 'max_s': 0.0, 'timeouts': 0})
+        stats['count'] += 1
+        stats['total_s'] = round(stats['total_s'] + round(elapsed, 3), 3)
+        stats['max_s'] = max(stats['max_s'], round(elapsed, 3))
+        stats['timeouts'] += 0 if ok else 1
+        if self.metrics:
+            self.metrics.observe('page_wait_seconds', elapsed, wait=name, ok=ok)
+        if self.logger:
+            level = self.logger.debug if ok else self.logger.warning
+            level(f"⏱️ Ожидание '{name}': {elapsed:.2f}с {'✅' if ok else '⚠️ таймаут'}")
+        return ok
+
+    def install_observers(self) -> bool:
+        """Подключение MutationObserver и обработчика pjax:end на текущей странице"""
+        try:
+            return bool(self.driver.execute_script(INSTALL_OBSERVERS_JS, LIST_CONTAINER_ID))
+        except Exception:
+            return False
+
+    def marker(self) -> Dict:
+        """Снимок счетчиков перед действием (клик пагинации, back)"""
+        self.install_observers()
+        return self._state()
+
+    def document_ready(self, timeout: float = 10) -> bool:
+        """document.readyState перешел в interactive/complete"""
+        return self._wait(
+            'document_ready',
+            lambda: self._state()['ready_state'] in ('interactive', 'complete'),
+            timeout
+        )
+
+    def list_changed(self, marker: Dict, timeout: float = 15) -> bool:
+        """
+        Список резюме обновился после действия
+
+        Срабатывает на pjax:end, мутацию контейнера или полную навигацию
+        (смена URL либо новый документ без наших счетчиков).
+        """
+        def changed():
+            state = self._state()
+            if state['url'] != marker.get('url') or not state['installed']:
+                return state['ready_state'] in ('interactive', 'complete')
+            return (state['pjax_end'] > marker.get('pjax_end', 0)
+                    or state['mutations'] > marker.get('mutations', 0))
+
+        return self._wait('list_changed', changed, timeout)
+
+    def stable_cards(self, card_selector: str, timeout: float = 10, quiet_ms: float = 300) -> bool:
+        """
+        Количество карточек не меняется quiet_ms миллисекунд, а контейнер за это
+        время не мутировал
+
+        Ноль карточек - тоже устоявшееся состояние, если документ загружен
+        полностью (последняя или пустая страница, сломанный селектор): ожидание не
+        тянется до timeout. Ноль или N решает вызывающий код по card_count.
+        """
+        self.install_observers()
+        last = {'count': -1, 'since': time.time()}
+
+        def stable():
+            state = self._state(card_selector)
+            if not state['installed']:
+                self.install_observers()
+                return False
+            self.card_count = state['cards']
+            if state['cards'] != last['count']:
+                last['count'] = state['cards']
+                last['since'] = time.time()
+                return False
+            # Карточки есть - достаточно interactive, ноль - только после полной загрузки документа
+            ready = ('complete',) if state['cards'] == 0 else ('interactive', 'complete')
+            if state['ready_state'] not in ready:
+                return False
+            steady_ms = (time.time() - last['since']) * 1000
+            return steady_ms >= quiet_ms and state['quiet_ms'] >= quiet_ms
+
+        return self._wait('stable_cards', stable, timeout)
+
+    def summary(self) -> Dict:
+        """Количество, суммарное и максимальное время по видам ожиданий"""
+        return {name: {**stats, 'avg_s': round(stats['total_s'] / stats['count'], 3)}
+                for name, stats in self.stats.items()}
+
+    def log_summary(self, logger=None):
+        logger = logger or self.logger
+        for name, stats in self.summary().items():
+            logger.info(f"⏱️ {name}: {stats['count']} раз, в среднем {stats['avg_s']}с, "
+                        f"максимум {stats['max_s']}с, всего {stats['total_s']}с, таймаутов {stats['timeouts']}")
@@ -0,0 +1,333 @@
+"""
+Пагинация по прямым URL страниц списка
+
+Вместо поиска кнопки "Наступна", клика с запасными способами и ожидания
+PJAX число страниц читается с первой страницы (наибольший ?page=N в
+пагинации), и URL страниц строятся заранее: base_url?page=N. Если пагинация
+показывает не все номера, число уточняется по пагинации последней известной
+страницы.
+
+Конец списка - первая пустая страница: без карточек или только с уже
+встреченными в этом обходе резюме (сайт может отдавать последнюю страницу на
+любой больший номер). Пустая страница внутри известного числа страниц
+(медленная загрузка, сбой разметки) сначала загружается еще раз.
+
+По HTTP (iter_pages) страницы загружаются волнами по rate.concurrency:
+AdaptiveRateController.acquire разносит начала запросов, ответы сервера
+регулируют паузу и параллельность. Страницы с ошибкой (429, 5xx, таймаут)
+повторяются с растущей паузой до retry_attempts раз; не загруженные и после
+этого попадают в missing и в итог. Браузерный путь (UltimateWorkUaParser)
+открывает те же URL через driver.get без кликов.
+
+Использование:
+    python pagination_planner.py [url] [--max-pages N]   # страницы и карточки по HTTP
+"""
+
+import argparse
+import re
+import sys
+import time
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+from config import BASE_URL, PARSING_CONFIG, SELECTOR_INFERENCE_CONFIG
+from rate_controller import AdaptiveRateController
+from selector_inference import Document, infer_card_selectors, page_number, parse_html, select
+
+
+def list_page_url(base_url: str, page: int) -> str:
+    """URL страницы списка: первая - без ?page, остальные - ?page=N (прочие параметры сохраняются)"""
+    parts = urlsplit(base_url)
+    query = [(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True) if key != 'page']
+    if page > 1:
+        query.append(('page', str(page)))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def read_total_pages(html, url: str) -> int:
+    """Наибольший номер страницы в ссылках на этот же список (не меньше текущей)"""
+    doc = html if isinstance(html, Document) else parse_html(html)
+    path = urlsplit(url).path
+    pages = [page_number(url) or 1]
+    for node in doc.by_tag.get('a', []):
+        href = node.attrs.get('href', '')
+        if 'page=' not in href:
+            continue
+        target = urljoin(url, href)
+        number = page_number(target)
+        if number and urlsplit(target).path == path:
+            pages.append(number)
+    return max(pages)
+
+
+def fetch_total_pages(base_url: Optional[str] = None) -> int:
+    """Число страниц списка по пагинации первой страницы (один HTTP запрос)"""
+    from fixture_replay import http_get
+
+    url = list_page_url(base_url or BASE_URL, 1)
+    return read_total_pages(http_get(url), url)
+
+
+def _resume_link(node, link_re):
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if current.tag == 'a' and link_re.search(current.attrs.get('href', '')):
+            return current
+        stack.extend(reversed(current.children))
+    return None
+
+
+def list_cards(html, url: str, selector: Optional[str] = None) -> List[Dict]:
+    """
+    Карточки страницы списка без браузера: [{'url', 'title'}]
+
+    Селектор - из реестра; если он ничего не нашел - выведенный по
+    повторяющейся структуре (selector_inference).
+    """
+    doc = html if isinstance(html, Document) else parse_html(html)
+    link_re = re.compile(SELECTOR_INFERENCE_CONFIG['resume_link_pattern'])
+    nodes = []
+    if selector:
+        try:
+            nodes = select(doc, selector)
+        except ValueError:
+            nodes = []  # Селектор вне поддерживаемого подмножества CSS
+    if not nodes:
+        candidates = infer_card_selectors(doc)
+        nodes = select(doc, candidates[0]['selector']) if candidates else []
+
+    cards, seen = [], set()
+    for node in nodes:
+        link = _resume_link(node, link_re)
+        if link is None:
+            continue
+        card_url = urljoin(url, link.attrs['href'])
+        if card_url not in seen:
+            seen.add(card_url)
+            cards.append({'url': card_url, 'title': ' '.join(link.text_content().split()) or 'Без названия'})
+    return cards
+
+
+class PaginationPlanner:
+    """Страницы списка по прямым URL с определением конца по пустой странице"""
+
+    def __init__(self, base_url: Optional[str] = None, rate: Optional[AdaptiveRateController] = None,
+                 metrics=None, logger=None, max_pages: Optional[int] = None,
+                 fetch: Optional[Callable[[str], str]] = None, card_selector: Optional[str] = None,
+                 retry_attempts: Optional[int] = None):
+        """
+        Args:
+            base_url: Первая страница списка
+            rate: Общий регулятор скорости (по умолчанию - собственный)
+            max_pages: Ограничение числа страниц (по умолчанию PARSING_CONFIG['max_pages'])
+            fetch: url -> HTML для iter_pages (по умолчанию HTTP GET)
+            card_selector: Селектор карточек для разбора без браузера
+            retry_attempts: Повторов страницы с ошибкой (по умолчанию PARSING_CONFIG['pagination_retry_attempts'])
+        """
+        self.base_url = base_url or BASE_URL
+        self.rate = rate or AdaptiveRateController(metrics=metrics, logger=logger)
+        self.metrics = metrics
+        self.logger = logger
+        self.max_pages = max_pages or PARSING_CONFIG['max_pages']
+        self.fetch = fetch
+        self.card_selector = card_selector
+        self.retry_attempts = (retry_attempts if retry_attempts is not None
+                               else PARSING_CONFIG['pagination_retry_attempts'])
+        self.total_pages: Optional[int] = None
+        self.end_page: Optional[int] = None
+        self.seen = set()
+        self.refetched = set()  # Пустые страницы внутри числа страниц, загруженные повторно
+        self.missing: List[int] = []  # Не загрузились и после повторов
+        self.latencies: Dict[int, float] = {}
+        self.stats = {'pages': 0, 'cards': 0, 'empty': 0, 'errors': 0, 'retries': 0}
+
+    # ---------- План ----------
+
+    def page_url(self, page: int) -> str:
+        return list_page_url(self.base_url, page)
+
+    def update_total(self, html, url: str) -> int:
+        """Число страниц по пагинации страницы (только растет)"""
+        total = read_total_pages(html, url)
+        if self.total_pages is None or total > self.total_pages:
+            if self.logger:
+                self.logger.info("🧭 Страниц в списке: %d (по пагинации %s)", total, url)
+            self.total_pages = total
+        return self.total_pages
+
+    @property
+    def last_page(self) -> int:
+        return min(self.max_pages, self.total_pages or 1)
+
+    def planned_urls(self) -> List[str]:
+        return [self.page_url(page) for page in range(1, self.last_page + 1)]
+
+    def next_url(self, page: int) -> Optional[str]:
+        """URL страницы после page; None - список закончился или достигнут max_pages"""
+        if self.end_page is not None or page >= self.last_page:
+            return None
+        return self.page_url(page + 1)
+
+    def accept(self, page: int, cards: List[Dict]) -> Optional[bool]:
+        """
+        Учет карточек страницы
+
+        Returns:
+            True - есть новые резюме; False - страница пустая, это конец списка;
+            None - пустая страница внутри известного числа страниц: загрузить ее
+            еще раз и снова вызвать accept (вторая пустая - конец списка)
+        """
+        urls = [card['url'] for card in cards if card.get('url')]
+        new_urls = [url for url in urls if url not in self.seen]
+        if not new_urls and page <= (self.total_pages or 0) and page not in self.refetched:
+            self.refetched.add(page)
+            if self.logger:
+                self.logger.warning("⚠️ Страница %d из %d пустая - загружаем еще раз", page, self.total_pages)
+            return None
+        self.seen.update(new_urls)
+        self.stats['pages'] += 1
+        self.stats['cards'] += len(urls)
+        if self.metrics:
+            self.metrics.inc('planned_pages_total', result='cards' if new_urls else 'empty')
+        if new_urls:
+            return True
+        self.stats['empty'] += 1
+        self.end_page = page
+        if self.logger:
+            self.logger.info("🏁 Страница %d пустая%s - конец списка", page,
+                             ' (только уже встреченные резюме)' if urls else '')
+        return False
+
+    # ---------- Загрузка по HTTP ----------
+
+    def _fetch_page(self, page: int) -> Tuple[int, str, Optional[str]]:
+        """(номер, URL, HTML); HTML '' - страницы нет (404), None - ошибка загрузки"""
+        from fixture_replay import http_get
+
+        url = self.page_url(page)
+        self.rate.acquire('page')
+        started_at = time.perf_counter()
+        try:
+            html = (self.fetch or http_get)(url)
+        except urllib.error.HTTPError as e:
+            latency = time.perf_counter() - started_at
+            if e.code == 404:
+                self.rate.observe(latency)
+                return page, url, ''
+            self.rate.observe(latency, ok=False, reason=f'http_{e.code}')
+            return page, url, None
+        except Exception as e:
+            self.rate.observe_error('error', time.perf_counter() - started_at)
+            if self.logger:
+                self.logger.warning("⚠️ Страница %d не загружена: %s", page, e)
+            return page, url, None
+        latency = time.perf_counter() - started_at
+        self.latencies[page] = latency
+        self.rate.observe(latency)
+        return page, url, html
+
+    def _fetch_with_retry(self, pool: ThreadPoolExecutor, pages) -> Dict[int, Tuple[str, Optional[str]]]:
+        """{номер: (URL, HTML)} для pages; страницы с ошибкой - повторно с растущей паузой"""
+        results = {page: (url, html) for page, url, html in pool.map(self._fetch_page, pages)}
+        for attempt in range(1, self.retry_attempts + 1):
+            failed = [page for page, (_, html) in sorted(results.items()) if html is None]
+            if not failed:
+                break
+            self.stats['retries'] += len(failed)
+            delay = self.rate.current_delay('page') * 2 ** (attempt - 1)
+            if self.logger:
+                self.logger.warning("🔄 Страницы %s не загружены, повтор %d/%d через %.1fс",
+                                    failed, attempt, self.retry_attempts, delay)
+            time.sleep(delay)
+            results.update({page: (url, html) for page, url, html in pool.map(self._fetch_page, failed)})
+        return results
+
+    def _page_cards(self, pool: ThreadPoolExecutor, page: int, url: str, html: str) -> Optional[List[Dict]]:
+        """Карточки загруженной страницы; None - конец списка (пустая и после повторной загрузки)"""
+        while True:
+            if html:
+                self.update_total(html, url)
+            cards = list_cards(html, url, self.card_selector) if html else []
+            accepted = self.accept(page, cards)
+            if accepted is None:
+                url, html = self._fetch_with_retry(pool, [page])[page]
+                html = html or ''  # Снова ошибка - считаем страницу пустой
+                continue
+            return cards if accepted else None
+
+    def iter_pages(self) -> Iterator[Tuple[int, str, List[Dict]]]:
+        """
+        (номер, URL, карточки) по порядку страниц до конца списка
+
+        Первая страница загружается отдельно (по ней - число страниц),
+        остальные - параллельными волнами по текущей параллельности регулятора.
+        Страница, не загруженная и после повторов, пропускается (self.missing).
+        """
+        with ThreadPoolExecutor(max_workers=max(1, self.rate.config['max_concurrency'])) as pool:
+            url, html = self._fetch_with_retry(pool, [1])[1]
+            if html is None:
+                raise RuntimeError(f"Первая страница списка не загружена: {url}")
+            cards = self._page_cards(pool, 1, url, html)
+            if cards is None:
+                return
+            yield 1, url, cards
+
+            next_page = 2
+            while next_page <= self.last_page:
+                wave = range(next_page, min(self.last_page, next_page + max(1, self.rate.concurrency) - 1) + 1)
+                results = self._fetch_with_retry(pool, wave)
+                for page in wave:
+                    url, html = results[page]
+                    if html is None:
+                        # Ошибка загрузки - не признак конца списка, страница в итоге как пропущенная
+                        self.stats['errors'] += 1
+                        self.missing.append(page)
+                        if self.logger:
+                            self.logger.error("❌ Страница %d не загружена после %d повторов", page,
+                                              self.retry_attempts)
+                        continue
+                    cards = self._page_cards(pool, page, url, html)
+                    if cards is None:
+                        return
+                    yield page, url, cards
+                next_page = wave[-1] + 1
+
+    def summary(self) -> Dict:
+        return {**self.stats, 'total_pages': self.total_pages, 'end_page': self.end_page,
+                'unique_cards': len(self.seen), 'missing': list(self.missing)}
+
+    def log_summary(self, logger=None):
+        logger = logger or self.logger
+        if not logger or not self.stats['pages']:
+            return
+        summary = self.summary()
+        logger.info(f"🧭 ПАГИНАЦИЯ: страниц {summary['pages']} из {summary['total_pages']} по пагинации, "
+                    f"карточек {summary['unique_cards']}, пустых {summary['empty']}, ошибок {summary['errors']}")
+        if summary['missing']:
+            logger.warning(f"⚠️ Не загружены страницы списка: {summary['missing']}")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Страницы списка по прямым URL (без браузера)")
+    arg_parser.add_argument('url', nargs='?', default=BASE_URL)
+    arg_parser.add_argument('--max-pages', type=int, default=None)
+    args = arg_parser.parse_args()
+
+    planner = PaginationPlanner(args.url, max_pages=args.max_pages)
+    started_at = time.perf_counter()
+    for page, url, cards in planner.iter_pages():
+        print(f"📄 {page:>3}: {len(cards):>3} карточек  {url}")
+    summary = planner.summary()
+    print(f"🧭 Страниц {summary['pages']} (по пагинации {summary['total_pages']}), "
+          f"резюме {summary['unique_cards']} за {time.perf_counter() - started_at:.1f}с")
+    if summary['missing']:
+        print(f"⚠️ Не загружены страницы: {summary['missing']}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+"""
+Компактный промпт резюме для LLM
+
+- только контейнер резюме (без навигации сайта, похожих кандидатов, футера)
+- служебные блоки убираются паттернами clean_full_text.BOILERPLATE_PATTERNS
+- пробелы и повторяющиеся строки схлопываются
+- текст укладывается в бюджет токенов (tiktoken) по секциям: сначала
+  сокращаются второстепенные секции, опыт работы и шапка - последними
+
+Раньше в LLM уходил весь текст страницы, обрезанный на 8000 символах, и
+обрезка могла прийтись на середину опыта работы.
+"""
+
+import logging
+import re
+from typing import Dict, List, Optional, Tuple
+
+from clean_full_text import clean_boilerplate
+from config import PROMPT_CONFIG
+from resume_sections import HEADING_RE, SECTION_HEADINGS
+
+_SPACES_RE = re.compile(r'[ \t ]+')
+
+_encodings = {}
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """
+    Количество токенов по tiktoken
+
+    Если tiktoken не установлен или словарь недоступен (нет сети при первом
+    запуске), используется оценка по байтам UTF-8.
+    """
+    model = model or PROMPT_CONFIG['model']
+    if model not in _encodings:
+        try:
+            import tiktoken
+            _encodings[model] = tiktoken.encoding_for_model(model)
+        except Exception as e:
+            logging.getLogger(__name__).warning("⚠️ tiktoken недоступен (%s), токены оцениваются по байтам", e)
+            _encodings[model] = None
+    encoding = _encodings[model]
+    if encoding is None:
+        return (len(text.encode('utf-8')) + 3) // 4
+    return len(encoding.encode(text))
+
+
+def isolate_container(soup):
+    """Контейнер резюме по PROMPT_CONFIG['container_selectors'], иначе body"""
+    for selector in PROMPT_CONFIG['container_selectors']:
+        container = soup.select_one(selector)
+        if container is not None and container.get_text(strip=True):
+            return container
+    return soup.body or soup
+
+
+def compact_whitespace(text: str) -> str:
+    """Схлопывание пробелов, пустых строк и подряд повторяющихся строк"""
+    lines = []
+    for line in text.split('\n'):
+        line = _SPACES_RE.sub(' ', line).strip()
+        if line and (not lines or lines[-1] != line):
+            lines.append(line)
+    return '\n'.join(lines)
+
+
+def _split_blocks(text: str) -> List[Tuple[Optional[str], str]]:
+    """Блоки (ключ секции, текст); первый блок - шапка резюме до первого заголовка"""
+    headings = list(HEADING_RE.finditer(text))
+    if not headings:
+        return [('header', text)]
+    blocks = [('header', text[:headings[0].start()])]
+    for current, following in zip(headings, headings[1:] + [None]):
+        key = SECTION_HEADINGS[current.group(1)] or ('skills' if current.group(1) == 'Знання і навички' else None)
+        blocks.append((key, text[current.start():following.start() if following else len(text)]))
+    return blocks
+
+
+def _truncate_lines(text: str, budget: int, model: Optional[str]) -> str:
+    """Первые строки текста, укладывающиеся в budget токенов"""
+    kept = []
+    used = 0
+    for line in text.split('\n'):
+        tokens = count_tokens(line + '\n', model)
+        if used + tokens > budget:
+            break
+        kept.append(line)
+        used += tokens
+    return '\n'.join(kept)
+
+
+def fit_to_budget(text: str, budget: int, model: Optional[str] = None) -> Tuple[str, List[str]]:
+    """
+    Текст в пределах budget токенов с сокращением секций по приоритету
+
+    Returns:
+        (текст, список сокращенных секций)
+    """
+    blocks = _split_blocks(text)
+    # Хвост страницы после 'Запропонувати вакансію' не нужен никогда
+    blocks = [(key, block.strip('\n')) for key, block in blocks if key is not None]
+    tokens = [count_tokens(block + '\n', model) for _, block in blocks]
+    total = sum(tokens)
+    trimmed = []
+
+    for key in PROMPT_CONFIG['trim_order']:
+        if total <= budget:
+            break
+        for index, (block_key, block) in enumerate(blocks):
+            if block_key != key or total <= budget:
+                continue
+            allowed = max(0, tokens[index] - (total - budget))
+            shortened = _truncate_lines(block, allowed, model)
+            new_tokens = count_tokens(shortened + '\n', model) if shortened else 0
+            blocks[index] = (block_key, shortened)
+            total -= tokens[index] - new_tokens
+            tokens[index] = new_tokens
+            trimmed.append(key)
+
+    return '\n'.join(block for _, block in blocks if block), trimmed
+
+
+class ResumePromptBuilder:
+    """Подготовка текста резюме для LLM и учет сэкономленных токенов"""
+
+    def __init__(self, budget: Optional[int] = None, model: Optional[str] = None, metrics=None):
+        self.budget = budget or PROMPT_CONFIG['token_budget']
+        self.model = model or PROMPT_CONFIG['model']
+        self.metrics = metrics
+        self.totals = {'resumes': 0, 'baseline_tokens': 0, 'tokens': 0}
+
+    @staticmethod
+    def legacy_text(soup) -> str:
+        """Текст, который раньше уходил в LLM (весь документ, 8000 символов)"""
+        for element in soup(['script', 'style', 'nav', 'header', 'footer']):
+            element.decompose()
+        text = soup.get_text(separator=' ', strip=True)
+        return text[:8000] + "..." if len(text) > 8000 else text
+
+    def build(self, page_html: str) -> Dict:
+        """
+        Текст резюме из HTML страницы
+
+        Returns:
+            Dict: text, tokens, baseline_tokens, saved_tokens, trimmed_sections
+        """
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(page_html, 'html.parser')
+        # Базовая линия - по тому же дереву до выделения контейнера: legacy_text убирает
+        # только script/style/nav/header/footer, которые ниже удаляются и так
+        baseline_tokens = count_tokens(self.legacy_text(soup), self.model)
+        container = isolate_container(soup)
+        for element in container(['script', 'style', 'nav', 'header', 'footer', 'noscript', 'svg', 'button']):
+            element.decompose()
+
+        text = compact_whitespace(clean_boilerplate(container.get_text(separator='\n')))
+        text, trimmed = fit_to_budget(text, self.budget, self.model)
+
+        tokens = count_tokens(text, self.model)
+        result = {
+            'text': text,
+            'tokens': tokens,
+            'baseline_tokens': baseline_tokens,
+            'saved_tokens': baseline_tokens - tokens,
+            'trimmed_sections': trimmed,
+        }
+
+        self.totals['resumes'] += 1
+        self.totals['baseline_tokens'] += baseline_tokens
+        self.totals['tokens'] += tokens
+        if self.metrics:
+            self.metrics.inc('llm_prompt_tokens_total', tokens)
+            self.metrics.inc('llm_prompt_tokens_saved_total', baseline_tokens - tokens)
+        return result
+
+    def log_summary(self, logger):
+        if not self.totals['resumes']:
+            return
+        baseline = self.totals['baseline_tokens']
+        saved = baseline - self.totals['tokens']
+        logger.info(f"✂️ ПРОМПТЫ: {self.totals['resumes']} резюме, {self.totals['tokens']:,} токенов "
+                    f"вместо {baseline:,} (сэкономлено {saved:,}, {saved / baseline * 100 if baseline else 0:.0f}%)")
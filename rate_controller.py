@@ -0,0 +1,205 @@
+"""
+Адаптивный контроль скорости парсинга (AIMD)
+
+Пока ответы сервера быстрые и без ошибок - пауза между запросами уменьшается
+на фиксированный шаг, а параллельность растет на единицу (additive increase).
+При таймаутах, HTTP 429/503 или странице с капчей пауза умножается, а
+параллельность делится пополам (multiplicative decrease).
+
+Выбранная скорость и история изменений пишутся в RunMetrics:
+    rate_delay_seconds, rate_concurrency (gauge), rate_adjustments_total,
+    server_latency_seconds, throttle_events_total
+"""
+
+import random
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+from config import RATE_CONFIG
+
+# Статус ответа и задержка сервера по Navigation Timing, признаки капчи
+PAGE_HEALTH_JS = """
+const nav = performance.getEntriesByType('navigation')[0];
+const markers = arguments[0];
+const title = (document.title || '').toLowerCase();
+return {
+    status: nav ? (nav.responseStatus || 0) : 0,
+    ttfb_ms: nav ? Math.max(0, nav.responseStart - nav.requestStart) : 0,
+    captcha: markers.selectors.some(s => document.querySelector(s) !== null)
+        || markers.titles.some(t => title.includes(t))
+};
+"""
+
+THROTTLE_STATUSES = (429, 503)
+
+
+class AdaptiveRateController:
+    """AIMD регулятор паузы между запросами и числа параллельных загрузок"""
+
+    def __init__(self, metrics=None, logger=None, config: Optional[Dict] = None):
+        self.config = {**RATE_CONFIG, **(config or {})}
+        self.metrics = metrics
+        self.logger = logger
+        self.delay = self.config['initial_delay']
+        self.concurrency = self.config['initial_concurrency']
+        self.window = deque(maxlen=self.config['error_window'])
+        self.healthy_streak = 0
+        self.history = deque(maxlen=self.config['history_size'])
+        self.adjustments = -1  # Первая запись ('start') - не изменение
+        self._delay_range = (self.delay, self.delay)
+        self._lock = threading.RLock()
+        self._next_slot = 0.0
+        self._record('start')
+
+    # ---------- наблюдения ----------
+
+    def observe(self, latency: float, ok: bool = True, reason: Optional[str] = None):
+        """
+        Результат одного запроса
+
+        Args:
+            latency: Задержка ответа сервера в секундах
+            ok: Запрос успешен
+            reason: Причина ошибки: timeout / http_429 / captcha / error
+        """
+        with self._lock:
+            self._observe(latency, ok, reason)
+
+    def _observe(self, latency: float, ok: bool, reason: Optional[str]):
+        self.window.append(ok)
+        if self.metrics:
+            self.metrics.observe('server_latency_seconds', latency)
+
+        if not ok:
+            if self.metrics:
+                self.metrics.inc('throttle_events_total', reason=reason or 'error')
+            if reason in ('timeout', 'captcha') or (reason or '').startswith('http_'):
+                self._decrease(reason)
+            elif self.error_rate() > self.config['max_error_rate']:
+                self._decrease('error_rate')
+            self.healthy_streak = 0
+            return
+
+        if latency > self.config['target_latency'] * self.config['slow_factor']:
+            self._decrease('slow')
+            self.healthy_streak = 0
+        elif latency <= self.config['target_latency'] and self.error_rate() <= self.config['max_error_rate']:
+            self.healthy_streak += 1
+            if self.healthy_streak >= self.config['increase_every']:
+                self._increase()
+                self.healthy_streak = 0
+
+    def observe_error(self, reason: str = 'error', latency: float = 0.0):
+        self.observe(latency, ok=False, reason=reason)
+
+    def observe_page(self, driver) -> Optional[str]:
+        """
+        Проверка текущей страницы драйвера: статус, задержка сервера, капча
+
+        Returns:
+            Причина троттлинга (http_429 / captcha / ...) или None
+        """
+        try:
+            health = driver.execute_script(PAGE_HEALTH_JS, self.config['captcha_markers']) or {}
+        except Exception:
+            return None
+
+        latency = (health.get('ttfb_ms') or 0) / 1000
+        status = health.get('status') or 0
+        if health.get('captcha'):
+            reason = 'captcha'
+        elif status in THROTTLE_STATUSES:
+            reason = f'http_{status}'
+        else:
+            reason = None
+        self.observe(latency, ok=reason is None, reason=reason)
+        return reason
+
+    def error_rate(self) -> float:
+        if not self.window:
+            return 0.0
+        return 1 - sum(self.window) / len(self.window)
+
+    # ---------- паузы ----------
+
+    def current_delay(self, kind: str = 'card') -> float:
+        return self.delay * (self.config['page_delay_factor'] if kind == 'page' else 1.0)
+
+    def wait(self, kind: str = 'card') -> float:
+        """Пауза перед следующим запросом (со случайным отклонением +/- jitter)"""
+        delay = self.current_delay(kind)
+        jitter = self.config['jitter']
+        delay *= random.uniform(1 - jitter, 1 + jitter)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    def acquire(self, kind: str = 'card') -> float:
+        """
+        Общий лимит для нескольких потоков: начала запросов разнесены на паузу
+
+        В отличие от wait() пауза отсчитывается от предыдущего запроса любого
+        потока, поэтому суммарная скорость не растет с числом потоков.
+        """
+        delay = self.current_delay(kind) / max(1, self.concurrency)
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + delay
+        if slot > now:
+            time.sleep(slot - now)
+        return slot - now
+
+    # ---------- регулировка ----------
+
+    def _increase(self):
+        delay = max(self.config['min_delay'], self.delay - self.config['delay_step'])
+        concurrency = min(self.config['max_concurrency'], self.concurrency + 1)
+        if delay == self.delay and concurrency == self.concurrency:
+            return
+        self.delay, self.concurrency = delay, concurrency
+        self._record('increase', direction='up')
+
+    def _decrease(self, reason: str):
+        self.delay = min(self.config['max_delay'],
+                         max(self.delay * self.config['backoff_factor'], self.config['min_backoff_delay']))
+        self.concurrency = max(1, self.concurrency // 2)
+        self._record(reason, direction='down')
+        if self.logger:
+            self.logger.warning("🐢 Снижаем скорость (%s): пауза %.2fс, параллельность %d",
+                                reason, self.delay, self.concurrency)
+
+    def _record(self, reason: str, direction: Optional[str] = None):
+        self.adjustments += 1
+        self._delay_range = (min(self._delay_range[0], self.delay), max(self._delay_range[1], self.delay))
+        self.history.append({
+            'time': round(time.time(), 3),
+            'reason': reason,
+            'delay': round(self.delay, 3),
+            'concurrency': self.concurrency,
+        })
+        if self.metrics:
+            self.metrics.record_event('rate', reason=reason, delay=round(self.delay, 3),
+                                      concurrency=self.concurrency)
+            self.metrics.set_gauge('rate_delay_seconds', self.delay)
+            self.metrics.set_gauge('rate_concurrency', self.concurrency)
+            if direction:
+                self.metrics.inc('rate_adjustments_total', direction=direction, reason=reason)
+
+    def summary(self) -> Dict:
+        return {
+            'delay': round(self.delay, 3),
+            'concurrency': self.concurrency,
+            'min_delay_reached': round(self._delay_range[0], 3),
+            'max_delay_reached': round(self._delay_range[1], 3),
+            'adjustments': self.adjustments,
+            'error_rate': round(self.error_rate(), 3),
+        }
+
+    def log_summary(self, logger):
+        summary = self.summary()
+        logger.info(f"🚦 СКОРОСТЬ: пауза {summary['delay']}с (диапазон {summary['min_delay_reached']}-"
+                    f"{summary['max_delay_reached']}с), параллельность {summary['concurrency']}, "
+                    f"изменений {summary['adjustments']}, ошибок {summary['error_rate'] * 100:.0f}%")
@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Колоночный снимок резюме и векторная аналитика на NumPy
+
+Снимок строится инкрементально из ResumeDatabase: при каждом обновлении
+читаются только записи с id больше сохраненного watermark.
+"""
+
+import json
+import os
+import sqlite3
+import time
+import logging
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from resume_fields import get_detailed_info, parse_age_years, parse_experience_years, parse_salary_number
+
+SKILL_WORD_BITS = 64
+
+
+class ResumeColumns:
+    """Колоночный снимок числовых полей резюме"""
+
+    def __init__(self, snapshot_path: str = "resume_columns.npz"):
+        """
+        Args:
+            snapshot_path: Путь к .npz файлу снимка
+        """
+        self.snapshot_path = snapshot_path
+        self.logger = logging.getLogger(__name__)
+        self._reset()
+
+    def _reset(self):
+        """Пустой снимок"""
+        self.urls = np.empty(0, dtype=object)
+        self.salary = np.empty(0, dtype=np.float64)
+        self.age = np.empty(0, dtype=np.float64)
+        self.experience_years = np.empty(0, dtype=np.float64)
+        self.city_id = np.empty(0, dtype=np.int32)
+        self.skill_bits = np.zeros((0, 1), dtype=np.uint64)
+        self.skill_totals = np.zeros(0, dtype=np.int64)
+
+        self.cities: List[str] = []
+        self.skills: List[str] = []
+        self.watermark = 0
+
+        self._city_ids: Dict[str, int] = {}
+        self._skill_ids: Dict[str, int] = {}
+        self._row_by_url: Dict[str, int] = {}
+
+    # ========================================
+    # ЗАГРУЗКА / СОХРАНЕНИЕ
+    # ========================================
+
+    def load(self) -> bool:
+        """Загрузка снимка с диска (False если снимка еще нет)"""
+        if not os.path.exists(self.snapshot_path):
+            return False
+
+        with np.load(self.snapshot_path, allow_pickle=False) as snapshot:
+            self.urls = snapshot['urls'].astype(object)
+            self.salary = snapshot['salary']
+            self.age = snapshot['age']
+            self.experience_years = snapshot['experience_years']
+            self.city_id = snapshot['city_id']
+            self.skill_bits = snapshot['skill_bits']
+            self.skill_totals = snapshot['skill_totals']
+            self.cities = snapshot['cities'].tolist()
+            self.skills = snapshot['skills'].tolist()
+            self.watermark = int(snapshot['watermark'])
+
+        self._city_ids = {city: i for i, city in enumerate(self.cities)}
+        self._skill_ids = {skill: i for i, skill in enumerate(self.skills)}
+        self._row_by_url = {url: i for i, url in enumerate(self.urls)}
+        return True
+
+    def save(self):
+        """Атомарное сохранение снимка на диск"""
+        tmp_path = self.snapshot_path + '.tmp.npz'
+        np.savez(
+            tmp_path,
+            urls=self.urls.astype(str),
+            salary=self.salary,
+            age=self.age,
+            experience_years=self.experience_years,
+            city_id=self.city_id,
+            skill_bits=self.skill_bits,
+            skill_totals=self.skill_totals,
+            cities=np.array(self.cities, dtype=str),
+            skills=np.array(self.skills, dtype=str),
+            watermark=np.int64(self.watermark)
+        )
+        os.replace(tmp_path, self.snapshot_path)
+
+    # ========================================
+    # ИНКРЕМЕНТАЛЬНОЕ ПОСТРОЕНИЕ
+    # ========================================
+
+    def update_from_db(self, db_path: str, batch_size: int = 5000) -> int:
+        """
+        Добавление в снимок записей, появившихся после watermark
+
+        INSERT OR REPLACE в ResumeDatabase выдает обновленной записи новый id,
+        поэтому обновления тоже попадают в выборку и перезаписывают строку по URL.
+        Удаленные записи (clear_database) по watermark не видны: если в БД меньше
+        записей, чем URL в снимке, или максимальный id меньше watermark, снимок
+        строится заново.
+
+        Returns:
+            int: Количество обработанных записей (при пересборке - и выбывших)
+        """
+        with sqlite3.connect(db_path) as conn:
+            cursor = conn.cursor()
+            max_id = cursor.execute('SELECT COALESCE(MAX(id), 0) FROM resumes').fetchone()[0]
+            processed = 0 if max_id < self.watermark else self._read_rows(cursor, batch_size)
+            # Счетчик - после чтения: новые записи во время чтения не выглядят удалением
+            count = cursor.execute('SELECT COUNT(*) FROM resumes').fetchone()[0]
+            if max_id < self.watermark or len(self.urls) > count:
+                dropped = len(self.urls) - count
+                self.logger.info(f"📈 Записи удалены из БД ({count} в БД, {len(self.urls)} в снимке), снимок строится заново")
+                self._reset()
+                processed = self._read_rows(cursor, batch_size) + max(dropped, 0)
+
+        if processed:
+            self.logger.info(f"📈 Снимок обновлен: +{processed} записей, всего {len(self.urls)}")
+        return processed
+
+    def _read_rows(self, cursor, batch_size: int) -> int:
+        """Чтение записей с id больше watermark пачками"""
+        processed = 0
+        cursor.execute(
+            'SELECT id, resume_url, resume_data FROM resumes WHERE id > ? ORDER BY id',
+            (self.watermark,)
+        )
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            self._append_rows(rows)
+            processed += len(rows)
+        return processed
+
+    def _append_rows(self, rows):
+        """Разбор пачки строк БД в колонки"""
+        n = len(rows)
+        urls = []
+        salary = np.full(n, np.nan)
+        age = np.full(n, np.nan)
+        experience = np.full(n, np.nan)
+        city_id = np.full(n, -1, dtype=np.int32)
+        row_skills = []
+
+        for i, (row_id, resume_url, resume_json) in enumerate(rows):
+            detailed = get_detailed_info(json.loads(resume_json))
+            urls.append(resume_url)
+            self.watermark = max(self.watermark, row_id)
+
+            salary_num = parse_salary_number(str(detailed.get('salary', '')))
+            if salary_num is not None:
+                salary[i] = salary_num
+
+            age_years = parse_age_years(detailed.get('age', ''))
+            if age_years is not None:
+                age[i] = age_years
+
+            experience_years = parse_experience_years(detailed.get('experience', []))
+            if experience_years is not None:
+                experience[i] = experience_years
+
+            location = str(detailed.get('location', ''))
+            if location and location != 'Не указан':
+                city_id[i] = self._intern(self._city_ids, self.cities, location)
+
+            skills = detailed.get('skills', [])
+            row_skills.append([
+                self._intern(self._skill_ids, self.skills, str(skill))
+                for skill in (skills if isinstance(skills, list) else [])
+            ])
+
+        words = max(1, (len(self.skills) + SKILL_WORD_BITS - 1) // SKILL_WORD_BITS)
+        if self.skill_bits.shape[1] < words:
+            padding = np.zeros((self.skill_bits.shape[0], words - self.skill_bits.shape[1]), dtype=np.uint64)
+            self.skill_bits = np.hstack([self.skill_bits, padding])
+
+        bits = np.zeros((n, words), dtype=np.uint64)
+        for i, skill_ids in enumerate(row_skills):
+            for skill_id in skill_ids:
+                bits[i, skill_id // SKILL_WORD_BITS] |= np.uint64(1) << np.uint64(skill_id % SKILL_WORD_BITS)
+
+        # Частоты навыков ведутся инкрементально, чтобы не распаковывать все битсеты при запросе
+        if self.skill_totals.size < len(self.skills):
+            self.skill_totals = np.concatenate([
+                self.skill_totals, np.zeros(len(self.skills) - self.skill_totals.size, dtype=np.int64)
+            ])
+        self.skill_totals += _unpack_bits(bits, len(self.skills)).sum(axis=0, dtype=np.int64)
+
+        # Обновления существующих URL перезаписываются на месте, новые дописываются в конец
+        new_mask = np.ones(n, dtype=bool)
+        for i, url in enumerate(urls):
+            existing = self._row_by_url.get(url)
+            if existing is not None:
+                new_mask[i] = False
+                self.skill_totals -= _unpack_bits(self.skill_bits[existing:existing + 1], len(self.skills))[0]
+                self.salary[existing] = salary[i]
+                self.age[existing] = age[i]
+                self.experience_years[existing] = experience[i]
+                self.city_id[existing] = city_id[i]
+                self.skill_bits[existing] = bits[i]
+
+        offset = len(self.urls)
+        new_urls = [url for url, is_new in zip(urls, new_mask) if is_new]
+        for j, url in enumerate(new_urls):
+            self._row_by_url[url] = offset + j
+
+        self.urls = np.concatenate([self.urls, np.array(new_urls, dtype=object)])
+        self.salary = np.concatenate([self.salary, salary[new_mask]])
+        self.age = np.concatenate([self.age, age[new_mask]])
+        self.experience_years = np.concatenate([self.experience_years, experience[new_mask]])
+        self.city_id = np.concatenate([self.city_id, city_id[new_mask]])
+        self.skill_bits = np.vstack([self.skill_bits, bits[new_mask]])
+
+    @staticmethod
+    def _intern(ids: Dict[str, int], values: List[str], value: str) -> int:
+        """Словарное кодирование строки"""
+        value_id = ids.get(value)
+        if value_id is None:
+            value_id = len(values)
+            ids[value] = value_id
+            values.append(value)
+        return value_id
+
+
+class ResumeAnalytics:
+    """Векторная аналитика поверх ResumeColumns"""
+
+    NUMERIC_FIELDS = ('salary', 'age', 'experience_years')
+
+    def __init__(self, columns: ResumeColumns):
+        self.columns = columns
+
+    def _field(self, field: str) -> np.ndarray:
+        if field not in self.NUMERIC_FIELDS:
+            raise ValueError(f"Неизвестное поле: {field}. Доступные: {', '.join(self.NUMERIC_FIELDS)}")
+        return getattr(self.columns, field)
+
+    def percentiles(self, field: str = 'salary', q: Sequence[float] = (10, 25, 50, 75, 90)) -> Dict:
+        """Перцентили числового поля (пропуски игнорируются)"""
+        values = self._field(field)
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return {}
+        return {f'p{int(p) if float(p).is_integer() else p}': float(v)
+                for p, v in zip(q, np.percentile(values, q))}
+
+    def histogram(self, field: str = 'salary', bins: int = 20, value_range=None) -> Dict:
+        """Гистограмма числового поля"""
+        values = self._field(field)
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return {'counts': [], 'edges': []}
+        counts, edges = np.histogram(values, bins=bins, range=value_range)
+        return {'counts': counts.tolist(), 'edges': edges.tolist()}
+
+    def group_by_city(self, field: str = 'salary', min_count: int = 1, top_n: Optional[int] = None) -> List[Dict]:
+        """Количество, среднее и медиана поля в разрезе городов"""
+        values = self._field(field)
+        mask = (self.columns.city_id >= 0) & ~np.isnan(values)
+        city_ids = self.columns.city_id[mask]
+        values = values[mask]
+        if values.size == 0:
+            return []
+
+        n_cities = len(self.columns.cities)
+        counts = np.bincount(city_ids, minlength=n_cities)
+        sums = np.bincount(city_ids, weights=values, minlength=n_cities)
+
+        # Медианы: сортируем по (город, значение) и берем середину каждой группы
+        order = np.lexsort((values, city_ids))
+        sorted_values = values[order]
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        lower = starts + (counts - 1) // 2
+        upper = starts + counts // 2
+        present = counts > 0
+        medians = np.full(n_cities, np.nan)
+        medians[present] = (sorted_values[lower[present]] + sorted_values[upper[present]]) / 2
+
+        selected = np.nonzero(counts >= min_count)[0]
+        selected = selected[np.argsort(-counts[selected], kind='stable')]
+        if top_n:
+            selected = selected[:top_n]
+
+        return [{
+            'city': self.columns.cities[city],
+            'count': int(counts[city]),
+            'mean': float(sums[city] / counts[city]),
+            'median': float(medians[city])
+        } for city in selected]
+
+    def skill_counts(self) -> np.ndarray:
+        """Частота каждого навыка"""
+        return self.columns.skill_totals
+
+    def skill_cooccurrence(self, top_n: int = 20) -> Dict:
+        """
+        Матрица совместной встречаемости для top_n самых частых навыков
+
+        Returns:
+            Dict: {'skills': [...], 'matrix': [[...]]}, на диагонали - частота навыка
+        """
+        counts = self.skill_counts()
+        if counts.size == 0:
+            return {'skills': [], 'matrix': []}
+
+        top = np.argsort(-counts, kind='stable')[:top_n]
+        bits = self.columns.skill_bits
+        words = (top // SKILL_WORD_BITS).astype(np.intp)
+        shifts = (top % SKILL_WORD_BITS).astype(np.uint64)
+        present = ((bits[:, words] >> shifts) & np.uint64(1)).astype(np.float32)
+        matrix = (present.T @ present).astype(np.int64)
+
+        return {
+            'skills': [self.columns.skills[i] for i in top],
+            'matrix': matrix.tolist()
+        }
+
+
+def _unpack_bits(bits: np.ndarray, n_skills: int) -> np.ndarray:
+    """uint64 битсеты -> матрица 0/1 (строки x навыки)"""
+    as_bytes = bits.astype('<u8').view(np.uint8).reshape(bits.shape[0], -1)
+    unpacked = np.unpackbits(as_bytes, axis=1, bitorder='little')
+    return unpacked[:, :n_skills]
+
+
+def load_analytics(db_path: str, snapshot_path: str = "resume_columns.npz") -> ResumeAnalytics:
+    """Загрузка снимка, дозагрузка новых записей из БД и сохранение"""
+    columns = ResumeColumns(snapshot_path)
+    columns.load()
+    if columns.update_from_db(db_path):
+        columns.save()
+    return ResumeAnalytics(columns)
+
+
+def main():
+    """Отчет по аналитике базы резюме"""
+    import sys
+    from config import OUTPUT_CONFIG
+
+    db_path = sys.argv[1] if len(sys.argv) > 1 else OUTPUT_CONFIG.get('database_file', 'work_ua_resumes.db')
+    snapshot_path = OUTPUT_CONFIG.get('analytics_snapshot', 'resume_columns.npz')
+
+    start_time = time.time()
+    analytics = load_analytics(db_path, snapshot_path)
+    load_time = time.time() - start_time
+
+    print("📈 АНАЛИТИКА БАЗЫ РЕЗЮМЕ")
+    print("=" * 50)
+    print(f"📚 Строк в снимке: {len(analytics.columns.urls):,} (загрузка {load_time * 1000:.0f} мс)")
+
+    start_time = time.time()
+    for field in ResumeAnalytics.NUMERIC_FIELDS:
+        print(f"📊 {field}: {analytics.percentiles(field)}")
+
+    print("\n📍 ЗАРПЛАТЫ ПО ГОРОДАМ:")
+    for group in analytics.group_by_city('salary', top_n=5):
+        print(f"   • {group['city']}: {group['count']} резюме, медиана {group['median']:,.0f} грн")
+
+    cooccurrence = analytics.skill_cooccurrence(top_n=5)
+    if cooccurrence['skills']:
+        print("\n🔧 СОВМЕСТНЫЕ НАВЫКИ (ТОП-5):")
+        for skill, row in zip(cooccurrence['skills'], cooccurrence['matrix']):
+            print(f"   • {skill}: {row}")
+
+    print(f"\n⚡ Расчет за {(time.time() - start_time) * 1000:.1f} мс")
+
+
+if __name__ == "__main__":
+    main()
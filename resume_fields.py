@@ -0,0 +1,127 @@
+"""
+Извлечение нормализованных полей из записей резюме
+Общие функции для индекса базы данных и консольного просмотра
+"""
+
+import json
+import re
+from typing import Dict, Optional
+
+
+def get_detailed_info(resume_data: Dict) -> Dict:
+    """
+    Возвращает блок детальной информации резюме независимо от формата записи
+
+    Поддерживаются форматы:
+    - экспорт базы: {'card_info': ..., 'detailed_info': ...}
+    - full_page_parser: {'card_info': ..., 'llm_details': ...}
+    """
+    if not isinstance(resume_data, dict):
+        return {}
+    detailed = resume_data.get('detailed_info') or resume_data.get('llm_details')
+    return detailed if isinstance(detailed, dict) else {}
+
+
+def parse_salary_number(salary: str) -> Optional[int]:
+    """Число из строки зарплаты ('25 000 грн' -> 25000) или None"""
+    if not salary or 'грн' not in salary:
+        return None
+    digits = ''.join(filter(str.isdigit, salary))
+    if not digits:
+        return None
+    salary_num = int(digits)
+    return salary_num if salary_num > 0 else None
+
+
+def extract_index_fields(resume_data: Dict) -> Dict:
+    """
+    Извлечение полей для индекса резюме
+
+    Args:
+        resume_data: Данные резюме в том виде, в котором они хранятся в БД
+
+    Returns:
+        Dict: Плоский словарь полей для таблицы resume_index
+    """
+    detailed = get_detailed_info(resume_data)
+    card = resume_data.get('card_info', {}) if isinstance(resume_data, dict) else {}
+    card = card if isinstance(card, dict) else {}
+
+    full_name = detailed.get('full_name', 'Не указано')
+    position = detailed.get('position', card.get('title', 'Не указано'))
+    salary = detailed.get('salary', 'Не указана')
+    location = detailed.get('location', 'Не указан')
+    age = detailed.get('age', 'Не указан')
+
+    skills = detailed.get('skills', [])
+    if not isinstance(skills, list):
+        skills = []
+    skills = [str(skill) for skill in skills]
+
+    experience = detailed.get('experience', [])
+    experience_count = len(experience) if isinstance(experience, list) else 0
+
+    skills_lower = [skill.lower() for skill in skills]
+    search_parts = [
+        str(detailed.get('full_name', '')).lower(),
+        str(detailed.get('position', '')).lower(),
+    ] + skills_lower
+
+    return {
+        'full_name': str(full_name),
+        'position': str(position),
+        'salary': str(salary),
+        'salary_num': parse_salary_number(str(detailed.get('salary', ''))),
+        'location': str(location),
+        'age': str(age),
+        'skills': skills,
+        'skills_json': json.dumps(skills, ensure_ascii=False),
+        'experience_count': experience_count,
+        'has_details': 1 if detailed else 0,
+        'is_kiev': 1 if 'київ' in str(detailed.get('location', '')).lower() else 0,
+        'has_salary': 1 if 'грн' in str(detailed.get('salary', '')) else 0,
+        'has_1c': 1 if any('1с' in skill for skill in skills_lower) else 0,
+        # Поля поиска разделены переводом строки, чтобы подстрока не "склеивала" соседние поля
+        'search_text': '\n'.join(search_parts),
+    }
+
+
+
+_AGE_RE = re.compile(r'(\d{2})')
+_YEARS_RE = re.compile(r'(\d+)\s*(?:рік|роки|років|год|лет|лір)', re.IGNORECASE)
+_MONTHS_RE = re.compile(r'(\d+)\s*(?:місяц|міс\.|месяц|мес\.)', re.IGNORECASE)
+
+
+def parse_age_years(age: str) -> Optional[int]:
+    """Возраст в годах из строки вида '58 років' или None"""
+    match = _AGE_RE.search(str(age or ''))
+    if not match:
+        return None
+    years = int(match.group(1))
+    return years if 14 <= years <= 99 else None
+
+
+def parse_experience_years(experience) -> Optional[float]:
+    """
+    Суммарный стаж в годах по списку мест работы
+
+    Длительность берется из скобок вида '(5 років 4 місяці)'.
+    """
+    if isinstance(experience, str):
+        experience = [experience]
+    if not isinstance(experience, list):
+        return None
+
+    total = 0.0
+    found = False
+    for entry in experience:
+        text = str(entry)
+        years = _YEARS_RE.search(text)
+        months = _MONTHS_RE.search(text)
+        if years:
+            total += int(years.group(1))
+            found = True
+        if months:
+            total += int(months.group(1)) / 12
+            found = True
+    return round(total, 2) if found else None
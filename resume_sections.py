@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Разбиение полного текста резюме на секции (навыки, опыт, образование, доп. информация)
+Выполняется один раз при сохранении резюме, экспорт и просмотр используют готовые поля
+"""
+
+import json
+import os
+import re
+import sys
+from typing import Dict, List
+
+# Секция навыков: та же семантика, что и в веб-интерфейсе (view_database.html)
+SKILLS_RE = re.compile(
+    r'Знання і навички\s*([\s\S]*?)(?:\n\n|\nДодаткова інформація|\nЗапропонувати вакансію|$)',
+    re.IGNORECASE
+)
+
+# Заголовки секций страницы резюме -> ключ секции (None - конец резюме)
+SECTION_HEADINGS = {
+    'Досвід роботи': 'experience',
+    'Освіта': 'education',
+    'Знання мов': 'languages',
+    'Додаткова інформація': 'additional_info',
+    'Знання і навички': None,
+    'Запропонувати вакансію': None,
+}
+
+TEXT_SECTIONS = ('experience', 'education', 'languages', 'additional_info')
+
+HEADING_RE = re.compile(
+    r'^[ \t]*(' + '|'.join(re.escape(heading) for heading in SECTION_HEADINGS) + r')[ \t]*$',
+    re.MULTILINE
+)
+
+
+def extract_skills(full_text: str) -> List[str]:
+    """Список навыков из секции 'Знання і навички'"""
+    if not full_text:
+        return []
+    skills_match = SKILLS_RE.search(full_text)
+    if not skills_match or not skills_match.group(1):
+        return []
+    return [s.strip() for s in skills_match.group(1).split('\n') if s.strip() and len(s.strip()) > 1]
+
+
+def split_sections(full_text: str) -> Dict:
+    """
+    Разбиение полного текста резюме на секции за один проход по заголовкам
+
+    Args:
+        full_text: Текст страницы резюме
+
+    Returns:
+        Dict: skills (список) и текст секций experience, education, languages, additional_info
+    """
+    sections = {key: '' for key in TEXT_SECTIONS}
+    sections['skills'] = extract_skills(full_text)
+    if not full_text:
+        return sections
+
+    headings = list(HEADING_RE.finditer(full_text))
+    for current, following in zip(headings, headings[1:] + [None]):
+        key = SECTION_HEADINGS[current.group(1)]
+        if key is None or sections[key]:
+            continue
+        end = following.start() if following else len(full_text)
+        sections[key] = full_text[current.end():end].strip()
+
+    return sections
+
+
+def _section_text(value) -> str:
+    """Поле LLM (строка, список строк или объектов) -> текст секции, по строке на элемент"""
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, dict):
+        return ', '.join(str(item).strip() for item in value.values() if item)
+    if isinstance(value, list):
+        return '\n'.join(line for line in (_section_text(item) for item in value) if line)
+    return ''
+
+
+def sections_from_llm(details: Dict) -> Dict:
+    """Секции по полям LLM (llm_details): у записей full_page_parser / llm_batch_jobs нет full_text"""
+    skills = details.get('professional_skills') or []
+    sections = {key: _section_text(details.get(key)) for key in TEXT_SECTIONS}
+    sections['skills'] = [skill for skill in (_section_text(item) for item in
+                                              (skills if isinstance(skills, list) else [skills])) if skill]
+    return sections
+
+
+def sections_for_record(resume_data: Dict) -> Dict:
+    """
+    Секции записи резюме: сохраненные при парсинге, полученные из full_text
+    или, если текста нет, из полей llm_details
+
+    Поддерживаются плоские записи ultimate_parser и записи БД с card_info / llm_details.
+    """
+    if not isinstance(resume_data, dict):
+        return split_sections('')
+    if isinstance(resume_data.get('sections'), dict) and isinstance(resume_data.get('skills'), list):
+        return {**resume_data['sections'], 'skills': resume_data['skills']}
+
+    full_text = resume_data.get('full_text')
+    card = resume_data.get('card_info')
+    if not full_text and isinstance(card, dict):
+        full_text = card.get('full_text')
+    details = resume_data.get('llm_details')
+    if not (isinstance(full_text, str) and full_text) and isinstance(details, dict):
+        return sections_from_llm(details)
+    return split_sections(full_text if isinstance(full_text, str) else '')
+
+
+def annotate_resume(resume_data: Dict) -> Dict:
+    """Добавляет в запись поля skills и sections (на месте), возвращает запись"""
+    full_text = resume_data.get('full_text')
+    if isinstance(full_text, str):
+        sections = split_sections(full_text)
+        resume_data['skills'] = sections.pop('skills')
+        resume_data['sections'] = sections
+    return resume_data
+
+
+def annotate_json_file(json_file: str) -> int:
+    """Дополняет секциями уже сохраненный JSON файл ultimate_parser"""
+    with open(json_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    for item in data:
+        if isinstance(item, dict):
+            annotate_resume(item)
+
+    tmp_file = json_file + '.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_file, json_file)
+    return len(data)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Использование: python resume_sections.py <resume_data.json>")
+        sys.exit(1)
+
+    count = annotate_json_file(sys.argv[1])
+    print(f"✅ Секции добавлены: {count:,} резюме в {sys.argv[1]}")
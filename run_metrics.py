@@ -0,0 +1,296 @@
+"""
+Метрики запуска парсера: счетчики, гистограммы и таймеры по этапам
+
+Экспорт в текстовом формате Prometheus (HTTP эндпоинт /metrics) и в JSON файл.
+"""
+
+import bisect
+import functools
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+from config import METRICS_CONFIG
+
+# Границы корзин гистограмм (секунды)
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Описание метрик для # HELP в Prometheus
+METRIC_HELP = {
+    'driver_start_seconds': 'Время запуска Chrome драйвера',
+    'page_load_seconds': 'Время загрузки страницы списка',
+    'card_extraction_seconds': 'Время извлечения данных одной карточки',
+    'detail_fetch_seconds': 'Время получения детальной страницы резюме',
+    'llm_latency_seconds': 'Задержка запроса к LLM',
+    'llm_tokens_total': 'Токены LLM (direction=in/out)',
+    'llm_cost_usd_total': 'Стоимость запросов к LLM, USD (model, purpose)',
+    'llm_run_cost_usd': 'Стоимость LLM за текущий запуск, USD',
+    'llm_tokens_estimated_total': 'Токены LLM, оцененные tiktoken (ответ без usage)',
+    'llm_budget_skips_total': 'Запросы к LLM, пропущенные из-за бюджета',
+    'llm_rule_based_total': 'Резюме, извлеченные правилами вместо LLM',
+    'selector_inference_seconds': 'Время вывода селектора по структуре страницы (kind=cards/pagination)',
+    'selector_inference_total': 'Вывод селекторов без LLM (kind, result=found/miss/last_page)',
+    'selector_outcomes_total': 'Исходы применения селекторов реестра (role, result)',
+    'selector_learned_total': 'Выученные селекторы (role, source=inference/llm)',
+    'selector_registry_reloads_total': 'Подхваченные версии реестра селекторов от других воркеров',
+    'planned_pages_total': 'Страницы списка по прямым URL (result=cards/empty)',
+    'near_duplicate_seconds': 'Время подписи MinHash и поиска по LSH для одного резюме',
+    'near_duplicates_total': 'Проверки на почти одинаковые резюме (result=duplicate/unique/short)',
+    'db_write_seconds': 'Время записи резюме в базу/файл',
+    'checkpoint_write_seconds': 'Время записи checkpoint',
+    'page_wait_seconds': 'Фактическое время ожиданий страницы',
+    'retries_total': 'Повторные попытки операций',
+    'driver_restarts_total': 'Перезапуски драйвера',
+    'resumes_total': 'Обработанные резюме по статусу',
+    'server_latency_seconds': 'Задержка ответа сервера (TTFB / обновление PJAX)',
+    'throttle_events_total': 'Таймауты, 429/503 и капчи',
+    'rate_delay_seconds': 'Текущая пауза между запросами',
+    'rate_concurrency': 'Текущая параллельность загрузок',
+    'rate_adjustments_total': 'Изменения скорости (direction=up/down)',
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict) -> LabelKey:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _escape_label(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(key: LabelKey, extra: Optional[Dict] = None) -> str:
+    pairs = list(key) + sorted((extra or {}).items())
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape_label(value)}"' for name, value in pairs) + '}'
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами (как в Prometheus)"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Оценка квантиля по корзинам (линейная интерполяция внутри корзины)"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts):
+            if cumulative + bucket_count >= rank and bucket_count:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.max
+                return min(lower + (upper - lower) * (rank - cumulative) / bucket_count, self.max)
+            cumulative += bucket_count
+        return self.max
+
+    def to_dict(self) -> Dict:
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 4),
+            'avg': round(self.sum / self.count, 4) if self.count else 0.0,
+            'p50': round(self.quantile(0.5), 4),
+            'p95': round(self.quantile(0.95), 4),
+            'max': round(self.max, 4),
+            'buckets': dict(zip([str(b) for b in self.buckets] + ['+Inf'], self.counts)),
+        }
+
+
+class RunMetrics:
+    """Метрики одного запуска парсера (потокобезопасно)"""
+
+    def __init__(self, run_id: Optional[str] = None, prefix: Optional[str] = None):
+        self.run_id = run_id or datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.prefix = prefix if prefix is not None else METRICS_CONFIG.get('prefix', 'workua_')
+        self.started_at = time.time()
+        self.counters: Dict[str, Dict[LabelKey, float]] = {}
+        self.gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self.histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self.events: Dict[str, deque] = {}  # Последние METRICS_CONFIG['max_events'] событий каждого вида
+        self._lock = threading.Lock()
+        self._server = None
+
+    # ---------- запись ----------
+
+    def inc(self, name: str, value: float = 1, **labels):
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            key = _label_key(labels)
+            series[key] = series.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels):
+        with self._lock:
+            self.gauges.setdefault(name, {})[_label_key(labels)] = value
+
+    def observe(self, name: str, value: float, **labels):
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            key = _label_key(labels)
+            if key not in series:
+                series[key] = Histogram()
+            series[key].observe(value)
+
+    def record_event(self, name: str, **fields):
+        """История изменений (например, выбранной скорости) - попадает только в JSON"""
+        with self._lock:
+            events = self.events.setdefault(name, deque(maxlen=METRICS_CONFIG.get('max_events', 1000)))
+            events.append({'time': round(time.time(), 3), **fields})
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """Замер длительности блока в гистограмму name (записывается и при исключении)"""
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started_at, **labels)
+
+    def record_llm_usage(self, response, **labels):
+        """Токены из ответа OpenAI (response.usage), если они есть"""
+        usage = getattr(response, 'usage', None)
+        if not usage:
+            return
+        self.inc('llm_tokens_total', getattr(usage, 'prompt_tokens', 0) or 0, direction='in', **labels)
+        self.inc('llm_tokens_total', getattr(usage, 'completion_tokens', 0) or 0, direction='out', **labels)
+
+    # ---------- экспорт ----------
+
+    def snapshot(self) -> Dict:
+        """Все метрики в виде словаря"""
+        with self._lock:
+            def series_dict(series, convert=lambda value: value):
+                return [{'labels': dict(key), 'value': convert(value)} for key, value in series.items()]
+
+            return {
+                'run_id': self.run_id,
+                'started_at': datetime.fromtimestamp(self.started_at).isoformat(),
+                'uptime_seconds': round(time.time() - self.started_at, 1),
+                'counters': {name: series_dict(series) for name, series in self.counters.items()},
+                'gauges': {name: series_dict(series) for name, series in self.gauges.items()},
+                'histograms': {name: series_dict(series, Histogram.to_dict)
+                               for name, series in self.histograms.items()},
+                'events': {name: list(items) for name, items in self.events.items()},
+            }
+
+    def to_prometheus(self) -> str:
+        """Текстовый формат экспозиции Prometheus"""
+        lines = []
+        run_label = {'run_id': self.run_id}
+        with self._lock:
+            for kind, metrics in (('counter', self.counters), ('gauge', self.gauges)):
+                for name, series in sorted(metrics.items()):
+                    full_name = self.prefix + name
+                    lines.append(f'# HELP {full_name} {METRIC_HELP.get(name, name)}')
+                    lines.append(f'# TYPE {full_name} {kind}')
+                    for key, value in series.items():
+                        lines.append(f'{full_name}{_format_labels(key, run_label)} {value}')
+
+            for name, series in sorted(self.histograms.items()):
+                full_name = self.prefix + name
+                lines.append(f'# HELP {full_name} {METRIC_HELP.get(name, name)}')
+                lines.append(f'# TYPE {full_name} histogram')
+                for key, histogram in series.items():
+                    cumulative = 0
+                    for bucket, bucket_count in zip(list(histogram.buckets) + ['+Inf'], histogram.counts):
+                        cumulative += bucket_count
+                        labels = _format_labels(key, {**run_label, 'le': str(bucket)})
+                        lines.append(f'{full_name}_bucket{labels} {cumulative}')
+                    lines.append(f'{full_name}_sum{_format_labels(key, run_label)} {histogram.sum}')
+                    lines.append(f'{full_name}_count{_format_labels(key, run_label)} {histogram.count}')
+
+        lines.append(f'# TYPE {self.prefix}uptime_seconds gauge')
+        lines.append(f'{self.prefix}uptime_seconds{_format_labels((), run_label)} {round(time.time() - self.started_at, 1)}')
+        return '\n'.join(lines) + '\n'
+
+    def export_json(self, output_file: Optional[str] = None) -> str:
+        """Сохранение метрик в JSON файл"""
+        output_file = output_file or METRICS_CONFIG.get('json_file', 'run_metrics_{run_id}.json').format(run_id=self.run_id)
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+        return output_file
+
+    def serve(self, port: Optional[int] = None, host: Optional[str] = None):
+        """HTTP эндпоинт /metrics (Prometheus) и /metrics.json в фоновом потоке (по умолчанию только localhost)"""
+        port = port or METRICS_CONFIG.get('prometheus_port')
+        host = host or METRICS_CONFIG.get('prometheus_host', '127.0.0.1')
+        if not port or self._server:
+            return self._server
+        metrics = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.startswith('/metrics.json'):
+                    body = json.dumps(metrics.snapshot(), ensure_ascii=False).encode('utf-8')
+                    content_type = 'application/json; charset=utf-8'
+                elif self.path.startswith('/metrics'):
+                    body = metrics.to_prometheus().encode('utf-8')
+                    content_type = 'text/plain; version=0.0.4; charset=utf-8'
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self._server
+
+    def shutdown(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def log_summary(self, logger):
+        """Сводка: куда ушло время и сколько было повторов/рестартов"""
+        snapshot = self.snapshot()
+        logger.info(f"⏱️ МЕТРИКИ ЗАПУСКА {self.run_id} (за {snapshot['uptime_seconds']}с):")
+        for name, series in sorted(snapshot['histograms'].items()):
+            for item in series:
+                stats = item['value']
+                labels = ','.join(f"{k}={v}" for k, v in item['labels'].items())
+                logger.info(f"   {name}{'[' + labels + ']' if labels else ''}: {stats['count']} раз, "
+                            f"всего {stats['sum']:.1f}с, p50 {stats['p50']:.2f}с, p95 {stats['p95']:.2f}с, "
+                            f"макс {stats['max']:.2f}с")
+        for name, series in sorted(snapshot['counters'].items()):
+            for item in series:
+                labels = ','.join(f"{k}={v}" for k, v in item['labels'].items())
+                logger.info(f"   {name}{'[' + labels + ']' if labels else ''}: {item['value']:g}")
+
+
+def timed(metric_name: str, **labels):
+    """Декоратор метода: длительность вызова в гистограмму self.metrics"""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            metrics = getattr(self, 'metrics', None)
+            if metrics is None:
+                return method(self, *args, **kwargs)
+            with metrics.timer(metric_name, **labels):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
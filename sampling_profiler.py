@@ -0,0 +1,148 @@
+"""
+Профилирование долгих запусков парсера
+
+- SamplingProfiler: фоновый поток снимает стеки всех потоков через
+  sys._current_frames() и пишет collapsed stacks (формат flamegraph.pl /
+  speedscope) отдельным файлом на каждое временное окно
+- MemoryTracker: снимки tracemalloc каждые N резюме и топ роста памяти
+  относительно предыдущего снимка
+"""
+
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from typing import Optional
+
+from config import PROFILING_CONFIG
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}".replace(';', ':').replace(' ', '_')
+
+
+class SamplingProfiler:
+    """Семплирующий профайлер с низкими накладными расходами (без sys.setprofile)"""
+
+    def __init__(self, output_dir: Optional[str] = None, interval: Optional[float] = None,
+                 window_seconds: Optional[float] = None, run_id: Optional[str] = None, logger=None):
+        self.output_dir = output_dir or PROFILING_CONFIG['output_dir']
+        self.interval = interval or PROFILING_CONFIG['sample_interval']
+        self.window_seconds = window_seconds or PROFILING_CONFIG['window_seconds']
+        self.run_id = run_id or datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.logger = logger
+        self.samples = Counter()
+        self.window_index = 0
+        self.total_samples = 0
+        self.files = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+        if self.logger:
+            self.logger.info(f"🔬 Профилирование: стеки каждые {self.interval * 1000:.0f} мс, "
+                             f"окно {self.window_seconds:.0f}с -> {self.output_dir}")
+        return self
+
+    def stop(self):
+        if not self._thread:
+            return
+        self._stop.set()
+        self._thread.join(timeout=5)
+        self._thread = None
+        self._flush_window()
+
+    def _sample(self):
+        own_id = threading.get_ident()
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            stack.append(thread_names.get(thread_id, str(thread_id)).replace(' ', '_'))
+            self.samples[';'.join(reversed(stack))] += 1
+            self.total_samples += 1
+
+    def _run(self):
+        window_started_at = time.monotonic()
+        while not self._stop.wait(self.interval):
+            self._sample()
+            if time.monotonic() - window_started_at >= self.window_seconds:
+                self._flush_window()
+                window_started_at = time.monotonic()
+
+    def _flush_window(self):
+        """Запись текущего окна в <output_dir>/<run_id>_wNNN.folded"""
+        if not self.samples:
+            return
+        filename = os.path.join(self.output_dir, f"{self.run_id}_w{self.window_index:03d}.folded")
+        with open(filename, 'w', encoding='utf-8') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        self.files.append(filename)
+        self.window_index += 1
+        self.samples = Counter()
+
+
+class MemoryTracker:
+    """Снимки tracemalloc каждые N резюме"""
+
+    def __init__(self, every: Optional[int] = None, output_dir: Optional[str] = None,
+                 frames: Optional[int] = None, top: Optional[int] = None,
+                 run_id: Optional[str] = None, logger=None):
+        self.every = every or PROFILING_CONFIG['tracemalloc_every']
+        self.output_dir = output_dir or PROFILING_CONFIG['output_dir']
+        self.frames = frames or PROFILING_CONFIG['tracemalloc_frames']
+        self.top = top or PROFILING_CONFIG['tracemalloc_top']
+        self.run_id = run_id or datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.logger = logger
+        self.previous = None
+        self.report_file = os.path.join(self.output_dir, f"{self.run_id}_memory.log")
+
+    def start(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        return self
+
+    def stop(self):
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def on_resume(self, resume_count: int):
+        """Вызывается после каждого резюме; снимок делается каждые self.every"""
+        if resume_count and resume_count % self.every == 0:
+            self.snapshot(resume_count)
+
+    def snapshot(self, resume_count: int):
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        ))
+        current, peak = tracemalloc.get_traced_memory()
+
+        lines = [f"=== {datetime.now().isoformat()} | резюме: {resume_count} | "
+                 f"текущая: {current / 1024 / 1024:.1f} МБ | пик: {peak / 1024 / 1024:.1f} МБ"]
+        if self.previous is not None:
+            for stat in snapshot.compare_to(self.previous, 'lineno')[:self.top]:
+                lines.append(f"  {stat}")
+        else:
+            for stat in snapshot.statistics('lineno')[:self.top]:
+                lines.append(f"  {stat}")
+        self.previous = snapshot
+
+        with open(self.report_file, 'a', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        if self.logger:
+            self.logger.info(f"🧠 tracemalloc: {current / 1024 / 1024:.1f} МБ после {resume_count} резюме -> {self.report_file}")
@@ -0,0 +1,509 @@
+"""
+Вывод селекторов по повторяющейся структуре страницы (без LLM)
+
+Карточки резюме - самая крупная группа одинаковых соседних элементов
+(тег + стабильные классы), каждый из которых содержит ссылку /resumes/N.
+Для группы подбирается минимальный CSS селектор, выбирающий ровно ее
+элементы: один класс, несколько классов, тег, затем привязка к родителю.
+Группы оцениваются по числу карточек, доле ссылок страницы и тому, что в
+карточке одно резюме.
+
+Следующая страница - ссылка rel=next или ссылка на ?page=N+1 (с текстом
+"Наступна", "»"...) внутри пагинации; селектор не зависит от номера страницы.
+
+Разбор - html.parser стандартной библиотеки в легкое дерево, без
+BeautifulSoup; страница списка work.ua обрабатывается за миллисекунды.
+WorkUaParser вызывает вывод перед LLM автоадаптацией, LLM остается
+последним шагом.
+
+Проверка на сохраненных фикстурах:
+    python selector_inference.py check [каталог_фикстур]
+    python selector_inference.py infer page.html [url]
+"""
+
+import os
+import re
+import sys
+import time
+from html.parser import HTMLParser
+from itertools import combinations
+from typing import Dict, List, Optional, Set
+from urllib.parse import parse_qs, urljoin, urlsplit
+
+from config import FIXTURES_CONFIG, SELECTOR_INFERENCE_CONFIG
+
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta',
+             'param', 'source', 'track', 'wbr'}
+
+# Открывающий тег закрывает незакрытый элемент на вершине стека
+IMPLIED_END = {
+    'li': {'li'}, 'p': {'p'}, 'option': {'option'}, 'dt': {'dt', 'dd'}, 'dd': {'dt', 'dd'},
+    'tr': {'tr', 'td', 'th'}, 'td': {'td', 'th'}, 'th': {'td', 'th'},
+}
+BLOCK_TAGS = {'div', 'ul', 'ol', 'table', 'section', 'article', 'nav', 'header', 'footer',
+              'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'form', 'pre', 'blockquote'}
+
+PAGINATION_HINTS = ('pagination', 'pager', 'paging')
+
+
+# ========================================
+# ДЕРЕВО СТРАНИЦЫ
+# ========================================
+
+class Node:
+    __slots__ = ('tag', 'attrs', 'classes', 'parent', 'children', 'index', 'text', 'links')
+
+    def __init__(self, tag: str, attrs: Dict[str, str], parent: Optional['Node']):
+        self.tag = tag
+        self.attrs = attrs
+        self.classes = attrs.get('class', '').split()
+        self.parent = parent
+        self.children: List['Node'] = []
+        self.index = len(parent.children) if parent is not None else 0
+        self.text: List[str] = []
+        self.links: Optional[Set[str]] = None  # Ссылки на резюме в поддереве
+
+    @property
+    def id(self) -> str:
+        return self.attrs.get('id', '')
+
+    @property
+    def is_last_child(self) -> bool:
+        return self.parent is not None and self.index == len(self.parent.children) - 1
+
+    def text_content(self) -> str:
+        return ''.join(self.text) + ''.join(child.text_content() for child in self.children)
+
+
+class Document:
+    """Узлы страницы в порядке документа с индексами по тегу и классу"""
+
+    def __init__(self, root: Node, nodes: List[Node]):
+        self.root = root
+        self.nodes = nodes
+        self.by_tag: Dict[str, List[Node]] = {}
+        self.by_class: Dict[str, List[Node]] = {}
+        for node in nodes:
+            self.by_tag.setdefault(node.tag, []).append(node)
+            for name in set(node.classes):
+                self.by_class.setdefault(name, []).append(node)
+
+
+class _TreeBuilder(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = Node('#document', {}, None)
+        self.nodes: List[Node] = []
+        self.stack = [self.root]
+
+    def _open(self, tag: str, attrs) -> Node:
+        top = self.stack[-1]
+        if top.tag in IMPLIED_END.get(tag, ()) or (top.tag == 'p' and tag in BLOCK_TAGS):
+            self.stack.pop()
+        parent = self.stack[-1]
+        node = Node(tag, {name: value or '' for name, value in attrs}, parent)
+        parent.children.append(node)
+        self.nodes.append(node)
+        return node
+
+    def handle_starttag(self, tag, attrs):
+        node = self._open(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.stack.append(node)
+
+    def handle_startendtag(self, tag, attrs):
+        self._open(tag, attrs)
+
+    def handle_endtag(self, tag):
+        for depth in range(len(self.stack) - 1, 0, -1):
+            if self.stack[depth].tag == tag:
+                del self.stack[depth:]
+                return
+
+    def handle_data(self, data):
+        self.stack[-1].text.append(data)
+
+
+def parse_html(html: str) -> Document:
+    builder = _TreeBuilder()
+    builder.feed(html)
+    builder.close()
+    return Document(builder.root, builder.nodes)
+
+
+# ========================================
+# CSS СЕЛЕКТОРЫ (подмножество для проверки выведенных)
+# ========================================
+
+_COMPOUND_RE = re.compile(r"""
+    (?P<tag>[a-zA-Z][\w-]*|\*)?
+    (?P<rest>(?:\#[\w-]+|\.[\w-]+|\[[\w-]+(?:[~*^$]?=(?:'[^']*'|"[^"]*"|[^\]]*))?\]|:(?:first|last)-child)*)$
+""", re.VERBOSE)
+_PART_RE = re.compile(r"""\#([\w-]+)|\.([\w-]+)|\[([\w-]+)(?:([~*^$]?=)('[^']*'|"[^"]*"|[^\]]*))?\]|:(first|last)-child""")
+
+
+def _parse_compound(text: str) -> Dict:
+    match = _COMPOUND_RE.match(text)
+    if not match or not text:
+        raise ValueError(f"Неподдерживаемый селектор: {text}")
+    compound = {'tag': match.group('tag') if match.group('tag') != '*' else None,
+                'id': None, 'classes': [], 'attrs': [], 'pseudo': []}
+    for id_, class_, attr, operator, value, pseudo in _PART_RE.findall(match.group('rest')):
+        if id_:
+            compound['id'] = id_
+        elif class_:
+            compound['classes'].append(class_)
+        elif attr:
+            compound['attrs'].append((attr, operator, value.strip('\'"') if operator else None))
+        else:
+            compound['pseudo'].append(pseudo)
+    return compound
+
+
+def parse_selector(selector: str) -> List:
+    """[(комбинатор, составной селектор)] слева направо; комбинаторы ' ' и '>'"""
+    steps, combinator = [], None
+    for token in re.sub(r'\s*>\s*', ' > ', selector.strip()).split():
+        if token == '>':
+            combinator = '>'
+            continue
+        steps.append((combinator or ' ', _parse_compound(token)))
+        combinator = None
+    return steps
+
+
+def _matches_compound(node: Node, compound: Dict) -> bool:
+    if compound['tag'] and node.tag != compound['tag']:
+        return False
+    if compound['id'] and node.id != compound['id']:
+        return False
+    if any(name not in node.classes for name in compound['classes']):
+        return False
+    for name, operator, value in compound['attrs']:
+        actual = node.attrs.get(name)
+        if actual is None:
+            return False
+        if (operator == '=' and actual != value) or (operator == '~=' and value not in actual.split()) \
+                or (operator == '*=' and value not in actual) or (operator == '^=' and not actual.startswith(value)) \
+                or (operator == '$=' and not actual.endswith(value)):
+            return False
+    for pseudo in compound['pseudo']:
+        if node.parent is None or (pseudo == 'first' and node.index != 0) or (pseudo == 'last' and not node.is_last_child):
+            return False
+    return True
+
+
+def _matches(node: Node, steps: List, position: int) -> bool:
+    if not _matches_compound(node, steps[position][1]):
+        return False
+    if position == 0:
+        return True
+    parent = node.parent
+    if steps[position][0] == '>':
+        return parent is not None and _matches(parent, steps, position - 1)
+    while parent is not None:
+        if _matches(parent, steps, position - 1):
+            return True
+        parent = parent.parent
+    return False
+
+
+def select(doc: Document, selector: str) -> List[Node]:
+    """Узлы документа по селектору (в порядке документа)"""
+    steps = parse_selector(selector)
+    last = steps[-1][1]
+    if last['classes']:
+        pool = doc.by_class.get(last['classes'][0], [])
+    elif last['tag']:
+        pool = doc.by_tag.get(last['tag'], [])
+    else:
+        pool = doc.nodes
+    return [node for node in pool if _matches(node, steps, len(steps) - 1)]
+
+
+# ========================================
+# КАРТОЧКИ РЕЗЮМЕ
+# ========================================
+
+_UNSTABLE_RES = [re.compile(pattern) for pattern in SELECTOR_INFERENCE_CONFIG['unstable_class_patterns']]
+
+
+def stable_classes(node: Node) -> List[str]:
+    """Классы без состояний (active, visited...) и сгенерированных имен"""
+    return [name for name in dict.fromkeys(node.classes) if not any(regex.search(name) for regex in _UNSTABLE_RES)]
+
+
+def _hint_rank(name: str) -> int:
+    hints = SELECTOR_INFERENCE_CONFIG['class_hints']
+    for rank, hint in enumerate(hints):
+        if hint in name:
+            return rank
+    return len(hints)
+
+
+def mark_resume_links(doc: Document, pattern: Optional[str] = None) -> Set[str]:
+    """Ссылки на резюме в поддереве каждого узла (Node.links); все ссылки страницы"""
+    link_re = re.compile(pattern or SELECTOR_INFERENCE_CONFIG['resume_link_pattern'])
+    for node in doc.nodes:
+        node.links = None
+    for node in reversed(doc.nodes):  # Дети в списке идут после родителя
+        if node.tag == 'a':
+            match = link_re.search(node.attrs.get('href', ''))
+            if match:
+                node.links = (node.links or set()) | {match.group(0)}
+        if node.links and node.parent is not None:
+            if node.parent.links is None:
+                node.parent.links = set()
+            node.parent.links |= node.links
+    return doc.root.links or set()
+
+
+def _selector_for_group(doc: Document, parent: Node, members: List[Node]) -> Optional[str]:
+    """Минимальный селектор, выбирающий ровно members"""
+    target = {id(node) for node in members}
+    tag = members[0].tag
+    classes = sorted(stable_classes(members[0]), key=lambda name: (_hint_rank(name), members[0].classes.index(name)))
+
+    def exact(selector: str) -> bool:
+        return {id(node) for node in select(doc, selector)} == target
+
+    for size in range(1, min(len(classes), SELECTOR_INFERENCE_CONFIG['max_classes']) + 1):
+        for combo in combinations(classes, size):
+            for selector in ('.' + '.'.join(combo), tag + '.' + '.'.join(combo)):
+                if exact(selector):
+                    return selector
+
+    parent_classes = stable_classes(parent)
+    if parent.id and not re.search(r'\d', parent.id):
+        anchor = '#' + parent.id
+    elif parent_classes:
+        anchor = parent.tag + '.' + parent_classes[0]
+    else:
+        anchor = parent.tag
+    for child in [tag] + [tag + '.' + name for name in classes]:
+        selector = f'{anchor} > {child}'
+        if exact(selector):
+            return selector
+    return None
+
+
+def infer_card_selectors(html, pattern: Optional[str] = None, min_cards: Optional[int] = None) -> List[Dict]:
+    """
+    Кандидаты селектора карточек резюме, лучший - первый
+
+    Args:
+        html: HTML страницы списка или Document
+        pattern: Регулярное выражение ссылки на резюме
+
+    Returns:
+        List[Dict]: selector, cards, links (ссылок на резюме в группе), score
+    """
+    doc = html if isinstance(html, Document) else parse_html(html)
+    min_cards = min_cards or SELECTOR_INFERENCE_CONFIG['min_cards']
+    all_links = mark_resume_links(doc, pattern)
+    if len(all_links) < min_cards:
+        return []
+
+    candidates = []
+    for parent in [doc.root] + doc.nodes:
+        if not parent.links or len(parent.links) < min_cards:
+            continue
+        groups: Dict[tuple, List[Node]] = {}
+        for child in parent.children:
+            groups.setdefault((child.tag, frozenset(stable_classes(child))), []).append(child)
+        for siblings in groups.values():
+            members = [node for node in siblings if node.links]
+            if len(members) < min_cards:
+                continue
+            links = set().union(*(node.links for node in members))
+            single = sum(1 for node in members if len(node.links) == 1) / len(members)
+            score = len(members) * (len(links) / len(all_links)) * single * (len(members) / len(siblings))
+            selector = _selector_for_group(doc, parent, members)
+            if selector:
+                candidates.append({'selector': selector, 'cards': len(members), 'links': len(links),
+                                   'score': round(score, 3)})
+    candidates.sort(key=lambda candidate: -candidate['score'])
+    return candidates
+
+
+# ========================================
+# СЛЕДУЮЩАЯ СТРАНИЦА
+# ========================================
+
+def page_number(url: str) -> Optional[int]:
+    values = parse_qs(urlsplit(url or '').query).get('page')
+    if values and values[0].isdigit():
+        return int(values[0])
+    return None
+
+
+def _current_page(doc: Document, url: Optional[str]) -> int:
+    if url:
+        return page_number(url) or 1
+    for node in doc.nodes:
+        if 'active' in node.classes or node.attrs.get('aria-current'):
+            text = node.text_content().strip()
+            if text.isdigit():
+                return int(text)
+    return 1
+
+
+def _container_selector(link: Node) -> Optional[str]:
+    """Ближайший контейнер пагинации ссылки: #id, .pagination, ul/nav"""
+    fallback = None
+    node = link.parent
+    while node is not None and node.tag not in ('body', '#document'):
+        classes = stable_classes(node)
+        hinted = [name for name in classes if any(hint in name for hint in PAGINATION_HINTS)]
+        if hinted:
+            return '.' + hinted[0]
+        if node.id and not re.search(r'\d', node.id) and any(hint in node.id for hint in PAGINATION_HINTS):
+            return '#' + node.id
+        if fallback is None and node.tag in ('ul', 'nav'):
+            fallback = node.tag + ('.' + classes[0] if classes else '')
+        node = node.parent
+    return fallback
+
+
+def infer_next_page_selector(html, url: Optional[str] = None) -> Optional[Dict]:
+    """
+    Селектор ссылки на следующую страницу
+
+    Returns:
+        Optional[Dict]: selector, href, page, reason; на последней странице -
+        {'selector': None, 'last_page': True}; None - пагинация не распознана
+    """
+    doc = html if isinstance(html, Document) else parse_html(html)
+    current = _current_page(doc, url)
+    next_texts = SELECTOR_INFERENCE_CONFIG['next_page_texts']
+
+    ranked, pages_seen = [], []
+    for node in doc.by_tag.get('a', []):
+        href = node.attrs.get('href', '')
+        if not href or href.startswith(('#', 'javascript:')):
+            continue
+        page = page_number(href)
+        if page is not None:
+            pages_seen.append(page)
+        text = node.text_content().strip().lower()
+        if 'next' in node.attrs.get('rel', '').split():
+            ranked.append((0, node, 'rel=next'))
+        elif page == current + 1 and text in next_texts:
+            ranked.append((1, node, f'page={page}, "{text}"'))
+        elif page == current + 1:
+            ranked.append((2, node, f'page={page}'))
+        elif text in next_texts and page is None:
+            ranked.append((3, node, f'"{text}"'))
+
+    if not ranked:
+        has_pagination = any(hint in name for name in doc.by_class for hint in PAGINATION_HINTS)
+        if (pages_seen and max(pages_seen) <= current) or has_pagination:
+            return {'selector': None, 'last_page': True, 'page': current}
+        return None
+
+    priority = min(rank for rank, _, _ in ranked)
+    targets = [node for rank, node, _ in ranked if rank == priority]
+    best = targets[0]
+    href = best.attrs['href']
+    targets = [node for node in targets if node.attrs['href'] == href]
+    target_ids = {id(node) for node in targets}
+    reason = next(reason for rank, node, reason in ranked if node is best)
+
+    selectors = []
+    if priority == 0:
+        selectors.append("a[rel='next']")
+    selectors += ['a.' + name for name in stable_classes(best)]
+    container = _container_selector(best)
+    if container:
+        parent = best.parent
+        if parent is not None and parent.tag == 'li' and parent.is_last_child:
+            selectors.append(f'{container} li:last-child a')
+        if best.is_last_child:
+            selectors.append(f'{container} a:last-child')
+        selectors += [f'{container} a.{name}' for name in stable_classes(best)]
+
+    for selector in selectors:
+        matched = select(doc, selector)
+        if matched and all(id(node) in target_ids for node in matched):
+            return {'selector': selector, 'href': href, 'page': page_number(href), 'reason': reason}
+    return None
+
+
+# ========================================
+# ПРОВЕРКА НА ФИКСТУРАХ
+# ========================================
+
+def check_fixtures(fixtures_dir: Optional[str] = None) -> bool:
+    """
+    Вывод селекторов на каждой сохраненной странице списка
+
+    Карточек должно быть столько же, сколько разных ссылок на резюме,
+    следующая страница - та, что записана в фикстурах (на последней - нет).
+    """
+    from fixture_replay import SITE_ORIGIN, fixture_key, load_manifest
+
+    fixtures_dir = fixtures_dir or FIXTURES_CONFIG['dir']
+    manifest = load_manifest(fixtures_dir)
+    pages = sorted((key for key, entry in manifest.items() if entry['kind'] == 'list'),
+                   key=lambda key: (urlsplit(key).path, page_number(key) or 1))
+    if not pages:
+        print(f"❌ Нет страниц списка в {fixtures_dir} (fixture_replay.py synthetic / record)")
+        return False
+
+    failures = 0
+    for key in pages:
+        with open(os.path.join(fixtures_dir, manifest[key]['file']), 'r', encoding='utf-8') as f:
+            html = f.read()
+        started_at = time.perf_counter()
+        doc = parse_html(html)
+        cards = infer_card_selectors(doc)
+        next_page = infer_next_page_selector(doc, SITE_ORIGIN + key)
+        elapsed_ms = (time.perf_counter() - started_at) * 1000
+
+        expected_cards = len(doc.root.links or ())
+        current = page_number(key) or 1
+        expected_next = f"{urlsplit(key).path}?page={current + 1}"
+        has_next = expected_next in manifest
+
+        problems = []
+        if not cards:
+            problems.append("карточки не найдены")
+        elif cards[0]['cards'] != expected_cards:
+            problems.append(f"карточек {cards[0]['cards']} из {expected_cards}")
+        if has_next and not (next_page and next_page.get('href')
+                             and fixture_key(urljoin(SITE_ORIGIN + key, next_page['href'])) == expected_next):
+            problems.append("следующая страница не найдена")
+        if not has_next and next_page and next_page.get('selector'):
+            problems.append(f"лишняя следующая страница {next_page['href']}")
+
+        card_selector = cards[0]['selector'] if cards else '-'
+        next_selector = (next_page or {}).get('selector') or ('последняя' if next_page else '-')
+        status = '✅' if not problems else '❌'
+        print(f"{status} {key:<60} {elapsed_ms:6.1f}мс  карточки: {card_selector} "
+              f"({cards[0]['cards'] if cards else 0})  далее: {next_selector}")
+        for problem in problems:
+            print(f"     ⚠️ {problem}")
+        failures += bool(problems)
+
+    print(f"📊 Страниц: {len(pages)}, ошибок: {failures}")
+    return failures == 0
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else 'check'
+    if command == 'infer' and len(sys.argv) > 2:
+        with open(sys.argv[2], 'r', encoding='utf-8') as f:
+            page_html = f.read()
+        page_url = sys.argv[3] if len(sys.argv) > 3 else None
+        started = time.perf_counter()
+        document = parse_html(page_html)
+        for candidate in infer_card_selectors(document)[:5]:
+            print(f"🃏 {candidate['selector']:<40} карточек {candidate['cards']:>3}, "
+                  f"резюме {candidate['links']:>3}, оценка {candidate['score']}")
+        print(f"➡️ Следующая страница: {infer_next_page_selector(document, page_url)}")
+        print(f"⏱️ {(time.perf_counter() - started) * 1000:.1f}мс")
+    elif command == 'check':
+        sys.exit(0 if check_fixtures(sys.argv[2] if len(sys.argv) > 2 else None) else 1)
+    else:
+        print("Использование: python selector_inference.py check [каталог] | infer page.html [url]")
+        sys.exit(1)
@@ -0,0 +1,279 @@
+"""
+Реестр селекторов: выученные селекторы и их статистика
+
+Вместо перезаписи config.py во время парсинга селекторы хранятся в
+версионированном JSON (SELECTOR_REGISTRY_CONFIG['file']):
+
+    {"version": 7, "updated_at": "...", "updated_by": "host:pid",
+     "roles": {"resume_cards": [{"selector": ".resume-link", "source": "inference",
+                                 "successes": 40, "failures": 1, "recent": [1, 1, 0, 1]}]}}
+
+Исходные селекторы роли - из SELECTORS в config.py. Кандидаты роли
+упорядочены по недавней доле успехов (последние исходы весят больше), так что
+сломавшийся селектор быстро уступает место выученному.
+
+Реестр загружается один раз при старте. Запись - под файловой блокировкой:
+файл перечитывается, к нему добавляются накопленные счетчики воркера, версия
+увеличивается, результат пишется атомарно (tmp + os.replace). Другие воркеры
+раз в reload_interval секунд видят новую версию и подхватывают ее без
+перезапуска.
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from config import SELECTOR_REGISTRY_CONFIG, SELECTORS
+
+
+def default_selectors(role: str) -> List[str]:
+    """Селекторы роли из config.py (pagination_next - вместе с pagination_next_alt)"""
+    selectors = [SELECTORS[role]] if role in SELECTORS else []
+    selectors += [selector for selector in SELECTORS.get(f'{role}_alt', []) if selector not in selectors]
+    return selectors
+
+
+@contextmanager
+def file_lock(path: str):
+    """Межпроцессная блокировка на время чтения-изменения-записи (fcntl; без него - только потоки)"""
+    try:
+        import fcntl
+    except ImportError:
+        fcntl = None
+    with open(path, 'a') as handle:
+        if fcntl:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+class SelectorRegistry:
+    """Селекторы по ролям с версионированным хранилищем (потокобезопасно)"""
+
+    def __init__(self, path: Optional[str] = None, logger=None, metrics=None,
+                 reload_interval: Optional[float] = None):
+        settings = SELECTOR_REGISTRY_CONFIG
+        self.path = path or settings['file']
+        self.logger = logger
+        self.metrics = metrics
+        self.window = settings['recent_window']
+        self.decay = settings['recent_decay']
+        self.flush_every = settings['flush_every']
+        self.reload_interval = reload_interval if reload_interval is not None else settings['reload_interval']
+        self.worker = f"{socket.gethostname()}:{os.getpid()}"
+        self._state = {'version': 0, 'roles': {}}
+        # Исходы и новые селекторы этого воркера, еще не записанные в файл: {(роль, селектор): delta}
+        self._pending: Dict[tuple, Dict] = {}
+        self._pending_outcomes = 0
+        self._checked_at = 0.0
+        self._mtime = None
+        self._lock = threading.RLock()
+        self.reload(force=True)
+
+    @property
+    def version(self) -> int:
+        return self._state['version']
+
+    # ---------- Чтение ----------
+
+    def _read(self) -> Dict:
+        if not os.path.exists(self.path):
+            return {'version': 0, 'roles': {}}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            if self.logger:
+                self.logger.warning("⚠️ Реестр селекторов %s не прочитан: %s", self.path, e)
+            return {'version': 0, 'roles': {}}
+        state.setdefault('version', 0)
+        state.setdefault('roles', {})
+        return state
+
+    def reload(self, force: bool = False) -> bool:
+        """Подхватить новую версию файла (не чаще reload_interval); True - обновлено"""
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._checked_at < self.reload_interval:
+                return False
+            self._checked_at = now
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except OSError:
+                mtime = None
+            if not force and mtime == self._mtime:
+                return False
+            self._mtime = mtime
+            state = self._read()
+            if not force and state['version'] <= self._state['version']:
+                return False
+            previous = self._state['version']
+            self._state = state
+        if not force:
+            if self.logger:
+                self.logger.info("🔄 Реестр селекторов: версия %d -> %d", previous, state['version'])
+            if self.metrics:
+                self.metrics.inc('selector_registry_reloads_total')
+        return True
+
+    def _score(self, entry: Dict) -> float:
+        """Доля успехов с затуханием по давности (новые исходы весят больше), априори 1/2"""
+        hits = weight_sum = 0.0
+        weight = 1.0
+        for outcome in reversed(entry.get('recent', [])):
+            hits += weight * outcome
+            weight_sum += weight
+            weight *= self.decay
+        return (hits + 1) / (weight_sum + 2)
+
+    def _entries(self, role: str) -> List[Dict]:
+        """Записи роли: файл + несохраненные исходы воркера + исходные селекторы из config.py"""
+        entries = [dict(entry) for entry in self._state['roles'].get(role, [])]
+        known = {entry['selector'] for entry in entries}
+        pending = [(selector, delta) for (pending_role, selector), delta in self._pending.items()
+                   if pending_role == role and selector not in known]
+        for selector, delta in pending:
+            if 'source' in delta:  # Выученный, еще не записанный - в начало
+                entries.insert(0, {'selector': selector, 'source': delta['source'], 'added_at': delta['added_at'],
+                                   'successes': 0, 'failures': 0, 'recent': []})
+                known.add(selector)
+        for selector in default_selectors(role) + [selector for selector, _ in pending]:
+            if selector not in known:
+                entries.append({'selector': selector, 'source': 'config', 'successes': 0, 'failures': 0, 'recent': []})
+                known.add(selector)
+        for entry in entries:
+            delta = self._pending.get((role, entry['selector']))
+            if delta:
+                self._apply(entry, delta)
+        return entries
+
+    def _apply(self, entry: Dict, delta: Dict):
+        entry['successes'] = entry.get('successes', 0) + delta['successes']
+        entry['failures'] = entry.get('failures', 0) + delta['failures']
+        entry['recent'] = (list(entry.get('recent', [])) + delta['recent'])[-self.window:]
+        if delta.get('last_success_at'):
+            entry['last_success_at'] = delta['last_success_at']
+
+    def candidates(self, role: str) -> List[str]:
+        """Селекторы роли, лучший - первый"""
+        self.reload()
+        with self._lock:
+            entries = self._entries(role)
+        # sorted устойчив: при равной оценке выученные (в начале списка) идут раньше исходных
+        return [entry['selector'] for entry in sorted(entries, key=lambda entry: -self._score(entry))]
+
+    def get(self, role: str) -> str:
+        candidates = self.candidates(role)
+        if not candidates:
+            raise KeyError(f"Нет селекторов для роли {role}")
+        return candidates[0]
+
+    # ---------- Исходы ----------
+
+    def _delta(self, role: str, selector: str) -> Dict:
+        return self._pending.setdefault((role, selector), {'successes': 0, 'failures': 0, 'recent': []})
+
+    def record(self, role: str, selector: str, success: bool):
+        """Исход применения селектора (нашел ли он нужные элементы)"""
+        with self._lock:
+            delta = self._delta(role, selector)
+            delta['successes' if success else 'failures'] += 1
+            delta['recent'] = (delta['recent'] + [1 if success else 0])[-self.window:]
+            if success:
+                delta['last_success_at'] = round(time.time(), 3)
+            self._pending_outcomes += 1
+            flush = self._pending_outcomes >= self.flush_every
+        if self.metrics:
+            self.metrics.inc('selector_outcomes_total', role=role, result='success' if success else 'failure')
+        if flush:
+            self.save()
+
+    def learn(self, role: str, selector: str, source: str) -> int:
+        """
+        Новый рабочий селектор (вывод по структуре, LLM, альтернативный)
+
+        Записывается сразу, первым в роли; остальные воркеры подхватят его
+        при следующей проверке файла.
+
+        Returns:
+            int: версия реестра после записи
+        """
+        with self._lock:
+            delta = self._delta(role, selector)
+            delta.setdefault('source', source)
+            delta.setdefault('added_at', round(time.time(), 3))
+        self.record(role, selector, True)
+        version = self.save()
+        if self.logger:
+            self.logger.info("💾 Селектор %s сохранен: %s (%s, версия реестра %d)", role, selector, source, version)
+        if self.metrics:
+            self.metrics.inc('selector_learned_total', role=role, source=source)
+        return version
+
+    # ---------- Запись ----------
+
+    def _merge(self, state: Dict) -> Dict:
+        roles = {role: [dict(entry) for entry in entries] for role, entries in state['roles'].items()}
+        for (role, selector), delta in self._pending.items():
+            entries = roles.setdefault(role, [])
+            entry = next((entry for entry in entries if entry['selector'] == selector), None)
+            if entry is None:
+                entry = {'selector': selector, 'source': delta.get('source', 'config'),
+                         'added_at': delta.get('added_at', round(time.time(), 3)),
+                         'successes': 0, 'failures': 0, 'recent': []}
+                # Выученный - в начало роли, исходный из config.py - в конец
+                entries.insert(0 if 'source' in delta else len(entries), entry)
+            self._apply(entry, delta)
+        return roles
+
+    def save(self) -> int:
+        """Добавить накопленные исходы к файлу с новой версией; версия после записи"""
+        with self._lock:
+            if not self._pending:
+                return self._state['version']
+            with file_lock(self.path + '.lock'):
+                state = self._read()
+                state = {
+                    'version': max(state['version'], self._state['version']) + 1,
+                    'updated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                    'updated_by': self.worker,
+                    'roles': self._merge(state),
+                }
+                tmp_file = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    json.dump(state, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_file, self.path)
+                try:
+                    self._mtime = os.stat(self.path).st_mtime_ns
+                except OSError:
+                    self._mtime = None
+            self._state = state
+            self._pending = {}
+            self._pending_outcomes = 0
+            return state['version']
+
+    def summary(self) -> Dict:
+        self.reload()
+        with self._lock:
+            return {role: [{'selector': entry['selector'], 'source': entry.get('source', 'config'),
+                            'successes': entry.get('successes', 0), 'failures': entry.get('failures', 0),
+                            'score': round(self._score(entry), 3)}
+                           for entry in sorted(self._entries(role), key=lambda entry: -self._score(entry))]
+                    for role in SELECTOR_REGISTRY_CONFIG['roles']}
+
+    def log_summary(self, logger=None):
+        logger = logger or self.logger
+        if not logger:
+            return
+        logger.info(f"🧭 Реестр селекторов {self.path}, версия {self.version}")
+        for role, entries in self.summary().items():
+            for entry in entries[:3]:
+                logger.info(f"   {role:<16} {entry['selector']:<36} {entry['successes']:>5}/{entry['failures']:<4} "
+                            f"оценка {entry['score']:.2f} ({entry['source']})")
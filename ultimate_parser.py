@@ -10,14 +10,28 @@ import time
 import json
 import logging
 import os
-import random
 from datetime import datetime
+from selenium.common.exceptions import TimeoutException
 from work_ua_parser import WorkUaParser
+from browser_profile import apply_network_blocking, is_lean, wait_until_ready
+from config import (BROWSER_CONFIG, INCREMENTAL_CONFIG, METRICS_CONFIG, NEAR_DUPLICATE_CONFIG, PARSING_CONFIG,
+                    PROFILING_CONFIG)
+from incremental_crawl import IncrementalCrawl
+from near_duplicates import NearDuplicateIndex
+from pagination_planner import PaginationPlanner, list_page_url
+from sampling_profiler import MemoryTracker, SamplingProfiler
 
 class UltimateWorkUaParser(WorkUaParser):
-    def __init__(self):
-        """Инициализация ULTIMATE парсера на базе основного"""
-        super().__init__()  # Получаем все методы основного парсера
+    def __init__(self, profile=None, base_url=None, incremental=None):
+        """
+        Инициализация ULTIMATE парсера на базе основного
+        
+        Args:
+            profile: Включить профилирование (по умолчанию PROFILING_CONFIG['enabled'])
+            base_url: Первая страница списка резюме (по умолчанию BASE_URL из config.py)
+            incremental: Только новые резюме с прошлого запуска (по умолчанию INCREMENTAL_CONFIG['enabled'])
+        """
+        super().__init__(base_url)  # Получаем все методы основного парсера
         
         self.setup_bulletproof_logging()
         
@@ -55,10 +69,33 @@ class UltimateWorkUaParser(WorkUaParser):
         self.max_retries_per_card = 3  # Максимум попыток на одну карточку
         self.failed_cards_retry = []   # Карточки для повторной обработки
         
+        # 🔬 Профилирование (opt-in): стеки по окнам и снимки памяти
+        self.profiler = None
+        self.memory_tracker = None
+        if PROFILING_CONFIG.get('enabled') if profile is None else profile:
+            self.profiler = SamplingProfiler(run_id=self.metrics.run_id, logger=self.logger)
+            self.memory_tracker = MemoryTracker(run_id=self.metrics.run_id, logger=self.logger)
+        
+        # 🆕 Инкрементальный режим: остановка на уже известных карточках
+        self.incremental = None
+        if INCREMENTAL_CONFIG.get('enabled') if incremental is None else incremental:
+            self.incremental = IncrementalCrawl(logger=self.logger)
+        
+        # 🧬 Почти одинаковые резюме под разными URL не сохраняются повторно
+        self.near_duplicates = None
+        self.last_duplicate = None
+        if NEAR_DUPLICATE_CONFIG.get('enabled'):
+            self.near_duplicates = NearDuplicateIndex(logger=self.logger, metrics=self.metrics)
+        
         self.logger.info("🚀 ULTIMATE Parser инициализирован (основной парсер + bulletproof логика)")
     
     def setup_bulletproof_logging(self):
         """Настройка детального логирования поверх основного"""
+        if self.log_context is not None:
+            # JSON lines лог уже пишет все уровни в отдельном потоке
+            self.logger.info("📝 Bulletproof логи (JSON lines): %s", self.log_context.log_file)
+            return
+
         log_filename = f"ultimate_parsing_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
         
         # Добавляем файловый хендлер к существующему логгеру
@@ -77,14 +114,16 @@ class UltimateWorkUaParser(WorkUaParser):
     def parse_single_card_with_retry(self, card, tab_index):
         """🔄 Обработка одной карточки с retry механизмом"""
         max_attempts = self.max_retries_per_card
+        self.last_duplicate = None  # Почти дубликат: {'resume_url', 'duplicate_of', 'cluster_id', 'similarity'}
         
+        self.set_log_context(card=card['url'])
         for attempt in range(1, max_attempts + 1):
             try:
-                self.logger.info(f"📋 ULTIMATE парсинг: {card['title']} (попытка {attempt}/{max_attempts})")
+                self.card_logger.info("📋 ULTIMATE парсинг: %s (попытка %d/%d)", card['title'], attempt, max_attempts)
                 
                 # Проверяем health перед каждой попыткой
                 if not self.auto_health_monitor():
-                    self.logger.warning(f"❌ Health check провален для {card['title']} (попытка {attempt})")
+                    self.card_logger.warning("❌ Health check провален для %s (попытка %d)", card['title'], attempt)
                     if attempt < max_attempts:
                         self.logger.info(f"🔄 Перезапускаем драйвер перед повторной попыткой...")
                         if not self.restart_driver_bulletproof():
@@ -98,14 +137,33 @@ class UltimateWorkUaParser(WorkUaParser):
                 # Используем детальный парсинг основного парсера!
                 resume_details = self.parse_resume_details()
                 
+                # Секции есть только при извлеченном тексте (не при 'Ошибка извлечения')
+                duplicate = None
+                if resume_details and self.near_duplicates and resume_details.get('sections'):
+                    duplicate = self.near_duplicates.check(card['url'], resume_details['full_text'])
+                    if duplicate['duplicate_of']:
+                        # То же резюме под другим URL: только в кластер сохраненного, без записи
+                        self.near_duplicates.add(duplicate)
+                        self.last_duplicate = {key: duplicate[key] for key in
+                                               ('resume_url', 'duplicate_of', 'cluster_id', 'similarity')}
+                        self.metrics.inc('resumes_total', status='duplicate')
+                        self.session_state['processed_urls'].add(card['url'])
+                        return True
+                
                 if resume_details:
                     # Объединяем данные карточки и детали
                     full_resume = {**card['full_info'], **resume_details}
                     
                     # 💾 СОХРАНЯЕМ детальную информацию!
                     self.save_resume_data(full_resume)
+                    # В индекс дубликатов - только сохраненное резюме
+                    if duplicate:
+                        self.near_duplicates.add(duplicate)
                     
-                    self.logger.info(f"✅ Успешно спарсено: {full_resume.get('title', 'Без названия')} (попытка {attempt})")
+                    self.card_logger.info("✅ Успешно спарсено: %s (попытка %d)", full_resume.get('title', 'Без названия'), attempt)
+                    self.metrics.inc('resumes_total', status='ok')
+                    if self.memory_tracker:
+                        self.memory_tracker.on_resume(self.session_state['successful_resumes'] + 1)
                     self.session_state['successful_resumes'] += 1
                     self.session_state['processed_urls'].add(card['url'])
                     
@@ -113,17 +171,21 @@ class UltimateWorkUaParser(WorkUaParser):
                     self.auto_health_monitor()
                     return True  # Успешно обработано
                 else:
-                    self.logger.warning(f"⚠️ Частичные данные для: {card['title']} (попытка {attempt})")
+                    self.card_logger.warning("⚠️ Частичные данные для: %s (попытка %d)", card['title'], attempt)
                     if attempt < max_attempts:
+                        self.rate.wait('card')
                         continue
                     else:
                         self.session_state['processed_urls'].add(card['url'])
+                        self.metrics.inc('resumes_total', status='partial')
                         return False  # Не удалось получить детали
                         
             except Exception as e:
-                self.logger.error(f"❌ Ошибка парсинга {card['title']} (попытка {attempt}): {e}")
+                self.logger.error("❌ Ошибка парсинга %s (попытка %d): %s", card['title'], attempt, e)
+                self.rate.observe_error('timeout' if isinstance(e, TimeoutException) else 'error')
                 
                 if attempt < max_attempts:
+                    self.metrics.inc('retries_total', operation='card')
                     self.logger.info(f"🔄 Перезапускаем драйвер для повторной попытки...")
                     if self.restart_driver_bulletproof():
                         # После рестарта нужно снова открыть вкладку
@@ -134,8 +196,9 @@ class UltimateWorkUaParser(WorkUaParser):
                             continue
                     continue
                 else:
-                    self.logger.error(f"💀 Окончательно не удалось обработать {card['title']} после {max_attempts} попыток")
+                    self.logger.error("💀 Окончательно не удалось обработать %s после %d попыток", card['title'], max_attempts)
                     self.session_state['failed_urls'].add(card['url'])
+                    self.metrics.inc('resumes_total', status='failed')
                     return False
         
         return False  # Если все попытки исчерпаны
@@ -146,10 +209,11 @@ class UltimateWorkUaParser(WorkUaParser):
             self.resume_data.append(resume_data)
             
             # Сохраняем все данные в JSON файл
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(self.resume_data, f, indent=2, ensure_ascii=False)
+            with self.metrics.timer('db_write_seconds', target='json'):
+                with open(self.data_file, 'w', encoding='utf-8') as f:
+                    json.dump(self.resume_data, f, indent=2, ensure_ascii=False)
                 
-            self.logger.info(f"💾 Резюме сохранено: {len(self.resume_data)} из {self.session_state['successful_resumes']}")
+            self.card_logger.info("💾 Резюме сохранено: %d из %d", len(self.resume_data), self.session_state['successful_resumes'])
             
         except Exception as e:
             self.logger.error(f"❌ Ошибка сохранения данных резюме: {e}")
@@ -167,11 +231,12 @@ class UltimateWorkUaParser(WorkUaParser):
                 'data_file': self.data_file  # Ссылка на файл с детальными данными
             }
             
-            with open(self.checkpoint_file, 'w', encoding='utf-8') as f:
-                json.dump(checkpoint_data, f, ensure_ascii=False, indent=2)
+            with self.metrics.timer('checkpoint_write_seconds'):
+                with open(self.checkpoint_file, 'w', encoding='utf-8') as f:
+                    json.dump(checkpoint_data, f, ensure_ascii=False, indent=2)
                 
             self.session_state['last_checkpoint'] = datetime.now().isoformat()
-            self.logger.debug(f"💾 Checkpoint сохранен: {self.checkpoint_file}")
+            self.logger.debug("💾 Checkpoint сохранен: %s", self.checkpoint_file)
             
         except Exception as e:
             self.logger.error(f"❌ Ошибка сохранения checkpoint: {e}")
@@ -247,34 +312,20 @@ class UltimateWorkUaParser(WorkUaParser):
             
             # Переходим на правильную страницу с резюме
             current_page = self.session_state.get('current_page', 1)
-            if current_page > 1:
-                recovery_url = f"{self.base_url}?page={current_page}"
-                self.logger.info(f"🌐 Восстанавливаем страницу с резюме: страница {current_page}")
-                self.logger.info(f"🔗 URL восстановления: {recovery_url}")
-            else:
-                recovery_url = self.base_url
-                self.logger.info("🌐 Восстанавливаем страницу с резюме: страница 1")
+            recovery_url = self.page_url(current_page)
+            self.logger.info(f"🌐 Восстанавливаем страницу с резюме: страница {current_page}")
+            self.logger.info(f"🔗 URL восстановления: {recovery_url}")
             
             self.driver.get(recovery_url)
             
-            # Ждем загрузки страницы
-            time.sleep(3)
-            
-            # Ждем загрузки карточек резюме
-            try:
-                from selenium.webdriver.support import expected_conditions as EC
-                from selenium.webdriver.support.ui import WebDriverWait
-                from selenium.webdriver.common.by import By
-                
-                WebDriverWait(self.driver, 10).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, ".card.resume-link"))
-                )
+            # Ждем, пока карточки резюме загрузятся и перестанут меняться
+            if self.waits.stable_cards(self.selectors.get('resume_cards')) and self.waits.card_count:
                 self.logger.info("✅ Карточки резюме загружены после восстановления")
-            except Exception as e:
-                self.logger.warning(f"⚠️ Карточки не загрузились: {e}")
+            else:
+                self.logger.warning("⚠️ Карточки не загрузились после восстановления")
             
             self.driver_restarts += 1
-            time.sleep(2)  # Дополнительная стабилизация
+            self.metrics.inc('driver_restarts_total')
             
             if self.is_driver_alive():
                 self.logger.info(f"✅ Драйвер перезапущен успешно (рестарт #{self.driver_restarts})")
@@ -301,7 +352,7 @@ class UltimateWorkUaParser(WorkUaParser):
         
         for attempt in range(3):
             try:
-                self.logger.debug(f"🎯 {operation_name} (попытка {attempt + 1})")
+                self.logger.debug("🎯 %s (попытка %d)", operation_name, attempt + 1)
                 result = operation_func(*args, **kwargs)
                 
                 if self.consecutive_errors > 0:
@@ -334,9 +385,19 @@ class UltimateWorkUaParser(WorkUaParser):
     def safe_open_tab(self, url, title):
         """Безопасное открытие вкладки с recovery"""
         def _open_tab():
-            self.driver.execute_script(f"window.open('{url}', '_blank');")
+            if is_lean():
+                # CDP блокировка действует на вкладку: открываем пустую, включаем
+                # блокировку и только потом запускаем навигацию (без ожидания загрузки)
+                current_handle = self.driver.current_window_handle
+                self.driver.execute_script("window.open('about:blank', '_blank');")
+                self.driver.switch_to.window(self.driver.window_handles[-1])
+                apply_network_blocking(self.driver)
+                self.driver.execute_script("window.location.href = arguments[0];", url)
+                self.driver.switch_to.window(current_handle)
+            else:
+                self.driver.execute_script(f"window.open('{url}', '_blank');")
             handles = self.driver.window_handles
-            self.logger.debug(f"📂 Вкладка открыта: {title} | Всего: {len(handles)}")
+            self.logger.debug("📂 Вкладка открыта: %s | Всего: %d", title, len(handles))
             return len(handles)
         
         return self.execute_with_recovery(f"Открытие вкладки: {title}", _open_tab)
@@ -347,7 +408,7 @@ class UltimateWorkUaParser(WorkUaParser):
             handles = self.driver.window_handles
             if tab_index < len(handles):
                 self.driver.switch_to.window(handles[tab_index])
-                self.logger.debug(f"🔄 Переключились на вкладку {tab_index}")
+                self.logger.debug("🔄 Переключились на вкладку %s", tab_index)
                 return True
             return False
         
@@ -384,13 +445,13 @@ class UltimateWorkUaParser(WorkUaParser):
             for i, card in enumerate(cards):
                 try:
                     card_start_time = time.time()
-                    self.logger.info(f"🔄 Обработка карточки {i+1}/{len(cards)}...")
+                    self.card_logger.debug("🔄 Обработка карточки %d/%d...", i + 1, len(cards))
                     
                     # Используем метод основного парсера для извлечения данных
                     card_info = self.parse_card_info(card)
                     
                     card_time = time.time() - card_start_time
-                    self.logger.info(f"✅ Карточка {i+1} обработана за {card_time:.1f}с")
+                    self.card_logger.debug("✅ Карточка %d обработана за %.1fс", i + 1, card_time)
                     
                     if card_info and card_info.get('url'):
                         card_data.append({
@@ -400,12 +461,12 @@ class UltimateWorkUaParser(WorkUaParser):
                             'card_element': card,
                             'full_info': card_info
                         })
-                        self.logger.info(f"📄 {card_info.get('title', 'Без названия')}")
+                        self.card_logger.info("📄 %s", card_info.get('title', 'Без названия'))
                     else:
-                        self.logger.warning(f"⚠️ Карточка {i+1}: нет URL или данных")
+                        self.card_logger.warning("⚠️ Карточка %d: нет URL или данных", i + 1)
                 
                 except Exception as e:
-                    self.logger.warning(f"⚠️ Ошибка обработки карточки {i}: {e}")
+                    self.card_logger.warning("⚠️ Ошибка обработки карточки %d: %s", i, e)
                     continue
             
             total_time = time.time() - start_time
@@ -414,24 +475,74 @@ class UltimateWorkUaParser(WorkUaParser):
         
         return self.execute_with_recovery("Получение карточек с LLM", _get_cards)
     
+    def page_url(self, page_num):
+        """URL страницы списка резюме по номеру"""
+        return list_page_url(self.base_url, page_num)
+
+    def start_browser(self, page_num=1):
+        """Запуск драйвера и переход на страницу списка page_num"""
+        self.logger.info("🔧 Инициализация ULTIMATE парсера...")
+        if not self.setup_driver():
+            raise Exception("❌ Не удалось инициализировать драйвер")
+        
+        # Переходим на страницу со списком резюме
+        url = self.page_url(page_num)
+        self.logger.info("🌐 Переход на страницу с резюме...")
+        self.driver.get(url)
+        wait_until_ready(self.driver, 'list')
+        if BROWSER_CONFIG.get('collect_page_metrics'):
+            self.page_metrics.record(self.driver, 'list', url)
+        
+        self.main_tab_handle = self.driver.current_window_handle
+        self.logger.info("✅ ULTIMATE парсер готов к работе")
+
+    def process_card(self, card):
+        """Одна карточка в отдельной вкладке: парсинг с retry, закрытие вкладки, checkpoint"""
+        # Открываем одну вкладку для карточки
+        self.safe_open_tab(card['url'], card['title'])
+        self.safe_switch_to_tab(1)  # Переключаемся на новую вкладку
+        
+        # Обрабатываем с retry механизмом
+        success = self.parse_single_card_with_retry(card, 1)
+        
+        # Закрываем вкладку
+        try:
+            self.safe_close_tab()
+        except:
+            pass  # Вкладка могла уже закрыться при ошибке
+        
+        # Возвращаемся на главную вкладку
+        try:
+            self.safe_switch_to_tab(0)
+        except:
+            # Если не можем вернуться - перезапускаем драйвер
+            self.restart_driver_bulletproof()
+        
+        # Сохраняем checkpoint после каждой карточки
+        self.save_checkpoint()
+        return success
+
     def ultimate_multitab_parsing(self, max_pages=3, max_cards_per_page=5):
         """ULTIMATE Multi-tab парсинг с LLM + bulletproof"""
         self.logger.info(f"🚀 ULTIMATE парсинг: {max_pages} страниц, {max_cards_per_page} карточек")
         
+        if METRICS_CONFIG.get('prometheus_port'):
+            self.metrics.serve()
+            self.logger.info(f"📈 Метрики: http://localhost:{METRICS_CONFIG['prometheus_port']}/metrics")
+        
+        if self.profiler:
+            self.profiler.start()
+            self.memory_tracker.start()
+        
+        # Прямые URL страниц: число страниц - по пагинации, конец - пустая страница
+        planned = PARSING_CONFIG.get('pagination_mode', 'planned') == 'planned'
+        self.pagination = PaginationPlanner(self.base_url, rate=self.rate, metrics=self.metrics,
+                                            logger=self.logger, max_pages=max_pages)
+        
         try:
             # Инициализация драйвера
             if not self.driver:
-                self.logger.info("🔧 Инициализация ULTIMATE парсера...")
-                if not self.setup_driver():
-                    raise Exception("❌ Не удалось инициализировать драйвер")
-                
-                # Переходим на базовую страницу
-                self.logger.info("🌐 Переход на страницу с резюме...")
-                self.driver.get(self.base_url)
-                time.sleep(3)
-                
-                self.main_tab_handle = self.driver.current_window_handle
-                self.logger.info("✅ ULTIMATE парсер готов к работе")
+                self.start_browser(self.session_state['current_page'])
             
             # Основной цикл по страницам
             for page_num in range(self.session_state['current_page'], max_pages + 1):
@@ -447,18 +558,39 @@ class UltimateWorkUaParser(WorkUaParser):
                         break
                 
                 self.session_state['current_page'] = page_num
+                self.set_log_context(page=page_num)
                 
                 try:
                     # Получаем карточки с LLM автоадаптацией
                     all_cards = self.get_cards_with_llm_fallback()
                     
+                    if planned:
+                        # Число страниц уточняется, когда дошли до последней известной
+                        if page_num >= self.pagination.last_page:
+                            self.pagination.update_total(self.driver.page_source, self.driver.current_url)
+                        accepted = self.pagination.accept(page_num, all_cards)
+                        if accepted is None:
+                            # Пустая страница внутри известного числа страниц - загружаем еще раз
+                            self.driver.get(self.page_url(page_num))
+                            wait_until_ready(self.driver, 'list')
+                            all_cards = self.get_cards_with_llm_fallback()
+                            accepted = self.pagination.accept(page_num, all_cards)
+                        # Пустая страница (или только уже встреченные резюме) - конец списка
+                        if not accepted:
+                            break
+                    
+                    # Инкрементально: только новые/измененные, стоп после K известных подряд
+                    stop_after_page = False
+                    if self.incremental:
+                        all_cards, stop_after_page = self.incremental.classify_page(all_cards)
+                    
                     # Фильтруем дубликаты
                     new_cards = []
                     for card in all_cards:
                         if card['url'] not in self.session_state['processed_urls']:
                             new_cards.append(card)
                         else:
-                            self.logger.debug(f"⏭️ Пропускаем дубликат: {card['title']}")
+                            self.card_logger.debug("⏭️ Пропускаем дубликат: %s", card['title'])
                     
                     cards_to_process = new_cards[:max_cards_per_page]
                     self.logger.info(f"🎯 К обработке: {len(cards_to_process)} из {len(all_cards)}")
@@ -476,47 +608,25 @@ class UltimateWorkUaParser(WorkUaParser):
                         failed_count = 0
                         
                         for i, card in enumerate(cards_to_process, 1):
-                            self.logger.info(f"\n📋 КАРТОЧКА {i}/{len(cards_to_process)}: {card['title']}")
+                            self.card_logger.info("📋 КАРТОЧКА %d/%d: %s", i, len(cards_to_process), card['title'])
                         
                             try:
-                                # Открываем одну вкладку для карточки
-                                self.safe_open_tab(card['url'], card['title'])
-                                self.safe_switch_to_tab(1)  # Переключаемся на новую вкладку
-                                
-                                # Обрабатываем с retry механизмом  
-                                success = self.parse_single_card_with_retry(card, 1)
-                                
-                                if success:
+                                if self.process_card(card):
                                     successful_count += 1
-                                    self.logger.info(f"✅ ИТОГО успешных: {successful_count}/{i}")
+                                    if self.incremental:
+                                        self.incremental.mark_processed(card)
+                                    self.card_logger.info("✅ ИТОГО успешных: %d/%d", successful_count, i)
                                 else:
                                     failed_count += 1
-                                    self.logger.warning(f"❌ ИТОГО неудачных: {failed_count}/{i}")
+                                    self.card_logger.warning("❌ ИТОГО неудачных: %d/%d", failed_count, i)
                                 
-                                # Закрываем вкладку
-                                try:
-                                    self.safe_close_tab()
-                                except:
-                                    pass  # Вкладка могла уже закрыться при ошибке
-                                
-                                # Возвращаемся на главную вкладку
-                                try:
-                                    self.safe_switch_to_tab(0)
-                                except:
-                                    # Если не можем вернуться - перезапускаем драйвер
-                                    self.restart_driver_bulletproof()
-                                
-                                # Сохраняем checkpoint после каждой карточки
-                                self.save_checkpoint()
-                                
-                                # Человекоподобная пауза между карточками
+                                # Пауза между карточками - подстраивается под ответы сервера
                                 if i < len(cards_to_process):
-                                    pause = random.uniform(1, 3)
-                                    self.logger.info(f"⏸️ Пауза {pause:.1f}s перед следующей карточкой...")
-                                    time.sleep(pause)
+                                    pause = self.rate.wait('card')
+                                    self.card_logger.debug("⏸️ Пауза %.1fs перед следующей карточкой...", pause)
                                     
                             except Exception as e:
-                                self.logger.error(f"❌ Критическая ошибка с карточкой {card['title']}: {e}")
+                                self.logger.error("❌ Критическая ошибка с карточкой %s: %s", card['title'], e)
                                 failed_count += 1
                                 self.session_state['failed_urls'].add(card['url'])
                                 
@@ -530,12 +640,28 @@ class UltimateWorkUaParser(WorkUaParser):
                     
                     self.logger.info(f"✅ ULTIMATE страница {page_num} обработана")
                     
+                    if stop_after_page:
+                        self.logger.info(f"🛑 {self.incremental.known_streak} известных резюме подряд - "
+                                         f"новых дальше нет, пагинация остановлена")
+                        break
+                    
                     # Переход на следующую страницу
                     if page_num < max_pages:
                         self.logger.info(f"⏭️ ULTIMATE переход на страницу {page_num + 1}...")
                         
-                        # Используем метод основного парсера для навигации
-                        if self.has_next_page():
+                        if planned:
+                            # Прямой переход по URL, без клика по кнопке
+                            next_url = self.pagination.next_url(page_num)
+                            if not next_url:
+                                self.logger.info(f"📄 Больше страниц нет (всего {self.pagination.total_pages})")
+                                break
+                            self.driver.get(next_url)
+                            wait_until_ready(self.driver, 'list')
+                            self.rate.observe_page(self.driver)
+                            if BROWSER_CONFIG.get('collect_page_metrics'):
+                                self.page_metrics.record(self.driver, 'list', next_url)
+                        # Клик по кнопке следующей страницы (метод основного парсера)
+                        elif self.has_next_page():
                             if not self.go_to_next_page():
                                 self.logger.error("❌ Не удалось перейти на следующую страницу")
                                 break
@@ -543,7 +669,7 @@ class UltimateWorkUaParser(WorkUaParser):
                             self.logger.info("📄 Больше страниц нет")
                             break
                         
-                        time.sleep(random.uniform(2, 4))
+                        self.rate.wait('page')
                 
                 except Exception as e:
                     self.logger.error(f"❌ Критическая ошибка на странице {page_num}: {e}")
@@ -574,9 +700,33 @@ class UltimateWorkUaParser(WorkUaParser):
         self.logger.info(f"💾 Checkpoint: {self.checkpoint_file}")
         self.logger.info(f"📋 ДЕТАЛЬНЫЕ ДАННЫЕ: {self.data_file} ({len(self.resume_data)} резюме)")
         self.logger.info(f"🎯 RETRY МЕХАНИЗМ: до {self.max_retries_per_card} попыток на карточку")
+        self.page_metrics.log_summary(self.logger)
+        self.rate.log_summary(self.logger)
+        self.prompt_builder.log_summary(self.logger)
+        self.llm_usage.log_summary(self.logger)
+        if self.incremental:
+            self.incremental.log_summary(self.logger)
+        self.waits.log_summary(self.logger)
+        self.selectors.log_summary(self.logger)
+        if getattr(self, 'pagination', None):
+            self.pagination.log_summary(self.logger)
+        if self.near_duplicates:
+            self.near_duplicates.log_summary(self.logger)
+        self.metrics.set_gauge('resumes_saved', len(self.resume_data))
+        self.metrics.set_gauge('pages_processed', self.session_state['current_page'])
+        self.metrics.log_summary(self.logger)
+        if METRICS_CONFIG.get('enabled', True):
+            self.logger.info(f"📈 Метрики сохранены: {self.metrics.export_json()}")
     
     def cleanup_ultimate(self):
         """Очистка ресурсов ULTIMATE парсера"""
+        self.selectors.save()
+        if self.profiler:
+            self.profiler.stop()
+            self.memory_tracker.stop()
+            self.logger.info(f"🔬 Профиль: {self.profiler.total_samples} семплов, "
+                             f"{len(self.profiler.files)} окон в {self.profiler.output_dir}")
+        
         try:
             if self.driver:
                 self.driver.quit()
@@ -585,7 +735,10 @@ class UltimateWorkUaParser(WorkUaParser):
             pass
 
 if __name__ == "__main__":
-    parser = UltimateWorkUaParser()
+    import sys
+    
+    parser = UltimateWorkUaParser(profile=True if '--profile' in sys.argv else None,
+                                  incremental=True if '--incremental' in sys.argv else None)
     
     # Берем настройки из config.py
     from config import PARSING_CONFIG
@@ -3,37 +3,46 @@
 Консольный просмотр базы данных резюме
 """
 
-import json
 import os
+import sys
 from datetime import datetime
-from collections import Counter
 
-def load_database():
-    """Загрузка данных из JSON файла"""
-    try:
-        with open('база_резюме_полная.json', 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        return data
-    except FileNotFoundError:
-        print("❌ Файл база_резюме_полная.json не найден")
-        return []
-    except json.JSONDecodeError:
-        print("❌ Ошибка чтения JSON файла")
-        return []
+from config import OUTPUT_CONFIG
+from database_manager import ResumeDatabase
+
+LEGACY_JSON_FILE = 'база_резюме_полная.json'
+
+def load_database(db_path=None):
+    """
+    Открытие базы резюме (данные читаются лениво, по запросу)
+    
+    При первом запуске JSON экспорт импортируется в SQLite один раз,
+    дальше все фильтры идут по индексу базы.
+    """
+    db_path = db_path or OUTPUT_CONFIG.get('database_file', 'work_ua_resumes.db')
+    db = ResumeDatabase(db_path)
+    
+    if db.get_stats().get('total_resumes', 0) == 0:
+        if os.path.exists(LEGACY_JSON_FILE):
+            print(f"📥 Импортируем {LEGACY_JSON_FILE} в {db_path}...")
+            imported = db.import_json_export(LEGACY_JSON_FILE)
+            print(f"✅ Импортировано резюме: {imported}")
+        else:
+            print(f"❌ База {db_path} пуста, файл {LEGACY_JSON_FILE} не найден")
+            return None
+    
+    return db
 
-def format_resume(resume_data, index):
-    """Форматирование резюме для вывода"""
-    detailed = resume_data.get('resume_data', {}).get('detailed_info', {})
-    card = resume_data.get('resume_data', {}).get('card_info', {})
-    
-    name = detailed.get('full_name', 'Не указано')
-    position = detailed.get('position', card.get('title', 'Не указано'))
-    salary = detailed.get('salary', 'Не указана')
-    location = detailed.get('location', 'Не указан')
-    age = detailed.get('age', 'Не указан')
-    skills = detailed.get('skills', [])
-    experience = detailed.get('experience', [])
-    url = resume_data.get('resume_url', '#')
+def format_resume(resume, index):
+    """Форматирование резюме (строка индекса) для вывода"""
+    name = resume.get('full_name') or 'Не указано'
+    position = resume.get('position') or 'Не указано'
+    salary = resume.get('salary') or 'Не указана'
+    location = resume.get('location') or 'Не указан'
+    age = resume.get('age') or 'Не указан'
+    skills = resume.get('skills', [])
+    experience_count = resume.get('experience_count', 0)
+    url = resume.get('resume_url', '#')
     
     # Форматируем вывод
     result = f"""
@@ -42,131 +51,94 @@ def format_resume(resume_data, index):
    💰 Зарплата: {salary}
    📍 Город: {location} | 🎂 Возраст: {age} лет
    🔧 Навыки: {' | '.join(skills[:4])}{'...' if len(skills) > 4 else ''}
-   📋 Опыт: {len(experience)} позиций
+   📋 Опыт: {experience_count} позиций
    🔗 URL: {url}
 """
     return result
 
-def show_stats(data):
+def show_stats(db):
     """Показать статистику"""
     print("📊 СТАТИСТИКА БАЗЫ ДАННЫХ")
     print("=" * 50)
     
-    total = len(data)
-    quality_resumes = [d for d in data if d.get('resume_data', {}).get('detailed_info')]
+    stats = db.get_index_stats(top_n=5)
     
-    # Собираем данные для статистики
-    all_skills = []
-    cities = []
-    salaries = []
-    positions = []
-    
-    for resume in quality_resumes:
-        detailed = resume['resume_data']['detailed_info']
-        
-        # Навыки
-        skills = detailed.get('skills', [])
-        all_skills.extend(skills)
-        
-        # Города
-        city = detailed.get('location', '')
-        if city and city != 'Не указан':
-            cities.append(city)
-        
-        # Зарплаты
-        salary = detailed.get('salary', '')
-        if salary and 'грн' in salary:
-            try:
-                salary_num = int(''.join(filter(str.isdigit, salary)))
-                if salary_num > 0:
-                    salaries.append(salary_num)
-            except:
-                pass
-        
-        # Должности
-        position = detailed.get('position', '')
-        if position and position != 'Не указано':
-            positions.append(position)
+    print(f"📚 Всего резюме: {stats.get('total_resumes', 0)}")
+    print(f"✅ Качественных: {stats.get('quality_resumes', 0)}")
+    print(f"💾 Размер базы: {db.get_stats().get('database_size_bytes', 0)} байт")
     
-    print(f"📚 Всего резюме: {total}")
-    print(f"✅ Качественных: {len(quality_resumes)}")
-    print(f"💾 Размер файла: {os.path.getsize('база_резюме_полная.json')} байт")
-    
-    if salaries:
-        avg_salary = sum(salaries) // len(salaries)
-        min_salary = min(salaries)
-        max_salary = max(salaries)
-        print(f"💰 Зарплаты: {min_salary:,} - {max_salary:,} грн (среднее: {avg_salary:,})")
+    if stats.get('salary_avg') is not None:
+        print(f"💰 Зарплаты: {stats['salary_min']:,} - {stats['salary_max']:,} грн (среднее: {stats['salary_avg']:,})")
+        show_salary_percentiles(db)
     
     # Топ навыков
-    skill_counter = Counter(all_skills)
-    if skill_counter:
+    if stats.get('top_skills'):
         print(f"\n🔧 ТОП-5 НАВЫКОВ:")
-        for skill, count in skill_counter.most_common(5):
+        for skill, count in stats['top_skills']:
             print(f"   • {skill}: {count} раз")
     
     # Топ городов
-    city_counter = Counter(cities)
-    if city_counter:
+    if stats.get('top_cities'):
         print(f"\n📍 ТОП ГОРОДОВ:")
-        for city, count in city_counter.most_common(5):
+        for city, count in stats['top_cities']:
             print(f"   • {city}: {count} кандидатов")
     
     # Топ должностей
-    position_counter = Counter(positions)
-    if position_counter:
+    if stats.get('top_positions'):
         print(f"\n💼 ТОП ДОЛЖНОСТЕЙ:")
-        for position, count in position_counter.most_common(5):
+        for position, count in stats['top_positions']:
             print(f"   • {position}: {count} резюме")
     
     print("=" * 50)
 
-def show_resumes(data, limit=10, filter_type=None, search_term=None):
-    """Показать резюме с фильтрацией"""
-    
-    # Фильтрация
-    filtered_data = data.copy()
-    
-    if filter_type == 'quality':
-        filtered_data = [d for d in filtered_data if d.get('resume_data', {}).get('detailed_info')]
-    elif filter_type == 'kiev':
-        filtered_data = [d for d in filtered_data 
-                        if 'київ' in d.get('resume_data', {}).get('detailed_info', {}).get('location', '').lower()]
-    elif filter_type == 'salary':
-        filtered_data = [d for d in filtered_data 
-                        if 'грн' in d.get('resume_data', {}).get('detailed_info', {}).get('salary', '')]
-    elif filter_type == '1c':
-        filtered_data = [d for d in filtered_data 
-                        if any('1с' in skill.lower() 
-                              for skill in d.get('resume_data', {}).get('detailed_info', {}).get('skills', []))]
-    
-    # Текстовый поиск
-    if search_term:
-        search_lower = search_term.lower()
-        filtered_data = [d for d in filtered_data
-                        if search_lower in d.get('resume_data', {}).get('detailed_info', {}).get('full_name', '').lower()
-                        or search_lower in d.get('resume_data', {}).get('detailed_info', {}).get('position', '').lower()
-                        or any(search_lower in skill.lower() 
-                              for skill in d.get('resume_data', {}).get('detailed_info', {}).get('skills', []))]
+def show_salary_percentiles(db):
+    """Перцентили зарплат по колоночному снимку (если установлен NumPy)"""
+    try:
+        from resume_analytics import load_analytics
+    except ImportError:
+        return
+    
+    analytics = load_analytics(db.db_path, OUTPUT_CONFIG.get('analytics_snapshot', 'resume_columns.npz'))
+    percentiles = analytics.percentiles('salary', q=(25, 50, 75, 90))
+    if percentiles:
+        print("📈 Перцентили: " + ' | '.join(f"{name}: {value:,.0f}" for name, value in percentiles.items()))
+
+def show_resumes(db, limit=10, filter_type=None, search_term=None):
+    """Показать резюме с фильтрацией (индексированный запрос + курсор, по странице за раз)"""
+    
+    cursor = db.query_resumes(filter_type=filter_type, search_term=search_term, page_size=limit)
+    page = cursor.fetch_page()
     
     # Показываем результаты
-    if not filtered_data:
+    if not page:
         print("🔍 Ничего не найдено по заданным критериям")
         return
     
-    print(f"\n📋 РЕЗЮМЕ ({len(filtered_data)} найдено):")
+    total = cursor.total
+    print(f"\n📋 РЕЗЮМЕ ({total} найдено):")
     print("=" * 70)
     
-    for i, resume in enumerate(filtered_data[:limit], 1):
-        print(format_resume(resume, i))
-    
-    if len(filtered_data) > limit:
-        print(f"... и еще {len(filtered_data) - limit} резюме")
+    shown = 0
+    while page:
+        for resume in page:
+            shown += 1
+            print(format_resume(resume, shown))
+        
+        if shown >= total or cursor.exhausted:
+            return
+        # Следующая страница - только по запросу в терминале
+        if not sys.stdin.isatty():
+            print(f"... и еще {total - shown} резюме")
+            return
+        answer = input(f"... еще {total - shown} резюме. Enter - следующие {limit}, q - назад: ").strip().lower()
+        if answer == 'q':
+            return
+        page = cursor.fetch_page()
 
 def interactive_menu():
     """Интерактивное меню"""
-    data = load_database()
-    if not data:
+    db = load_database()
+    if not db:
         return
     
     while True:
@@ -186,21 +158,21 @@ def interactive_menu():
         choice = input("Выберите опцию (1-9): ").strip()
         
         if choice == '1':
-            show_stats(data)
+            show_stats(db)
         elif choice == '2':
-            show_resumes(data, limit=10)
+            show_resumes(db, limit=10)
         elif choice == '3':
-            show_resumes(data, limit=10, filter_type='quality')
+            show_resumes(db, limit=10, filter_type='quality')
         elif choice == '4':
-            show_resumes(data, limit=10, filter_type='kiev')
+            show_resumes(db, limit=10, filter_type='kiev')
         elif choice == '5':
-            show_resumes(data, limit=10, filter_type='salary')
+            show_resumes(db, limit=10, filter_type='salary')
         elif choice == '6':
-            show_resumes(data, limit=10, filter_type='1c')
+            show_resumes(db, limit=10, filter_type='1c')
         elif choice == '7':
             search_term = input("Введите ключевое слово для поиска: ").strip()
             if search_term:
-                show_resumes(data, limit=10, search_term=search_term)
+                show_resumes(db, limit=10, search_term=search_term)
         elif choice == '8':
             print("🌐 Запускаем веб-интерфейс...")
             os.system("python start_viewer.py 8002 &")
@@ -213,24 +185,24 @@ def interactive_menu():
 
 if __name__ == "__main__":
     # Можно запускать с параметрами или в интерактивном режиме
-    import sys
-    
     if len(sys.argv) > 1:
-        data = load_database()
+        db = load_database()
+        if not db:
+            sys.exit(1)
         command = sys.argv[1].lower()
         
         if command == 'stats':
-            show_stats(data)
+            show_stats(db)
         elif command == 'all':
-            show_resumes(data, limit=20)
+            show_resumes(db, limit=20)
         elif command == 'quality':
-            show_resumes(data, filter_type='quality')
+            show_resumes(db, filter_type='quality')
         elif command == 'kiev':
-            show_resumes(data, filter_type='kiev')
+            show_resumes(db, filter_type='kiev')
         elif command == 'salary':
-            show_resumes(data, filter_type='salary')
+            show_resumes(db, filter_type='salary')
         elif command == '1c':
-            show_resumes(data, filter_type='1c')
+            show_resumes(db, filter_type='1c')
         else:
             print("❌ Неизвестная команда. Доступные: stats, all, quality, kiev, salary, 1c")
     else:
@@ -6,7 +6,6 @@ Work.ua Resume Parser
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
@@ -17,32 +16,78 @@ import csv
 import logging
 import datetime
 import openai
-from config import BROWSER_CONFIG, PARSING_CONFIG
+from config import BASE_URL, BROWSER_CONFIG, FIXTURES_CONFIG, LOGGING_CONFIG, PARSING_CONFIG
+from log_pipeline import bind_context, configure_levels, setup_queue_logging
+from fixture_replay import FixtureRecorder
+from incremental_crawl import resume_id_from_url
+from resume_sections import annotate_resume
+from page_waits import PageWaiter
+from llm_backends import make_extraction_backend
+from llm_batching import BatchExtractor
+from llm_extraction import StructuredExtractor
+from llm_usage import UsageMeter
+from prompt_builder import ResumePromptBuilder
+from rate_controller import AdaptiveRateController
+from run_metrics import RunMetrics, timed
+from selector_registry import SelectorRegistry
+from browser_profile import (PageMetricsLog, apply_network_blocking, build_chrome_options,
+                             wait_until_ready)
 
 
 class WorkUaParser:
-    def __init__(self):
-        """Инициализация парсера"""
+    def __init__(self, base_url=None):
+        """
+        Инициализация парсера
+
+        Args:
+            base_url: Первая страница списка резюме (по умолчанию BASE_URL из config.py)
+        """
         self.driver = None
-        self.base_url = "https://www.work.ua/resumes-%D0%B1%D1%83%D1%85%D0%B3%D0%B0%D0%BB%D1%82%D0%B5%D1%80/"
+        self.base_url = base_url or BASE_URL
+        self.metrics = RunMetrics()
         self.setup_logging()
         self.max_retries = 3
         self.retry_delay = 2
+        self.page_metrics = PageMetricsLog()
+        self.waits = PageWaiter(logger=self.logger, metrics=self.metrics)
+        self.rate = AdaptiveRateController(metrics=self.metrics, logger=self.logger)
+        self.prompt_builder = ResumePromptBuilder(metrics=self.metrics)
+        self.selectors = SelectorRegistry(logger=self.logger, metrics=self.metrics)
+        self.llm_usage = UsageMeter(metrics=self.metrics, logger=self.logger)
+        self.llm_extractor = StructuredExtractor(metrics=self.metrics, logger=self.logger, usage_meter=self.llm_usage)
+        self.batch_extractor = BatchExtractor(self.llm_extractor, metrics=self.metrics, logger=self.logger)
+        self.extraction_backend = make_extraction_backend(self)
+        self.fixture_recorder = FixtureRecorder() if FIXTURES_CONFIG.get('record') else None
+        self.llm_extractor.fixture_recorder = self.fixture_recorder
         
     def setup_logging(self):
         """Настройка системы логирования"""
-        log_filename = f"work_ua_parser_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
-        
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler(log_filename, encoding='utf-8'),
-                logging.StreamHandler()
-            ]
-        )
+        self.log_context = None
+        if LOGGING_CONFIG.get('mode') == 'queue_json':
+            # Запись в файл/консоль в отдельном потоке, JSON lines с run_id/page/card
+            self.log_context = setup_queue_logging(self.metrics.run_id)
+        else:
+            log_filename = f"work_ua_parser_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
+
+            logging.basicConfig(
+                level=logging.INFO,
+                format='%(asctime)s - %(levelname)s - %(message)s',
+                handlers=[
+                    logging.FileHandler(log_filename, encoding='utf-8'),
+                    logging.StreamHandler()
+                ]
+            )
         self.logger = logging.getLogger(__name__)
+        self.card_logger = logging.getLogger(f"{__name__}.card")
+        configure_levels(self.logger, self.card_logger)
         self.logger.info("Work.ua Parser инициализирован")
+
+    def set_log_context(self, page=None, card=None):
+        """Текущая страница/карточка для полей page и card в JSON логе"""
+        if self.log_context is not None:
+            self.log_context.page = page if page is not None else self.log_context.page
+            self.log_context.card = card
+            bind_context(self.log_context)  # Парсер мог быть создан в другом потоке
         
     def retry_operation(self, operation, operation_name, max_retries=None):
         """Универсальная функция для повторения операций при ошибках"""
@@ -58,32 +103,20 @@ class WorkUaParser:
             except Exception as e:
                 if attempt < max_retries:
                     self.logger.warning(f"⚠️ {operation_name} неудачна (попытка {attempt + 1}/{max_retries + 1}): {e}")
+                    self.metrics.inc('retries_total', operation=operation_name)
                     time.sleep(self.retry_delay)
                 else:
                     self.logger.error(f"❌ {operation_name} провалена после {max_retries + 1} попыток: {e}")
                     raise e
         
+    @timed('driver_start_seconds')
     def setup_driver(self):
         """Настройка и запуск Chrome драйвера"""
         def _setup():
             self.logger.info("Настройка Chrome драйвера...")
             
-            # Настройки Chrome
-            chrome_options = Options()
-            
-            # Устанавливаем размер окна
-            chrome_options.add_argument(f"--window-size={BROWSER_CONFIG['window_size'][0]},{BROWSER_CONFIG['window_size'][1]}")
-            
-            # Если нужен headless режим
-            if BROWSER_CONFIG['headless']:
-                chrome_options.add_argument("--headless")
-                
-            # Дополнительные настройки для стабильности
-            chrome_options.add_argument("--no-sandbox")
-            chrome_options.add_argument("--disable-dev-shm-usage")
-            chrome_options.add_argument("--disable-gpu")
-            chrome_options.add_argument("--disable-extensions")
-            chrome_options.add_argument("--disable-web-security")
+            # Настройки Chrome по профилю из конфига (lean/full, см. browser_profile.py)
+            chrome_options = build_chrome_options()
             
             try:
                 # 🔧 BULLETPROOF инициализация драйвера с таймаутом
@@ -114,6 +147,12 @@ class WorkUaParser:
                 self.driver.set_page_load_timeout(BROWSER_CONFIG['page_load_timeout'])
                 self.driver.implicitly_wait(BROWSER_CONFIG['implicit_wait'])
                 
+                self.waits.attach(self.driver)
+                
+                # Блокировка картинок, шрифтов, медиа и сторонних доменов (профиль lean)
+                if apply_network_blocking(self.driver):
+                    self.logger.info("🪶 Облегченный профиль: ресурсы заблокированы через CDP")
+                
                 self.logger.info("✅ Chrome драйвер успешно инициализирован")
                 return True
                 
@@ -127,6 +166,7 @@ class WorkUaParser:
             self.logger.critical(f"❌ Критическая ошибка инициализации драйвера: {e}")
             return False
         
+    @timed('page_load_seconds', page_type='first')
     def open_page(self):
         """Открытие страницы с резюме"""
         if not self.driver:
@@ -139,9 +179,13 @@ class WorkUaParser:
             try:
                 self.driver.get(self.base_url)
                 
-                # Ждем загрузки страницы с WebDriverWait
-                wait = WebDriverWait(self.driver, 10)
-                wait.until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+                # Ждем только контейнер списка резюме (в профиле full - body)
+                wait_until_ready(self.driver, 'list', timeout=10)
+                self.rate.observe_page(self.driver)
+                if BROWSER_CONFIG.get('collect_page_metrics'):
+                    self.page_metrics.record(self.driver, 'list', self.base_url)
+                if self.fixture_recorder:
+                    self.fixture_recorder.record_page(self.driver.current_url, self.driver.page_source, 'list')
                 
                 # Проверяем, что страница загружена
                 current_url = self.driver.current_url
@@ -181,13 +225,12 @@ class WorkUaParser:
         try:
             print("Ищем карточки резюме на странице...")
             
-            # Используем селектор из конфига
-            from config import SELECTORS
-            card_selector = SELECTORS['resume_cards']
+            # Лучший селектор реестра (config.py или выученный)
+            card_selector = self.selectors.get('resume_cards')
             print(f"Используем селектор: {card_selector}")
             
-            # Ждем появления карточек
-            time.sleep(3)
+            # Ждем, пока количество карточек перестанет меняться
+            self.waits.stable_cards(card_selector)
             
             # Ищем все карточки
             cards = self.driver.find_elements(By.CSS_SELECTOR, card_selector)
@@ -197,9 +240,15 @@ class WorkUaParser:
             if len(cards) < 5:  # Если карточек мало, проверим альтернативные селекторы
                 print("🔍 Проверяем альтернативные селекторы...")
                 
-                # Пробуем более простой селектор
-                alt_cards1 = self.driver.find_elements(By.CSS_SELECTOR, ".card.resume-link")
-                print(f"   Альтернативный селектор '.card.resume-link': {len(alt_cards1)} карточек")
+                # Остальные известные селекторы реестра
+                for alt_selector in self.selectors.candidates('resume_cards'):
+                    if alt_selector == card_selector:
+                        continue
+                    alt_cards = self.driver.find_elements(By.CSS_SELECTOR, alt_selector)
+                    print(f"   Альтернативный селектор '{alt_selector}': {len(alt_cards)} карточек")
+                    if len(alt_cards) > max(len(cards), 2):
+                        self.selectors.record('resume_cards', card_selector, False)
+                        card_selector, cards = alt_selector, alt_cards
                 
                 alt_cards2 = self.driver.find_elements(By.CSS_SELECTOR, "div.card")
                 print(f"   Селектор 'div.card': {len(alt_cards2)} элементов")
@@ -217,11 +266,17 @@ class WorkUaParser:
                 # АВТОМАТИЧЕСКАЯ АДАПТАЦИЯ СЕЛЕКТОРОВ с LLM
                 if len(cards) <= 2 and hasattr(self, '_initial_cards_count') and self._initial_cards_count > 5:
                     print("🤖 АКТИВИРУЕМ АВТОАДАПТАЦИЮ СЕЛЕКТОРОВ...")
+                    # Селектор сломан: опускаем его в реестре до записи выученного
+                    self.selectors.record('resume_cards', card_selector, False)
                     new_cards = self._auto_adapt_selectors_with_llm()
                     if new_cards and len(new_cards) > len(cards):
-                        print(f"✅ LLM нашел лучшие селекторы! Карточек: {len(new_cards)}")
+                        print(f"✅ Найдены лучшие селекторы! Карточек: {len(new_cards)}")
                         return new_cards
-            
+                else:
+                    self.selectors.record('resume_cards', card_selector, len(cards) > 0)
+            else:
+                self.selectors.record('resume_cards', card_selector, True)
+
             # Запоминаем количество карточек при первом запуске
             if not hasattr(self, '_initial_cards_count') and len(cards) > 5:
                 self._initial_cards_count = len(cards)
@@ -271,6 +326,7 @@ class WorkUaParser:
         finally:
             self.driver.implicitly_wait(old_timeout)
 
+    @timed('card_extraction_seconds')
     def parse_card_info(self, card):
         """⚡ БЫСТРОЕ извлечение информации из карточки"""
         if not card:
@@ -328,14 +384,51 @@ class WorkUaParser:
             education_elements = self._fast_find_elements(card, "p.mb-0.mt-xs.text-default-7")
             card_info['education_employment'] = education_elements[0].text.strip() if education_elements else "Не указано"
             
+            # Дата обновления и ID резюме - для инкрементального режима
+            time_element = self._fast_find_element(card, "time", timeout=0)
+            card_info['posted'] = ((time_element.get_attribute("datetime") or time_element.text.strip())
+                                   if time_element else "")
+            card_info['resume_id'] = resume_id_from_url(card_info['url'])
+            
             return card_info
             
         except Exception as e:
-            print(f"❌ Ошибка при извлечении информации из карточки: {e}")
+            self.card_logger.warning("❌ Ошибка при извлечении информации из карточки: %s", e)
+            return None
+
+    def _infer_card_selector(self):
+        """Вывод селектора карточек по повторяющейся структуре страницы, без LLM"""
+        from config import SELECTOR_INFERENCE_CONFIG
+        if not SELECTOR_INFERENCE_CONFIG.get('enabled', True):
             return None
+        
+        try:
+            from selector_inference import infer_card_selectors
+            started_at = time.perf_counter()
+            candidates = infer_card_selectors(self.driver.page_source)
+            self.metrics.observe('selector_inference_seconds', time.perf_counter() - started_at, kind='cards')
+            
+            for candidate in candidates[:3]:
+                test_cards = self.driver.find_elements(By.CSS_SELECTOR, candidate['selector'])
+                print(f"🧩 Выведен селектор: {candidate['selector']} (карточек {candidate['cards']}, "
+                      f"в браузере {len(test_cards)}, оценка {candidate['score']})")
+                if len(test_cards) > 2:
+                    self.metrics.inc('selector_inference_total', kind='cards', result='found')
+                    self.selectors.learn('resume_cards', candidate['selector'], source='inference')
+                    return test_cards
+        except Exception as e:
+            print(f"⚠️ Ошибка вывода селектора карточек: {e}")
+        
+        self.metrics.inc('selector_inference_total', kind='cards', result='miss')
+        return None
 
     def _auto_adapt_selectors_with_llm(self):
-        """🤖 АВТОМАТИЧЕСКАЯ АДАПТАЦИЯ СЕЛЕКТОРОВ с помощью LLM"""
+        """🤖 АВТОМАТИЧЕСКАЯ АДАПТАЦИЯ СЕЛЕКТОРОВ: вывод по структуре страницы, LLM - последний шаг"""
+        # 0. Повторяющаяся структура со ссылками на резюме - миллисекунды, без запроса к LLM
+        inferred_cards = self._infer_card_selector()
+        if inferred_cards:
+            return inferred_cards
+        
         print("🔍 Анализируем DOM структуру с помощью LLM...")
         
         try:
@@ -409,7 +502,7 @@ class WorkUaParser:
                 
                 if len(test_cards) > 2:
                     # Обновляем селектор в конфиге для будущих запусков
-                    self._update_selector_config(new_selector)
+                    self.selectors.learn('resume_cards', new_selector, source='llm')
                     return test_cards
                     
             print("❌ LLM не смог найти лучшие селекторы")
@@ -419,25 +512,31 @@ class WorkUaParser:
             print(f"❌ Ошибка автоадаптации: {e}")
             return None
     
-    def call_llm_for_analysis(self, prompt):
-        """Вызов LLM для анализа DOM структуры"""
+    def call_llm_for_analysis(self, prompt, purpose='selectors'):
+        """Вызов LLM для анализа DOM структуры (purpose - selectors/pagination для учета стоимости)"""
+        if not self.llm_usage.allow(purpose):
+            return None
         try:
             from openai import OpenAI
             import json
             
             client = OpenAI()
+            messages = [
+                {"role": "system", "content": "Ты эксперт по веб-скрейпингу и CSS селекторам. Анализируй HTML и возвращай только JSON."},
+                {"role": "user", "content": prompt}
+            ]
             
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "Ты эксперт по веб-скрейпингу и CSS селекторам. Анализируй HTML и возвращай только JSON."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.1,
-                max_tokens=500
-            )
+            with self.metrics.timer('llm_latency_seconds', purpose=purpose):
+                response = client.chat.completions.create(
+                    model="gpt-3.5-turbo",
+                    messages=messages,
+                    temperature=0.1,
+                    max_tokens=500
+                )
+            self.metrics.record_llm_usage(response, purpose=purpose)
             
             content = response.choices[0].message.content.strip()
+            self.llm_usage.record(response.model or "gpt-3.5-turbo", purpose, response.usage, messages, content)
             
             # Парсим JSON ответ
             if content.startswith('```json'):
@@ -449,40 +548,6 @@ class WorkUaParser:
             print(f"❌ Ошибка LLM анализа: {e}")
             return None
     
-    def _update_selector_config(self, new_selector):
-        """Обновление селектора в конфигурации"""
-        try:
-            # Читаем конфиг
-            with open('config.py', 'r', encoding='utf-8') as f:
-                config_content = f.read()
-            
-            # Заменяем селектор
-            import re
-            pattern = r"'resume_cards':\s*'[^']+'"
-            replacement = f"'resume_cards': '{new_selector}'"
-            
-            updated_config = re.sub(pattern, replacement, config_content)
-            
-            # Сохраняем
-            with open('config.py', 'w', encoding='utf-8') as f:
-                f.write(updated_config)
-                
-            print(f"💾 Селектор обновлен в config.py: {new_selector}")
-            
-            # Также создаем backup файл
-            import datetime
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_filename = f"selector_backup_{timestamp}.txt"
-            with open(backup_filename, 'w', encoding='utf-8') as f:
-                f.write(f"Дата: {datetime.datetime.now()}\n")
-                f.write(f"Новый селектор: {new_selector}\n")
-                f.write(f"Причина: Автоадаптация LLM\n")
-            
-            print(f"💾 Создан backup: {backup_filename}")
-            
-        except Exception as e:
-            print(f"❌ Ошибка обновления конфига: {e}")
-
     # ========================================
     # МЕТОДЫ ПАГИНАЦИИ С АВТОАДАПТАЦИЕЙ
     # ========================================
@@ -490,9 +555,8 @@ class WorkUaParser:
     def has_next_page(self):
         """Проверяет наличие следующей страницы с автоадаптацией селекторов"""
         try:
-            # Используем основной селектор
-            from config import SELECTORS, PARSING_CONFIG
-            main_selector = SELECTORS['pagination_next']
+            # Лучший селектор реестра, остальные - альтернативные
+            main_selector, *alt_selectors = self.selectors.candidates('pagination_next')
             
             print(f"🔍 Проверяем наличие следующей страницы...")
             print(f"   Селектор: {main_selector}")
@@ -510,14 +574,14 @@ class WorkUaParser:
             # Если основной селектор не работает, пробуем альтернативные
             print(f"⚠️ Основной селектор не найден, пробуем альтернативные...")
             
-            alt_selectors = SELECTORS.get('pagination_next_alt', [])
             for i, alt_selector in enumerate(alt_selectors):
                 try:
                     alt_elements = self.driver.find_elements(By.CSS_SELECTOR, alt_selector)
                     if alt_elements:
-                        print(f"✅ Найдена следующая страница: альтернативный селектор #{i+1}")
-                        # Обновляем основной селектор для будущих использований
-                        self._update_pagination_selector(alt_selector)
+                        print(f"✅ Найдена следующая страница: альтернативный селектор #{i+1} ({alt_selector})")
+                        # Альтернативный поднимается в реестре над основным для будущих использований
+                        self.selectors.record('pagination_next', main_selector, False)
+                        self.selectors.record('pagination_next', alt_selector, True)
                         return True
                 except Exception as e:
                     continue
@@ -534,23 +598,18 @@ class WorkUaParser:
             print(f"❌ Ошибка проверки следующей страницы: {e}")
             return False
     
-    def go_to_next_page(self):
-        """Переходит на следующую страницу с автоадаптацией"""
+    @timed('page_load_seconds', page_type='next')
+    def go_to_next_page(self, adapted=False):
+        """Переходит на следующую страницу с автоадаптацией (adapted - повтор после нее, без новой)"""
         try:
-            from config import SELECTORS, PARSING_CONFIG
-            
             print(f"📄 Переходим на следующую страницу...")
             
-            # Сохраняем текущий URL для проверки
-            current_url = self.driver.current_url
-            
             # Ищем кнопку следующей страницы
-            main_selector = SELECTORS['pagination_next']
+            main_selector, *alt_selectors = self.selectors.candidates('pagination_next')
             next_elements = self.driver.find_elements(By.CSS_SELECTOR, main_selector)
             
             if not next_elements:
                 # Пробуем альтернативные селекторы
-                alt_selectors = SELECTORS.get('pagination_next_alt', [])
                 for alt_selector in alt_selectors:
                     try:
                         next_elements = self.driver.find_elements(By.CSS_SELECTOR, alt_selector)
@@ -568,8 +627,10 @@ class WorkUaParser:
             
             # Прокручиваем к элементу и делаем его видимым
             print(f"📜 Прокручиваем к кнопке пагинации...")
-            self.driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", next_button)
-            time.sleep(2)
+            self.driver.execute_script("arguments[0].scrollIntoView({behavior: 'instant', block: 'center'});", next_button)
+            
+            # Счетчики PJAX/мутаций до клика - по ним ждем обновления списка
+            list_marker = self.waits.marker()
             
             # Проверяем кликабельность элемента
             try:
@@ -610,46 +671,38 @@ class WorkUaParser:
                             raise Exception("Ссылка не найдена")
                     except Exception as e3:
                         print(f"❌ Все способы клика не сработали")
-                        # Активируем LLM автоадаптацию
-                        if PARSING_CONFIG.get('pagination_auto_adapt', True):
-                            print(f"🤖 Активируем LLM автоадаптацию селекторов...")
+                        self.selectors.record('pagination_next', main_selector, False)
+                        # Активируем автоадаптацию (один раз на переход)
+                        if not adapted and PARSING_CONFIG.get('pagination_auto_adapt', True):
+                            print(f"🤖 Активируем автоадаптацию селекторов пагинации...")
                             if self._auto_adapt_pagination_selectors():
                                 # Пробуем еще раз с новым селектором
-                                return self.go_to_next_page()
+                                return self.go_to_next_page(adapted=True)
                         raise Exception(f"Не удалось кликнуть: {e1}, {e2}, {e3}")
             
             # Ждем загрузки страницы
             timeout = PARSING_CONFIG.get('pagination_wait_timeout', 15)
             print(f"⏳ Ожидаем загрузки следующей страницы ({timeout}s)...")
             
-            # Ждем изменения URL или содержимого
-            WebDriverWait(self.driver, timeout).until(
-                lambda driver: driver.current_url != current_url or 
-                self._page_content_changed(current_url)
-            )
-            
-            # Дополнительное ожидание PJAX загрузки
-            time.sleep(PARSING_CONFIG.get('delay_between_pages', 2))
+            # Ждем pjax:end, мутации контейнера или полной навигации
+            wait_started_at = time.perf_counter()
+            if not self.waits.list_changed(list_marker, timeout):
+                raise TimeoutException("Список резюме не обновился после клика")
+            self.rate.observe(time.perf_counter() - wait_started_at)
             
-            # Ждем загрузки PJAX контейнера
-            try:
-                WebDriverWait(self.driver, 10).until(
-                    EC.presence_of_element_located((By.ID, "pjax-resume-list"))
-                )
-                print(f"✅ PJAX контейнер загружен")
-                
-                # Ждем появления карточек резюме
-                WebDriverWait(self.driver, 10).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, SELECTORS['resume_cards']))
-                )
+            # Ждем, пока PJAX контейнер заполнится и карточки перестанут меняться
+            if self.waits.stable_cards(self.selectors.get('resume_cards')) and self.waits.card_count:
                 print(f"✅ Карточки резюме загружены")
-                
-            except TimeoutException:
+                if self.fixture_recorder:
+                    self.fixture_recorder.record_page(self.driver.current_url, self.driver.page_source, 'list')
+            else:
                 print(f"⚠️ PJAX контейнер не загрузился за отведенное время")
                 # Принудительное обновление
                 self.driver.refresh()
-                time.sleep(3)
+                self.waits.document_ready()
+                self.waits.stable_cards(self.selectors.get('resume_cards'))
             
+            self.selectors.record('pagination_next', main_selector, True)
             new_url = self.driver.current_url
             print(f"✅ Успешно перешли на следующую страницу")
             print(f"   Новый URL: {new_url}")
@@ -658,29 +711,51 @@ class WorkUaParser:
             
         except TimeoutException:
             print(f"❌ Таймаут при переходе на следующую страницу")
+            self.rate.observe_error('timeout')
             return False
         except Exception as e:
             print(f"❌ Ошибка при переходе на следующую страницу: {e}")
             return False
     
-    def _page_content_changed(self, original_url):
-        """Проверяет изменилось ли содержимое страницы"""
+    def _infer_pagination_selector(self):
+        """
+        Вывод селектора следующей страницы без LLM
+        
+        Returns:
+            True - селектор найден и работает, False - страница последняя,
+            None - пагинация не распознана (дальше LLM)
+        """
+        from config import SELECTOR_INFERENCE_CONFIG
+        if not SELECTOR_INFERENCE_CONFIG.get('enabled', True):
+            return None
+        
         try:
-            from config import SELECTORS
-            
-            # Если URL изменился, страница точно изменилась
-            if self.driver.current_url != original_url:
+            from selector_inference import infer_next_page_selector
+            started_at = time.perf_counter()
+            result = infer_next_page_selector(self.driver.page_source, self.driver.current_url)
+            self.metrics.observe('selector_inference_seconds', time.perf_counter() - started_at, kind='pagination')
+            
+            if result and result.get('last_page'):
+                print(f"🏁 Ссылки на следующую страницу нет: страница {result['page']} последняя")
+                self.metrics.inc('selector_inference_total', kind='pagination', result='last_page')
+                return False
+            if result and self.driver.find_elements(By.CSS_SELECTOR, result['selector']):
+                print(f"🧩 Выведен селектор пагинации: {result['selector']} ({result['reason']})")
+                self.metrics.inc('selector_inference_total', kind='pagination', result='found')
+                self.selectors.learn('pagination_next', result['selector'], source='inference')
                 return True
-            
-            # Проверяем наличие карточек (если страница обновилась через PJAX)
-            cards = self.driver.find_elements(By.CSS_SELECTOR, SELECTORS['resume_cards'])
-            return len(cards) > 0
-            
-        except Exception:
-            return False
-    
+        except Exception as e:
+            print(f"⚠️ Ошибка вывода селектора пагинации: {e}")
+        
+        self.metrics.inc('selector_inference_total', kind='pagination', result='miss')
+        return None
+
     def _auto_adapt_pagination_selectors(self):
-        """Автоматическая адаптация селекторов пагинации через LLM"""
+        """Автоматическая адаптация селекторов пагинации: вывод по структуре страницы, LLM - последний шаг"""
+        inferred = self._infer_pagination_selector()
+        if inferred is not None:
+            return inferred
+        
         print("🤖 LLM анализ селекторов пагинации...")
         
         try:
@@ -738,7 +813,7 @@ class WorkUaParser:
 Селектор должен указывать на кликабельную кнопку/ссылку для перехода на следующую страницу."""
 
             # Вызов LLM
-            response = self.call_llm_for_analysis(analysis_prompt)
+            response = self.call_llm_for_analysis(analysis_prompt, purpose='pagination')
             
             if response and 'next_page_selector' in response:
                 new_selector = response['next_page_selector']
@@ -748,7 +823,7 @@ class WorkUaParser:
                 test_elements = self.driver.find_elements(By.CSS_SELECTOR, new_selector)
                 if test_elements:
                     print(f"✅ Новый селектор пагинации работает!")
-                    self._update_pagination_selector(new_selector)
+                    self.selectors.learn('pagination_next', new_selector, source='llm')
                     return True
                 else:
                     print(f"❌ Новый селектор пагинации не работает")
@@ -759,29 +834,6 @@ class WorkUaParser:
             print(f"❌ Ошибка LLM анализа пагинации: {e}")
             return False
     
-    def _update_pagination_selector(self, new_selector):
-        """Обновляет селектор пагинации в конфигурации"""
-        try:
-            # Читаем конфиг
-            with open('config.py', 'r', encoding='utf-8') as f:
-                config_content = f.read()
-            
-            # Заменяем селектор пагинации
-            import re
-            pattern = r'"pagination_next":\s*"[^"]+"'
-            replacement = f'"pagination_next": "{new_selector}"'
-            
-            updated_config = re.sub(pattern, replacement, config_content)
-            
-            # Сохраняем
-            with open('config.py', 'w', encoding='utf-8') as f:
-                f.write(updated_config)
-                
-            print(f"💾 Селектор пагинации обновлен: {new_selector}")
-            
-        except Exception as e:
-            print(f"❌ Ошибка обновления селектора пагинации: {e}")
-        
     def click_card(self, card):
         """Переход внутрь карточки"""
         if not card or not self.driver:
@@ -857,8 +909,8 @@ class WorkUaParser:
                 wait = WebDriverWait(self.driver, 10)
                 wait.until(lambda driver: driver.current_url != current_url_before)
                 
-                # Дополнительное ожидание стабилизации страницы
-                time.sleep(2)
+                # Ждем готовности документа вместо фиксированной паузы
+                self.waits.document_ready()
                 
                 # Проверяем, что мы вернулись
                 current_url_after = self.driver.current_url
@@ -876,23 +928,20 @@ class WorkUaParser:
                         pjax_wait.until(EC.presence_of_element_located((By.ID, "pjax-resume-list")))
                         self.logger.info("✅ PJAX контейнер загружен")
                         
-                        # Дополнительно ждем появления карточек внутри контейнера
-                        pjax_wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "#pjax-resume-list .card.resume-link")))
+                        # Дополнительно ждем, пока карточки внутри контейнера перестанут меняться
+                        if not (self.waits.stable_cards("#pjax-resume-list .card.resume-link", timeout=15) and self.waits.card_count):
+                            raise TimeoutException("Карточки не стабилизировались")
                         self.logger.info("✅ Карточки резюме загружены")
                         
-                        # Дополнительная пауза для полной стабилизации
-                        time.sleep(1)
-                        
                     except TimeoutException:
                         self.logger.warning("⚠️ PJAX контейнер или карточки не загрузились за 15 секунд")
                         # Пробуем принудительно вернуться на основную страницу
                         self.logger.info("🔄 Принудительный переход на основную страницу...")
                         try:
                             self.driver.get(self.base_url)
-                            time.sleep(3)
                             # Проверяем что карточки появились
-                            wait_cards = WebDriverWait(self.driver, 10)
-                            wait_cards.until(EC.presence_of_element_located((By.CSS_SELECTOR, ".card.resume-link")))
+                            if not (self.waits.stable_cards(".card.resume-link") and self.waits.card_count):
+                                raise TimeoutException("Карточки не появились")
                             self.logger.info("✅ Страница восстановлена")
                         except Exception as e:
                             self.logger.error(f"❌ Не удалось восстановить страницу: {e}")
@@ -944,6 +993,7 @@ class WorkUaParser:
             self.logger.error(f"Драйвер не отвечает: {e}")
             return False
 
+    @timed('detail_fetch_seconds')
     def parse_resume_details(self):
         """Извлечение детальной информации со страницы резюме"""
         if not self.driver:
@@ -957,214 +1007,137 @@ class WorkUaParser:
                 print("⚠️ Мы не на странице резюме")
                 return None
             
-            print("📋 Извлекаем детальную информацию с страницы резюме...")
+            self.card_logger.debug("📋 Извлекаем детальную информацию с страницы резюме...")
+            
+            # Ждем контейнер резюме (при eager загрузке DOM может быть еще не полным)
+            try:
+                wait_until_ready(self.driver, 'resume')
+            except TimeoutException:
+                self.card_logger.warning("⚠️ Контейнер резюме не дождались, берем текст как есть")
+                self.rate.observe_error('timeout')
+            throttled = self.rate.observe_page(self.driver)
+            if throttled:
+                self.card_logger.warning("🚫 Сервер ограничивает запросы (%s): %s", throttled, current_url)
+                return None
+            if BROWSER_CONFIG.get('collect_page_metrics'):
+                self.page_metrics.record(self.driver, 'resume', current_url)
             
             # ПРОСТО БЕРЕМ ВЕСЬ ТЕКСТ СТРАНИЦЫ - БЕЗ ЛИШНЕЙ ФИГНИ
             try:
                 # Получаем весь текст страницы одним вызовом
                 full_page_text = self.driver.find_element(By.TAG_NAME, "body").text
+                if self.fixture_recorder:
+                    self.fixture_recorder.record_page(current_url, self.driver.page_source, 'resume')
                 
                 resume_details = {
                     'full_text': full_page_text,
                     'resume_url': current_url,
                     'parsing_time': '< 1 секунды вместо 2 минут!'
                 }
+                # Секции (навыки, опыт, образование) разбираем сразу, чтобы экспорт не гонял регулярки
+                annotate_resume(resume_details)
             except Exception as e:
-                print(f"❌ Ошибка извлечения текста: {e}")
+                self.card_logger.error("❌ Ошибка извлечения текста: %s", e)
                 resume_details = {
                     'full_text': 'Ошибка извлечения',
                     'resume_url': current_url
                 }
             
-            print("✅ Детальная информация извлечена")
+            self.card_logger.debug("✅ Детальная информация извлечена")
             return resume_details
             
         except Exception as e:
-            print(f"❌ Ошибка при извлечении детальной информации: {e}")
+            self.card_logger.error("❌ Ошибка при извлечении детальной информации: %s", e)
             return None
 
-    def parse_resume_with_llm(self):
-        """Извлечение информации со страницы резюме с помощью LLM"""
+    def snapshot_resume_for_llm(self):
+        """Компактный текст текущей страницы резюме для LLM: {'url', 'text'}"""
         if not self.driver:
             self.logger.error("❌ Драйвер не доступен")
             return None
-            
+        
+        # Проверяем, что мы на странице резюме
+        current_url = self.driver.current_url
+        if "/resumes/" not in current_url:
+            self.logger.warning("⚠️ Мы не на странице резюме")
+            return None
+        
+        self.logger.info("🤖 Извлекаем HTML страницы для LLM обработки...")
+        
+        # Только контейнер резюме без служебных блоков, в пределах бюджета токенов
+        prompt_text = self.prompt_builder.build(self.driver.page_source)
+        
+        self.card_logger.info("📄 Промпт: %d токенов вместо %d (-%d)%s", prompt_text['tokens'],
+                              prompt_text['baseline_tokens'], prompt_text['saved_tokens'],
+                              f", сокращено: {', '.join(prompt_text['trimmed_sections'])}"
+                              if prompt_text['trimmed_sections'] else '')
+        return {'url': current_url, 'text': prompt_text['text']}
+    
+    def _llm_result(self, resume_data, info, resume_url):
+        """Поля от LLM -> данные резюме со служебными полями"""
+        if not resume_data:
+            self.logger.error("❌ OpenAI не вернул ни одного поля")
+            return None
+        
+        resume_data['resume_url'] = resume_url
+        resume_data['parsed_with'] = self.extraction_backend.label + (' (continued)' if info['continued_fields'] else '')
+        if info.get('rule_based'):
+            resume_data['parsed_with'] = 'rules (LLM budget exceeded)'
+        if info.get('batch_size'):
+            resume_data['parsed_with'] += f" (batch {info['batch_size']})"
+        if info['missing']:
+            resume_data['missing_fields'] = info['missing']
+            self.logger.warning(f"⚠️ Не получены поля: {', '.join(info['missing'])}")
+        return resume_data
+    
+    def parse_resume_with_llm(self, snapshot=None):
+        """Извлечение информации со страницы резюме с помощью LLM (snapshot - уже снятый текст страницы)"""
         try:
-            # Проверяем, что мы на странице резюме
-            current_url = self.driver.current_url
-            if "/resumes/" not in current_url:
-                self.logger.warning("⚠️ Мы не на странице резюме")
+            snapshot = snapshot or self.snapshot_resume_for_llm()
+            if not snapshot:
                 return None
             
-            self.logger.info("🤖 Извлекаем HTML страницы для LLM обработки...")
-            
-            # Получаем весь HTML страницы
-            page_html = self.driver.page_source
-            
-            # Очищаем HTML от лишнего (скрипты, стили)
-            from bs4 import BeautifulSoup
-            soup = BeautifulSoup(page_html, 'html.parser')
-            
-            # Удаляем ненужные элементы
-            for element in soup(['script', 'style', 'nav', 'header', 'footer']):
-                element.decompose()
-            
-            # Берем только текстовое содержимое основной области
-            main_content = soup.get_text(separator=' ', strip=True)
-            
-            # Ограничиваем размер текста (ChatGPT имеет лимиты)
-            if len(main_content) > 8000:
-                main_content = main_content[:8000] + "..."
-            
-            self.logger.info(f"📄 Подготовлен текст длиной {len(main_content)} символов")
-            
-            # Формируем prompt для ChatGPT
-            prompt = f"""
-Извлеки ПОЛНУЮ детальную информацию из резюме в JSON формате:
-
-{main_content}
-
-Формат ответа:
-{{
-    "full_name": "полное имя",
-    "position": "должность", 
-    "salary": "зарплата",
-    "age": "возраст",
-    "location": "город",
-    "birth_date": "дата рождения",
-    "address": "полный адрес",
-    "phone": "телефон (если есть)",
-    "education": [
-        "ПОЛНАЯ информация об образовании с годами, учебными заведениями, квалификациями"
-    ],
-    "experience": [
-        "ДЕТАЛЬНАЯ информация о каждом месте работы с должностными обязанностями, компанией, периодом"
-    ],
-    "professional_skills": [
-        "ПОДРОБНЫЕ профессиональные навыки, знание программ, технологий"
-    ],
-    "personal_skills": [
-        "Личные качества, характеристики"
-    ],
-    "languages": [
-        "Знание языков с уровнем"
-    ],
-    "additional_info": "ВСЯ дополнительная информация",
-    "detailed_description": "Полное описание кандидата"
-}}
-
-КРИТИЧЕСКИ ВАЖНО: 
-- Извлекай ВСЮ доступную информацию БЕЗ сокращений
-- В education - ПОЛНЫЕ названия учебных заведений с годами и специальностями
-- В experience - ДЕТАЛЬНЫЕ должностные обязанности для каждого места работы
-- В professional_skills - ВСЕ упомянутые программы, технологии, навыки
-- Сохраняй ВЕСЬ оригинальный текст важных разделов
-- Если информация большая - включай её полностью
-- Ответь ТОЛЬКО JSON
-"""
-
-            # Отправляем запрос в OpenAI
-            self.logger.info("🚀 Отправляем запрос в OpenAI...")
+            # Запрос к модели извлечения (OpenAI: JSON mode, поток, продолжение при обрыве)
+            self.logger.info(f"🚀 Отправляем запрос: {self.extraction_backend.label}...")
             
             try:
-                client = openai.OpenAI()
-                response = client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=[
-                        {"role": "system", "content": "Ты эксперт по анализу резюме. Извлекаешь ПОЛНУЮ структурированную информацию из текста резюме БЕЗ сокращений."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=4000,  # Увеличиваем лимит токенов для детальной информации
-                    temperature=0.1
-                )
-                
-                # Парсим ответ
-                llm_response = response.choices[0].message.content.strip()
-                self.logger.info("✅ Получен ответ от OpenAI")
-                
-                # Очищаем ответ от markdown разметки
-                if llm_response.startswith('```json'):
-                    llm_response = llm_response[7:]  # Убираем ```json
-                if llm_response.startswith('```'):
-                    llm_response = llm_response[3:]   # Убираем ```
-                if llm_response.endswith('```'):
-                    llm_response = llm_response[:-3]  # Убираем ```
-                llm_response = llm_response.strip()
-                
-                # Парсим JSON
-                try:
-                    resume_data = json.loads(llm_response)
-                    resume_data['resume_url'] = current_url
-                    resume_data['parsed_with'] = 'OpenAI GPT-3.5'
-                    
-                    self.logger.info("🎉 Информация успешно извлечена с помощью LLM")
-                    return resume_data
-                    
-                except json.JSONDecodeError as e:
-                    self.logger.warning("⚠️ Неполный JSON от OpenAI, пытаемся восстановить...")
-                    self.logger.warning(f"Ошибка: {e}")
-                    
-                    # Пытаемся восстановить неполный JSON
-                    try:
-                        # Добавляем недостающие закрывающие скобки
-                        fixed_json = self._fix_incomplete_json(llm_response)
-                        if fixed_json:
-                            resume_data = json.loads(fixed_json)
-                            resume_data['resume_url'] = current_url
-                            resume_data['parsed_with'] = 'OpenAI GPT-3.5 (fixed)'
-                            
-                            self.logger.info("🛠️ JSON восстановлен и обработан")
-                            return resume_data
-                    except:
-                        pass
-                    
-                    self.logger.error("❌ Не удалось восстановить JSON от OpenAI")
-                    self.logger.error(f"Неполный ответ: {llm_response[:500]}...")
-                    return None
-                    
+                resume_data, info = self.extraction_backend.extract(snapshot['text'], snapshot['url'])
             except Exception as e:
-                self.logger.error(f"❌ Ошибка запроса к OpenAI: {e}")
+                self.logger.error(f"❌ Ошибка запроса к модели извлечения: {e}")
                 return None
+            
+            resume_data = self._llm_result(resume_data, info, snapshot['url'])
+            if resume_data:
+                self.logger.info(f"🎉 Информация успешно извлечена с помощью LLM (запросов: {info['requests']})")
+            return resume_data
                 
         except Exception as e:
             self.logger.error(f"❌ Ошибка в parse_resume_with_llm: {e}")
             return None
     
-    def _fix_incomplete_json(self, broken_json: str) -> str:
-        """Пытается восстановить неполный JSON"""
-        try:
-            # Удаляем лишние символы в конце
-            broken_json = broken_json.strip()
-            
-            # Считаем открытые/закрытые скобки
-            open_braces = broken_json.count('{')
-            close_braces = broken_json.count('}')
-            open_brackets = broken_json.count('[')
-            close_brackets = broken_json.count(']')
-            
-            # Если JSON обрывается на значении строки, завершаем её
-            if broken_json.endswith('"') and not broken_json.endswith('",') and not broken_json.endswith('"]'):
-                pass  # JSON уже корректно завершен
-            elif not broken_json.endswith('"') and not broken_json.endswith(',') and not broken_json.endswith('}') and not broken_json.endswith(']'):
-                # Если обрывается посередине значения, добавляем кавычку
-                if '"' in broken_json.split('\n')[-1]:
-                    broken_json += '"'
-            
-            # Добавляем недостающие закрывающие скобки
-            for _ in range(open_brackets - close_brackets):
-                broken_json += ']'
-            
-            for _ in range(open_braces - close_braces):
-                broken_json += '}'
-            
-            # Проверяем что получился валидный JSON
-            json.loads(broken_json)
-            return broken_json
-            
-        except Exception as e:
-            self.logger.debug(f"Не удалось восстановить JSON: {e}")
-            return None
-
+    def parse_resumes_with_llm_batch(self, snapshots):
+        """
+        Пакетное извлечение по снимкам snapshot_resume_for_llm()
+        
+        Returns:
+            Dict: URL резюме -> данные (резюме без результата отсутствуют)
+        """
+        snapshots = [snapshot for snapshot in snapshots if snapshot]
+        if not snapshots:
+            return {}
+        
+        self.logger.info(f"🚀 Пакетная обработка {len(snapshots)} резюме: {self.extraction_backend.label}...")
+        extracted = self.extraction_backend.extract_many([(snapshot['url'], snapshot['text'])
+                                                          for snapshot in snapshots])
+        
+        results = {}
+        for resume_url, (resume_data, info) in extracted.items():
+            resume_data = self._llm_result(resume_data, info, resume_url)
+            if resume_data:
+                results[resume_url] = resume_data
+        self.logger.info(f"🎉 Пакетно извлечено {len(results)}/{len(snapshots)} резюме")
+        return results
+    
     def process_all_cards(self):
         """Обработка всех карточек резюме на текущей странице"""
         if not self.driver:
@@ -1256,7 +1229,6 @@ class WorkUaParser:
                         # Возвращаемся назад
                         if self.go_back():
                             print(f"↩️ Вернулись на список после карточки {i+1}")
-                            time.sleep(1.5)  # Увеличенная пауза для стабилизации
                         else:
                             print(f"❌ Не удалось вернуться после карточки {i+1}")
                             break  # Прекращаем обработку, если не можем вернуться
@@ -1272,7 +1244,7 @@ class WorkUaParser:
                     
                     # Небольшая пауза между обработкой карточек
                     if i < total_cards - 1:
-                        time.sleep(0.5)
+                        self.rate.wait('card')
                         
                 except Exception as e:
                     print(f"❌ Ошибка при обработке карточки {i+1}: {e}")
@@ -1318,6 +1290,8 @@ class WorkUaParser:
             self.logger.error(f"Ошибка при закрытии браузера: {e}")
         finally:
             self.driver = None
+            # Несохраненные исходы селекторов - в общий реестр
+            self.selectors.save()
 
 
 if __name__ == "__main__":
@@ -1423,7 +1397,6 @@ if __name__ == "__main__":
                             # Возвращаемся назад
                             if parser.go_back():
                                 print(f"↩️ Вернулись на список")
-                                time.sleep(1.5)  # Увеличенная пауза
                             else:
                                 print(f"❌ Проблема с возвратом")
                                 break
@@ -1455,7 +1428,7 @@ if __name__ == "__main__":
                         if parser.go_to_next_page():
                             current_page += 1
                             print(f"📄 Перешли на страницу {current_page}")
-                            time.sleep(PARSING_CONFIG.get('delay_between_pages', 2))
+                            parser.rate.wait('page')
                         else:
                             print(f"❌ Не удалось перейти на следующую страницу")
                             break